@@ -108,7 +108,10 @@ DATABASES = {
         'ENGINE': os.getenv('DATABASE_ENGINE'),
         'NAME': os.getenv('DATABASE_NAME'),
         'USER': os.getenv('DATABASE_USER'),
-        'PASSWORD': os.getenv('DATABASE_PASSWORD')
+        'PASSWORD': os.getenv('DATABASE_PASSWORD'),
+        # Testovi istovremenog rada (app/tests.py) na SQLite-u traže bazu u
+        # fajlu, jer baza u memoriji ne podržava istovremene konekcije
+        'TEST': {'NAME': os.getenv('DATABASE_TEST_NAME')},
         #'HOST': os.getenv('DATABASE_HOST', ''),
         #'PORT': os.getenv('DATABASE_PORT', ''),
     }
@@ -207,6 +210,13 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = 'onlybuns.isa@gmail.com'
 EMAIL_HOST_PASSWORD = 'uxuwqvwefovkufvq '
 DEFAULT_FROM_EMAIL = 'onlybuns.isa@gmail.com'
+# Red za slanje emaila (app/services/email_service.py): broj poruka po SMTP
+# vezi, pokušaji pre odustajanja, zakup preuzete poruke (s) i najduže
+# trajanje jednog koraka posla slanja (s)
+EMAIL_SERIJA = env.int('EMAIL_SERIJA', default=50)
+EMAIL_MAX_POKUSAJA = env.int('EMAIL_MAX_POKUSAJA', default=5)
+EMAIL_ZAKUP = env.int('EMAIL_ZAKUP', default=300)
+EMAIL_TRAJANJE_KORAKA = env.int('EMAIL_TRAJANJE_KORAKA', default=60)
 
 #JWT
 SIMPLE_JWT = {
@@ -225,6 +235,128 @@ MIKROSERVIS_URL = env('MIKROSERVIS_URL', default='http://localhost:8001')
 
 # MIKROSERVIS - Supplier Analysis Microservice Settings
 SUPPLIER_ANALYSIS_MS_URL = os.environ.get('SUPPLIER_ANALYSIS_MS_URL', 'http://localhost:8001/')
+# HTTP klijent (app/services/supplier_analysis_service.py): veličina pool-a
+# konekcija, broj ponovljenih pokušaja idempotentnih poziva, i prekidač koji
+# posle CIRCUIT_THRESHOLD uzastopnih grešaka odbija pozive CIRCUIT_RESET sekundi
+SUPPLIER_ANALYSIS_POOL_SIZE = env.int('SUPPLIER_ANALYSIS_POOL_SIZE', default=10)
+SUPPLIER_ANALYSIS_MAX_RETRIES = env.int('SUPPLIER_ANALYSIS_MAX_RETRIES', default=2)
+SUPPLIER_ANALYSIS_BACKOFF = env.float('SUPPLIER_ANALYSIS_BACKOFF', default=0.2)
+SUPPLIER_ANALYSIS_CIRCUIT_THRESHOLD = env.int('SUPPLIER_ANALYSIS_CIRCUIT_THRESHOLD', default=5)
+SUPPLIER_ANALYSIS_CIRCUIT_RESET = env.int('SUPPLIER_ANALYSIS_CIRCUIT_RESET', default=30)
+# Broj istovremenih serija pri sinhronizaciji (komanda sync_suppliers)
+SUPPLIER_SYNC_WORKERS = env.int('SUPPLIER_SYNC_WORKERS', default=4)
+# Keš PDF izveštaja mikroservisa na disku (app/services/report_cache.py)
+REPORT_CACHE_DIR = env('REPORT_CACHE_DIR', default=os.path.join(BASE_DIR, 'cache', 'izvestaji'))
+REPORT_CACHE_TTL = env.int('REPORT_CACHE_TTL', default=3600)
+REPORT_CACHE_MAX_MB = env.int('REPORT_CACHE_MAX_MB', default=200)
+
+# Keš odgovora za read endpoint-e (app/services/response_cache.py)
+# ODGOVOR_CACHE_BACKEND: 'locmem' (podrazumevano, zaseban keš po procesu),
+# 'file' ili 'redis' (deljen između worker-a; redis zahteva paket redis)
+ODGOVOR_CACHE_ALIAS = 'odgovori'
+ODGOVOR_CACHE_TIMEOUT = env.int('ODGOVOR_CACHE_TIMEOUT', default=300)
+ODGOVOR_CACHE_BACKENDI = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'odgovori',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': env('ODGOVOR_CACHE_LOCATION', default=os.path.join(BASE_DIR, 'cache', 'odgovori')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('ODGOVOR_CACHE_LOCATION', default='redis://127.0.0.1:6379/1'),
+    },
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    ODGOVOR_CACHE_ALIAS: ODGOVOR_CACHE_BACKENDI[env('ODGOVOR_CACHE_BACKEND', default='locmem')],
+}
+
+# Početno usklađivanje statusa skladišta (app/services/warehouse_status_service.py)
+# Izvršava se jednom, u pozadini, na prvom HTTP zahtevu; ZAKLJUCAVANJE je broj
+# sekundi tokom kojih ostali worker-i preskaču usklađivanje
+SKLADISTA_USKLADJIVANJE_PRI_POKRETANJU = env.bool('SKLADISTA_USKLADJIVANJE_PRI_POKRETANJU', default=True)
+SKLADISTA_USKLADJIVANJE_ZAKLJUCAVANJE = env.int('SKLADISTA_USKLADJIVANJE_ZAKLJUCAVANJE', default=300)
+
+# Čuvanje merenja temperature (app/services/telemetry_service.py, komanda compact_telemetry)
+# Broj dana po nivou: sirova merenja, zbirovi od 1 minuta i od 1 sata (0 = zauvek)
+TELEMETRIJA_CUVANJE_DANA = {
+    'sirovo': env.int('TELEMETRIJA_CUVANJE_SIROVIH_DANA', default=7),
+    'minut': env.int('TELEMETRIJA_CUVANJE_MINUTNIH_DANA', default=90),
+    'sat': env.int('TELEMETRIJA_CUVANJE_SATNIH_DANA', default=0),
+}
+# Sabija se samo do najveće šifre merenja viđene pre ovoliko sekundi, jer se
+# šifre ne potvrđuju redom (mora biti duže od najduže transakcije unosa)
+TELEMETRIJA_SABIJANJE_ODLAGANJE_S = env.int('TELEMETRIJA_SABIJANJE_ODLAGANJE_S', default=300)
+
+# Pozadinski poslovi (app/services/job_service.py, komanda run_worker)
+# RADNIK_U_PROCESU: radnik sa BROJ_NITI niti se pokreće u web procesu; za više
+# worker-a isključiti i pokrenuti zaseban proces `manage.py run_worker`.
+# ISTEK_IZVRSAVANJA: posle koliko sekundi se posao u_toku smatra zaglavljenim
+POSLOVI_RADNIK_U_PROCESU = env.bool('POSLOVI_RADNIK_U_PROCESU', default=True)
+POSLOVI_BROJ_NITI = env.int('POSLOVI_BROJ_NITI', default=2)
+POSLOVI_ISTEK_IZVRSAVANJA = env.int('POSLOVI_ISTEK_IZVRSAVANJA', default=300)
+
+# Geokodiranje adresa (app/services/geocode_service.py)
+# GEOKODER: putanja do funkcije (adresa, drzava) -> (lat, lon) | None
+# TTL_DANA važi za pronađene adrese, NEGATIVNI_TTL_SATI za nepronađene
+GEOKODER = env('GEOKODER', default='app.services.geocode_service.nominatim_geokoder')
+GEOKOD_TIMEOUT = env.int('GEOKOD_TIMEOUT', default=10)
+GEOKOD_TTL_DANA = env.int('GEOKOD_TTL_DANA', default=30)
+GEOKOD_NEGATIVNI_TTL_SATI = env.int('GEOKOD_NEGATIVNI_TTL_SATI', default=1)
+GEOKOD_LRU_VELICINA = env.int('GEOKOD_LRU_VELICINA', default=2048)
+
+# Rute između tačaka (app/services/route_service.py)
+# RUTER: putanja do funkcije (polaziste, odrediste, profil) -> ruta | None;
+# za rad bez mreže može se postaviti lokalni ruter
+RUTER = env('RUTER', default='app.services.route_service.osrm_ruter')
+RUTER_TIMEOUT = env.int('RUTER_TIMEOUT', default=10)
+RUTA_KES_TTL_DANA = env.int('RUTA_KES_TTL_DANA', default=30)
+
+# Dodela šifara novim zapisima (app/services/sifra_service.py, komanda uskladi_sifre)
+# STRATEGIJA: 'sekvenca' (identity sekvenca kolone) ili 'blok' (hi/lo preko
+# tabele brojac_sifara); prazno = 'sekvenca' na Oracle/PostgreSQL, inače 'blok'
+SIFRE_STRATEGIJA = env('SIFRE_STRATEGIJA', default='')
+SIFRE_VELICINA_BLOKA = env.int('SIFRE_VELICINA_BLOKA', default=20)
+
+# Saga transakcije (app/saga_orchestrator.py)
+# MAX_POKUSAJA: pokušaji slanja događaja u InfluxDB pre kompenzacije;
+# ISTEK: posle koliko sekundi bez promene se saga smatra zaglavljenom;
+# OPORAVAK_INTERVAL: koliko često pozadinski posao nastavlja zaglavljene sage
+SAGA_MAX_POKUSAJA = env.int('SAGA_MAX_POKUSAJA', default=5)
+SAGA_ISTEK = env.int('SAGA_ISTEK', default=300)
+SAGA_OPORAVAK_INTERVAL = env.int('SAGA_OPORAVAK_INTERVAL', default=60)
+# Notifikacije u realnom vremenu (app/services/notifikacija_service.py)
+# BROKER: klasa sa objavi/pretplati/odjavi; SSE_INTERVAL: sekunde između
+# provera baze (i ping-a) na otvorenoj SSE vezi kada nema objava
+NOTIFIKACIJE_BROKER = env('NOTIFIKACIJE_BROKER', default='app.services.notifikacija_service.LokalniBroker')
+NOTIFIKACIJE_SSE_INTERVAL = env.int('NOTIFIKACIJE_SSE_INTERVAL', default=20)
+# Notifikacije ispod kursora nastale u poslednjih PREKLAPANJE sekundi se čitaju
+# ponovo, jer šifre ne postaju vidljive redom (commit posle upisa)
+NOTIFIKACIJE_PREKLAPANJE = env.int('NOTIFIKACIJE_PREKLAPANJE', default=30)
+# Primaoci obaveštenja po ulozi se keširaju PRIMAOCI_TTL sekundi; isto
+# obaveštenje (npr. kvar istog vozila) se ne ponavlja u PROZOR_SPAJANJA sekundi
+NOTIFIKACIJE_PRIMAOCI_TTL = env.int('NOTIFIKACIJE_PRIMAOCI_TTL', default=300)
+NOTIFIKACIJE_PROZOR_SPAJANJA = env.int('NOTIFIKACIJE_PROZOR_SPAJANJA', default=300)
+
+# Uvoz faktura (saga/fakture-sa-placanjem/batch/): najviše stavki po zahtevu
+# i broj stavki jedne serije (jedna saga, jedan bulk_create, jedan zahtev ka mikroservisu)
+SAGA_MAX_STAVKI_UVOZA = env.int('SAGA_MAX_STAVKI_UVOZA', default=10000)
+SAGA_VELICINA_SERIJE = env.int('SAGA_VELICINA_SERIJE', default=500)
+
+# Pravila kršenja ugovora (app/services/krsenja_service.py): uključena pravila
+# (podrazumevano sva registrovana), trajanje keša rezultata pravila (s),
+# preklapanje vodenog žiga (s) i prag ponovljenih reklamacija (broj u periodu od dana)
+KRSENJA_PRAVILA = env.list('KRSENJA_PRAVILA', default=None)
+KRSENJA_KES_TTL = env.int('KRSENJA_KES_TTL', default=86400)
+KRSENJA_PREKLAPANJE = env.int('KRSENJA_PREKLAPANJE', default=60)
+KRSENJA_REKLAMACIJE_BROJ = env.int('KRSENJA_REKLAMACIJE_BROJ', default=3)
+KRSENJA_REKLAMACIJE_PERIOD = env.int('KRSENJA_REKLAMACIJE_PERIOD', default=90)
 
 # Logging konfiguracija za automatsku proveru artikala
 LOGGING = {
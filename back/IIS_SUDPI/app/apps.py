@@ -8,99 +8,20 @@ class AppConfig(AppConfig):
     def ready(self):
         # Importuj signale kada se aplikacija učita
         import app.signals
-        
-        # Pokreni početnu proveru svih skladišta
-        self._check_initial_skladista_status()
-    
-        self._test_signali()
 
-    def _check_initial_skladista_status(self):
-        """
-        Proveri i ažuriraj status svih skladišta prilikom pokretanja
-        """
-        try:
-            from .models import Skladiste, Temperatura
-            
-            print("=== POKRETANJE AUTOMATSKE PROVERE SKLADIŠTA ===")
-            
-            skladista = Skladiste.objects.all()
-            promenjenih = 0
-            
-            for skladiste in skladista:
-                # Dobij najnoviju temperaturu
-                najnovija_temp = Temperatura.objects.filter(
-                    skladiste=skladiste
-                ).order_by('-vreme_merenja').first()
-                
-                if najnovija_temp:
-                    # Određi novi status
-                    if najnovija_temp.vrednost > 6:
-                        novi_status = 'visok'
-                    elif najnovija_temp.vrednost > 4:
-                        novi_status = 'umeren'
-                    else:
-                        novi_status = 'nizak'
-                    
-                    # Ažuriraj ako je potrebno
-                    if skladiste.status_rizika_s != novi_status:
-                        stari_status = skladiste.status_rizika_s
-                        skladiste.status_rizika_s = novi_status
-                        skladiste.save()
-                        promenjenih += 1
-                        
-                        print(f"Ažuriran status: {skladiste.mesto_s} - {stari_status} → {novi_status} (temp: {najnovija_temp.vrednost}°C)")
-            
-            print(f"Provera završena: {promenjenih} skladišta ažurirano")
-            print("=== ZAVRŠETAK AUTOMATSKE PROVERE ===")
-            
-        except Exception as e:
-            print(f"Greška pri početnoj proveri skladišta: {e}")
-    def _test_signali(self):
-        """
-        Test funkcija za proveru da li signali rade ispravno
-        """
-        try:
-            from .models import Vozilo, Isporuka, User
-            from datetime import datetime, timedelta, date
-            from django.utils import timezone
-            
-            print("=== POKRETANJE TESTA SIGNALA - vozilo ===")
-            
-            # Kreiraj test vozilo
-            test_vozilo = Vozilo.objects.create(
-                marka='TestMarka',
-                model='TestModel',
-                status='slobodno',
-                registracija=date.today(),
-                kapacitet=1000
-            )
-            print(f"Kreirano test vozilo: {test_vozilo.marka} {test_vozilo.model} sa statusom {test_vozilo.status}")
-            
-            
-            print("=== POKRETANJE TESTA SIGNALA - isporuka ===")
-            
-            nova_isporuka = Isporuka.objects.create(
-                #sifra_i="TEST001",
-                status = 'aktivna',
-                datum_polaska = timezone.now(),
-                rok_is = timezone.now() + timedelta(days=4),
-                datum_dolaska = timezone.now() + timedelta(days=2),
-                kolicina_kg = 300,
-                vozilo=test_vozilo,
-                #datum_isporuke=datetime.now(),
-                #odrediste="Test destinacija",
-                #koordinator=koordinator
-            )
-            print(f"✅ Test 2: Kreirana test isporuka → signal aktiviran!")
+        # ready() ne sme da pristupa bazi (izvršava se u svakom worker-u,
+        # svakoj manage.py komandi i svakom pokretanju testova).
+        # Početna provera skladišta se zakazuje za prvi HTTP zahtev i
+        # izvršava jednom, u pozadini (services/warehouse_status_service.py).
+        from .services.warehouse_status_service import zakazi_uskladjivanje_pri_pokretanju
+        zakazi_uskladjivanje_pri_pokretanju()
 
-            # Promeni status vozila da izazove signal
-            #test_vozilo.status = 'u_kvaru'
-            #test_vozilo.save()
-            Vozilo.objects.filter(pk=test_vozilo.pk).update(status='u_kvaru')
-            print(f"Ažuriran status test vozila na: {test_vozilo.status}")
-            
-
-            print("=== ZAVRŠETAK TESTA SIGNALA ===")
-            
-        except Exception as e:
-            print(f"Greška pri testiranju signala: {e}")
\ No newline at end of file
+        # Izvršioci pozadinskih poslova (simulacije, oslobađanje rampi,
+        # sinhronizacija dobavljača, slanje događaja i kompenzacija saga, slanje
+        # email-ova) i radnik u procesu, koji se takođe pokreće tek na prvom HTTP zahtevu
+        import app.services.simulation_service
+        import app.services.supplier_sync_service
+        import app.services.email_service
+        import app.saga_orchestrator
+        from .services.job_service import zakazi_radnika_u_procesu
+        zakazi_radnika_u_procesu()
@@ -0,0 +1,145 @@
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from app.models import Dobavljac, Ugovor, Faktura, Transakcija, Penal
+from app.services.dashboard_service import izracunaj_dashboard_finansija
+from app.services.finance_rollup_service import obnovi_zbirove
+
+
+class _Rollback(Exception):
+    """Služi samo da poništi test podatke na kraju benchmark-a."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Meri broj upita i vreme dashboard-a finansijskog analitičara '
+        'dok raste broj dobavljača i faktura (podaci se na kraju poništavaju)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--koraci',
+            type=str,
+            default='10:100,50:1000,200:5000',
+            help='Lista koraka "dobavljaci:fakture" razdvojenih zarezom (kumulativno)',
+        )
+        parser.add_argument(
+            '--ponavljanja',
+            type=int,
+            default=3,
+            help='Broj merenja po koraku (prikazuje se najbolje vreme)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            koraci = [
+                tuple(int(deo) for deo in korak.split(':'))
+                for korak in options['koraci'].split(',')
+            ]
+        except ValueError:
+            raise CommandError('Neispravan format --koraci, očekuje se npr. "10:100,50:1000"')
+
+        rezultati = []
+        try:
+            with transaction.atomic():
+                for broj_dobavljaca, broj_faktura in koraci:
+                    self._napravi_podatke(broj_dobavljaca, broj_faktura)
+                    # bulk_create ne okida signale, pa zbirne tabele gradimo ručno
+                    obnovi_zbirove()
+                    rezultati.append(
+                        (broj_dobavljaca, broj_faktura) + self._izmeri(options['ponavljanja'])
+                    )
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write("\n=== DASHBOARD BENCHMARK ===")
+        self.stdout.write(f"{'+dobavljaci':>12} {'+fakture':>10} {'upita':>6} {'vreme (ms)':>11}")
+        for broj_dobavljaca, broj_faktura, broj_upita, trajanje in rezultati:
+            self.stdout.write(
+                f"{broj_dobavljaca:>12} {broj_faktura:>10} {broj_upita:>6} {trajanje * 1000:>11.1f}"
+            )
+
+        brojevi_upita = {rezultat[2] for rezultat in rezultati}
+        if len(brojevi_upita) != 1:
+            raise CommandError(f"Broj upita nije konstantan: {sorted(brojevi_upita)}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nBroj upita je konstantan ({brojevi_upita.pop()}) za sve veličine podataka"
+            )
+        )
+
+    def _izmeri(self, ponavljanja):
+        najbolje = None
+        broj_upita = 0
+        for _ in range(max(1, ponavljanja)):
+            with CaptureQueriesContext(connection) as upiti:
+                pocetak = time.perf_counter()
+                izracunaj_dashboard_finansija()
+                trajanje = time.perf_counter() - pocetak
+            broj_upita = len(upiti.captured_queries)
+            najbolje = trajanje if najbolje is None else min(najbolje, trajanje)
+        return broj_upita, najbolje
+
+    def _napravi_podatke(self, broj_dobavljaca, broj_faktura):
+        danas = date.today()
+        oznaka = uuid.uuid4().hex[:8]
+
+        dobavljaci = Dobavljac.objects.bulk_create([
+            Dobavljac(
+                naziv=f"Benchmark dobavljač {oznaka}-{i}",
+                email=f"bench{i}@example.com",
+                PIB_d=f"B{oznaka}{i}",
+                ime_sirovine="Sirovina",
+                cena=Decimal('100.00'),
+                rok_isporuke=7,
+                ocena=Decimal(str(5 + i % 5)),
+                datum_ocenjivanja=danas,
+                izabran=i % 2 == 0,
+            )
+            for i in range(broj_dobavljaca)
+        ])
+
+        ugovori = Ugovor.objects.bulk_create([
+            Ugovor(
+                datum_potpisa_u=danas - timedelta(days=365),
+                datum_isteka_u=danas + timedelta(days=365),
+                status_u='aktivan' if i % 3 else 'istekao',
+                uslovi_u="Benchmark",
+                dobavljac=dobavljac,
+            )
+            for i, dobavljac in enumerate(dobavljaci)
+        ])
+
+        statusi = ['primljena', 'verifikovana', 'isplacena', 'isplacena']
+        fakture = Faktura.objects.bulk_create([
+            Faktura(
+                iznos_f=Decimal(1000 + i % 500),
+                datum_prijema_f=danas - timedelta(days=i % 200),
+                rok_placanja_f=danas + timedelta(days=i % 45),
+                status_f=statusi[i % len(statusi)],
+                ugovor=ugovori[i % len(ugovori)],
+            )
+            for i in range(broj_faktura)
+        ])
+
+        Transakcija.objects.bulk_create([
+            Transakcija(
+                potvrda_t=f"BENCH-{oznaka}-{faktura.pk}",
+                status_t='uspesna',
+                faktura=faktura,
+            )
+            for faktura in fakture if faktura.status_f == 'isplacena'
+        ])
+
+        Penal.objects.bulk_create([
+            Penal(razlog_p="Benchmark", iznos_p=Decimal('50.00'), ugovor=ugovor)
+            for ugovor in ugovori[::2]
+        ])
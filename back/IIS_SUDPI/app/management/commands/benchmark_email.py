@@ -0,0 +1,181 @@
+import socketserver
+import threading
+import time
+
+from django.core import mail
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.utils import timezone
+
+from app.models import EmailPoruka, Posao
+from app.services.email_service import POSAO_SLANJE, posalji_email
+from app.services.job_service import izvrsi_posao
+
+
+def napravi_lokalni_smtp(kasnjenje_veze=0.0, kasnjenje_poruke=0.0):
+    """
+    Lokalni SMTP server umesto pravog: prihvata svaku poruku i broji poruke
+    (primljeno) i veze (veze).
+    kasnjenje_veze oponaša uspostavljanje veze (TLS, prijava), a
+    kasnjenje_poruke obradu jedne poruke na serveru (sekunde).
+    """
+
+    class Handler(socketserver.StreamRequestHandler):
+        def odgovori(self, linija):
+            self.wfile.write(f"{linija}\r\n".encode('ascii'))
+            self.wfile.flush()
+
+        def handle(self):
+            with server.lock:
+                server.veze += 1
+            time.sleep(kasnjenje_veze)
+            self.odgovori('220 localhost SMTP')
+            while True:
+                linija = self.rfile.readline()
+                if not linija:
+                    return
+                komanda = linija.decode('ascii', 'replace').strip().upper()
+                if komanda.startswith(('EHLO', 'HELO')):
+                    self.odgovori('250 localhost')
+                elif komanda.startswith('DATA'):
+                    self.odgovori('354 kraj sa <CRLF>.<CRLF>')
+                    while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                        pass
+                    time.sleep(kasnjenje_poruke)
+                    with server.lock:
+                        server.primljeno += 1
+                    self.odgovori('250 OK')
+                elif komanda.startswith('QUIT'):
+                    self.odgovori('221 Bye')
+                    return
+                else:
+                    # MAIL, RCPT, RSET, NOOP
+                    self.odgovori('250 OK')
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.primljeno = 0
+    server.veze = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Command(BaseCommand):
+    help = (
+        'Poredi slanje emaila u toku zahteva (send_mail po poruci) i red za '
+        'slanje (upis u email_poruka + pozadinsko slanje u serijama preko '
+        'jedne SMTP veze), na lokalnom SMTP serveru'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--broj',
+            type=int,
+            default=200,
+            help='Broj poruka po načinu slanja',
+        )
+        parser.add_argument(
+            '--serija',
+            type=int,
+            default=50,
+            help='Broj poruka po SMTP vezi (EMAIL_SERIJA)',
+        )
+        parser.add_argument(
+            '--kasnjenje-veze',
+            type=float,
+            default=50,
+            help='Kašnjenje uspostavljanja SMTP veze u ms (TLS i prijava kod pravog servera)',
+        )
+        parser.add_argument(
+            '--kasnjenje-poruke',
+            type=float,
+            default=2,
+            help='Kašnjenje obrade jedne poruke na SMTP serveru u ms',
+        )
+        parser.add_argument(
+            '--locmem',
+            action='store_true',
+            help='Koristi locmem email backend umesto lokalnog SMTP servera',
+        )
+
+    def handle(self, *args, **options):
+        broj, serija = options['broj'], options['serija']
+        if broj < 1 or serija < 1:
+            raise CommandError('--broj i --serija moraju biti pozitivni brojevi')
+        if EmailPoruka.objects.filter(status='na_cekanju').exists():
+            raise CommandError('U redu već ima poruka na čekanju; benchmark bi ih poslao lokalnom serveru')
+
+        server = None
+        if options['locmem']:
+            podesavanja = {'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend'}
+            mail.outbox = []
+        else:
+            server = napravi_lokalni_smtp(options['kasnjenje_veze'] / 1000, options['kasnjenje_poruke'] / 1000)
+            podesavanja = {
+                'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+                'EMAIL_HOST': '127.0.0.1',
+                'EMAIL_PORT': server.server_address[1],
+                'EMAIL_USE_TLS': False,
+                'EMAIL_USE_SSL': False,
+                'EMAIL_HOST_USER': '',
+                'EMAIL_HOST_PASSWORD': '',
+            }
+
+        pocetak_benchmarka = timezone.now()
+        sifre = []
+        try:
+            with override_settings(EMAIL_SERIJA=serija, **podesavanja):
+                # U toku zahteva: nova SMTP veza i čekanje servera za svaku poruku
+                pocetak = time.perf_counter()
+                for i in range(broj):
+                    send_mail(f"Benchmark {i}", "Sadržaj poruke", None, [f"dobavljac{i}@example.com"])
+                sinhrono = time.perf_counter() - pocetak
+
+                # Red za slanje: zahtev samo upisuje poruku
+                pocetak = time.perf_counter()
+                for i in range(broj):
+                    sifre.append(posalji_email(f"dobavljac{i}@example.com", f"Benchmark {i}", "Sadržaj poruke").sifra_em)
+                upis = time.perf_counter() - pocetak
+                slanje = self._isprazni_red()
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            neposlate = EmailPoruka.objects.filter(sifra_em__in=sifre).exclude(status='poslata').count()
+            EmailPoruka.objects.filter(sifra_em__in=sifre).delete()
+            Posao.objects.filter(tip=POSAO_SLANJE, kreirano__gte=pocetak_benchmarka).delete()
+
+        primljeno = len(mail.outbox) if server is None else server.primljeno
+        self.stdout.write(f"\n=== SLANJE EMAILA ({broj} poruka, serija {serija}) ===")
+        self.stdout.write(f"{'način':<22} {'zahtev (ms/poruka)':>19} {'ukupno (s)':>11} {'poruka/s':>9}")
+        self.stdout.write(
+            f"{'send_mail u zahtevu':<22} {sinhrono / broj * 1000:>19.2f} {sinhrono:>11.2f} {broj / sinhrono:>9.0f}"
+        )
+        self.stdout.write(
+            f"{'red za slanje':<22} {upis / broj * 1000:>19.2f} {upis + slanje:>11.2f} {broj / (upis + slanje):>9.0f}"
+        )
+        self.stdout.write(f"(pozadinsko slanje reda: {slanje:.2f} s)")
+
+        if neposlate or primljeno != 2 * broj:
+            raise CommandError(f"Neposlato iz reda: {neposlate}, server primio {primljeno} od {2 * broj}")
+        self.stdout.write(self.style.SUCCESS(
+            f"\nZahtev je {sinhrono / upis:.1f}x brži, slanje {sinhrono / slanje:.1f}x brže"
+        ))
+
+    def _isprazni_red(self):
+        """Izvršava dospele poslove slanja u ovom procesu, kao pozadinski radnik."""
+        pocetak = time.perf_counter()
+        while True:
+            posao_obj = Posao.objects.filter(
+                tip=POSAO_SLANJE, status='na_cekanju', zakazano_za__lte=timezone.now()
+            ).order_by('sifra_p').first()
+            if posao_obj is None:
+                break
+            preuzet = Posao.objects.filter(sifra_p=posao_obj.sifra_p, status='na_cekanju').update(
+                status='u_toku', zapoceto=timezone.now(), radnik='benchmark_email'
+            )
+            if preuzet:
+                izvrsi_posao(posao_obj)
+        return time.perf_counter() - pocetak
@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app.services.geocode_service import geokodiraj, ocisti_lru
+
+
+class _Rollback(Exception):
+    """Služi samo da poništi test podatke na kraju benchmark-a."""
+
+
+class LokalniGeokoder:
+    """
+    Zamena za Nominatim: vraća izmišljene koordinate posle `kasnjenje` sekundi
+    i broji pozive. Adrese koje sadrže 'nepostojeca' nisu pronađene.
+    """
+
+    def __init__(self, kasnjenje):
+        self.kasnjenje = kasnjenje
+        self.pozivi = 0
+
+    def __call__(self, adresa, drzava):
+        self.pozivi += 1
+        time.sleep(self.kasnjenje)
+        if 'nepostojeca' in adresa.lower():
+            return None
+        h = sum(ord(c) for c in adresa.lower())
+        return 42 + (h % 400) / 100, 19 + (h % 300) / 100
+
+
+class Command(BaseCommand):
+    help = (
+        'Meri geokodiranje adresa sa lokalnim geokoderom (bez mreže): prvi poziv, '
+        'pogodak u tabeli geokod_adresa i pogodak u memoriji procesa '
+        '(podaci se na kraju poništavaju)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--adrese',
+            type=int,
+            default=200,
+            help='Broj različitih adresa',
+        )
+        parser.add_argument(
+            '--kasnjenje-ms',
+            type=float,
+            default=50,
+            help='Simulirano kašnjenje geokodera po pozivu',
+        )
+
+    def handle(self, *args, **options):
+        if options['adrese'] < 1:
+            raise CommandError('--adrese mora biti pozitivan broj')
+
+        geokoder = LokalniGeokoder(options['kasnjenje_ms'] / 1000)
+        adrese = [f"Bulevar oslobođenja {i}, Novi Sad" for i in range(options['adrese'] - 1)]
+        adrese.append('Nepostojeca ulica 1')
+
+        rezultati = []
+        try:
+            with transaction.atomic():
+                ocisti_lru()
+                rezultati.append(('geokoder', *self._meri(adrese, geokoder)))
+                ocisti_lru()
+                rezultati.append(('tabela', *self._meri(adrese, geokoder)))
+                # Drugačije pisanje iste adrese pogađa isti ključ
+                rezultati.append(('memorija', *self._meri([f"  {a.upper()} " for a in adrese], geokoder)))
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            ocisti_lru()
+
+        self.stdout.write("\n=== GEOKODIRANJE BENCHMARK ===")
+        self.stdout.write(f"{'izvor':<10} {'adresa':>7} {'poziva geokodera':>17} {'ms/adresi':>10}")
+        for izvor, broj, pozivi, trajanje in rezultati:
+            self.stdout.write(f"{izvor:<10} {broj:>7} {pozivi:>17} {trajanje / broj * 1000:>10.3f}")
+
+        if rezultati[1][2] or rezultati[2][2]:
+            raise CommandError('Ponovljene adrese ne smeju pozivati geokoder')
+        self.stdout.write(self.style.SUCCESS(
+            f"\nPogodak u memoriji je {rezultati[0][3] / rezultati[2][3]:.0f}x brži od geokodera"
+        ))
+
+    def _meri(self, adrese, geokoder):
+        pre = geokoder.pozivi
+        pocetak = time.perf_counter()
+        for adresa in adrese:
+            geokodiraj(adresa, geokoder=geokoder)
+        return len(adrese), geokoder.pozivi - pre, time.perf_counter() - pocetak
@@ -0,0 +1,128 @@
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.utils import timezone
+
+from app.models import Dobavljac, EmailPoruka, Faktura, Penal, Posao, Ugovor
+from app.services.email_service import POSAO_SLANJE
+from app.services.krsenja_service import obrisi_kes, proceni
+from app.services.penal_service import obradi_krsenja, pronadji_krsenja
+from app.views import auto_create_penalty
+
+
+class Command(BaseCommand):
+    help = (
+        'Poredi kreiranje penala za istekle ugovore i neplaćene fakture jedan po '
+        'jedan (auto_create_penalty) i serijski (penal_service.obradi_krsenja), '
+        'i punu i inkrementalnu proveru pravila kršenja'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--broj',
+            type=int,
+            default=500,
+            help='Broj isteklih ugovora (svaki sa jednom neplaćenom fakturom posle roka)',
+        )
+
+    def handle(self, *args, **options):
+        broj = options['broj']
+        if broj < 1:
+            raise CommandError('--broj mora biti pozitivan broj')
+
+        oznaka = uuid.uuid4().hex[:8]
+        email = f"penali-{oznaka}@example.com"
+        danas = date.today()
+        pocetak_benchmarka = timezone.now()
+        dobavljac = Dobavljac.objects.create(
+            naziv=f"Benchmark penali {oznaka}",
+            email=email,
+            PIB_d=f"P{oznaka}",
+            ime_sirovine="Sirovina",
+            cena=Decimal('100.00'),
+            rok_isporuke=7,
+            ocena=Decimal('8'),
+            datum_ocenjivanja=danas,
+        )
+        try:
+            Ugovor.objects.bulk_create([
+                Ugovor(
+                    datum_potpisa_u=danas - timedelta(days=400),
+                    datum_isteka_u=danas - timedelta(days=1 + i % 30),
+                    status_u='aktivan',
+                    uslovi_u="Benchmark",
+                    dobavljac=dobavljac,
+                )
+                for i in range(broj)
+            ])
+            ugovori = list(Ugovor.objects.filter(dobavljac=dobavljac).values_list('sifra_u', flat=True))
+            Faktura.objects.bulk_create([
+                Faktura(
+                    iznos_f=Decimal('1000.00'),
+                    datum_prijema_f=danas - timedelta(days=60),
+                    rok_placanja_f=danas - timedelta(days=30),
+                    status_f='primljena',
+                    ugovor_id=sifra_u,
+                )
+                for sifra_u in ugovori
+            ])
+            ocekivano = 2 * broj
+
+            # Jedan po jedan: penal, ugovor i email u posebnoj transakciji za svako kršenje
+            pocetak = time.perf_counter()
+            pojedinacno_penala = sum(
+                auto_create_penalty(krsenje)[0] for krsenje in pronadji_krsenja(ugovori)
+            )
+            pojedinacno = time.perf_counter() - pocetak
+
+            Penal.objects.filter(ugovor__dobavljac=dobavljac).delete()
+            EmailPoruka.objects.filter(primalac=email).delete()
+            Ugovor.objects.filter(dobavljac=dobavljac).update(status_u='aktivan', izmenjeno_u=timezone.now())
+
+            probno = obradi_krsenja(dry_run=True, ugovori=ugovori)
+            serijski = obradi_krsenja(ugovori=ugovori)
+            poruka = EmailPoruka.objects.filter(primalac=email).count()
+            aktivnih = Ugovor.objects.filter(dobavljac=dobavljac, status_u='aktivan').count()
+
+            # Provera pravila bez keša, pa ponovo bez izmena (samo vodeni žig);
+            # bez preklapanja, jer su svi zapisi benchmarka upravo izmenjeni
+            with override_settings(KRSENJA_PREKLAPANJE=0):
+                obrisi_kes()
+                pocetak = time.perf_counter()
+                _, puna = proceni()
+                puna_ms = (time.perf_counter() - pocetak) * 1000
+                pocetak = time.perf_counter()
+                _, inkrementalna = proceni()
+                inkrementalna_ms = (time.perf_counter() - pocetak) * 1000
+        finally:
+            # Brisanje dobavljača kaskadno briše ugovore i penale
+            EmailPoruka.objects.filter(primalac=email).delete()
+            Posao.objects.filter(tip=POSAO_SLANJE, kreirano__gte=pocetak_benchmarka).delete()
+            dobavljac.delete()
+
+        self.stdout.write(f"\n=== KREIRANJE PENALA ({broj} isteklih ugovora, {broj} neplaćenih faktura) ===")
+        self.stdout.write(f"jedan po jedan: {pojedinacno * 1000:>10.1f} ms ({pojedinacno_penala} penala)")
+        self.stdout.write(f"probni rad:     {probno['trajanje_ms']['ukupno']:>10.1f} ms ({len(probno['krsenja'])} kršenja)")
+        self.stdout.write(f"serijski:       {serijski['trajanje_ms']['ukupno']:>10.1f} ms ({len(serijski['penali'])} penala)")
+        for faza in ('detekcija', 'upis', 'obavestenja'):
+            self.stdout.write(f"  {faza:<13} {serijski['trajanje_ms'][faza]:>10.1f} ms")
+        self.stdout.write(f"\nprovera pravila: puna {puna_ms:.1f} ms, inkrementalna {inkrementalna_ms:.1f} ms")
+        for kod in puna:
+            self.stdout.write(
+                f"  {kod:<24} {puna[kod]['ms']:>8.1f} ms -> {inkrementalna[kod]['ms']:>6.1f} ms "
+                f"({inkrementalna[kod]['nacin']}, provereno {inkrementalna[kod]['provereno']})"
+            )
+
+        if pojedinacno_penala != ocekivano or len(serijski['penali']) != ocekivano or poruka != ocekivano or aktivnih:
+            raise CommandError(
+                f"Penala: jedan po jedan {pojedinacno_penala}, serijski {len(serijski['penali'])}; "
+                f"poruka u redu {poruka}; aktivnih ugovora {aktivnih} "
+                f"(očekivano {ocekivano}, {ocekivano}, {ocekivano}, 0)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"\nSerijsko kreiranje je {pojedinacno * 1000 / serijski['trajanje_ms']['ukupno']:.1f}x brže"
+        ))
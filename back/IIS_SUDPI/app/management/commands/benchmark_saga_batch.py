@@ -0,0 +1,137 @@
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app.models import Dobavljac, Posao, Saga, Ugovor
+from app.saga_orchestrator import (
+    POSAO_SLANJE, SagaOrchestrator, kljuc_slanja, uvezi_fakture_sa_placanjem
+)
+from app.services.job_service import izvrsi_posao
+
+from .benchmark_sifre import napravi_lokalni_mikroservis
+
+
+class Command(BaseCommand):
+    help = (
+        'Poredi uvoz faktura sa plaćanjem pojedinačnim sagama i serijskim '
+        'sagama (bulk_create + jedan zahtev ka mikroservisu po seriji)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--broj',
+            type=int,
+            default=2000,
+            help='Broj faktura po načinu uvoza',
+        )
+        parser.add_argument(
+            '--serija',
+            type=int,
+            default=500,
+            help='Broj faktura u jednoj seriji',
+        )
+
+    def handle(self, *args, **options):
+        broj, serija = options['broj'], options['serija']
+        if broj < 1 or serija < 1:
+            raise CommandError('--broj i --serija moraju biti pozitivni brojevi')
+
+        server = napravi_lokalni_mikroservis()
+        url = f"http://127.0.0.1:{server.server_port}"
+        oznaka = uuid.uuid4().hex[:8]
+        danas = date.today()
+        dobavljac = Dobavljac.objects.create(
+            naziv=f"Benchmark uvoz {oznaka}",
+            email="bench@example.com",
+            PIB_d=f"U{oznaka}",
+            ime_sirovine="Sirovina",
+            cena=Decimal('100.00'),
+            rok_isporuke=7,
+            ocena=Decimal('8'),
+            datum_ocenjivanja=danas,
+        )
+        ugovor = Ugovor.objects.create(
+            datum_potpisa_u=danas - timedelta(days=30),
+            datum_isteka_u=danas + timedelta(days=365),
+            status_u='aktivan',
+            uslovi_u="Benchmark",
+            dobavljac=dobavljac,
+        )
+
+        def stavke(nacin):
+            return [
+                {
+                    "ugovor_id": ugovor.sifra_u,
+                    "iznos": "1000.00",
+                    "datum_prijema": danas.isoformat(),
+                    "rok_placanja": (danas + timedelta(days=30)).isoformat(),
+                    "potvrda_transakcije": f"BENCH-{nacin}-{oznaka}-{i}",
+                    "status_transakcije": "uspesna",
+                }
+                for i in range(broj)
+            ]
+
+        sage = []
+        try:
+            # Pojedinačno: jedna saga (dva INSERT-a i jedan HTTP zahtev) po fakturi
+            pocetak = time.perf_counter()
+            neuspesno_pojedinacno = 0
+            for stavka in stavke('P'):
+                uspeh, rezultat = SagaOrchestrator(mikroservis_url=url).create_faktura_with_payment(**stavka)
+                neuspesno_pojedinacno += not uspeh
+                if rezultat.get('saga_id'):
+                    sage.append(rezultat['saga_id'])
+            lokalno_pojedinacno = time.perf_counter() - pocetak
+            slanje_pojedinacno = self._posalji(sage)
+
+            # Serijski: jedna saga po seriji
+            pocetak = time.perf_counter()
+            uvoz = uvezi_fakture_sa_placanjem(stavke('S'), velicina_serije=serija, mikroservis_url=url)
+            lokalno_serijski = time.perf_counter() - pocetak
+            sage += uvoz['sage']
+            slanje_serijski = self._posalji(uvoz['sage'])
+            neuspesno_serijski = uvoz['neuspesno']
+            nezavrsene = Saga.objects.filter(sifra_sg__in=sage).exclude(status='zavrsena').count()
+        finally:
+            server.shutdown()
+            server.server_close()
+            # Brisanje dobavljača kaskadno briše ugovor, fakture i transakcije
+            Posao.objects.filter(kljuc__in=[kljuc_slanja(sifra_sg) for sifra_sg in sage]).delete()
+            Saga.objects.filter(sifra_sg__in=sage).delete()
+            dobavljac.delete()
+
+        self.stdout.write(f"\n=== UVOZ FAKTURA SA PLAĆANJEM ({broj} faktura, serija {serija}) ===")
+        self.stdout.write(f"{'način':<14} {'upis (s)':>9} {'slanje (s)':>11} {'ukupno (s)':>11} {'faktura/s':>10}")
+        for nacin, lokalno, slanje in (
+            ('pojedinačno', lokalno_pojedinacno, slanje_pojedinacno),
+            ('serijski', lokalno_serijski, slanje_serijski),
+        ):
+            ukupno = lokalno + slanje
+            self.stdout.write(f"{nacin:<14} {lokalno:>9.2f} {slanje:>11.2f} {ukupno:>11.2f} {broj / ukupno:>10.0f}")
+
+        if neuspesno_pojedinacno or neuspesno_serijski or nezavrsene:
+            raise CommandError(
+                f"Neuspešno: pojedinačno {neuspesno_pojedinacno}, serijski {neuspesno_serijski}, "
+                f"nezavršenih saga {nezavrsene}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"\nSerijski uvoz je {(lokalno_pojedinacno + slanje_pojedinacno) / (lokalno_serijski + slanje_serijski):.1f}x brži"
+        ))
+
+    def _posalji(self, sage):
+        """Šalje događaje saga iz outbox-a u ovom procesu, kao pozadinski radnik."""
+        pocetak = time.perf_counter()
+        poslovi = Posao.objects.filter(
+            tip=POSAO_SLANJE, status='na_cekanju', kljuc__in=[kljuc_slanja(sifra_sg) for sifra_sg in sage]
+        )
+        for posao_obj in poslovi:
+            preuzet = Posao.objects.filter(sifra_p=posao_obj.sifra_p, status='na_cekanju').update(
+                status='u_toku', zapoceto=timezone.now(), radnik='benchmark_saga_batch'
+            )
+            if preuzet:
+                izvrsi_posao(posao_obj)
+        return time.perf_counter() - pocetak
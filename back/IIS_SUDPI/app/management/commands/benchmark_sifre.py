@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app.models import Dobavljac, Posao, Saga, Ugovor
+from app.saga_orchestrator import PenalSagaOrchestrator, SagaOrchestrator, kljuc_slanja
+from app.services.sifra_service import strategija
+
+
+def napravi_lokalni_mikroservis():
+    """Lokalni HTTP server umesto finansijskog mikroservisa: prihvata svaki događaj (201)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            telo = json.dumps({'status': 'ok'}).encode('utf-8')
+            self.send_response(201)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(telo)))
+            self.end_headers()
+            self.wfile.write(telo)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Command(BaseCommand):
+    help = (
+        'Istovremeno pokreće veliki broj saga (faktura sa plaćanjem i penal) i '
+        'meri protok dodele šifara (duplikate proveravaju SifreSagaTest i DodelaSifaraTest u app/tests.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--broj',
+            type=int,
+            default=300,
+            help='Ukupan broj saga (naizmenično faktura i penal)',
+        )
+        parser.add_argument(
+            '--niti',
+            type=int,
+            default=16,
+            help='Broj saga koje se izvršavaju istovremeno',
+        )
+
+    def handle(self, *args, **options):
+        broj, niti = options['broj'], options['niti']
+        if broj < 1 or niti < 1:
+            raise CommandError('--broj i --niti moraju biti pozitivni brojevi')
+
+        if connection.vendor == 'sqlite':
+            # SQLite dozvoljava jednog pisca; bez BEGIN IMMEDIATE istovremene
+            # transakcije padaju sa "database is locked" umesto da čekaju red
+            connection.settings_dict['OPTIONS'].update(transaction_mode='IMMEDIATE', timeout=60)
+
+        server = napravi_lokalni_mikroservis()
+        url = f"http://127.0.0.1:{server.server_port}"
+        oznaka = uuid.uuid4().hex[:8]
+        danas = date.today()
+        dobavljac = Dobavljac.objects.create(
+            naziv=f"Benchmark šifre {oznaka}",
+            email="bench@example.com",
+            PIB_d=f"S{oznaka}",
+            ime_sirovine="Sirovina",
+            cena=Decimal('100.00'),
+            rok_isporuke=7,
+            ocena=Decimal('8'),
+            datum_ocenjivanja=danas,
+        )
+        ugovor = Ugovor.objects.create(
+            datum_potpisa_u=danas - timedelta(days=30),
+            datum_isteka_u=danas + timedelta(days=365),
+            status_u='aktivan',
+            uslovi_u="Benchmark",
+            dobavljac=dobavljac,
+        )
+
+        def saga(i):
+            try:
+                if i % 2:
+                    return PenalSagaOrchestrator(mikroservis_url=url).create_penal_with_sync(
+                        ugovor_id=ugovor.sifra_u, razlog=f"Benchmark {i}", iznos=Decimal('10.00')
+                    )
+                return SagaOrchestrator(mikroservis_url=url).create_faktura_with_payment(
+                    ugovor_id=ugovor.sifra_u,
+                    iznos=Decimal('1000.00'),
+                    datum_prijema=danas.isoformat(),
+                    rok_placanja=(danas + timedelta(days=30)).isoformat(),
+                    potvrda_transakcije=f"BENCH-{oznaka}-{i}",
+                )
+            finally:
+                connection.close()
+
+        try:
+            pocetak = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=niti) as pool:
+                rezultati = list(pool.map(saga, range(broj)))
+            trajanje = time.perf_counter() - pocetak
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        try:
+            sifre = {'faktura_id': [], 'transakcija_id': [], 'penal_id': []}
+            greske = Counter()
+            for uspeh, rezultat in rezultati:
+                if not uspeh:
+                    greske[rezultat.get('error', '')[:80]] += 1
+                    continue
+                for kljuc, lista in sifre.items():
+                    if kljuc in rezultat:
+                        lista.append(rezultat[kljuc])
+
+            self.stdout.write(f"\n=== DODELA ŠIFARA (strategija: {strategija()}) ===")
+            self.stdout.write(
+                f"Saga: {broj}, istovremeno: {niti}, trajanje: {trajanje:.2f} s "
+                f"({broj / trajanje:.0f} saga/s)"
+            )
+            for kljuc, lista in sifre.items():
+                self.stdout.write(f"{kljuc}: {len(lista)} dodeljeno")
+            for poruka, ukupno in greske.items():
+                self.stdout.write(self.style.WARNING(f"Neuspešno ({ukupno}): {poruka}"))
+        finally:
+            # Brisanje dobavljača kaskadno briše ugovor, fakture, transakcije i
+            # penale; sage i neposlati događaji se brišu posebno
+            sage = [rezultat['saga_id'] for _, rezultat in rezultati if rezultat.get('saga_id')]
+            Posao.objects.filter(kljuc__in=[kljuc_slanja(sifra_sg) for sifra_sg in sage]).delete()
+            Saga.objects.filter(sifra_sg__in=sage).delete()
+            dobavljac.delete()
+
+        if greske:
+            raise CommandError("Neke sage nisu uspele")
+        self.stdout.write(self.style.SUCCESS("\nSve sage su uspele"))
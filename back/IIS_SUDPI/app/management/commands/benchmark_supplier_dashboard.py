@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.supplier_analysis_service import (
+    AsyncSupplierAnalysisService, SupplierAnalysisService, DASHBOARD_ENDPOINTS
+)
+
+
+def napravi_lokalni_servis(kasnjenja):
+    """
+    Lokalni HTTP server umesto mikroservisa: za svaki endpoint kontrolne table
+    vraća mali JSON posle zadatog kašnjenja (sekunde).
+    """
+    putanje = {f"/api/{endpoint}": kasnjenja[sekcija] for sekcija, endpoint in DASHBOARD_ENDPOINTS.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            putanja = self.path.split('?')[0]
+            if putanja not in putanje:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            time.sleep(putanje[putanja])
+            telo = json.dumps({'path': putanja, 'items': list(range(50))}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(telo)))
+            self.end_headers()
+            self.wfile.write(telo)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Command(BaseCommand):
+    help = (
+        'Poredi sinhrono (redom) i asinhrono (paralelno) dohvatanje kontrolne '
+        'table analize dobavljača naspram lokalnog servisa sa veštačkim kašnjenjem'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ponavljanja',
+            type=int,
+            default=10,
+            help='Broj dohvatanja kontrolne table po načinu',
+        )
+        parser.add_argument(
+            '--kasnjenje-ms',
+            type=int,
+            nargs=3,
+            default=[120, 80, 60],
+            metavar=('RIZICI', 'TRENDOVI', 'TRZISTE'),
+            help='Kašnjenje lokalnog servisa po endpoint-u',
+        )
+
+    def handle(self, *args, **options):
+        ponavljanja = options['ponavljanja']
+        if ponavljanja < 1:
+            raise CommandError('--ponavljanja mora biti pozitivan broj')
+
+        kasnjenja = dict(zip(DASHBOARD_ENDPOINTS, (ms / 1000 for ms in options['kasnjenje_ms'])))
+        server = napravi_lokalni_servis(kasnjenja)
+        base_url = f"http://127.0.0.1:{server.server_port}/"
+        try:
+            sinhrono = self._sinhrono(SupplierAnalysisService(base_url), ponavljanja)
+            asinhrono = asyncio.run(self._asinhrono(AsyncSupplierAnalysisService(base_url), ponavljanja))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write("\n=== KONTROLNA TABLA ANALIZE DOBAVLJAČA ===")
+        self.stdout.write(
+            f"Kašnjenja servisa (ms): {', '.join(str(ms) for ms in options['kasnjenje_ms'])} "
+            f"(zbir {sum(options['kasnjenje_ms'])}, najduže {max(options['kasnjenje_ms'])})"
+        )
+        self.stdout.write(f"{'način':<12} {'prosek (ms)':>12} {'najbolje (ms)':>14}")
+        for nacin, vremena in (('sinhrono', sinhrono), ('asinhrono', asinhrono)):
+            self.stdout.write(
+                f"{nacin:<12} {sum(vremena) / len(vremena) * 1000:>12.1f} {min(vremena) * 1000:>14.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"\nAsinhrono dohvatanje je {sum(sinhrono) / sum(asinhrono):.1f}x brže"
+        ))
+
+    def _sinhrono(self, servis, ponavljanja):
+        vremena = []
+        for _ in range(ponavljanja):
+            pocetak = time.perf_counter()
+            rezultat = {
+                'risk_patterns': servis.get_supplier_risk_patterns(),
+                'performance_trends': servis.get_supplier_performance_trends(),
+                'market_dynamics': servis.get_material_market_dynamics(),
+            }
+            vremena.append(time.perf_counter() - pocetak)
+            self._proveri(rezultat)
+        return vremena
+
+    async def _asinhrono(self, servis, ponavljanja):
+        vremena = []
+        for _ in range(ponavljanja):
+            pocetak = time.perf_counter()
+            rezultat = await servis.get_dashboard()
+            vremena.append(time.perf_counter() - pocetak)
+            self._proveri(rezultat)
+        return vremena
+
+    def _proveri(self, rezultat):
+        neuspesno = [sekcija for sekcija, podaci in rezultat.items() if podaci is None]
+        if neuspesno:
+            raise CommandError(f"Lokalni servis nije vratio: {', '.join(neuspesno)}")
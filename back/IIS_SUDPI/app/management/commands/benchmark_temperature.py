@@ -0,0 +1,115 @@
+import io
+import json
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from app.models import Skladiste, Temperatura
+from app.services.temperature_ingest_service import citaj_ndjson, unesi_merenja
+
+
+class _Rollback(Exception):
+    """Služi samo da poništi test podatke na kraju benchmark-a."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Meri broj upisanih merenja temperature u sekundi: pojedinačni upis '
+        '(post_save signal po merenju) naspram masovnog NDJSON unosa '
+        '(podaci se na kraju poništavaju)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--merenja',
+            type=int,
+            default=5000,
+            help='Broj merenja po načinu upisa',
+        )
+        parser.add_argument(
+            '--skladista',
+            type=int,
+            default=20,
+            help='Broj skladišta kojima pripadaju merenja',
+        )
+        parser.add_argument(
+            '--velicina-serije',
+            type=int,
+            default=1000,
+            help='Broj merenja po seriji za masovni unos',
+        )
+
+    def handle(self, *args, **options):
+        broj_merenja = options['merenja']
+        if broj_merenja < 1 or options['skladista'] < 1:
+            raise CommandError('--merenja i --skladista moraju biti pozitivni brojevi')
+
+        rezultati = []
+        try:
+            with transaction.atomic():
+                skladista = Skladiste.objects.bulk_create([
+                    Skladiste(mesto_s=f"Benchmark skladište {i}")
+                    for i in range(options['skladista'])
+                ])
+                sifre = [skladiste.sifra_s for skladiste in skladista]
+                vrednosti = [
+                    (round(random.uniform(0, 9), 2), random.choice(sifre))
+                    for _ in range(broj_merenja)
+                ]
+
+                rezultati.append(('pojedinačno', *self._pojedinacno(vrednosti)))
+                rezultati.append(('masovno (NDJSON)', *self._masovno(vrednosti, options['velicina_serije'])))
+
+                self._proveri_stanje(skladista)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write("\n=== TEMPERATURE BENCHMARK ===")
+        self.stdout.write(f"{'način':<18} {'merenja':>8} {'upita':>7} {'vreme (s)':>10} {'merenja/s':>11}")
+        for nacin, upisano, broj_upita, trajanje in rezultati:
+            self.stdout.write(
+                f"{nacin:<18} {upisano:>8} {broj_upita:>7} {trajanje:>10.3f} {upisano / trajanje:>11.0f}"
+            )
+
+        ubrzanje = rezultati[0][3] / rezultati[1][3]
+        self.stdout.write(self.style.SUCCESS(f"\nMasovni unos je {ubrzanje:.1f}x brži"))
+
+    def _pojedinacno(self, vrednosti):
+        with CaptureQueriesContext(connection) as upiti:
+            pocetak = time.perf_counter()
+            for vrednost, skladiste_id in vrednosti:
+                Temperatura.objects.create(vrednost=Decimal(str(vrednost)), skladiste_id=skladiste_id)
+            trajanje = time.perf_counter() - pocetak
+        return len(vrednosti), len(upiti.captured_queries), trajanje
+
+    def _masovno(self, vrednosti, velicina_serije):
+        telo = '\n'.join(
+            json.dumps({'vrednost': vrednost, 'skladiste': skladiste_id})
+            for vrednost, skladiste_id in vrednosti
+        ).encode('utf-8')
+
+        with CaptureQueriesContext(connection) as upiti:
+            pocetak = time.perf_counter()
+            rezultat = unesi_merenja(citaj_ndjson(io.BytesIO(telo)), velicina_serije)
+            trajanje = time.perf_counter() - pocetak
+
+        if rezultat['odbijeno']:
+            raise CommandError(f"Masovni unos je odbio merenja: {rezultat['greske'][:5]}")
+        return rezultat['upisano'], len(upiti.captured_queries), trajanje
+
+    def _proveri_stanje(self, skladista):
+        """Poslednja temperatura na skladištu mora odgovarati istoriji merenja."""
+        for skladiste in Skladiste.objects.filter(sifra_s__in=[s.sifra_s for s in skladista]):
+            poslednja = Temperatura.objects.filter(skladiste=skladiste).order_by(
+                '-vreme_merenja', '-id_merenja'
+            ).values_list('vrednost', flat=True).first()
+            if poslednja != skladiste.poslednja_temperatura_s:
+                raise CommandError(
+                    f"Neusklađeno poslednje merenje za skladište {skladiste.sifra_s}: "
+                    f"{skladiste.poslednja_temperatura_s} != {poslednja}"
+                )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.finance_rollup_service import TABELE, proveri_zbirove, popravi_razlike
+
+
+class Command(BaseCommand):
+    help = 'Proverava da li se zbirne finansijske tabele slažu sa izvornim podacima'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tabela',
+            action='append',
+            choices=TABELE,
+            help='Proverava samo navedenu zbirnu tabelu (može se ponoviti)',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Ponovo izračunava korpe u kojima je pronađena razlika',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Maksimalan broj prikazanih razlika',
+        )
+
+    def handle(self, *args, **options):
+        tabele = options['tabela'] or TABELE
+        razlike = proveri_zbirove(tabele)
+
+        if not razlike:
+            self.stdout.write(self.style.SUCCESS("Zbirne tabele su konzistentne"))
+            return
+
+        for tabela, kljuc, ocekivano, trenutno in razlike[:options['limit']]:
+            self.stdout.write(
+                f"{tabela} {kljuc}: očekivano {ocekivano}, trenutno {trenutno}"
+            )
+        if len(razlike) > options['limit']:
+            self.stdout.write(f"... i još {len(razlike) - options['limit']} razlika")
+
+        if options['fix']:
+            popravljeno = popravi_razlike(razlike)
+            self.stdout.write(self.style.SUCCESS(f"\nPopravljeno {popravljeno} korpi"))
+            return
+
+        raise CommandError(f"Pronađeno {len(razlike)} razlika u zbirnim tabelama")
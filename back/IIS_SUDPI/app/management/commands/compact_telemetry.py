@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.telemetry_service import (
+    sabij_izvor, primeni_cuvanje, pregled_sabijanja, IZVORI, VELICINA_SERIJE
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Sabija sirova merenja temperature u zbirove od 1 minuta i 1 sata i '
+        'briše podatke starije od perioda čuvanja (TELEMETRIJA_CUVANJE_DANA)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Prikazuje broj merenja za sabijanje i redova za brisanje bez izmena',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=VELICINA_SERIJE,
+            help='Broj merenja po seriji (svaka serija je zasebna transakcija)',
+        )
+        parser.add_argument(
+            '--odlaganje',
+            type=int,
+            default=None,
+            help='Sabija samo merenja čija je šifra viđena pre ovoliko sekundi '
+                 '(podrazumevano TELEMETRIJA_SABIJANJE_ODLAGANJE_S)',
+        )
+        parser.add_argument(
+            '--no-retention',
+            action='store_true',
+            help='Samo sabijanje, bez brisanja starih podataka',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size mora biti pozitivan broj')
+
+        if options['dry_run']:
+            pregled = pregled_sabijanja()
+            self.stdout.write("=== ČEKA SABIJANJE ===")
+            for izvor, broj in pregled['za_sabijanje'].items():
+                self.stdout.write(f"{izvor}: {broj} merenja")
+            self.stdout.write("\n=== ZA BRISANJE ===")
+            for naziv, broj in pregled['za_brisanje'].items():
+                self.stdout.write(f"{naziv}: {broj} redova")
+            self.stdout.write(self.style.WARNING("\n[DRY RUN] Nijedna izmena nije sačuvana"))
+            return
+
+        self.stdout.write("=== SABIJANJE ===")
+        for izvor in IZVORI:
+            pocetak = time.perf_counter()
+            merenja, minutni, satni = sabij_izvor(izvor, batch_size, options['odlaganje'])
+            trajanje = time.perf_counter() - pocetak
+            self.stdout.write(
+                f"{izvor}: {merenja} merenja → {minutni} minutnih i {satni} satnih zbirova "
+                f"({trajanje * 1000:.1f} ms)"
+            )
+
+        if not options['no_retention']:
+            self.stdout.write("\n=== BRISANJE STARIH PODATAKA ===")
+            pocetak = time.perf_counter()
+            obrisano = primeni_cuvanje(velicina_serije=batch_size)
+            trajanje = time.perf_counter() - pocetak
+            for naziv, broj in obrisano.items():
+                self.stdout.write(f"{naziv}: {broj} obrisano")
+            self.stdout.write(f"Trajanje: {trajanje * 1000:.1f} ms")
+
+        self.stdout.write(self.style.SUCCESS("\nSabijanje telemetrije završeno"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from app.saga_orchestrator import oporavi_sage
+
+
+class Command(BaseCommand):
+    help = (
+        'Nastavlja zaglavljene Saga transakcije: ponavlja lokalne korake '
+        'prekinutih saga i ponovo zakazuje izgubljeno slanje događaja i kompenzaciju'
+    )
+
+    def handle(self, *args, **options):
+        nastavljeno = oporavi_sage()
+        self.stdout.write("=== OPORAVAK SAGA ===")
+        for status_sage, broj in nastavljeno.items():
+            self.stdout.write(f"{status_sage}: {broj}")
+        self.stdout.write(self.style.SUCCESS("\nOporavak završen"))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.services.finance_rollup_service import TABELE, obnovi_zbirove
+
+
+class Command(BaseCommand):
+    help = 'Ponovo gradi zbirne finansijske tabele (fakture, stavke, penali) iz izvornih podataka'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tabela',
+            action='append',
+            choices=TABELE,
+            help='Obnavlja samo navedenu zbirnu tabelu (može se ponoviti)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Broj redova po bulk insert-u',
+        )
+
+    def handle(self, *args, **options):
+        tabele = options['tabela'] or TABELE
+
+        self.stdout.write(f"Obnavljam zbirne tabele: {', '.join(tabele)}")
+        pocetak = time.perf_counter()
+        rezultat = obnovi_zbirove(tabele, batch_size=options['batch_size'])
+        trajanje = time.perf_counter() - pocetak
+
+        for tabela, broj_redova in rezultat.items():
+            self.stdout.write(f"  {tabela}: {broj_redova} redova")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\nZbirne tabele obnovljene za {trajanje:.2f}s")
+        )
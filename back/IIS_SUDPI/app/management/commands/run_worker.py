@@ -0,0 +1,64 @@
+import json
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.job_service import Radnik, metrike_poslova
+
+
+class Command(BaseCommand):
+    help = (
+        'Pokreće radnika koji izvršava pozadinske poslove iz tabele posao '
+        '(simulacije, odloženo oslobađanje rampi). Koristi se kada je '
+        'POSLOVI_RADNIK_U_PROCESU isključen.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--niti',
+            type=int,
+            default=2,
+            help='Broj niti radnika (najveći broj poslova koji se izvršavaju istovremeno)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Pauza u sekundama kada u redu nema dospelih poslova',
+        )
+        parser.add_argument(
+            '--jednom',
+            action='store_true',
+            help='Izvršava dospele poslove i završava rad kada red ostane prazan',
+        )
+        parser.add_argument(
+            '--metrike',
+            action='store_true',
+            help='Samo prikazuje stanje reda i kašnjenje izvršavanja',
+        )
+
+    def handle(self, *args, **options):
+        if options['metrike']:
+            self.stdout.write(json.dumps(metrike_poslova(), indent=2, ensure_ascii=False))
+            return
+
+        if options['niti'] < 1:
+            raise CommandError('--niti mora biti pozitivan broj')
+
+        radnik = Radnik(broj_niti=options['niti'], interval=options['interval'])
+
+        def zaustavi(*_):
+            self.stdout.write(self.style.WARNING("Zaustavljanje radnika posle tekućih poslova..."))
+            radnik.stop()
+
+        signal.signal(signal.SIGINT, zaustavi)
+        signal.signal(signal.SIGTERM, zaustavi)
+
+        self.stdout.write(f"Radnik {radnik.naziv} pokrenut ({radnik.broj_niti} niti)")
+        radnik.pokreni(jednom=options['jednom'])
+        # join sa prekidom da bi signal stigao do glavne niti
+        while any(nit.is_alive() for nit in radnik.niti):
+            for nit in radnik.niti:
+                nit.join(timeout=0.5)
+
+        self.stdout.write(self.style.SUCCESS("Radnik je završio rad"))
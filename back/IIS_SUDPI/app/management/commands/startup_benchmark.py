@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Skripta koja se izvršava u novom procesu (hladan start): meri django.setup()
+# (uvoz modula + ready() svih aplikacija), posebno ready() ove aplikacije,
+# i broji upite ka bazi izvršene tokom pokretanja.
+SKRIPTA = r"""
+import json, time
+pocetak = time.perf_counter()
+
+import django
+from django.db import connections
+import app.apps
+
+trajanje_ready = []
+originalni_ready = app.apps.AppConfig.ready
+
+def ready(self):
+    t = time.perf_counter()
+    originalni_ready(self)
+    trajanje_ready.append(time.perf_counter() - t)
+
+app.apps.AppConfig.ready = ready
+
+upiti = []
+
+def brojac(execute, sql, params, many, context):
+    upiti.append(sql)
+    return execute(sql, params, many, context)
+
+with connections['default'].execute_wrapper(brojac):
+    django.setup()
+
+ukupno = time.perf_counter() - pocetak
+print(json.dumps({
+    'ukupno': ukupno,
+    'ready': sum(trajanje_ready),
+    'upiti': len(upiti),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Meri vreme hladnog pokretanja aplikacije (uvoz modula i AppConfig.ready) '
+        'i proverava da ready() ne pristupa bazi'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ponavljanja',
+            type=int,
+            default=5,
+            help='Broj pokretanja novog procesa (prikazuje se najbolje i prosečno vreme)',
+        )
+
+    def handle(self, *args, **options):
+        env = os.environ.copy()
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'IIS_SUDPI.settings')
+
+        merenja = []
+        for _ in range(max(1, options['ponavljanja'])):
+            proces = subprocess.run(
+                [sys.executable, '-c', SKRIPTA],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if proces.returncode != 0:
+                raise CommandError(f"Pokretanje nije uspelo:\n{proces.stderr}")
+            merenja.append(json.loads(proces.stdout.strip().splitlines()[-1]))
+
+        self.stdout.write("\n=== STARTUP BENCHMARK ===")
+        self.stdout.write(f"{'#':>3} {'uvoz (ms)':>10} {'ready (ms)':>11} {'ukupno (ms)':>12} {'upita':>6}")
+        for indeks, merenje in enumerate(merenja, start=1):
+            self.stdout.write(
+                f"{indeks:>3} {(merenje['ukupno'] - merenje['ready']) * 1000:>10.1f} "
+                f"{merenje['ready'] * 1000:>11.1f} {merenje['ukupno'] * 1000:>12.1f} {merenje['upiti']:>6}"
+            )
+
+        ukupno = [merenje['ukupno'] for merenje in merenja]
+        ready = [merenje['ready'] for merenje in merenja]
+        self.stdout.write(
+            f"\nNajbolje: {min(ukupno) * 1000:.1f} ms (ready: {min(ready) * 1000:.1f} ms), "
+            f"prosek: {sum(ukupno) / len(ukupno) * 1000:.1f} ms"
+        )
+
+        upiti = max(merenje['upiti'] for merenje in merenja)
+        if upiti:
+            raise CommandError(f"Pokretanje aplikacije izvršava upite ka bazi ({upiti})")
+
+        self.stdout.write(self.style.SUCCESS("Pokretanje aplikacije ne pristupa bazi"))
@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.supplier_sync_service import ENTITIES, CHUNK_SIZE, sync
+
+
+class Command(BaseCommand):
+    help = (
+        'Šalje mikroservisu za analizu dobavljača nove i izmenjene dobavljače, '
+        'reklamacije i sertifikate (u serijama, paralelno)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entitet',
+            action='append',
+            choices=list(ENTITIES),
+            help='Sinhronizuje samo dati entitet (može se navesti više puta)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Šalje sve zapise, ne samo izmenjene od poslednje sinhronizacije',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Prikazuje broj zapisa za slanje bez slanja',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Broj zapisa po seriji',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Broj serija koje se šalju istovremeno (podrazumevano SUPPLIER_SYNC_WORKERS)',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or (options['workers'] is not None and options['workers'] < 1):
+            raise CommandError('--batch-size i --workers moraju biti pozitivni brojevi')
+
+        def prikazi_napredak(stanje):
+            for entitet, brojaci in stanje['entities'].items():
+                if brojaci['changed']:
+                    self.stdout.write(
+                        f"  {entitet}: {brojaci['sent'] + brojaci['failed']}/{brojaci['changed']}",
+                        ending='\r'
+                    )
+
+        pocetak = time.perf_counter()
+        try:
+            stanje = sync(
+                entities=options['entitet'],
+                full=options['full'],
+                chunk_size=options['batch_size'],
+                workers=options['workers'],
+                dry_run=options['dry_run'],
+                progress=prikazi_napredak,
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        trajanje = time.perf_counter() - pocetak
+
+        self.stdout.write("\n=== SINHRONIZACIJA DOBAVLJAČA ===")
+        for entitet, brojaci in stanje['entities'].items():
+            linija = f"{entitet}: ukupno {brojaci['total']}, izmenjeno {brojaci['changed']}"
+            if 'sent' in brojaci:
+                linija += f", poslato {brojaci['sent']}, neuspešno {brojaci['failed']}"
+            self.stdout.write(linija)
+        self.stdout.write(f"Trajanje: {trajanje:.2f} s")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("\n[DRY RUN] Ništa nije poslato"))
+        elif stanje['status'] == 'completed':
+            self.stdout.write(self.style.SUCCESS("\nSinhronizacija završena"))
+        else:
+            self.stdout.write(self.style.WARNING(f"\nSinhronizacija završena sa greškama ({stanje['status']})"))
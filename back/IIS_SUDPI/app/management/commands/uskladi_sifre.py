@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from app.services.sifra_service import MODELI, strategija, uskladi
+
+
+class Command(BaseCommand):
+    help = (
+        'Pomera sekvence (ili brojače blokova) šifara iznad najveće postojeće '
+        'šifre; pokrenuti posle uvoza podataka sa eksplicitnim šiframa'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"=== USKLAĐIVANJE ŠIFARA (strategija: {strategija()}) ===")
+        for model in MODELI:
+            najveca = uskladi(model)
+            self.stdout.write(f"{model._meta.db_table}: najveća postojeća šifra {najveca}")
+        self.stdout.write(self.style.SUCCESS("\nŠifre su usklađene"))
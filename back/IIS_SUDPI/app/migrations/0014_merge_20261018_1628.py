@@ -0,0 +1,14 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_temperatura_vozilo_alter_temperatura_skladiste'),
+        ('app', '0013_rename_sifra_i_izvestaj_sifra_iz_voznja'),
+    ]
+
+    operations = [
+    ]
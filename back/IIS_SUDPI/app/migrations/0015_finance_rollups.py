@@ -0,0 +1,62 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:28
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_merge_20261018_1628'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DnevniZbirFaktura',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datum', models.DateField()),
+                ('status_f', models.CharField(choices=[('primljena', 'Primljena'), ('verifikovana', 'Verifikovana'), ('isplacena', 'Isplaćena'), ('odbijena', 'Odbijena')], max_length=20)),
+                ('broj_faktura', models.IntegerField(default=0)),
+                ('ukupan_iznos', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('broj_placanja', models.IntegerField(default=0)),
+                ('ukupno_dana_placanja', models.IntegerField(default=0)),
+                ('dobavljac', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zbirovi_faktura', to='app.dobavljac')),
+            ],
+            options={
+                'db_table': 'zbir_faktura_dnevno',
+                'unique_together': {('datum', 'dobavljac', 'status_f')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DnevniZbirPenala',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datum', models.DateField()),
+                ('broj_penala', models.IntegerField(default=0)),
+                ('ukupan_iznos', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('ugovor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zbirovi_penala', to='app.ugovor')),
+            ],
+            options={
+                'db_table': 'zbir_penala_dnevno',
+                'unique_together': {('datum', 'ugovor')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DnevniZbirStavki',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datum', models.DateField()),
+                ('status_f', models.CharField(choices=[('primljena', 'Primljena'), ('verifikovana', 'Verifikovana'), ('isplacena', 'Isplaćena'), ('odbijena', 'Odbijena')], max_length=20)),
+                ('broj_stavki', models.IntegerField(default=0)),
+                ('ukupna_kolicina', models.IntegerField(default=0)),
+                ('ukupan_trosak', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('proizvod', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zbirovi_stavki', to='app.proizvod')),
+            ],
+            options={
+                'db_table': 'zbir_stavki_dnevno',
+                'unique_together': {('datum', 'proizvod', 'status_f')},
+            },
+        ),
+    ]
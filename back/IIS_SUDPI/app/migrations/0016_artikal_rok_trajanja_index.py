@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_finance_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='artikal',
+            name='rok_trajanja_a',
+            field=models.DateField(db_index=True),
+        ),
+    ]
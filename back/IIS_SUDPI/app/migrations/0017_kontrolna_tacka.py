@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_artikal_rok_trajanja_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KontrolnaTacka',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('naziv', models.CharField(max_length=100, unique=True)),
+                ('stanje', models.JSONField(blank=True, default=dict)),
+                ('azurirano', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'kontrolna_tacka',
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:38
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def popuni_poslednja_merenja(apps, schema_editor):
+    Skladiste = apps.get_model('app', 'Skladiste')
+    Temperatura = apps.get_model('app', 'Temperatura')
+
+    def poslednje(polje):
+        return Subquery(
+            Temperatura.objects.filter(skladiste=OuterRef('pk')).order_by(
+                '-vreme_merenja', '-id_merenja'
+            ).values(polje)[:1]
+        )
+
+    Skladiste.objects.update(
+        poslednja_temperatura_s=poslednje('vrednost'),
+        vreme_poslednjeg_merenja_s=poslednje('vreme_merenja'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_kontrolna_tacka'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skladiste',
+            name='poslednja_temperatura_s',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='skladiste',
+            name='vreme_poslednjeg_merenja_s',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='temperatura',
+            index=models.Index(fields=['skladiste', 'vreme_merenja'], name='temperatura_skl_vreme_idx'),
+        ),
+        migrations.RunPython(popuni_poslednja_merenja, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_skladiste_poslednje_merenje'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='temperatura',
+            name='vreme_merenja',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
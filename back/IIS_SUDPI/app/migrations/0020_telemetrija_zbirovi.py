@@ -0,0 +1,111 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:42
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_temperatura_vreme_merenja_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZbirTemperatureMinut',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('izvor', models.CharField(choices=[('temperatura', 'Merenje skladišta ili vozila'), ('isporuka', 'Merenje vozila tokom isporuke')], max_length=20)),
+                ('pocetak', models.DateTimeField()),
+                ('broj_merenja', models.IntegerField(default=0)),
+                ('minimum', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('maksimum', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('zbir', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+            ],
+            options={
+                'db_table': 'zbir_temperature_minut',
+            },
+        ),
+        migrations.CreateModel(
+            name='ZbirTemperatureSat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('izvor', models.CharField(choices=[('temperatura', 'Merenje skladišta ili vozila'), ('isporuka', 'Merenje vozila tokom isporuke')], max_length=20)),
+                ('pocetak', models.DateTimeField()),
+                ('broj_merenja', models.IntegerField(default=0)),
+                ('minimum', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('maksimum', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('zbir', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+            ],
+            options={
+                'db_table': 'zbir_temperature_sat',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='voziloomogucavatemperatura',
+            index=models.Index(fields=['isporuka', 'vreme'], name='temperatura_vozilo_vreme_idx'),
+        ),
+        migrations.AddField(
+            model_name='zbirtemperatureminut',
+            name='isporuka',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.isporuka'),
+        ),
+        migrations.AddField(
+            model_name='zbirtemperatureminut',
+            name='skladiste',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.skladiste'),
+        ),
+        migrations.AddField(
+            model_name='zbirtemperatureminut',
+            name='vozilo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.vozilo'),
+        ),
+        migrations.AddField(
+            model_name='zbirtemperaturesat',
+            name='isporuka',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.isporuka'),
+        ),
+        migrations.AddField(
+            model_name='zbirtemperaturesat',
+            name='skladiste',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.skladiste'),
+        ),
+        migrations.AddField(
+            model_name='zbirtemperaturesat',
+            name='vozilo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.vozilo'),
+        ),
+        migrations.AddIndex(
+            model_name='zbirtemperatureminut',
+            index=models.Index(fields=['skladiste', 'pocetak'], name='zbir_temp_min_skl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zbirtemperatureminut',
+            index=models.Index(fields=['vozilo', 'pocetak'], name='zbir_temp_min_voz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zbirtemperatureminut',
+            index=models.Index(fields=['isporuka', 'pocetak'], name='zbir_temp_min_isp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zbirtemperatureminut',
+            index=models.Index(fields=['izvor', 'pocetak'], name='zbir_temp_min_izvor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zbirtemperaturesat',
+            index=models.Index(fields=['skladiste', 'pocetak'], name='zbir_temp_sat_skl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zbirtemperaturesat',
+            index=models.Index(fields=['vozilo', 'pocetak'], name='zbir_temp_sat_voz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zbirtemperaturesat',
+            index=models.Index(fields=['isporuka', 'pocetak'], name='zbir_temp_sat_isp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zbirtemperaturesat',
+            index=models.Index(fields=['izvor', 'pocetak'], name='zbir_temp_sat_izvor_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_telemetrija_zbirovi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Posao',
+            fields=[
+                ('sifra_p', models.AutoField(primary_key=True, serialize=False)),
+                ('tip', models.CharField(max_length=100)),
+                ('kljuc', models.CharField(blank=True, db_index=True, default='', max_length=200)),
+                ('parametri', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('na_cekanju', 'Na čekanju'), ('u_toku', 'U toku'), ('zavrsen', 'Završen'), ('neuspesan', 'Neuspešan'), ('otkazan', 'Otkazan')], default='na_cekanju', max_length=20)),
+                ('zakazano_za', models.DateTimeField(default=django.utils.timezone.now)),
+                ('kreirano', models.DateTimeField(auto_now_add=True)),
+                ('zapoceto', models.DateTimeField(blank=True, null=True)),
+                ('zavrseno', models.DateTimeField(blank=True, null=True)),
+                ('broj_pokusaja', models.IntegerField(default=0)),
+                ('max_pokusaja', models.IntegerField(default=3)),
+                ('broj_izvrsavanja', models.IntegerField(default=0)),
+                ('radnik', models.CharField(blank=True, default='', max_length=100)),
+                ('greska', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'posao',
+                'indexes': [models.Index(fields=['status', 'zakazano_za'], name='posao_status_zakazano_idx')],
+            },
+        ),
+    ]
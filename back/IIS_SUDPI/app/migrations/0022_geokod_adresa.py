@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_posao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeokodAdresa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('adresa', models.CharField(max_length=255)),
+                ('drzava', models.CharField(default='rs', max_length=10)),
+                ('lat', models.FloatField(blank=True, null=True)),
+                ('lon', models.FloatField(blank=True, null=True)),
+                ('azurirano', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'geokod_adresa',
+                'constraints': [models.UniqueConstraint(fields=('adresa', 'drzava'), name='geokod_adresa_drzava_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_geokod_adresa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RutaGeometrija',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kljuc', models.CharField(max_length=100, unique=True)),
+                ('profil', models.CharField(default='driving', max_length=20)),
+                ('duzina_m', models.FloatField()),
+                ('trajanje_s', models.FloatField()),
+                ('polilinija', models.TextField()),
+                ('azurirano', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'ruta_geometrija',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_ruta_geometrija'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SinhronizacijaOtisak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entitet', models.CharField(max_length=30)),
+                ('objekat_id', models.IntegerField()),
+                ('otisak', models.CharField(max_length=40)),
+                ('sinhronizovano', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'sinhronizacija_otisak',
+                'constraints': [models.UniqueConstraint(fields=('entitet', 'objekat_id'), name='sinhronizacija_otisak_uniq')],
+            },
+        ),
+    ]
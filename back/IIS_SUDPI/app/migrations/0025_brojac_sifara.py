@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_sinhronizacija_otisak'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BrojacSifara',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabela', models.CharField(max_length=100, unique=True)),
+                ('poslednja', models.BigIntegerField(default=0)),
+                ('azurirano', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'brojac_sifara',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0025_brojac_sifara'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Saga',
+            fields=[
+                ('sifra_sg', models.AutoField(primary_key=True, serialize=False)),
+                ('tip', models.CharField(max_length=30)),
+                ('kljuc_idempotencije', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('status', models.CharField(choices=[('pokrenuta', 'Pokrenuta'), ('ceka_dogadjaj', 'Čeka slanje događaja'), ('zavrsena', 'Završena'), ('kompenzacija', 'Kompenzacija u toku'), ('kompenzovana', 'Kompenzovana'), ('neuspesna', 'Neuspešna')], default='pokrenuta', max_length=20)),
+                ('korak', models.CharField(blank=True, default='', max_length=50)),
+                ('parametri', models.JSONField(blank=True, default=dict)),
+                ('rezultat', models.JSONField(blank=True, default=dict)),
+                ('dogadjaj', models.JSONField(blank=True, default=dict)),
+                ('log', models.JSONField(blank=True, default=list)),
+                ('mikroservis_url', models.CharField(max_length=200)),
+                ('broj_pokusaja', models.IntegerField(default=0)),
+                ('greska', models.TextField(blank=True, default='')),
+                ('kreirano', models.DateTimeField(auto_now_add=True)),
+                ('azurirano', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'saga',
+                'indexes': [models.Index(fields=['status', 'azurirano'], name='saga_status_azurirano_idx')],
+            },
+        ),
+    ]
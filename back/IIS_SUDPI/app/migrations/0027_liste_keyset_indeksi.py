@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0026_saga'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='faktura',
+            index=models.Index(fields=['-datum_prijema_f', '-sifra_f'], name='faktura_datum_sifra_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faktura',
+            index=models.Index(fields=['status_f', '-datum_prijema_f', '-sifra_f'], name='faktura_status_datum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faktura',
+            index=models.Index(fields=['ugovor', '-datum_prijema_f', '-sifra_f'], name='faktura_ugovor_datum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='penal',
+            index=models.Index(fields=['-datum_p', '-sifra_p'], name='penal_datum_sifra_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='penal',
+            index=models.Index(fields=['ugovor', '-datum_p', '-sifra_p'], name='penal_ugovor_datum_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0027_liste_keyset_indeksi'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notifikacija',
+            index=models.Index(fields=['korisnik', 'sifra_n'], name='notifikacija_korisnik_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notifikacija',
+            index=models.Index(fields=['korisnik', 'procitana_n'], name='notifikacija_procitana_idx'),
+        ),
+    ]
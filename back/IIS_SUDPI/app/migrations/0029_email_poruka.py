@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0028_notifikacija_indeksi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPoruka',
+            fields=[
+                ('sifra_em', models.AutoField(primary_key=True, serialize=False)),
+                ('primalac', models.CharField(max_length=254)),
+                ('posiljalac', models.CharField(max_length=254)),
+                ('naslov', models.CharField(max_length=255)),
+                ('sadrzaj', models.TextField()),
+                ('status', models.CharField(choices=[('na_cekanju', 'Na čekanju'), ('poslata', 'Poslata'), ('neuspesna', 'Neuspešna')], default='na_cekanju', max_length=20)),
+                ('broj_pokusaja', models.IntegerField(default=0)),
+                ('sledeci_pokusaj', models.DateTimeField(default=django.utils.timezone.now)),
+                ('greska', models.TextField(blank=True, default='')),
+                ('kreirano', models.DateTimeField(auto_now_add=True)),
+                ('poslato', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'email_poruka',
+                'indexes': [models.Index(fields=['status', 'sledeci_pokusaj'], name='email_status_pokusaj_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0029_email_poruka'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KrsenjeUgovora',
+            fields=[
+                ('sifra_ku', models.AutoField(primary_key=True, serialize=False)),
+                ('pravilo', models.CharField(max_length=50)),
+                ('predmet', models.CharField(max_length=100)),
+                ('datum', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'krsenje_ugovora',
+            },
+        ),
+        migrations.AddField(
+            model_name='faktura',
+            name='izmenjeno_f',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='reklamacija',
+            name='izmenjeno',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='sertifikat',
+            name='izmenjeno',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='ugovor',
+            name='izmenjeno_u',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='faktura',
+            index=models.Index(fields=['status_f', 'rok_placanja_f'], name='faktura_status_rok_idx'),
+        ),
+        migrations.AddField(
+            model_name='krsenjeugovora',
+            name='penal',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='krsenja', to='app.penal'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='krsenjeugovora',
+            unique_together={('pravilo', 'predmet')},
+        ),
+    ]
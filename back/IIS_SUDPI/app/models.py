@@ -105,6 +105,11 @@ class Skladiste(models.Model):
     sifra_s = models.AutoField(primary_key=True)
     mesto_s = models.CharField(max_length=200)
     status_rizika_s = models.CharField(max_length=20, choices=RIZIK_CHOICES, default='nizak')
+
+    # Poslednje merenje temperature - održava se pri upisu temperature
+    # (services/warehouse_status_service.py), pa lista skladišta ne čita istoriju merenja
+    poslednja_temperatura_s = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    vreme_poslednjeg_merenja_s = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         db_table = 'skladiste'
@@ -123,7 +128,7 @@ class Artikal(models.Model):
     sifra_a = models.AutoField(primary_key=True)
     naziv_a = models.CharField(max_length=200)
     osnovna_cena_a = models.DecimalField(max_digits=10, decimal_places=2)
-    rok_trajanja_a = models.DateField()
+    rok_trajanja_a = models.DateField(db_index=True)
     status_trajanja = models.CharField(max_length=20, choices=STATUS_TRAJANJA_CHOICES, default='aktivan')
     
     # Veza sa skladišnim operaterom (se_bavi - 0,N : 1,N)
@@ -247,6 +252,8 @@ class Ugovor(models.Model):
     datum_isteka_u = models.DateField()
     status_u = models.CharField(max_length=20, choices=STATUS_CHOICES, default='aktivan')
     uslovi_u = models.TextField()
+    # Vodeni žig za inkrementalnu proveru kršenja (services/krsenja_service.py)
+    izmenjeno_u = models.DateTimeField(auto_now=True, db_index=True)
     
     # Veza sa dobavljačem (1,1 : 0,N)
     dobavljac = models.ForeignKey(Dobavljac, on_delete=models.CASCADE, related_name='ugovori')
@@ -272,12 +279,22 @@ class Faktura(models.Model):
     rok_placanja_f = models.DateField()
     status_f = models.CharField(max_length=20, choices=STATUS_CHOICES, default='primljena')
     razlog_cekanja_f = models.TextField(blank=True, null=True)
+    izmenjeno_f = models.DateTimeField(auto_now=True, db_index=True)
     
     # Veza sa ugovorom (obuhvata - 1,1 : 0,N)
     ugovor = models.ForeignKey(Ugovor, on_delete=models.CASCADE, related_name='fakture')
     
     class Meta:
         db_table = 'faktura'
+        # Liste faktura se sortiraju po (datum_prijema_f, sifra_f) uz keyset
+        # paginaciju; indeksi pokrivaju sortiranje bez filtera, sa filterom statusa i po ugovoru
+        indexes = [
+            models.Index(fields=['-datum_prijema_f', '-sifra_f'], name='faktura_datum_sifra_idx'),
+            models.Index(fields=['status_f', '-datum_prijema_f', '-sifra_f'], name='faktura_status_datum_idx'),
+            models.Index(fields=['ugovor', '-datum_prijema_f', '-sifra_f'], name='faktura_ugovor_datum_idx'),
+            # Pravilo neplaćenih faktura posle roka (services/krsenja_service.py)
+            models.Index(fields=['status_f', 'rok_placanja_f'], name='faktura_status_rok_idx'),
+        ]
     
     def __str__(self):
         return f"Faktura {self.sifra_f} - {self.iznos_f} RSD"
@@ -316,10 +333,30 @@ class Penal(models.Model):
     
     class Meta:
         db_table = 'penal'
+        indexes = [
+            models.Index(fields=['-datum_p', '-sifra_p'], name='penal_datum_sifra_idx'),
+            models.Index(fields=['ugovor', '-datum_p', '-sifra_p'], name='penal_ugovor_datum_idx'),
+        ]
     
     def __str__(self):
         return f"Penal {self.sifra_p} - {self.iznos_p} RSD"
 
+# Kršenje za koje je dodeljen penal; sprečava ponovni penal za isto kršenje
+class KrsenjeUgovora(models.Model):
+    sifra_ku = models.AutoField(primary_key=True)
+    pravilo = models.CharField(max_length=50)
+    predmet = models.CharField(max_length=100)
+    datum = models.DateTimeField(auto_now_add=True)
+
+    penal = models.ForeignKey(Penal, on_delete=models.CASCADE, related_name='krsenja')
+
+    class Meta:
+        db_table = 'krsenje_ugovora'
+        unique_together = ('pravilo', 'predmet')
+
+    def __str__(self):
+        return f"Kršenje {self.pravilo} {self.predmet} - penal {self.penal_id}"
+
 # Model za kategoriju proizvoda
 class KategorijaProizvoda(models.Model):
     sifra_kp = models.AutoField(primary_key=True)
@@ -365,6 +402,56 @@ class StavkaFakture(models.Model):
     def __str__(self):
         return f"Stavka {self.naziv_sf} - {self.kolicina_sf} x {self.cena_po_jed}"
 
+# Zbirne (rollup) tabele za finansijske izveštaje
+# Održavaju se inkrementalno iz signala (vidi services/finance_rollup_service.py)
+class DnevniZbirFaktura(models.Model):
+    datum = models.DateField()
+    status_f = models.CharField(max_length=20, choices=Faktura.STATUS_CHOICES)
+    broj_faktura = models.IntegerField(default=0)
+    ukupan_iznos = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    # Za prosečno vreme plaćanja (samo fakture sa transakcijom)
+    broj_placanja = models.IntegerField(default=0)
+    ukupno_dana_placanja = models.IntegerField(default=0)
+
+    dobavljac = models.ForeignKey(Dobavljac, on_delete=models.CASCADE, related_name='zbirovi_faktura')
+
+    class Meta:
+        db_table = 'zbir_faktura_dnevno'
+        unique_together = ('datum', 'dobavljac', 'status_f')
+
+    def __str__(self):
+        return f"Zbir faktura {self.datum} - {self.dobavljac_id} ({self.status_f})"
+
+class DnevniZbirStavki(models.Model):
+    datum = models.DateField()
+    status_f = models.CharField(max_length=20, choices=Faktura.STATUS_CHOICES)
+    broj_stavki = models.IntegerField(default=0)
+    ukupna_kolicina = models.IntegerField(default=0)
+    ukupan_trosak = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    proizvod = models.ForeignKey(Proizvod, on_delete=models.CASCADE, related_name='zbirovi_stavki')
+
+    class Meta:
+        db_table = 'zbir_stavki_dnevno'
+        unique_together = ('datum', 'proizvod', 'status_f')
+
+    def __str__(self):
+        return f"Zbir stavki {self.datum} - {self.proizvod_id} ({self.status_f})"
+
+class DnevniZbirPenala(models.Model):
+    datum = models.DateField()
+    broj_penala = models.IntegerField(default=0)
+    ukupan_iznos = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    ugovor = models.ForeignKey(Ugovor, on_delete=models.CASCADE, related_name='zbirovi_penala')
+
+    class Meta:
+        db_table = 'zbir_penala_dnevno'
+        unique_together = ('datum', 'ugovor')
+
+    def __str__(self):
+        return f"Zbir penala {self.datum} - ugovor {self.ugovor_id}"
+
 # Model za sertifikat
 class Sertifikat(models.Model):
     TIP_CHOICES = (
@@ -381,6 +468,7 @@ class Sertifikat(models.Model):
     tip = models.CharField(max_length=20, choices=TIP_CHOICES)
     datum_izdavanja = models.DateField()
     datum_isteka = models.DateField()
+    izmenjeno = models.DateTimeField(auto_now=True, db_index=True)
     
     # Veza sa dobavljačem (sertifikuje - 1,1 : 0,N)
     dobavljac = models.ForeignKey(Dobavljac, on_delete=models.CASCADE, related_name='sertifikati')
@@ -433,6 +521,7 @@ class Reklamacija(models.Model):
         validators=[MinValueValidator(1), MaxValueValidator(10)],
         help_text="Jačina žalbe na skali 1-10"
     )
+    izmenjeno = models.DateTimeField(auto_now=True, db_index=True)
     
     # Veze
     kontrolor = models.ForeignKey(KontrolorKvaliteta, on_delete=models.CASCADE, related_name='reklamacije')
@@ -507,13 +596,17 @@ class Popust(models.Model):
 class Temperatura(models.Model):
     id_merenja = models.AutoField(primary_key=True)
     vrednost = models.DecimalField(max_digits=5, decimal_places=2, help_text="Temperatura u Celzijusima")
-    vreme_merenja = models.DateTimeField(auto_now_add=True)
+    # default umesto auto_now_add, da bi masovni unos mogao da sačuva vreme merenja sa senzora
+    vreme_merenja = models.DateTimeField(default=timezone.now)
     
     # Veza sa skladištem (beleži se u - 1,N : 1,N)
     skladiste = models.ForeignKey(Skladiste, on_delete=models.CASCADE, related_name='temperature',null=True, blank=True)
     vozilo = models.ForeignKey('Vozilo', on_delete=models.CASCADE, related_name='temperature', null=True, blank=True)
     class Meta:
         db_table = 'temperatura'
+        indexes = [
+            models.Index(fields=['skladiste', 'vreme_merenja'], name='temperatura_skl_vreme_idx'),
+        ]
     
     def __str__(self):
         string = "Temperatura {self.vrednost}°C u "
@@ -537,6 +630,12 @@ class Notifikacija(models.Model):
     class Meta:
         db_table = 'notifikacija'
         ordering = ['-datum_n']
+        indexes = [
+            # Nove notifikacije korisnika posle kursora (SSE, notifikacije/moje/)
+            models.Index(fields=['korisnik', 'sifra_n'], name='notifikacija_korisnik_idx'),
+            # Broj nepročitanih (Oracle ne podržava parcijalne indekse)
+            models.Index(fields=['korisnik', 'procitana_n'], name='notifikacija_procitana_idx'),
+        ]
     
     def __str__(self):
         return f"Notifikacija za {self.korisnik.ime_k} {self.korisnik.prz_k} - {self.datum_n.strftime('%d.%m.%Y')}"
@@ -706,6 +805,65 @@ class voziloOmogucavaTemperatura(models.Model):
             return Upozorenje(isporuka = self.isporuka, tip = 'temperatura', poruka = 'Temperatura je izvan opsega.' )
     class Meta:
         db_table = 'temperaturaVozilo'
+        indexes = [
+            models.Index(fields=['isporuka', 'vreme'], name='temperatura_vozilo_vreme_idx'),
+        ]
+
+
+# Zbirovi merenja temperature po vremenskim intervalima (services/telemetry_service.py).
+# Sirova merenja se posle perioda čuvanja brišu, a istorija ostaje u zbirovima
+# od 1 minuta i 1 sata; prosek se računa kao zbir / broj_merenja.
+class ZbirTemperatureBaza(models.Model):
+    IZVOR_CHOICES = (
+        ('temperatura', 'Merenje skladišta ili vozila'),
+        ('isporuka', 'Merenje vozila tokom isporuke'),
+    )
+
+    izvor = models.CharField(max_length=20, choices=IZVOR_CHOICES)
+    pocetak = models.DateTimeField()
+    broj_merenja = models.IntegerField(default=0)
+    minimum = models.DecimalField(max_digits=5, decimal_places=2)
+    maksimum = models.DecimalField(max_digits=5, decimal_places=2)
+    zbir = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    skladiste = models.ForeignKey(Skladiste, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    vozilo = models.ForeignKey(Vozilo, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    isporuka = models.ForeignKey(Isporuka, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    class Meta:
+        abstract = True
+
+    @property
+    def prosek(self):
+        return self.zbir / self.broj_merenja if self.broj_merenja else None
+
+
+class ZbirTemperatureMinut(ZbirTemperatureBaza):
+    class Meta:
+        db_table = 'zbir_temperature_minut'
+        indexes = [
+            models.Index(fields=['skladiste', 'pocetak'], name='zbir_temp_min_skl_idx'),
+            models.Index(fields=['vozilo', 'pocetak'], name='zbir_temp_min_voz_idx'),
+            models.Index(fields=['isporuka', 'pocetak'], name='zbir_temp_min_isp_idx'),
+            models.Index(fields=['izvor', 'pocetak'], name='zbir_temp_min_izvor_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.izvor} {self.pocetak} (1 min): {self.broj_merenja} merenja"
+
+
+class ZbirTemperatureSat(ZbirTemperatureBaza):
+    class Meta:
+        db_table = 'zbir_temperature_sat'
+        indexes = [
+            models.Index(fields=['skladiste', 'pocetak'], name='zbir_temp_sat_skl_idx'),
+            models.Index(fields=['vozilo', 'pocetak'], name='zbir_temp_sat_voz_idx'),
+            models.Index(fields=['isporuka', 'pocetak'], name='zbir_temp_sat_isp_idx'),
+            models.Index(fields=['izvor', 'pocetak'], name='zbir_temp_sat_izvor_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.izvor} {self.pocetak} (1 h): {self.broj_merenja} merenja"
 
 class Rampa(models.Model):
     sifra_rp = models.AutoField(primary_key=True)
@@ -748,4 +906,192 @@ class Voznja(models.Model):
         return f"Voznja rute {self.ruta.polazna_tacka} → {self.ruta.odrediste} ({self.trenutna_lat}, {self.trenutna_lon})"
 
     class Meta:
-        db_table = 'voznja'
\ No newline at end of file
+        db_table = 'voznja'
+# Kontrolne tačke za pozadinske poslove (nastavak prekinutog rada, vodeni žigovi)
+class KontrolnaTacka(models.Model):
+    naziv = models.CharField(max_length=100, unique=True)
+    stanje = models.JSONField(default=dict, blank=True)
+    azurirano = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'kontrolna_tacka'
+
+    def __str__(self):
+        return f"{self.naziv} ({self.azurirano})"
+
+
+# Pozadinski poslovi (services/job_service.py).
+# Posao se izvršava u radniku (komanda run_worker ili nit u procesu), može biti
+# zakazan za kasnije, otkazan, i ponovo pokrenut posle pada radnika.
+class Posao(models.Model):
+    STATUS_CHOICES = (
+        ('na_cekanju', 'Na čekanju'),
+        ('u_toku', 'U toku'),
+        ('zavrsen', 'Završen'),
+        ('neuspesan', 'Neuspešan'),
+        ('otkazan', 'Otkazan'),
+    )
+
+    sifra_p = models.AutoField(primary_key=True)
+    tip = models.CharField(max_length=100)
+    kljuc = models.CharField(max_length=200, blank=True, default='', db_index=True)
+    parametri = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='na_cekanju')
+    zakazano_za = models.DateTimeField(default=timezone.now)
+    kreirano = models.DateTimeField(auto_now_add=True)
+    zapoceto = models.DateTimeField(null=True, blank=True)
+    zavrseno = models.DateTimeField(null=True, blank=True)
+    broj_pokusaja = models.IntegerField(default=0)
+    max_pokusaja = models.IntegerField(default=3)
+    broj_izvrsavanja = models.IntegerField(default=0)
+    radnik = models.CharField(max_length=100, blank=True, default='')
+    greska = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'posao'
+        indexes = [
+            models.Index(fields=['status', 'zakazano_za'], name='posao_status_zakazano_idx'),
+        ]
+
+    def __str__(self):
+        return f"Posao {self.sifra_p} ({self.tip}, {self.status})"
+
+
+# Keš geokodiranja adresa (services/geocode_service.py).
+# lat/lon su NULL kada geokoder nije pronašao adresu (negativni keš).
+class GeokodAdresa(models.Model):
+    adresa = models.CharField(max_length=255)
+    drzava = models.CharField(max_length=10, default='rs')
+    lat = models.FloatField(null=True, blank=True)
+    lon = models.FloatField(null=True, blank=True)
+    azurirano = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'geokod_adresa'
+        constraints = [
+            models.UniqueConstraint(fields=['adresa', 'drzava'], name='geokod_adresa_drzava_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.adresa} ({self.drzava}): {self.lat}, {self.lon}"
+
+
+# Keš OSRM ruta (services/route_service.py): dužina, trajanje i geometrija
+# (kodirana polilinija) po paru koordinata i profilu vožnje.
+class RutaGeometrija(models.Model):
+    kljuc = models.CharField(max_length=100, unique=True)
+    profil = models.CharField(max_length=20, default='driving')
+    duzina_m = models.FloatField()
+    trajanje_s = models.FloatField()
+    polilinija = models.TextField()
+    azurirano = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'ruta_geometrija'
+
+    def __str__(self):
+        return f"{self.kljuc} ({self.duzina_m / 1000:.1f} km)"
+
+
+# Poslednje stanje zapisa poslato mikroservisu za analizu dobavljača
+# (services/supplier_sync_service.py). Otisak je heš poslatog sadržaja, pa se
+# pri sledećoj sinhronizaciji šalju samo zapisi čiji se sadržaj promenio.
+class SinhronizacijaOtisak(models.Model):
+    entitet = models.CharField(max_length=30)
+    objekat_id = models.IntegerField()
+    otisak = models.CharField(max_length=40)
+    sinhronizovano = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'sinhronizacija_otisak'
+        constraints = [
+            models.UniqueConstraint(fields=['entitet', 'objekat_id'], name='sinhronizacija_otisak_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.entitet} {self.objekat_id} ({self.sinhronizovano})"
+
+
+# Brojači za dodelu šifara u blokovima (services/sifra_service.py) na bazama
+# bez sekvenci; poslednja je najveća šifra koja je već rezervisana za tabelu.
+class BrojacSifara(models.Model):
+    tabela = models.CharField(max_length=100, unique=True)
+    poslednja = models.BigIntegerField(default=0)
+    azurirano = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'brojac_sifara'
+
+    def __str__(self):
+        return f"{self.tabela}: {self.poslednja}"
+
+
+# Trajno stanje Saga transakcija (saga_orchestrator.py): status i tekući
+# korak, ulazni podaci, rezultat lokalnih koraka, događaj za mikroservis koji
+# se šalje posle commit-a (outbox) i dnevnik koraka.
+class Saga(models.Model):
+    STATUS_CHOICES = (
+        ('pokrenuta', 'Pokrenuta'),
+        ('ceka_dogadjaj', 'Čeka slanje događaja'),
+        ('zavrsena', 'Završena'),
+        ('kompenzacija', 'Kompenzacija u toku'),
+        ('kompenzovana', 'Kompenzovana'),
+        ('neuspesna', 'Neuspešna'),
+    )
+
+    sifra_sg = models.AutoField(primary_key=True)
+    tip = models.CharField(max_length=30)
+    kljuc_idempotencije = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pokrenuta')
+    korak = models.CharField(max_length=50, blank=True, default='')
+    parametri = models.JSONField(default=dict, blank=True)
+    rezultat = models.JSONField(default=dict, blank=True)
+    dogadjaj = models.JSONField(default=dict, blank=True)
+    log = models.JSONField(default=list, blank=True)
+    mikroservis_url = models.CharField(max_length=200)
+    broj_pokusaja = models.IntegerField(default=0)
+    greska = models.TextField(blank=True, default='')
+    kreirano = models.DateTimeField(auto_now_add=True)
+    azurirano = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'saga'
+        indexes = [
+            models.Index(fields=['status', 'azurirano'], name='saga_status_azurirano_idx'),
+        ]
+
+    def __str__(self):
+        return f"Saga {self.sifra_sg} ({self.tip}, {self.status})"
+
+
+# Odlazni email-ovi (services/email_service.py): poruka se upisuje u istoj
+# transakciji kao i promena zbog koje se šalje, a šalje je pozadinski posao,
+# u serijama preko jedne SMTP veze, sa ponavljanjem. sledeci_pokusaj je i
+# zakup: preuzeta poruka se pomera u budućnost dok se šalje.
+class EmailPoruka(models.Model):
+    STATUS_CHOICES = (
+        ('na_cekanju', 'Na čekanju'),
+        ('poslata', 'Poslata'),
+        ('neuspesna', 'Neuspešna'),
+    )
+
+    sifra_em = models.AutoField(primary_key=True)
+    primalac = models.CharField(max_length=254)
+    posiljalac = models.CharField(max_length=254)
+    naslov = models.CharField(max_length=255)
+    sadrzaj = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='na_cekanju')
+    broj_pokusaja = models.IntegerField(default=0)
+    sledeci_pokusaj = models.DateTimeField(default=timezone.now)
+    greska = models.TextField(blank=True, default='')
+    kreirano = models.DateTimeField(auto_now_add=True)
+    poslato = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_poruka'
+        indexes = [
+            models.Index(fields=['status', 'sledeci_pokusaj'], name='email_status_pokusaj_idx'),
+        ]
+
+    def __str__(self):
+        return f"Email {self.sifra_em} za {self.primalac} ({self.status})"
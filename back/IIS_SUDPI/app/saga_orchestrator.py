@@ -5,38 +5,102 @@ Implementira Saga pattern (Orkestracija) između Oracle baze (Django) i InfluxDB
 
 Scenario: Kreiranje fakture sa plaćanjem
 - Korak 1: Kreiraj fakturu u Oracle bazi
-- Korak 2: Kreiraj transakciju u Oracle bazi  
+- Korak 2: Kreiraj transakciju u Oracle bazi
 - Korak 3: Pošalji događaj u InfluxDB
 - Ako neki korak ne uspe -> Rollback (kompenzacione transakcije)
+
+Stanje svake sage se čuva u tabeli saga. Lokalni koraci se izvršavaju u
+jednoj transakciji zajedno sa upisom događaja (outbox) i posla za njegovo
+slanje, pa događaj odlazi u InfluxDB tek posle commit-a, iz pozadinskog
+radnika (services/job_service.py), sa ponavljanjem. Ako događaj ne može da se
+isporuči, kompenzacija se takođe izvršava u pozadini. Sage zaglavljene posle
+pada procesa nastavlja posao 'saga_oporavak'.
 """
 
 import httpx
 import logging
-from django.db import transaction as db_transaction
-from django.db.models import Max
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
 from django.utils import timezone
-from typing import Dict, Any, Tuple
-from decimal import Decimal
+from typing import Dict, Any, List, Optional, Tuple
+from decimal import Decimal, InvalidOperation
 
-from .models import Faktura, Transakcija, Ugovor
+from .models import Faktura, Penal, Posao, Saga, Transakcija, Ugovor
+from .services import finance_rollup_service as zbirovi
+from .services.job_service import AKTIVNI_STATUSI, nastavi, posao, zakazi
+from .services.response_cache import povecaj_verziju
+from .services.sifra_service import dodeli_sifru, dodeli_sifre
 
 logger = logging.getLogger(__name__)
 
+POSAO_SLANJE = 'saga_dogadjaj'
+POSAO_KOMPENZACIJA = 'saga_kompenzacija'
+POSAO_OPORAVAK = 'saga_oporavak'
+
+NEZAVRSENI_STATUSI = ('pokrenuta', 'ceka_dogadjaj', 'kompenzacija')
+
+# Status događaja u InfluxDB po statusu sage
+INFLUXDB_STATUS = {
+    'pokrenuta': 'na_cekanju',
+    'ceka_dogadjaj': 'na_cekanju',
+    'zavrsena': 'synced',
+    'kompenzacija': 'otkazan',
+    'kompenzovana': 'otkazan',
+    'neuspesna': 'nije_poslat',
+}
+
+ORKESTRATORI = {}
+
+
+def status_fakture(status_transakcije):
+    """Status fakture na osnovu transakcije"""
+    if status_transakcije == "uspesna":
+        return 'isplacena'
+    if status_transakcije == "neuspesna":
+        return 'odbijena'
+    return 'verifikovana'
+
 
-class SagaOrchestrator:
+def kljuc_slanja(sifra_sg):
+    return f"saga:{sifra_sg}"
+
+
+def kljuc_kompenzacije(sifra_sg):
+    return f"saga_kompenzacija:{sifra_sg}"
+
+
+class SagaGreska(Exception):
+    """Lokalni korak ne može da se izvrši (npr. ugovor ne postoji)."""
+
+
+class BaseSagaOrchestrator:
     """
-    Orkestrator Saga transakcije za kreiranje fakture sa plaćanjem
-    
-    Koordinira sledeće korake:
-    1. Lokalna transakcija u Oracle DB (Faktura + Transakcija)
-    2. Mikroservis poziv ka InfluxDB (finansijski događaj)
-    3. Kompenzacione transakcije u slučaju greške
+    Zajednički tok Saga transakcije sa trajnim stanjem:
+    1. Lokalni koraci u Oracle DB + događaj (outbox) u jednoj transakciji
+    2. Slanje događaja u InfluxDB iz pozadinskog radnika, sa ponavljanjem
+    3. Kompenzacione transakcije u pozadini ako događaj ne može da se isporuči
+
+    Podklasa definiše tip, lokalni_koraci, kompenzacija i otkazni_dogadjaj.
     """
-    
-    def __init__(self, mikroservis_url: str = "http://localhost:8001"):
-        self.mikroservis_url = mikroservis_url
-        self.saga_log = []
-        
+
+    tip = None
+    oznaka_loga = "SAGA"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.tip:
+            ORKESTRATORI[cls.tip] = cls
+
+    def __init__(self, mikroservis_url: Optional[str] = None, saga: Optional[Saga] = None):
+        self.mikroservis_url = mikroservis_url or getattr(settings, 'MIKROSERVIS_URL', 'http://localhost:8001')
+        self.saga = saga
+        self.saga_log = list(saga.log) if saga else []
+
+    @staticmethod
+    def iz_sage(saga: Saga) -> 'BaseSagaOrchestrator':
+        return ORKESTRATORI[saga.tip](saga.mikroservis_url, saga)
+
     def log_step(self, step: str, status: str, details: str = ""):
         """Loguje korak Saga transakcije"""
         log_entry = {
@@ -46,20 +110,210 @@ class SagaOrchestrator:
             "details": details
         }
         self.saga_log.append(log_entry)
-        logger.info(f"[SAGA] {step}: {status} - {details}")
-    
+        logger.info(f"[{self.oznaka_loga}] {step}: {status} - {details}")
+
+    def _sacuvaj(self, **izmene):
+        """Upisuje stanje sage zajedno sa dnevnikom koraka."""
+        for polje, vrednost in izmene.items():
+            setattr(self.saga, polje, vrednost)
+        self.saga.log = self.saga_log
+        self.saga.save()
+
+    # ---------- Koraci koje definiše podklasa ----------
+
+    def lokalni_koraci(self, parametri: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Izvršava se u transakciji; vraća (rezultat, događaj {'putanja', 'telo'})."""
+        raise NotImplementedError
+
+    def kompenzacija(self, rezultat: Dict[str, Any]) -> None:
+        """Poništava lokalne korake (izvršava se u transakciji)."""
+        raise NotImplementedError
+
+    def otkazni_dogadjaj(self) -> Dict[str, Any]:
+        """Događaj (telo zahteva) kojim se u InfluxDB označava da je saga otkazana."""
+        raise NotImplementedError
+
+    # ---------- Tok sage ----------
+
+    def pokreni(self, parametri: Dict[str, Any], kljuc_idempotencije: Optional[str] = None) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Pokreće sagu. Sa ključem idempotencije ponovljeni zahtev vraća stanje
+        postojeće sage umesto da pravi novu.
+
+        Returns:
+            (success, result_data)
+        """
+        kljuc = kljuc_idempotencije or None
+        if kljuc:
+            postojeca = Saga.objects.filter(kljuc_idempotencije=kljuc).first()
+            if postojeca:
+                return self._ponovljena(postojeca, parametri)
+
+        try:
+            with db_transaction.atomic():
+                self.saga = Saga.objects.create(
+                    tip=self.tip,
+                    kljuc_idempotencije=kljuc,
+                    parametri=parametri,
+                    mikroservis_url=self.mikroservis_url,
+                )
+        except IntegrityError:
+            # Isti ključ je istovremeno poslat dva puta
+            return self._ponovljena(Saga.objects.get(kljuc_idempotencije=kljuc), parametri)
+
+        self.log_step("SAGA_START", "INFO", f"Pokretanje Saga transakcije {self.saga.sifra_sg}")
+        return self._izvrsi_lokalno()
+
+    def _izvrsi_lokalno(self) -> Tuple[bool, Dict[str, Any]]:
+        try:
+            with db_transaction.atomic():
+                rezultat, dogadjaj = self.lokalni_koraci(self.saga.parametri)
+                self.log_step("OUTBOX", "INFO", "Događaj za InfluxDB upisan, šalje se posle commit-a")
+                self._sacuvaj(status='ceka_dogadjaj', korak='OUTBOX', rezultat=rezultat, dogadjaj=dogadjaj)
+                zakazi_slanje(self.saga.sifra_sg)
+                zakazi_oporavak()
+        except Exception as e:
+            # Lokalna transakcija je poništena, pa nema šta da se kompenzuje
+            self.log_step("SAGA_FAILED", "ERROR", f"Greška: {str(e)}")
+            self._sacuvaj(status='neuspesna', korak='SAGA_FAILED', rezultat={}, dogadjaj={}, greska=str(e))
+            return False, self._odgovor_greske(str(e))
+
+        return True, self.odgovor()
+
+    def _ponovljena(self, saga: Saga, parametri: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        if saga.tip != self.tip or saga.parametri != parametri:
+            return False, {
+                "error": "Ključ idempotencije je već iskorišćen za drugi zahtev",
+                "message": "Zahtev nije izvršen",
+                "konflikt": True,
+                "saga_id": saga.sifra_sg,
+                "saga_log": []
+            }
+        self.saga = saga
+        self.saga_log = list(saga.log)
+        if saga.status == 'pokrenuta':
+            # Prvi zahtev još izvršava lokalne korake; rezultat još ne postoji
+            return False, {
+                "error": "Zahtev sa istim ključem idempotencije je još u obradi",
+                "message": "Zahtev je u obradi, ponoviti kasnije",
+                "u_toku": True,
+                "ponovljen": True,
+                "saga_id": saga.sifra_sg,
+                "saga_status": saga.status,
+                "saga_log": self.saga_log
+            }
+        if saga.status in ('neuspesna', 'kompenzacija', 'kompenzovana'):
+            return False, {**self._odgovor_greske(saga.greska), "ponovljen": True}
+        return True, {**self.odgovor(), "ponovljen": True}
+
+    def odgovor(self) -> Dict[str, Any]:
+        return {
+            "message": "Lokalni koraci završeni, događaj za InfluxDB se šalje u pozadini",
+            **self.saga.rezultat,
+            "saga_id": self.saga.sifra_sg,
+            "saga_status": self.saga.status,
+            "influxdb_status": INFLUXDB_STATUS[self.saga.status],
+            "saga_log": self.saga_log
+        }
+
+    def _odgovor_greske(self, greska: str) -> Dict[str, Any]:
+        return {
+            "error": greska,
+            "message": "Transakciona obrada neuspešna - izvršen rollback",
+            "saga_id": self.saga.sifra_sg,
+            "saga_status": self.saga.status,
+            "saga_log": self.saga_log
+        }
+
+    def posalji_dogadjaj(self, posao_obj: Posao) -> None:
+        """Šalje događaj iz outbox-a; izvršava se u pozadinskom radniku."""
+        dogadjaj = self.saga.dogadjaj
+        self.log_step(
+            "EVENT_SEND_START", "INFO",
+            f"Slanje događaja u InfluxDB (pokušaj {self.saga.broj_pokusaja + 1})"
+        )
+        try:
+            response = httpx.post(
+                f"{self.mikroservis_url}{dogadjaj['putanja']}",
+                json=dogadjaj['telo'],
+                headers={'Idempotency-Key': kljuc_slanja(self.saga.sifra_sg)},
+                timeout=10.0
+            )
+        except httpx.RequestError as e:
+            self._neuspesno_slanje(posao_obj, f"HTTP greška: {str(e)}", ponovi=True)
+            return
+
+        if response.status_code in (200, 201):
+            self.log_step("SAGA_SUCCESS", "SUCCESS", "Događaj poslat u InfluxDB, saga završena")
+            self._sacuvaj(status='zavrsena', korak='SAGA_SUCCESS', greska='')
+            return
+
+        # Greške klijenta (4xx) se ne ponavljaju, osim 429
+        self._neuspesno_slanje(
+            posao_obj,
+            f"Mikroservis vratio status {response.status_code}: {response.text[:500]}",
+            ponovi=response.status_code >= 500 or response.status_code == 429
+        )
+
+    def _neuspesno_slanje(self, posao_obj: Posao, greska: str, ponovi: bool) -> None:
+        pokusaji = self.saga.broj_pokusaja + 1
+        self.log_step("EVENT_SEND_FAILED", "ERROR", greska)
+        if ponovi and pokusaji < getattr(settings, 'SAGA_MAX_POKUSAJA', 5):
+            self._sacuvaj(korak='EVENT_SEND_FAILED', broj_pokusaja=pokusaji, greska=greska)
+            # Eksponencijalno odlaganje: 2, 4, 8... sekundi (najviše 5 minuta)
+            nastavi(posao_obj, min(2 ** pokusaji, 300))
+
+        self.log_step("ROLLBACK_START", "INFO", "Pokretanje kompenzacionih transakcija")
+        with db_transaction.atomic():
+            self._sacuvaj(status='kompenzacija', korak='ROLLBACK_START', broj_pokusaja=pokusaji, greska=greska)
+            zakazi_kompenzaciju(self.saga.sifra_sg)
+
+    def kompenzuj(self) -> None:
+        """Kompenzacione transakcije; izvršava se u pozadinskom radniku."""
+        with db_transaction.atomic():
+            self.kompenzacija(self.saga.rezultat)
+
+        # Posle isteka vremena događaj je možda ipak zabeležen
+        if self.saga.broj_pokusaja:
+            try:
+                httpx.post(
+                    f"{self.mikroservis_url}{self.saga.dogadjaj['putanja']}",
+                    json=self.otkazni_dogadjaj(),
+                    timeout=5.0
+                )
+                self.log_step("ROLLBACK_EVENT", "SUCCESS", "Otkazni događaj poslat u InfluxDB")
+            except Exception as rollback_error:
+                self.log_step("ROLLBACK_EVENT", "ERROR", f"Rollback greška: {str(rollback_error)}")
+
+        self.log_step("ROLLBACK_END", "INFO", "Kompenzacione transakcije završene")
+        self._sacuvaj(status='kompenzovana', korak='ROLLBACK_END')
+
+
+class SagaOrchestrator(BaseSagaOrchestrator):
+    """
+    Orkestrator Saga transakcije za kreiranje fakture sa plaćanjem
+
+    Koordinira sledeće korake:
+    1. Lokalna transakcija u Oracle DB (Faktura + Transakcija)
+    2. Mikroservis poziv ka InfluxDB (finansijski događaj)
+    3. Kompenzacione transakcije u slučaju greške
+    """
+
+    tip = 'faktura_sa_placanjem'
+
     def create_faktura_with_payment(
-        self, 
+        self,
         ugovor_id: int,
         iznos: Decimal,
         datum_prijema: str,
         rok_placanja: str,
         potvrda_transakcije: str,
-        status_transakcije: str = "uspesna"
+        status_transakcije: str = "uspesna",
+        kljuc_idempotencije: Optional[str] = None
     ) -> Tuple[bool, Dict[str, Any]]:
         """
         Glavna Saga funkcija: Kreira fakturu sa plaćanjem (transakciona obrada)
-        
+
         Args:
             ugovor_id: ID ugovora
             iznos: Iznos fakture
@@ -67,341 +321,560 @@ class SagaOrchestrator:
             rok_placanja: Rok za plaćanje
             potvrda_transakcije: Broj potvrde transakcije
             status_transakcije: Status transakcije (uspesna/neuspesna/na_cekanju)
-            
+            kljuc_idempotencije: Ključ kojim se prepoznaje ponovljen zahtev
+
         Returns:
             (success, result_data)
         """
-        
-        faktura = None
-        transakcija = None
-        influx_sent = False
-        
-        self.log_step("SAGA_START", "INFO", "Pokretanje Saga transakcije")
-        
+        return self.pokreni({
+            "ugovor_id": ugovor_id,
+            "iznos": str(iznos),
+            "datum_prijema": str(datum_prijema),
+            "rok_placanja": str(rok_placanja),
+            "potvrda_transakcije": potvrda_transakcije,
+            "status_transakcije": status_transakcije
+        }, kljuc_idempotencije)
+
+    def lokalni_koraci(self, parametri):
+        self.log_step("STEP_1_START", "INFO", "Kreiranje fakture u Oracle DB")
         try:
-            self.log_step("STEP_1_START", "INFO", "Kreiranje fakture u Oracle DB")
-            
-            with db_transaction.atomic():
-                try:
-                    ugovor = Ugovor.objects.get(sifra_u=ugovor_id)
-                except Ugovor.DoesNotExist:
-                    self.log_step("STEP_1_FAILED", "ERROR", f"Ugovor {ugovor_id} ne postoji")
-                    return False, {
-                        "error": "Ugovor ne postoji",
-                        "saga_log": self.saga_log
-                    }
-
-                max_faktura_id = Faktura.objects.aggregate(
-                    Max('sifra_f')
-                )['sifra_f__max'] or 0
-                next_faktura_id = max_faktura_id + 1
-                
-                faktura = Faktura(
-                    sifra_f=next_faktura_id,
-                    iznos_f=iznos,
-                    datum_prijema_f=datum_prijema,
-                    rok_placanja_f=rok_placanja,
-                    status_f='primljena',
-                    ugovor=ugovor
-                )
-                faktura.save()
-                
-                self.log_step(
-                    "STEP_1_SUCCESS", 
-                    "SUCCESS", 
-                    f"Faktura {faktura.sifra_f} kreirana u Oracle DB"
-                )
-            
-            self.log_step("STEP_2_START", "INFO", "Kreiranje transakcije u Oracle DB")
-            
-            with db_transaction.atomic():
-                max_transakcija_id = Transakcija.objects.aggregate(
-                    Max('sifra_t')
-                )['sifra_t__max'] or 0
-                next_transakcija_id = max_transakcija_id + 1
-                
-                transakcija = Transakcija(
-                    sifra_t=next_transakcija_id,
-                    potvrda_t=potvrda_transakcije,
-                    status_t=status_transakcije,
-                    faktura=faktura
-                )
-                transakcija.save()
-                
-                # Ažuriraj status fakture na osnovu transakcije
-                if status_transakcije == "uspesna":
-                    faktura.status_f = 'isplacena'
-                elif status_transakcije == "neuspesna":
-                    faktura.status_f = 'odbijena'
-                else:
-                    faktura.status_f = 'verifikovana'
-                
-                faktura.save()
-                
-                self.log_step(
-                    "STEP_2_SUCCESS", 
-                    "SUCCESS", 
-                    f"Transakcija {transakcija.sifra_t} kreirana u Oracle DB"
-                )
+            ugovor = Ugovor.objects.get(sifra_u=parametri['ugovor_id'])
+        except Ugovor.DoesNotExist:
+            self.log_step("STEP_1_FAILED", "ERROR", f"Ugovor {parametri['ugovor_id']} ne postoji")
+            raise SagaGreska("Ugovor ne postoji")
 
-            # Pošalji događaj u InfluxDB mikroservis
-            self.log_step("STEP_3_START", "INFO", "Slanje događaja u InfluxDB mikroservis")
-            
-            mikroservis_data = {
+        status_transakcije = parametri['status_transakcije']
+        faktura = Faktura(
+            sifra_f=dodeli_sifru(Faktura),
+            iznos_f=Decimal(parametri['iznos']),
+            datum_prijema_f=parametri['datum_prijema'],
+            rok_placanja_f=parametri['rok_placanja'],
+            status_f=status_fakture(status_transakcije),
+            ugovor=ugovor
+        )
+        faktura.save()
+        self.log_step("STEP_1_SUCCESS", "SUCCESS", f"Faktura {faktura.sifra_f} kreirana u Oracle DB")
+
+        self.log_step("STEP_2_START", "INFO", "Kreiranje transakcije u Oracle DB")
+        transakcija = Transakcija(
+            sifra_t=dodeli_sifru(Transakcija),
+            potvrda_t=parametri['potvrda_transakcije'],
+            status_t=status_transakcije,
+            faktura=faktura
+        )
+        transakcija.save()
+        self.log_step("STEP_2_SUCCESS", "SUCCESS", f"Transakcija {transakcija.sifra_t} kreirana u Oracle DB")
+
+        rezultat = {"faktura_id": faktura.sifra_f, "transakcija_id": transakcija.sifra_t}
+        dogadjaj = {
+            "putanja": "/api/dogadjaji/transakcija",
+            "telo": {
                 "faktura_id": faktura.sifra_f,
-                "iznos": float(iznos),
+                "iznos": float(faktura.iznos_f),
                 "status": status_transakcije,
-                "potvrda": potvrda_transakcije,
+                "potvrda": transakcija.potvrda_t,
                 "opis": f"Plaćanje fakture {faktura.sifra_f} po ugovoru {ugovor.sifra_u}"
             }
-            
-            try:
-                response = httpx.post(
-                    f"{self.mikroservis_url}/api/dogadjaji/transakcija",
-                    json=mikroservis_data,
-                    timeout=10.0
-                )
-                
-                if response.status_code == 201:
-                    influx_sent = True
-                    self.log_step(
-                        "STEP_3_SUCCESS", 
-                        "SUCCESS", 
-                        "Događaj uspešno poslat u InfluxDB"
-                    )
-                else:
-                    raise Exception(f"Mikroservis vratio status {response.status_code}: {response.text}")
-                    
-            except httpx.RequestError as e:
-                self.log_step("STEP_3_FAILED", "ERROR", f"HTTP greška: {str(e)}")
-                raise Exception(f"Greška pri komunikaciji sa mikroservisom: {str(e)}")
-            
-
-            # SAGA USPEŠNA   
-            self.log_step("SAGA_SUCCESS", "SUCCESS", "Saga transakcija uspešno završena")
-            
-            return True, {
-                "message": "Transakciona obrada uspešno završena",
-                "faktura_id": faktura.sifra_f,
-                "transakcija_id": transakcija.sifra_t,
-                "influxdb_status": "synced",
-                "saga_log": self.saga_log
-            }
-            
-        except Exception as e:
+        }
+        return rezultat, dogadjaj
 
-            # SAGA NEUSPEŠNA
-            self.log_step("SAGA_FAILED", "ERROR", f"Greška: {str(e)}")
-            self.log_step("ROLLBACK_START", "INFO", "Pokretanje kompenzacionih transakcija")
-            
-            # Obriši transakciju iz Oracle DB
-            if transakcija:
-                try:
-                    with db_transaction.atomic():
-                        transakcija.delete()
-                        self.log_step("ROLLBACK_STEP_1", "SUCCESS", "Transakcija obrisana iz Oracle DB")
-                except Exception as rollback_error:
-                    self.log_step("ROLLBACK_STEP_1", "ERROR", f"Rollback greška: {str(rollback_error)}")
-            
-            # Obriši fakturu iz Oracle DB
-            if faktura:
-                try:
-                    with db_transaction.atomic():
-                        faktura.delete()
-                        self.log_step("ROLLBACK_STEP_2", "SUCCESS", "Faktura obrisana iz Oracle DB")
-                except Exception as rollback_error:
-                    self.log_step("ROLLBACK_STEP_2", "ERROR", f"Rollback greška: {str(rollback_error)}")
-            
-            # Obriši događaj iz InfluxDB (ako je poslat)
-            if influx_sent:
-                try:
-                    # InfluxDB ne podržava tačno brisanje pojedinačnog događaja,
-                    # ali možemo da označimo događaj kao "otkazan"
-                    cancel_data = {
-                        "faktura_id": faktura.sifra_f if faktura else 0,
-                        "iznos": 0.0,
-                        "status": "otkazan",
-                        "potvrda": f"ROLLBACK-{potvrda_transakcije}",
-                        "opis": f"ROLLBACK: Transakcija otkazana zbog greške u Saga procesu"
-                    }
-                    
-                    httpx.post(
-                        f"{self.mikroservis_url}/api/dogadjaji/transakcija",
-                        json=cancel_data,
-                        timeout=5.0
-                    )
-                    self.log_step("ROLLBACK_STEP_3", "SUCCESS", "Otkazni događaj poslat u InfluxDB")
-                except Exception as rollback_error:
-                    self.log_step("ROLLBACK_STEP_3", "ERROR", f"Rollback greška: {str(rollback_error)}")
-            
-            self.log_step("ROLLBACK_END", "INFO", "Kompenzacione transakcije završene")
-            
-            return False, {
-                "error": str(e),
-                "message": "Transakciona obrada neuspešna - izvršen rollback",
-                "saga_log": self.saga_log
-            }
+    def kompenzacija(self, rezultat):
+        # Obriši transakciju iz Oracle DB
+        Transakcija.objects.filter(sifra_t=rezultat.get('transakcija_id')).delete()
+        self.log_step("ROLLBACK_STEP_1", "SUCCESS", "Transakcija obrisana iz Oracle DB")
+
+        # Obriši fakturu iz Oracle DB
+        Faktura.objects.filter(sifra_f=rezultat.get('faktura_id')).delete()
+        self.log_step("ROLLBACK_STEP_2", "SUCCESS", "Faktura obrisana iz Oracle DB")
+
+    def otkazni_dogadjaj(self):
+        # InfluxDB ne podržava tačno brisanje pojedinačnog događaja,
+        # ali možemo da označimo događaj kao "otkazan"
+        return {
+            "faktura_id": self.saga.rezultat.get('faktura_id', 0),
+            "iznos": 0.0,
+            "status": "otkazan",
+            "potvrda": f"ROLLBACK-{self.saga.parametri['potvrda_transakcije']}",
+            "opis": "ROLLBACK: Transakcija otkazana zbog greške u Saga procesu"
+        }
 
 
-class PenalSagaOrchestrator:
+class PenalSagaOrchestrator(BaseSagaOrchestrator):
     """
     Saga orkestrator za kreiranje penala
-    
+
     Scenario: Kreiranje penala zbog kršenja ugovora
     - Korak 1: Kreiraj penal u Oracle bazi
     - Korak 2: Pošalji događaj u InfluxDB
     - Ako neki korak ne uspe -> Rollback
     """
-    
-    def __init__(self, mikroservis_url: str = "http://localhost:8001"):
-        self.mikroservis_url = mikroservis_url
-        self.saga_log = []
-    
-    def log_step(self, step: str, status: str, details: str = ""):
-        """Loguje korak Saga transakcije"""
-        log_entry = {
-            "timestamp": timezone.now().isoformat(),
-            "step": step,
-            "status": status,
-            "details": details
-        }
-        self.saga_log.append(log_entry)
-        logger.info(f"[SAGA-PENAL] {step}: {status} - {details}")
-    
+
+    tip = 'penal'
+    oznaka_loga = "SAGA-PENAL"
+
     def create_penal_with_sync(
         self,
         ugovor_id: int,
         razlog: str,
-        iznos: Decimal
+        iznos: Decimal,
+        kljuc_idempotencije: Optional[str] = None
     ) -> Tuple[bool, Dict[str, Any]]:
         """
         Saga funkcija: Kreira penal sa sinhronizacijom u InfluxDB
-        
+
         Args:
             ugovor_id: ID ugovora
             razlog: Razlog penala
             iznos: Iznos penala
-            
+            kljuc_idempotencije: Ključ kojim se prepoznaje ponovljen zahtev
+
         Returns:
             (success, result_data)
         """
-        
-        penal = None
-        influx_sent = False
-        
-        self.log_step("SAGA_START", "INFO", "Pokretanje Saga transakcije za penal")
-        
+        return self.pokreni({
+            "ugovor_id": ugovor_id,
+            "razlog": razlog,
+            "iznos": str(iznos)
+        }, kljuc_idempotencije)
+
+    def lokalni_koraci(self, parametri):
+        self.log_step("STEP_1_START", "INFO", "Kreiranje penala u Oracle DB")
         try:
+            ugovor = Ugovor.objects.get(sifra_u=parametri['ugovor_id'])
+        except Ugovor.DoesNotExist:
+            self.log_step("STEP_1_FAILED", "ERROR", f"Ugovor {parametri['ugovor_id']} ne postoji")
+            raise SagaGreska("Ugovor ne postoji")
 
-            # Kreiraj penal u Oracle bazi
-            self.log_step("STEP_1_START", "INFO", "Kreiranje penala u Oracle DB")
-            
-            with db_transaction.atomic():
-                from .models import Penal, Ugovor
-                
-                try:
-                    ugovor = Ugovor.objects.get(sifra_u=ugovor_id)
-                except Ugovor.DoesNotExist:
-                    self.log_step("STEP_1_FAILED", "ERROR", f"Ugovor {ugovor_id} ne postoji")
-                    return False, {
-                        "error": "Ugovor ne postoji",
-                        "saga_log": self.saga_log
-                    }
-                
-                max_penal_id = Penal.objects.aggregate(
-                    Max('sifra_p')
-                )['sifra_p__max'] or 0
-                next_penal_id = max_penal_id + 1
-                
-                penal = Penal(
-                    sifra_p=next_penal_id,
-                    razlog_p=razlog,
-                    iznos_p=iznos,
-                    ugovor=ugovor
-                )
-                penal.save()
-                
-                self.log_step(
-                    "STEP_1_SUCCESS",
-                    "SUCCESS",
-                    f"Penal {penal.sifra_p} kreiran u Oracle DB"
-                )
-            
-            # Pošalji događaj u InfluxDB
-            self.log_step("STEP_2_START", "INFO", "Slanje događaja u InfluxDB")
-            
-            mikroservis_data = {
+        penal = Penal(
+            sifra_p=dodeli_sifru(Penal),
+            razlog_p=parametri['razlog'],
+            iznos_p=Decimal(parametri['iznos']),
+            ugovor=ugovor
+        )
+        penal.save()
+        self.log_step("STEP_1_SUCCESS", "SUCCESS", f"Penal {penal.sifra_p} kreiran u Oracle DB")
+
+        rezultat = {"penal_id": penal.sifra_p}
+        dogadjaj = {
+            "putanja": "/api/dogadjaji/penal",
+            "telo": {
                 "ugovor_id": ugovor.sifra_u,
-                "iznos": float(iznos),
-                "razlog": razlog,
+                "iznos": float(penal.iznos_p),
+                "razlog": penal.razlog_p,
                 "status": "kreiran"
             }
-            
-            try:
-                response = httpx.post(
-                    f"{self.mikroservis_url}/api/dogadjaji/penal",
-                    json=mikroservis_data,
-                    timeout=10.0
-                )
-                
-                if response.status_code == 201:
-                    influx_sent = True
-                    self.log_step("STEP_2_SUCCESS", "SUCCESS", "Događaj poslat u InfluxDB")
-                else:
-                    raise Exception(f"Mikroservis vratio status {response.status_code}")
-                    
-            except httpx.RequestError as e:
-                self.log_step("STEP_2_FAILED", "ERROR", f"HTTP greška: {str(e)}")
-                raise Exception(f"Greška pri komunikaciji sa mikroservisom: {str(e)}")
-            
-
-            # SAGA USPEŠNA
-            self.log_step("SAGA_SUCCESS", "SUCCESS", "Saga transakcija uspešno završena")
-            
-            return True, {
-                "message": "Penal uspešno kreiran i sinhronizovan",
-                "penal_id": penal.sifra_p,
-                "influxdb_status": "synced",
-                "saga_log": self.saga_log
-            }
-            
-        except Exception as e:
+        }
+        return rezultat, dogadjaj
 
-            # ROLLBACK
-            self.log_step("SAGA_FAILED", "ERROR", f"Greška: {str(e)}")
-            self.log_step("ROLLBACK_START", "INFO", "Pokretanje rollback-a")
-            
-            # Obriši penal iz Oracle DB
-            if penal:
+    def kompenzacija(self, rezultat):
+        # Obriši penal iz Oracle DB
+        Penal.objects.filter(sifra_p=rezultat.get('penal_id')).delete()
+        self.log_step("ROLLBACK_STEP_1", "SUCCESS", "Penal obrisan iz Oracle DB")
+
+    def otkazni_dogadjaj(self):
+        return {
+            "ugovor_id": self.saga.dogadjaj['telo']['ugovor_id'],
+            "iznos": 0.0,
+            "razlog": f"ROLLBACK: {self.saga.parametri['razlog']}",
+            "status": "otkazan"
+        }
+
+
+class BatchFakturaSagaOrchestrator(BaseSagaOrchestrator):
+    """
+    Saga za uvoz više faktura sa plaćanjem; jedna saga obuhvata jednu seriju:
+    1. Fakture i transakcije serije se upisuju sa bulk_create u jednoj transakciji
+    2. Događaji serije se šalju mikroservisu jednim zahtevom (batch endpoint,
+       ili pojedinačno ako ga mikroservis nema)
+    3. Kompenzuju se samo stavke čiji događaj mikroservis nije prihvatio;
+       ako serija ne može da se pošalje, kompenzuje se cela serija
+    Vidi uvezi_fakture_sa_placanjem.
+    """
+
+    tip = 'fakture_sa_placanjem'
+    oznaka_loga = "SAGA-BATCH"
+
+    PUTANJA_BATCH = "/api/dogadjaji/transakcija/batch"
+    PUTANJA_POJEDINACNO = "/api/dogadjaji/transakcija"
+
+    def lokalni_koraci(self, parametri):
+        stavke = parametri['stavke']
+        self.log_step("STEP_1_START", "INFO", f"Upis {len(stavke)} faktura i transakcija u Oracle DB")
+
+        # Ugovori i postojeće potvrde serije se proveravaju jednim upitom
+        ugovori = dict(
+            Ugovor.objects.filter(sifra_u__in={stavka['ugovor_id'] for stavka in stavke})
+            .values_list('sifra_u', 'dobavljac_id')
+        )
+        postojece_potvrde = set(
+            Transakcija.objects.filter(potvrda_t__in=[stavka['potvrda_transakcije'] for stavka in stavke])
+            .values_list('potvrda_t', flat=True)
+        )
+        greske, za_upis = [], []
+        for stavka in stavke:
+            if stavka['ugovor_id'] not in ugovori:
+                greske.append({"indeks": stavka['indeks'], "error": "Ugovor ne postoji"})
+            elif stavka['potvrda_transakcije'] in postojece_potvrde:
+                greske.append({
+                    "indeks": stavka['indeks'],
+                    "error": f"Transakcija sa potvrdom '{stavka['potvrda_transakcije']}' već postoji"
+                })
+            else:
+                za_upis.append(stavka)
+
+        try:
+            with db_transaction.atomic():
+                upisane = self._upisi(za_upis, ugovori)
+        except IntegrityError as e:
+            # Npr. ista potvrda transakcije upisana u međuvremenu: serija se
+            # upisuje stavku po stavku, pa ne uspevaju samo sporne stavke
+            self.log_step("STEP_1_RETRY", "WARNING", f"Serija odbijena ({str(e)}), upis stavku po stavku")
+            upisane = []
+            for stavka in za_upis:
                 try:
                     with db_transaction.atomic():
-                        penal.delete()
-                        self.log_step("ROLLBACK_STEP_1", "SUCCESS", "Penal obrisan iz Oracle DB")
-                except Exception as rollback_error:
-                    self.log_step("ROLLBACK_STEP_1", "ERROR", f"Rollback greška: {str(rollback_error)}")
-            
-            # Pošalji otkazni događaj u InfluxDB
-            if influx_sent:
-                try:
-                    cancel_data = {
-                        "ugovor_id": ugovor_id,
-                        "iznos": 0.0,
-                        "razlog": f"ROLLBACK: {razlog}",
-                        "status": "otkazan"
-                    }
-                    httpx.post(
-                        f"{self.mikroservis_url}/api/dogadjaji/penal",
-                        json=cancel_data,
-                        timeout=5.0
+                        upisane += self._upisi([stavka], ugovori)
+                except IntegrityError as greska:
+                    greske.append({"indeks": stavka['indeks'], "error": f"Greška pri upisu: {str(greska)}"})
+
+        if not upisane:
+            raise SagaGreska(f"Nijedna faktura serije nije upisana ({greske[0]['error']})")
+        self.log_step(
+            "STEP_1_SUCCESS", "SUCCESS",
+            f"Upisano {len(upisane)} faktura i transakcija, neuspešno {len(greske)}"
+        )
+
+        po_fakturi = {stavka['indeks']: stavka for stavka in stavke}
+        dogadjaj = {
+            "putanja": self.PUTANJA_BATCH,
+            "telo": {"dogadjaji": [
+                {
+                    "faktura_id": upisana['faktura_id'],
+                    "iznos": float(Decimal(po_fakturi[upisana['indeks']]['iznos'])),
+                    "status": po_fakturi[upisana['indeks']]['status_transakcije'],
+                    "potvrda": po_fakturi[upisana['indeks']]['potvrda_transakcije'],
+                    "opis": (
+                        f"Plaćanje fakture {upisana['faktura_id']} po ugovoru "
+                        f"{po_fakturi[upisana['indeks']]['ugovor_id']}"
                     )
-                    self.log_step("ROLLBACK_STEP_2", "SUCCESS", "Otkazni događaj poslat")
-                except Exception as rollback_error:
-                    self.log_step("ROLLBACK_STEP_2", "ERROR", f"Rollback greška: {str(rollback_error)}")
-            
-            self.log_step("ROLLBACK_END", "INFO", "Rollback završen")
-            
-            return False, {
-                "error": str(e),
-                "message": "Transakciona obrada neuspešna - izvršen rollback",
-                "saga_log": self.saga_log
+                }
+                for upisana in upisane
+            ]}
+        }
+        return {"stavke": upisane, "greske": greske}, dogadjaj
+
+    def _upisi(self, stavke, ugovori):
+        """bulk_create faktura i transakcija; vraća [{'indeks', 'faktura_id', 'transakcija_id'}]."""
+        if not stavke:
+            return []
+        sifre_f = dodeli_sifre(Faktura, len(stavke))
+        sifre_t = dodeli_sifre(Transakcija, len(stavke))
+        fakture = [
+            Faktura(
+                sifra_f=sifra_f,
+                iznos_f=Decimal(stavka['iznos']),
+                datum_prijema_f=date.fromisoformat(stavka['datum_prijema']),
+                rok_placanja_f=date.fromisoformat(stavka['rok_placanja']),
+                status_f=status_fakture(stavka['status_transakcije']),
+                ugovor_id=stavka['ugovor_id']
+            )
+            for sifra_f, stavka in zip(sifre_f, stavke)
+        ]
+        Faktura.objects.bulk_create(fakture)
+        Transakcija.objects.bulk_create([
+            Transakcija(
+                sifra_t=sifra_t,
+                potvrda_t=stavka['potvrda_transakcije'],
+                status_t=stavka['status_transakcije'],
+                faktura_id=sifra_f
+            )
+            for sifra_f, sifra_t, stavka in zip(sifre_f, sifre_t, stavke)
+        ])
+
+        # bulk_create ne okida signale: zbirne tabele i keš se osvežavaju ovde
+        zbirovi.oznaci_korpe('fakture', {
+            (faktura.datum_prijema_f, ugovori[faktura.ugovor_id], faktura.status_f) for faktura in fakture
+        })
+        povecaj_verziju(Faktura)
+
+        return [
+            {"indeks": stavka['indeks'], "faktura_id": sifra_f, "transakcija_id": sifra_t}
+            for sifra_f, sifra_t, stavka in zip(sifre_f, sifre_t, stavke)
+        ]
+
+    def posalji_dogadjaj(self, posao_obj: Posao) -> None:
+        dogadjaji = self.saga.dogadjaj['telo']['dogadjaji']
+        self.log_step(
+            "EVENT_SEND_START", "INFO",
+            f"Slanje {len(dogadjaji)} događaja u InfluxDB (pokušaj {self.saga.broj_pokusaja + 1})"
+        )
+        try:
+            with httpx.Client(base_url=self.mikroservis_url, timeout=30.0) as client:
+                response = client.post(
+                    self.PUTANJA_BATCH,
+                    json=self.saga.dogadjaj['telo'],
+                    headers={'Idempotency-Key': kljuc_slanja(self.saga.sifra_sg)}
+                )
+                if response.status_code in (404, 405):
+                    self.log_step("EVENT_SEND_SINGLE", "INFO", "Mikroservis nema batch endpoint, slanje pojedinačno")
+                    odbijene = self._posalji_pojedinacno(client, dogadjaji)
+                elif response.status_code in (200, 201):
+                    odgovor = response.json() if response.content else {}
+                    odbijene = set(odgovor.get('failed_ids', [])) if isinstance(odgovor, dict) else set()
+                else:
+                    self._neuspesno_slanje(
+                        posao_obj,
+                        f"Mikroservis vratio status {response.status_code}: {response.text[:500]}",
+                        ponovi=response.status_code >= 500 or response.status_code == 429
+                    )
+                    return
+        except httpx.RequestError as e:
+            self._neuspesno_slanje(posao_obj, f"HTTP greška: {str(e)}", ponovi=True)
+            return
+
+        stavke = self.saga.rezultat['stavke']
+        if odbijene:
+            self.log_step("ROLLBACK_PARTIAL_START", "INFO", f"Kompenzacija {len(odbijene)} odbijenih stavki")
+            with db_transaction.atomic():
+                Transakcija.objects.filter(faktura_id__in=odbijene).delete()
+                Faktura.objects.filter(sifra_f__in=odbijene).delete()
+            self.log_step("ROLLBACK_PARTIAL_END", "SUCCESS", "Fakture i transakcije odbijenih stavki obrisane")
+        for stavka in stavke:
+            stavka['influxdb_status'] = 'otkazan' if stavka['faktura_id'] in odbijene else 'synced'
+
+        self.log_step(
+            "SAGA_SUCCESS", "SUCCESS",
+            f"Poslato {len(stavke) - len(odbijene)} događaja, kompenzovano {len(odbijene)} stavki"
+        )
+        self._sacuvaj(status='zavrsena', korak='SAGA_SUCCESS', greska='')
+
+    def _posalji_pojedinacno(self, client, dogadjaji):
+        """Vraća skup faktura čiji događaj nije prihvaćen."""
+        odbijene = set()
+        for dogadjaj in dogadjaji:
+            try:
+                response = client.post(self.PUTANJA_POJEDINACNO, json=dogadjaj)
+                if response.status_code not in (200, 201):
+                    odbijene.add(dogadjaj['faktura_id'])
+            except httpx.RequestError:
+                odbijene.add(dogadjaj['faktura_id'])
+        return odbijene
+
+    def kompenzacija(self, rezultat):
+        fakture = [stavka['faktura_id'] for stavka in rezultat['stavke']]
+        Transakcija.objects.filter(faktura_id__in=fakture).delete()
+        Faktura.objects.filter(sifra_f__in=fakture).delete()
+        for stavka in rezultat['stavke']:
+            stavka['influxdb_status'] = 'otkazan'
+        self.log_step("ROLLBACK_STEP_1", "SUCCESS", f"Obrisano {len(fakture)} faktura i transakcija iz Oracle DB")
+
+    def otkazni_dogadjaj(self):
+        return {"dogadjaji": [
+            {
+                "faktura_id": dogadjaj['faktura_id'],
+                "iznos": 0.0,
+                "status": "otkazan",
+                "potvrda": f"ROLLBACK-{dogadjaj['potvrda']}",
+                "opis": "ROLLBACK: Transakcija otkazana zbog greške u Saga procesu"
             }
+            for dogadjaj in self.saga.dogadjaj['telo']['dogadjaji']
+        ]}
+
+
+OBAVEZNA_POLJA_FAKTURE = ('ugovor_id', 'iznos', 'datum_prijema', 'rok_placanja', 'potvrda_transakcije')
+VELICINA_SERIJE = 500
+
+
+def _proveri_stavke(stavke: List[Any]) -> Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+    """
+    Proverava stavke uvoza; vraća (ispravne stavke sa indeksom, {indeks: ishod}
+    za neispravne). Provera ne čita bazu, pa ponovljen zahtev daje iste serije
+    (isti parametri sage); ugovore i postojeće potvrde proverava saga.
+    """
+    statusi_transakcije = {kod for kod, _ in Transakcija.STATUS_CHOICES}
+    ispravne, ishodi, potvrde = [], {}, set()
+    for indeks, stavka in enumerate(stavke):
+        def greska(poruka):
+            ishodi[indeks] = {"indeks": indeks, "status": "odbijena", "error": poruka}
+
+        if not isinstance(stavka, dict):
+            greska("Stavka mora biti objekat")
+            continue
+        nedostaje = [polje for polje in OBAVEZNA_POLJA_FAKTURE if stavka.get(polje) in (None, '')]
+        if nedostaje:
+            greska(f"Polje '{nedostaje[0]}' je obavezno")
+            continue
+        try:
+            iznos = Decimal(str(stavka['iznos']))
+            datum_prijema = date.fromisoformat(str(stavka['datum_prijema']))
+            rok_placanja = date.fromisoformat(str(stavka['rok_placanja']))
+            ugovor_id = int(stavka['ugovor_id'])
+        except (InvalidOperation, ValueError, TypeError):
+            greska("Neispravan iznos, datum ili ugovor")
+            continue
+        status_transakcije = stavka.get('status_transakcije', 'uspesna')
+        if status_transakcije not in statusi_transakcije:
+            greska(f"Nepoznat status transakcije '{status_transakcije}'")
+            continue
+        potvrda = str(stavka['potvrda_transakcije'])
+        if potvrda in potvrde:
+            greska(f"Potvrda transakcije '{potvrda}' se ponavlja u zahtevu")
+            continue
+        potvrde.add(potvrda)
+        ispravne.append({
+            "indeks": indeks,
+            "ugovor_id": ugovor_id,
+            "iznos": str(iznos),
+            "datum_prijema": datum_prijema.isoformat(),
+            "rok_placanja": rok_placanja.isoformat(),
+            "potvrda_transakcije": potvrda,
+            "status_transakcije": status_transakcije
+        })
+
+    return ispravne, ishodi
+
+
+def uvezi_fakture_sa_placanjem(
+    stavke: List[Any],
+    kljuc_idempotencije: Optional[str] = None,
+    velicina_serije: Optional[int] = None,
+    mikroservis_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Uvoz više faktura sa plaćanjem. Ispravne stavke se dele u serije od
+    `velicina_serije`; svaka serija je zasebna saga (BatchFakturaSagaOrchestrator),
+    pa neuspeh jedne serije ne poništava ostale.
+    Sa ključem idempotencije ponovljen zahtev vraća postojeće sage serija;
+    stavke serije čija saga još izvršava lokalne korake su u_obradi.
+
+    Returns:
+        {'ukupno', 'kreirano', 'u_obradi', 'neuspesno', 'stavke': [ishod po stavci], 'sage': [saga_id]}
+    """
+    velicina_serije = velicina_serije or getattr(settings, 'SAGA_VELICINA_SERIJE', VELICINA_SERIJE)
+    ispravne, ishodi = _proveri_stavke(stavke)
+    sage = []
+    for broj, pocetak in enumerate(range(0, len(ispravne), velicina_serije)):
+        serija = ispravne[pocetak:pocetak + velicina_serije]
+        orkestrator = BatchFakturaSagaOrchestrator(mikroservis_url)
+        success, result = orkestrator.pokreni(
+            {"stavke": serija},
+            f"{kljuc_idempotencije}:{broj}" if kljuc_idempotencije else None
+        )
+        if result.get('saga_id'):
+            sage.append(result['saga_id'])
+
+        if not success:
+            for stavka in serija:
+                ishodi[stavka['indeks']] = {
+                    "indeks": stavka['indeks'], "status": "u_obradi" if result.get('u_toku') else "neuspesna",
+                    "error": result['error'], "saga_id": result.get('saga_id')
+                }
+            continue
+        for upisana in result['stavke']:
+            influxdb_status = upisana.get('influxdb_status', result['influxdb_status'])
+            ishodi[upisana['indeks']] = {
+                **upisana,
+                # Stavke koje je mikroservis odbio su već kompenzovane (ponovljen zahtev)
+                "status": "kompenzovana" if influxdb_status == 'otkazan' else "kreirana",
+                "saga_id": result['saga_id'],
+                "influxdb_status": influxdb_status
+            }
+        for greska in result['greske']:
+            ishodi[greska['indeks']] = {**greska, "status": "neuspesna", "saga_id": result['saga_id']}
+
+    kreirano = sum(1 for ishod in ishodi.values() if ishod['status'] == 'kreirana')
+    u_obradi = sum(1 for ishod in ishodi.values() if ishod['status'] == 'u_obradi')
+    return {
+        "ukupno": len(stavke),
+        "kreirano": kreirano,
+        "u_obradi": u_obradi,
+        "neuspesno": len(stavke) - kreirano - u_obradi,
+        "stavke": [ishodi[indeks] for indeks in sorted(ishodi)],
+        "sage": sage
+    }
+
+
+# ========== POZADINSKI POSLOVI ==========
+
+def zakazi_slanje(sifra_sg):
+    return zakazi(POSAO_SLANJE, {'sifra_sg': sifra_sg}, kljuc=kljuc_slanja(sifra_sg), max_pokusaja=1, jedinstven=True)
+
+
+def zakazi_kompenzaciju(sifra_sg):
+    return zakazi(
+        POSAO_KOMPENZACIJA, {'sifra_sg': sifra_sg},
+        kljuc=kljuc_kompenzacije(sifra_sg), max_pokusaja=5, jedinstven=True
+    )
+
+
+def zakazi_oporavak():
+    return zakazi(
+        POSAO_OPORAVAK, kljuc=POSAO_OPORAVAK, jedinstven=True,
+        za=getattr(settings, 'SAGA_OPORAVAK_INTERVAL', 60)
+    )
+
+
+@posao(POSAO_SLANJE)
+def posao_slanja(posao_obj):
+    """Parametri: sifra_sg. Šalje događaj sage koja čeka slanje."""
+    saga = Saga.objects.filter(sifra_sg=posao_obj.parametri['sifra_sg'], status='ceka_dogadjaj').first()
+    if saga:
+        BaseSagaOrchestrator.iz_sage(saga).posalji_dogadjaj(posao_obj)
+
+
+@posao(POSAO_KOMPENZACIJA)
+def posao_kompenzacije(posao_obj):
+    """Parametri: sifra_sg. Neuspela kompenzacija se ponavlja sa odlaganjem (job_service)."""
+    saga = Saga.objects.filter(sifra_sg=posao_obj.parametri['sifra_sg'], status='kompenzacija').first()
+    if saga:
+        BaseSagaOrchestrator.iz_sage(saga).kompenzuj()
+
+
+def oporavi_sage():
+    """
+    Nastavlja sage bez promene duže od SAGA_ISTEK sekundi:
+    - pokrenuta: proces je pao pre commit-a lokalnih koraka, koraci se ponavljaju
+    - ceka_dogadjaj / kompenzacija: posao je izgubljen, zakazuje se ponovo
+    Vraća broj nastavljenih saga po statusu.
+    """
+    sada = timezone.now()
+    granica = sada - timedelta(seconds=getattr(settings, 'SAGA_ISTEK', 300))
+    zaglavljene = list(
+        Saga.objects.filter(status__in=NEZAVRSENI_STATUSI, azurirano__lt=granica).order_by('sifra_sg')[:500]
+    )
+    aktivni_poslovi = set(
+        Posao.objects.filter(
+            status__in=AKTIVNI_STATUSI, tip__in=(POSAO_SLANJE, POSAO_KOMPENZACIJA)
+        ).values_list('kljuc', flat=True)
+    )
+
+    nastavljeno = {status_sage: 0 for status_sage in NEZAVRSENI_STATUSI}
+    for saga in zaglavljene:
+        if saga.status == 'pokrenuta':
+            # Uslovni UPDATE: sagu nastavlja samo jedan radnik
+            preuzeta = Saga.objects.filter(
+                sifra_sg=saga.sifra_sg, status='pokrenuta', azurirano=saga.azurirano
+            ).update(azurirano=sada)
+            if preuzeta:
+                orkestrator = BaseSagaOrchestrator.iz_sage(saga)
+                orkestrator.log_step("SAGA_RESUME", "INFO", "Nastavak sage posle prekida")
+                orkestrator._izvrsi_lokalno()
+                nastavljeno['pokrenuta'] += 1
+        elif saga.status == 'ceka_dogadjaj' and kljuc_slanja(saga.sifra_sg) not in aktivni_poslovi:
+            zakazi_slanje(saga.sifra_sg)
+            nastavljeno['ceka_dogadjaj'] += 1
+        elif saga.status == 'kompenzacija' and kljuc_kompenzacije(saga.sifra_sg) not in aktivni_poslovi:
+            zakazi_kompenzaciju(saga.sifra_sg)
+            nastavljeno['kompenzacija'] += 1
+
+    if any(nastavljeno.values()):
+        logger.warning(f"Nastavljene zaglavljene sage: {nastavljeno}")
+    return nastavljeno
+
+
+@posao(POSAO_OPORAVAK)
+def posao_oporavka(posao_obj):
+    """Periodično nastavlja zaglavljene sage dok god ima nezavršenih (ponovo se zakazuje sa novom sagom)."""
+    oporavi_sage()
+    if Saga.objects.filter(status__in=NEZAVRSENI_STATUSI).exists():
+        nastavi(posao_obj, getattr(settings, 'SAGA_OPORAVAK_INTERVAL', 60))
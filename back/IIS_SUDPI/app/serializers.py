@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from decimal import Decimal
 from django.utils import timezone
 from .models import Faktura, Vozac, Voznja, User, Dobavljac, Transakcija, Ugovor, Penal, StavkaFakture, Proizvod, Poseta, Reklamacija, Skladiste, Artikal, Zalihe, Popust, Temperatura, Notifikacija, Vozilo, Servis, Ruta, Isporuka, Upozorenje, voziloOmogucavaTemperatura, Izvestaj, Sertifikat, Rampa, TerminUtovara
+from .services.sifra_service import dodeli_sifru
 
 class RegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
@@ -251,15 +252,9 @@ class SkladisteSerializer(serializers.ModelSerializer):
         fields = ['sifra_s', 'mesto_s', 'status_rizika_s', 'poslednja_temperatura']
     
     def get_poslednja_temperatura(self, obj):
-        """Vraća poslednju izmerenu temperaturu za skladište"""
-        from .models import Temperatura
-        
-        poslednja_temp = Temperatura.objects.filter(
-            skladiste=obj
-        ).order_by('-vreme_merenja').first()
-        
-        if poslednja_temp:
-            return float(poslednja_temp.vrednost)
+        """Vraća poslednju izmerenu temperaturu za skladište (sačuvanu na skladištu)"""
+        if obj.poslednja_temperatura_s is not None:
+            return float(obj.poslednja_temperatura_s)
         return None
 
 class ArtikalSerializer(serializers.ModelSerializer):
@@ -299,13 +294,8 @@ class DodajSkladisteSerializer(serializers.Serializer):
         return value
     
     def create(self, validated_data):
-        # Automatski generiši šifru skladišta
-        from django.db.models import Max
-        max_sifra = Skladiste.objects.aggregate(Max('sifra_s'))['sifra_s__max'] or 0
-        nova_sifra = max_sifra + 1
-        
         skladiste = Skladiste.objects.create(
-            sifra_s=nova_sifra,
+            sifra_s=dodeli_sifru(Skladiste),
             mesto_s=validated_data['mesto_s'],
             status_rizika_s=validated_data['status_rizika_s']
         )
@@ -349,6 +339,7 @@ class DodajArtikalSerializer(serializers.Serializer):
             }
 
 class RizicniArtikalSerializer(serializers.ModelSerializer):
+    status_trajanja = serializers.SerializerMethodField()
     popust_cena = serializers.SerializerMethodField()
     dani_do_isteka = serializers.SerializerMethodField()
     
@@ -356,11 +347,21 @@ class RizicniArtikalSerializer(serializers.ModelSerializer):
         model = Artikal
         fields = ['sifra_a', 'naziv_a', 'osnovna_cena_a', 'rok_trajanja_a', 'status_trajanja', 'popust_cena', 'dani_do_isteka']
     
+    def get_status_trajanja(self, obj):
+        """Izvedeni status (anotacija izvedeni_status) ima prednost nad sačuvanim"""
+        return getattr(obj, 'izvedeni_status', obj.status_trajanja)
+    
     def get_popust_cena(self, obj):
         """Vraća cenu sa popustom ako postoji aktivan popust"""
         from datetime import date
         from .models import Popust
         
+        # Aktivni popusti učitani kroz prefetch_related (to_attr='aktivni_popusti')
+        if hasattr(obj, 'aktivni_popusti'):
+            if obj.aktivni_popusti:
+                return float(obj.aktivni_popusti[0].predlozena_cena_a)
+            return None
+        
         danas = date.today()
         aktivan_popust = Popust.objects.filter(
             artikli=obj,
@@ -0,0 +1,154 @@
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from app.models import Faktura, Dobavljac, DnevniZbirFaktura
+
+logger = logging.getLogger(__name__)
+
+BROJ_MESECI_TROSKOVA = 6
+PERIOD_PENALA_DANA = 180
+PERIOD_ISPLATA_DANA = 30
+LIMIT_ISPLATA = 10
+
+
+def _poslednji_meseci(danas, broj_meseci=BROJ_MESECI_TROSKOVA):
+    """
+    Vraća listu (pocetak, kraj) kalendarskih meseci, od najstarijeg do tekućeg.
+    Kraj je prvi dan sledećeg meseca (ekskluzivno).
+    """
+    meseci = []
+    pocetak = danas.replace(day=1)
+    for _ in range(broj_meseci):
+        kraj = (pocetak.replace(day=28) + timedelta(days=4)).replace(day=1)
+        meseci.append((pocetak, kraj))
+        pocetak = (pocetak - timedelta(days=1)).replace(day=1)
+    meseci.reverse()
+    return meseci
+
+
+def izracunaj_pregled_i_troskove(danas=None):
+    """
+    Pregled finansija i troškovi po mesecima u JEDNOM upitu nad dnevnim
+    zbirovima faktura (DnevniZbirFaktura), bez skeniranja istorije faktura.
+    """
+    danas = danas or date.today()
+    meseci = _poslednji_meseci(danas)
+
+    agregati = {
+        'ukupno_placeno': Sum('ukupan_iznos', filter=Q(status_f='isplacena')),
+        'na_cekanju': Sum('ukupan_iznos', filter=Q(status_f__in=['primljena', 'verifikovana'])),
+        'broj_placanja': Sum('broj_placanja'),
+        'ukupno_dana_placanja': Sum('ukupno_dana_placanja'),
+    }
+    for indeks, (pocetak, kraj) in enumerate(meseci):
+        agregati[f'mesec_{indeks}'] = Sum('ukupan_iznos', filter=Q(
+            status_f='isplacena',
+            datum__gte=pocetak,
+            datum__lt=kraj,
+        ))
+
+    rezultat = DnevniZbirFaktura.objects.aggregate(**agregati)
+
+    broj_placanja = rezultat['broj_placanja'] or 0
+    pregled_finansija = {
+        'ukupno_placeno': float(rezultat['ukupno_placeno'] or Decimal('0.00')),
+        'na_cekanju': float(rezultat['na_cekanju'] or Decimal('0.00')),
+        'prosecno_vreme_placanja': round(rezultat['ukupno_dana_placanja'] / broj_placanja) if broj_placanja > 0 else 0,
+    }
+
+    troskovi_po_mesecima = [
+        {
+            'mesec': pocetak.strftime('%m/%Y'),
+            'iznos': float(rezultat[f'mesec_{indeks}'] or Decimal('0.00')),
+        }
+        for indeks, (pocetak, _) in enumerate(meseci)
+    ]
+
+    return pregled_finansija, troskovi_po_mesecima
+
+
+def izracunaj_profitabilnost_dobavljaca(danas=None):
+    """
+    Profitabilnost izabranih dobavljača u JEDNOM upitu:
+    broj aktivnih ugovora i penala iz poslednjih 6 meseci računaju se anotacijom
+    (penali se čitaju iz dnevnih zbirova penala).
+    """
+    danas = danas or date.today()
+    pre_6_meseci = danas - timedelta(days=PERIOD_PENALA_DANA)
+
+    dobavljaci = Dobavljac.objects.filter(izabran=True).annotate(
+        aktivni_ugovori=Count(
+            'ugovori', filter=Q(ugovori__status_u='aktivan'), distinct=True
+        ),
+        penali_count=Coalesce(Sum(
+            'ugovori__zbirovi_penala__broj_penala',
+            filter=Q(ugovori__zbirovi_penala__datum__gte=pre_6_meseci)
+        ), 0),
+    ).values('naziv', 'ocena', 'aktivni_ugovori', 'penali_count')
+
+    dobavljaci_profitabilnost = []
+    for dobavljac in dobavljaci:
+        # Računamo profitabilnost: (ocena * 10) + (aktivni_ugovori * 5) - (penali * 15)
+        profitabilnost = (
+            (float(dobavljac['ocena']) * 10)
+            + (dobavljac['aktivni_ugovori'] * 5)
+            - (dobavljac['penali_count'] * 15)
+        )
+        profitabilnost = max(0, min(100, profitabilnost))  # Ograniči na 0-100%
+
+        dobavljaci_profitabilnost.append({
+            'name': dobavljac['naziv'],
+            'profitability': f"{profitabilnost:.0f}%",
+            '_vrednost': profitabilnost,
+        })
+
+    dobavljaci_profitabilnost.sort(key=lambda x: x['_vrednost'], reverse=True)
+    for stavka in dobavljaci_profitabilnost:
+        del stavka['_vrednost']
+
+    return dobavljaci_profitabilnost
+
+
+def izracunaj_nadolazece_isplate(danas=None):
+    """
+    Fakture koje treba isplatiti u narednih 30 dana (jedan upit, samo potrebne kolone).
+    """
+    danas = danas or date.today()
+    za_30_dana = danas + timedelta(days=PERIOD_ISPLATA_DANA)
+
+    fakture_za_isplatu = Faktura.objects.filter(
+        status_f__in=['primljena', 'verifikovana'],
+        rok_placanja_f__lte=za_30_dana
+    ).order_by('rok_placanja_f').values(
+        'sifra_f', 'iznos_f', 'ugovor__dobavljac__naziv'
+    )[:LIMIT_ISPLATA]
+
+    return [
+        {
+            'id': str(faktura['sifra_f']),
+            'supplier': faktura['ugovor__dobavljac__naziv'],
+            'amount': f"{float(faktura['iznos_f']):.0f}€"
+        }
+        for faktura in fakture_za_isplatu
+    ]
+
+
+def izracunaj_dashboard_finansija(danas=None):
+    """
+    Sastavlja sve panele dashboard-a finansijskog analitičara.
+    Ukupan broj upita je konstantan (3) bez obzira na broj faktura i dobavljača;
+    pregled i troškovi se čitaju iz zbirnih tabela (services/finance_rollup_service.py).
+    """
+    danas = danas or date.today()
+    pregled_finansija, troskovi_po_mesecima = izracunaj_pregled_i_troskove(danas)
+
+    return {
+        'pregled_finansija': pregled_finansija,
+        'profitabilnost_dobavljaca': izracunaj_profitabilnost_dobavljaca(danas),
+        'nadolazece_isplate': izracunaj_nadolazece_isplate(danas),
+        'vizualizacija_troskova': troskovi_po_mesecima,
+    }
@@ -0,0 +1,155 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from app.models import EmailPoruka, Posao
+from app.services.job_service import nastavi, posao, zakazi
+
+logger = logging.getLogger(__name__)
+
+# Email outbox umesto send_mail u toku zahteva.
+# - posalji_email upisuje poruku u email_poruka (u transakciji pozivaoca) i
+#   posle commit-a budi posao slanja; zahtev ne čeka SMTP
+# - posao preuzima seriju dospelih poruka (EMAIL_SERIJA) i šalje je preko
+#   jedne otvorene SMTP veze; preuzimanje (uslovni UPDATE) pomera
+#   sledeci_pokusaj za EMAIL_ZAKUP sekundi, pa poruku ne šalju dva radnika,
+#   a poruka radnika koji je pao posle isteka zakupa ponovo dospeva
+# - neuspela poruka se ponavlja posle 30, 60, 120... sekundi (najviše sat),
+#   do EMAIL_MAX_POKUSAJA pokušaja
+# - posao se ponovo zakazuje dok god ima poruka na čekanju
+
+POSAO_SLANJE = 'email_slanje'
+
+
+def posalji_email(primalac, naslov, sadrzaj, posiljalac=None):
+    """Stavlja poruku u red za slanje; vraća EmailPoruka."""
+    poruka = EmailPoruka.objects.create(
+        primalac=primalac,
+        posiljalac=posiljalac or settings.DEFAULT_FROM_EMAIL,
+        naslov=naslov[:255],
+        sadrzaj=sadrzaj,
+    )
+    transaction.on_commit(zakazi_slanje)
+    return poruka
+
+
+def posalji_emailove(poruke, posiljalac=None):
+    """Više poruka [(primalac, naslov, sadrzaj)] u red jednim INSERT-om; vraća broj poruka."""
+    posiljalac = posiljalac or settings.DEFAULT_FROM_EMAIL
+    upisane = EmailPoruka.objects.bulk_create([
+        EmailPoruka(primalac=primalac, posiljalac=posiljalac, naslov=naslov[:255], sadrzaj=sadrzaj)
+        for primalac, naslov, sadrzaj in poruke
+    ])
+    if upisane:
+        transaction.on_commit(zakazi_slanje)
+    return len(upisane)
+
+
+def zakazi_slanje():
+    """
+    Budi posao slanja: posao koji čeka (npr. odloženo ponavljanje) pomera na
+    sada, a ako nijedan ne čeka, dodaje novi. Posao koji se upravo izvršava ne
+    računa se, jer je možda već proverio red pre nove poruke.
+    """
+    sada = timezone.now()
+    cekaju = Posao.objects.filter(tip=POSAO_SLANJE, status='na_cekanju')
+    if cekaju.exists():
+        cekaju.filter(zakazano_za__gt=sada).update(zakazano_za=sada)
+        return
+    zakazi(POSAO_SLANJE, kljuc=POSAO_SLANJE, max_pokusaja=5)
+
+
+def _preuzmi_seriju(velicina):
+    """
+    Preuzima do `velicina` dospelih poruka. Kandidati se čitaju bez
+    zaključavanja (Oracle ne podržava SELECT ... FOR UPDATE sa ograničenjem
+    broja redova); poruka se preuzima uslovnim UPDATE-om koji pomera
+    sledeci_pokusaj za zakup, pa je dobija tačno jedan radnik.
+    """
+    sada = timezone.now()
+    zakup = sada + timedelta(seconds=getattr(settings, 'EMAIL_ZAKUP', 300))
+    kandidati = list(
+        EmailPoruka.objects.filter(
+            status='na_cekanju', sledeci_pokusaj__lte=sada
+        ).order_by('sledeci_pokusaj', 'sifra_em').values_list('sifra_em', flat=True)[:velicina]
+    )
+    sifre = [
+        sifra_em for sifra_em in kandidati
+        if EmailPoruka.objects.filter(
+            sifra_em=sifra_em, status='na_cekanju', sledeci_pokusaj__lte=sada
+        ).update(sledeci_pokusaj=zakup)
+    ]
+    if not sifre:
+        return []
+    return list(EmailPoruka.objects.filter(sifra_em__in=sifre).order_by('sifra_em'))
+
+
+def _neuspesna(poruka, greska):
+    pokusaji = poruka.broj_pokusaja + 1
+    izmene = {'broj_pokusaja': pokusaji, 'greska': greska[:4000]}
+    if pokusaji >= getattr(settings, 'EMAIL_MAX_POKUSAJA', 5):
+        izmene['status'] = 'neuspesna'
+        logger.error(f"Email {poruka.sifra_em} za {poruka.primalac} nije poslat posle {pokusaji} pokušaja: {greska}")
+    else:
+        izmene['sledeci_pokusaj'] = timezone.now() + timedelta(seconds=min(30 * 2 ** (pokusaji - 1), 3600))
+    EmailPoruka.objects.filter(sifra_em=poruka.sifra_em).update(**izmene)
+
+
+def posalji_seriju(poruke):
+    """Šalje poruke preko jedne SMTP veze. Vraća broj poslatih."""
+    try:
+        veza = get_connection(fail_silently=False)
+        veza.open()
+    except Exception as e:
+        for poruka in poruke:
+            _neuspesna(poruka, f"SMTP veza: {str(e)}")
+        return 0
+
+    poslate = []
+    try:
+        for poruka in poruke:
+            try:
+                veza.send_messages([
+                    EmailMessage(poruka.naslov, poruka.sadrzaj, poruka.posiljalac, [poruka.primalac])
+                ])
+                poslate.append(poruka.sifra_em)
+            except Exception as e:
+                _neuspesna(poruka, str(e))
+    finally:
+        try:
+            veza.close()
+        except Exception:
+            pass
+
+    EmailPoruka.objects.filter(sifra_em__in=poslate).update(status='poslata', poslato=timezone.now(), greska='')
+    return len(poslate)
+
+
+@posao(POSAO_SLANJE)
+def posao_slanja(posao_obj):
+    """Šalje dospele poruke u serijama; ponovo se zakazuje za sledeću poruku na čekanju."""
+    velicina = getattr(settings, 'EMAIL_SERIJA', 50)
+    pocetak = time.monotonic()
+    poslato = 0
+    while True:
+        poruke = _preuzmi_seriju(velicina)
+        if not poruke:
+            break
+        poslato += posalji_seriju(poruke)
+        if time.monotonic() - pocetak > getattr(settings, 'EMAIL_TRAJANJE_KORAKA', 60):
+            # Ne zauzima nit radnika predugo; nastavlja odmah u sledećem koraku
+            logger.info(f"Poslato {poslato} email poruka, slanje se nastavlja")
+            nastavi(posao_obj, 0)
+
+    if poslato:
+        logger.info(f"Poslato {poslato} email poruka")
+    sledeca = EmailPoruka.objects.filter(status='na_cekanju').aggregate(sledeca=Min('sledeci_pokusaj'))['sledeca']
+    if sledeca is not None:
+        nastavi(posao_obj, max((sledeca - timezone.now()).total_seconds(), 1))
+
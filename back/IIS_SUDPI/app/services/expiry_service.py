@@ -0,0 +1,326 @@
+import logging
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, When, Value, CharField, Q, Count
+
+from app.models import Artikal, Popust, KontrolnaTacka
+from app.services.response_cache import povecaj_verziju
+from app.services.sifra_service import dodeli_sifre
+
+logger = logging.getLogger(__name__)
+
+# Status trajanja artikla se izvodi iz roka trajanja:
+#   rok < danas              -> 'istekao'
+#   rok <= danas + 7 dana    -> 'istice'
+#   inače                    -> 'aktivan'
+# Čitanje koristi Case/When anotaciju (bez upisa), a sačuvani status_trajanja
+# se usklađuje zasebnim poslom sa po jednim UPDATE ... WHERE upitom po prelazu.
+
+DANA_DO_ISTEKA = 7
+POPUST_FAKTOR = Decimal('0.5')
+STATUSI = ('istekao', 'istice', 'aktivan')
+KONTROLNA_TACKA = 'provera_rokova'
+
+
+def granice_statusa(danas=None):
+    danas = danas or date.today()
+    return danas, danas + timedelta(days=DANA_DO_ISTEKA)
+
+
+def izracunaj_status(rok_trajanja, danas=None):
+    """Isti status kao izraz_statusa_trajanja, izračunat u Python-u za jedan artikal."""
+    danas, datum_za_7_dana = granice_statusa(danas)
+    if rok_trajanja < danas:
+        return 'istekao'
+    if rok_trajanja <= datum_za_7_dana:
+        return 'istice'
+    return 'aktivan'
+
+
+def izraz_statusa_trajanja(danas=None):
+    """Case/When izraz koji u bazi računa status trajanja na osnovu rok_trajanja_a."""
+    danas, datum_za_7_dana = granice_statusa(danas)
+    return Case(
+        When(rok_trajanja_a__lt=danas, then=Value('istekao')),
+        When(rok_trajanja_a__lte=datum_za_7_dana, then=Value('istice')),
+        default=Value('aktivan'),
+        output_field=CharField(),
+    )
+
+
+def uslov_statusa(status_trajanja, danas=None, prefiks=''):
+    """Q uslov nad rok_trajanja_a ekvivalentan izvedenom statusu (koristi indeks na roku)."""
+    danas, datum_za_7_dana = granice_statusa(danas)
+    polje = f'{prefiks}rok_trajanja_a'
+    if status_trajanja == 'istekao':
+        return Q(**{f'{polje}__lt': danas})
+    if status_trajanja == 'istice':
+        return Q(**{f'{polje}__gte': danas, f'{polje}__lte': datum_za_7_dana})
+    return Q(**{f'{polje}__gt': datum_za_7_dana})
+
+
+def artikli_sa_statusom(queryset=None, danas=None):
+    """Anotira artikle izvedenim statusom (izvedeni_status) - čisto čitanje."""
+    queryset = Artikal.objects.all() if queryset is None else queryset
+    return queryset.annotate(izvedeni_status=izraz_statusa_trajanja(danas))
+
+
+def primeni_prelaze_statusa(danas=None, queryset=None):
+    """
+    Usklađuje sačuvani status_trajanja sa izvedenim statusom.
+    Jedan UPDATE ... WHERE po ciljnom statusu, bez učitavanja artikala.
+    Vraća (broj_promenjenih, id-jevi artikala koji su upravo prešli u 'istice').
+    """
+    queryset = Artikal.objects.all() if queryset is None else queryset
+    promenjeno = 0
+
+    with transaction.atomic():
+        novi_isticu = list(
+            queryset.filter(uslov_statusa('istice', danas)).exclude(
+                status_trajanja='istice'
+            ).values_list('sifra_a', flat=True)
+        )
+
+        for status_trajanja in STATUSI:
+            promenjeno += queryset.filter(uslov_statusa(status_trajanja, danas)).exclude(
+                status_trajanja=status_trajanja
+            ).update(status_trajanja=status_trajanja)
+
+    if promenjeno:
+        # update() ne okida signale, pa keš odgovora invalidiramo ručno
+        povecaj_verziju(Artikal)
+        logger.info(f"Prelazi statusa trajanja: {promenjeno} artikala promenjeno")
+
+    return promenjeno, novi_isticu
+
+
+def artikli_bez_aktivnog_popusta(artikli_ids, danas=None):
+    """Id-jevi artikala iz liste koji nemaju popust koji važi danas (jedan upit)."""
+    danas = danas or date.today()
+    sa_popustom = set(
+        Popust.artikli.through.objects.filter(
+            artikal_id__in=artikli_ids,
+            popust__datum_pocetka_vazenja_p__lte=danas,
+            popust__datum_kraja_vazenja_p__gte=danas,
+        ).values_list('artikal_id', flat=True)
+    )
+    return [sifra_a for sifra_a in artikli_ids if sifra_a not in sa_popustom]
+
+
+def kreiraj_popuste(artikli_ids, danas=None, batch_size=1000):
+    """
+    Kreira popuste (50% osnovne cene, važe od danas do roka trajanja) za artikle
+    koji nemaju aktivan popust. Popusti i M2M veze se upisuju sa bulk_create,
+    a ponovno pokretanje ne pravi duplikate. Vraća broj kreiranih popusta.
+
+    Šifre popusta se dodeljuju unapred (sifra_service), jer bulk_create na
+    Oracle-u ne vraća šifre upisanih redova, a potrebne su za M2M veze.
+    """
+    danas = danas or date.today()
+    artikli_ids = list(artikli_ids)
+    if not artikli_ids:
+        return 0
+
+    kreirano = 0
+    for pocetak in range(0, len(artikli_ids), batch_size):
+        deo = artikli_bez_aktivnog_popusta(artikli_ids[pocetak:pocetak + batch_size], danas)
+        if not deo:
+            continue
+
+        artikli = list(
+            Artikal.objects.filter(sifra_a__in=deo).values_list(
+                'sifra_a', 'osnovna_cena_a', 'rok_trajanja_a'
+            )
+        )
+        with transaction.atomic():
+            popusti = Popust.objects.bulk_create([
+                Popust(
+                    sifra_p=sifra_p,
+                    predlozena_cena_a=osnovna_cena * POPUST_FAKTOR,
+                    datum_pocetka_vazenja_p=danas,
+                    datum_kraja_vazenja_p=rok_trajanja,
+                )
+                for sifra_p, (_, osnovna_cena, rok_trajanja) in zip(dodeli_sifre(Popust, len(artikli)), artikli)
+            ], batch_size=batch_size)
+            Popust.artikli.through.objects.bulk_create([
+                Popust.artikli.through(popust_id=popust.pk, artikal_id=sifra_a)
+                for popust, (sifra_a, _, _) in zip(popusti, artikli)
+            ], batch_size=batch_size)
+        kreirano += len(popusti)
+
+    if kreirano:
+        # bulk_create ne okida signale (ni m2m_changed)
+        povecaj_verziju(Popust)
+        povecaj_verziju(Artikal)
+        logger.info(f"Kreirano {kreirano} popusta za artikle koji ističu")
+
+    return kreirano
+
+
+def uskladi_artikle(queryset=None, danas=None):
+    """Prelazi statusa + popusti za artikle koji su upravo počeli da ističu."""
+    promenjeno, novi_isticu = primeni_prelaze_statusa(danas, queryset)
+    kreirano = kreiraj_popuste(novi_isticu, danas)
+    return promenjeno, kreirano
+
+
+def uskladi_artikal(artikal, danas=None):
+    """
+    Usklađuje jedan artikal (koristi se iz post_save signala).
+    Bez dodatnih upita ako je sačuvani status već ispravan.
+    """
+    novi_status = izracunaj_status(artikal.rok_trajanja_a, danas)
+    if novi_status == artikal.status_trajanja:
+        return False
+
+    uskladi_artikle(Artikal.objects.filter(pk=artikal.pk), danas)
+    artikal.status_trajanja = novi_status
+    return True
+
+
+# ========== NOĆNA PROVERA U SERIJAMA ==========
+
+def _osnovni_queryset(danas, since):
+    """
+    Artikli čiji se status mogao promeniti od datuma since: status se menja kada
+    rok prođe (rok < danas) ili uđe u period od 7 dana (rok <= danas + 7), pa su
+    relevantni samo rokovi od since do danas + 7. Bez since - svi artikli.
+    """
+    queryset = Artikal.objects.all()
+    if since:
+        _, datum_za_7_dana = granice_statusa(danas)
+        queryset = queryset.filter(rok_trajanja_a__gte=since, rok_trajanja_a__lte=datum_za_7_dana)
+    return queryset
+
+
+def _ucitaj_kontrolnu_tacku():
+    return KontrolnaTacka.objects.filter(naziv=KONTROLNA_TACKA).first()
+
+
+def _sacuvaj_kontrolnu_tacku(**stanje):
+    KontrolnaTacka.objects.update_or_create(naziv=KONTROLNA_TACKA, defaults={'stanje': stanje})
+
+
+def odredi_since(danas=None):
+    """Datum poslednje uspešne provere (za inkrementalno pokretanje), ili None."""
+    kontrolna_tacka = _ucitaj_kontrolnu_tacku()
+    if kontrolna_tacka and kontrolna_tacka.stanje.get('poslednja_uspesna'):
+        return date.fromisoformat(kontrolna_tacka.stanje['poslednja_uspesna'])
+    return None
+
+
+def pregled_promena(danas=None, since=None):
+    """Dry-run: broj artikala po prelazu i broj popusta koji bi bili kreirani, bez upisa."""
+    danas = danas or date.today()
+    queryset = _osnovni_queryset(danas, since)
+
+    prelazi = queryset.aggregate(**{
+        status_trajanja: Count('sifra_a', filter=uslov_statusa(status_trajanja, danas) & ~Q(status_trajanja=status_trajanja))
+        for status_trajanja in STATUSI
+    })
+    novi_isticu = list(
+        queryset.filter(uslov_statusa('istice', danas)).exclude(
+            status_trajanja='istice'
+        ).values_list('sifra_a', flat=True)
+    )
+    return {
+        'prelazi': prelazi,
+        'promenjeno': sum(prelazi.values()),
+        'popusta': len(artikli_bez_aktivnog_popusta(novi_isticu, danas)),
+    }
+
+
+def pokreni_proveru_rokova(danas=None, batch_size=1000, since=None, nastavi=True, izvestaj=None):
+    """
+    Usklađuje statuse i kreira popuste u serijama po sifra_a.
+
+    - svaka serija je zasebna transakcija (kratko držanje zaključavanja)
+    - posle svake serije čuva se kontrolna tačka, pa se prekinuto pokretanje
+      istog dana nastavlja od poslednje obrađene serije (nastavi=True)
+    - ponovno pokretanje je idempotentno (prelazi i popusti se ne ponavljaju)
+
+    izvestaj je opciona funkcija koja prima poruku o napretku.
+    Vraća rečnik sa brojačima i trajanjem faza (u sekundama).
+    """
+    danas = danas or date.today()
+    izvestaj = izvestaj or (lambda poruka: None)
+    faze = {'odabir': 0.0, 'prelazi': 0.0, 'popusti': 0.0}
+    rezultat = {'promenjeno': 0, 'popusta': 0, 'serija': 0, 'nastavljeno_od': None}
+
+    poslednji_id = 0
+    kontrolna_tacka = _ucitaj_kontrolnu_tacku()
+    if nastavi and kontrolna_tacka:
+        stanje = kontrolna_tacka.stanje
+        if not stanje.get('zavrseno') and stanje.get('datum') == danas.isoformat():
+            poslednji_id = stanje.get('poslednji_id', 0)
+            since = date.fromisoformat(stanje['since']) if stanje.get('since') else None
+            rezultat['nastavljeno_od'] = poslednji_id
+            izvestaj(f"Nastavljam prekinutu proveru od artikla {poslednji_id}")
+    poslednja_uspesna = kontrolna_tacka.stanje.get('poslednja_uspesna') if kontrolna_tacka else None
+
+    queryset = _osnovni_queryset(danas, since)
+
+    while True:
+        pocetak = time.perf_counter()
+        ids = list(
+            queryset.filter(sifra_a__gt=poslednji_id).order_by('sifra_a').values_list(
+                'sifra_a', flat=True
+            )[:batch_size]
+        )
+        faze['odabir'] += time.perf_counter() - pocetak
+        if not ids:
+            break
+
+        serija = queryset.filter(sifra_a__gt=poslednji_id, sifra_a__lte=ids[-1])
+
+        pocetak = time.perf_counter()
+        promenjeno, novi_isticu = primeni_prelaze_statusa(danas, serija)
+        faze['prelazi'] += time.perf_counter() - pocetak
+
+        pocetak = time.perf_counter()
+        kreirano = kreiraj_popuste(novi_isticu, danas, batch_size)
+        faze['popusti'] += time.perf_counter() - pocetak
+
+        poslednji_id = ids[-1]
+        rezultat['promenjeno'] += promenjeno
+        rezultat['popusta'] += kreirano
+        rezultat['serija'] += 1
+        _sacuvaj_kontrolnu_tacku(
+            datum=danas.isoformat(),
+            since=since.isoformat() if since else None,
+            poslednji_id=poslednji_id,
+            zavrseno=False,
+            poslednja_uspesna=poslednja_uspesna,
+        )
+        izvestaj(
+            f"Serija {rezultat['serija']}: do artikla {poslednji_id}, "
+            f"{promenjeno} prelaza, {kreirano} popusta"
+        )
+
+    _sacuvaj_kontrolnu_tacku(
+        datum=danas.isoformat(),
+        since=since.isoformat() if since else None,
+        poslednji_id=poslednji_id,
+        zavrseno=True,
+        poslednja_uspesna=danas.isoformat(),
+    )
+
+    rezultat['faze'] = faze
+    return rezultat
+
+
+def pregled_stanja(danas=None):
+    """Brojevi artikala po sačuvanom statusu i broj aktivnih popusta."""
+    danas = danas or date.today()
+    stanje = Artikal.objects.aggregate(**{
+        status_trajanja: Count('sifra_a', filter=Q(status_trajanja=status_trajanja))
+        for status_trajanja in STATUSI
+    })
+    stanje['aktivni_popusti'] = Popust.objects.filter(
+        datum_pocetka_vazenja_p__lte=danas,
+        datum_kraja_vazenja_p__gte=danas
+    ).count()
+    return stanje
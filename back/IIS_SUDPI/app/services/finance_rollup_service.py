@@ -0,0 +1,342 @@
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from app.models import (
+    Faktura, StavkaFakture, Penal,
+    DnevniZbirFaktura, DnevniZbirStavki, DnevniZbirPenala,
+)
+
+logger = logging.getLogger(__name__)
+
+# Zbirne tabele se osvežavaju po "korpama" (bucket-ima): svaka izmena izvorne
+# tabele označi korpe koje dotiče, a one se ponovo izračunavaju iz izvornih
+# podataka tek kada se transakcija potvrdi. Ponovno izračunavanje jedne korpe
+# dotiče samo fakture jednog dana/dobavljača/statusa, pa je idempotentno i ne
+# zavisi od veličine istorije.
+
+TABELE = ('fakture', 'stavke', 'penali')
+
+
+def _dan_placanja(datum_t):
+    return timezone.localdate(datum_t) if timezone.is_aware(datum_t) else datum_t.date()
+
+
+def _dani_placanja(redovi):
+    """Vraća (broj_placanja, ukupno_dana) za niz (datum_prijema_f, transakcija__datum_t)."""
+    broj = 0
+    ukupno = 0
+    for datum_prijema, datum_t in redovi:
+        if datum_t is None:
+            continue
+        broj += 1
+        ukupno += (_dan_placanja(datum_t) - datum_prijema).days
+    return broj, ukupno
+
+
+# ========== KLJUČEVI KORPI ==========
+
+def kljuc_fakture(faktura_id):
+    """(datum, dobavljac_id, status_f) za fakturu, ili None ako ne postoji."""
+    return Faktura.objects.filter(pk=faktura_id).values_list(
+        'datum_prijema_f', 'ugovor__dobavljac_id', 'status_f'
+    ).first()
+
+
+def kljucevi_stavki(faktura_id, datum, status_f):
+    """Korpe stavki jedne fakture za zadati datum i status."""
+    proizvodi = StavkaFakture.objects.filter(faktura_id=faktura_id).values_list(
+        'proizvod_id', flat=True
+    ).distinct()
+    return {(datum, proizvod_id, status_f) for proizvod_id in proizvodi}
+
+
+def kljuc_stavke(stavka_id):
+    """(datum, proizvod_id, status_f) za stavku fakture, ili None ako ne postoji."""
+    return StavkaFakture.objects.filter(pk=stavka_id).values_list(
+        'faktura__datum_prijema_f', 'proizvod_id', 'faktura__status_f'
+    ).first()
+
+
+def kljuc_penala(penal_id):
+    """(datum, ugovor_id) za penal, ili None ako ne postoji."""
+    return Penal.objects.filter(pk=penal_id).values_list('datum_p', 'ugovor_id').first()
+
+
+# ========== INKREMENTALNO OSVEŽAVANJE ==========
+
+def osvezi_zbir_faktura(datum, dobavljac_id, status_f):
+    fakture = Faktura.objects.filter(
+        datum_prijema_f=datum, ugovor__dobavljac_id=dobavljac_id, status_f=status_f
+    )
+    agregat = fakture.aggregate(broj=Count('sifra_f'), iznos=Sum('iznos_f'))
+    filter_korpe = dict(datum=datum, dobavljac_id=dobavljac_id, status_f=status_f)
+
+    if not agregat['broj']:
+        DnevniZbirFaktura.objects.filter(**filter_korpe).delete()
+        return
+
+    broj_placanja, ukupno_dana = 0, 0
+    if status_f == 'isplacena':
+        broj_placanja, ukupno_dana = _dani_placanja(
+            fakture.filter(transakcija__isnull=False).values_list(
+                'datum_prijema_f', 'transakcija__datum_t'
+            )
+        )
+
+    DnevniZbirFaktura.objects.update_or_create(**filter_korpe, defaults={
+        'broj_faktura': agregat['broj'],
+        'ukupan_iznos': agregat['iznos'] or Decimal('0.00'),
+        'broj_placanja': broj_placanja,
+        'ukupno_dana_placanja': ukupno_dana,
+    })
+
+
+def osvezi_zbir_stavki(datum, proizvod_id, status_f):
+    agregat = StavkaFakture.objects.filter(
+        faktura__datum_prijema_f=datum, faktura__status_f=status_f, proizvod_id=proizvod_id
+    ).aggregate(
+        broj=Count('sifra_sf'), kolicina=Sum('kolicina_sf'), trosak=Sum('cena_po_jed')
+    )
+    filter_korpe = dict(datum=datum, proizvod_id=proizvod_id, status_f=status_f)
+
+    if not agregat['broj']:
+        DnevniZbirStavki.objects.filter(**filter_korpe).delete()
+        return
+
+    DnevniZbirStavki.objects.update_or_create(**filter_korpe, defaults={
+        'broj_stavki': agregat['broj'],
+        'ukupna_kolicina': agregat['kolicina'] or 0,
+        'ukupan_trosak': agregat['trosak'] or Decimal('0.00'),
+    })
+
+
+def osvezi_zbir_penala(datum, ugovor_id):
+    agregat = Penal.objects.filter(datum_p=datum, ugovor_id=ugovor_id).aggregate(
+        broj=Count('sifra_p'), iznos=Sum('iznos_p')
+    )
+    filter_korpe = dict(datum=datum, ugovor_id=ugovor_id)
+
+    if not agregat['broj']:
+        DnevniZbirPenala.objects.filter(**filter_korpe).delete()
+        return
+
+    DnevniZbirPenala.objects.update_or_create(**filter_korpe, defaults={
+        'broj_penala': agregat['broj'],
+        'ukupan_iznos': agregat['iznos'] or Decimal('0.00'),
+    })
+
+
+def osvezi_zbirove_penala(kljucevi):
+    """Više korpi penala odjednom: jedan grupisani upit i serijski upis zbirova."""
+    kljucevi = set(kljucevi)
+    datumi = {datum for datum, _ in kljucevi}
+    ugovori = {ugovor_id for _, ugovor_id in kljucevi}
+    agregati = {
+        (red['datum_p'], red['ugovor_id']): red
+        for red in Penal.objects.filter(datum_p__in=datumi, ugovor_id__in=ugovori).values(
+            'datum_p', 'ugovor_id'
+        ).annotate(broj=Count('sifra_p'), iznos=Sum('iznos_p')).order_by()
+    }
+    postojeci = {
+        (zbir.datum, zbir.ugovor_id): zbir
+        for zbir in DnevniZbirPenala.objects.filter(datum__in=datumi, ugovor_id__in=ugovori)
+    }
+
+    izmenjeni, novi = [], []
+    for kljuc in kljucevi:
+        red = agregati.get(kljuc)
+        if red is None or not red['broj']:
+            continue
+        zbir = postojeci.get(kljuc) or DnevniZbirPenala(datum=kljuc[0], ugovor_id=kljuc[1])
+        zbir.broj_penala = red['broj']
+        zbir.ukupan_iznos = red['iznos'] or Decimal('0.00')
+        (izmenjeni if zbir.pk else novi).append(zbir)
+
+    with transaction.atomic():
+        DnevniZbirPenala.objects.filter(pk__in=[
+            zbir.pk for kljuc, zbir in postojeci.items() if kljuc in kljucevi and kljuc not in agregati
+        ]).delete()
+        DnevniZbirPenala.objects.bulk_update(izmenjeni, ['broj_penala', 'ukupan_iznos'])
+        DnevniZbirPenala.objects.bulk_create(novi)
+
+
+OSVEZAVANJE = {
+    'fakture': osvezi_zbir_faktura,
+    'stavke': osvezi_zbir_stavki,
+    'penali': osvezi_zbir_penala,
+}
+
+# Osvežavanje više korpi odjednom (npr. posle bulk_create penala)
+OSVEZAVANJE_SERIJSKI = {
+    'penali': osvezi_zbirove_penala,
+}
+
+
+def oznaci_korpe(tabela, kljucevi):
+    """
+    Označava korpe za osvežavanje. Osvežavanje se izvršava posle commit-a,
+    tako da vidi konačno stanje (uključujući kaskadna brisanja).
+    """
+    kljucevi = {kljuc for kljuc in kljucevi if kljuc and None not in kljuc}
+    if not kljucevi:
+        return
+
+    def osvezi():
+        if len(kljucevi) > 1 and tabela in OSVEZAVANJE_SERIJSKI:
+            try:
+                OSVEZAVANJE_SERIJSKI[tabela](kljucevi)
+                return
+            except Exception as e:
+                # Npr. istovremeno upisana ista korpa; pojedinačno osvežavanje je otporno na to
+                logger.warning(f"Serijsko osvežavanje zbirne tabele {tabela} nije uspelo: {str(e)}")
+        for kljuc in kljucevi:
+            try:
+                OSVEZAVANJE[tabela](*kljuc)
+            except Exception as e:
+                logger.error(f"Greška pri osvežavanju zbirne tabele {tabela} {kljuc}: {str(e)}")
+
+    transaction.on_commit(osvezi)
+
+
+# ========== PUNA OBNOVA I PROVERA ==========
+
+def izracunaj_zbirove_faktura():
+    zbirovi = {}
+    for red in Faktura.objects.values(
+        'datum_prijema_f', 'ugovor__dobavljac_id', 'status_f'
+    ).annotate(broj=Count('sifra_f'), iznos=Sum('iznos_f')).order_by():
+        kljuc = (red['datum_prijema_f'], red['ugovor__dobavljac_id'], red['status_f'])
+        zbirovi[kljuc] = {
+            'broj_faktura': red['broj'],
+            'ukupan_iznos': red['iznos'] or Decimal('0.00'),
+            'broj_placanja': 0,
+            'ukupno_dana_placanja': 0,
+        }
+
+    placanja = defaultdict(list)
+    for datum_prijema, dobavljac_id, datum_t in Faktura.objects.filter(
+        status_f='isplacena', transakcija__isnull=False
+    ).values_list('datum_prijema_f', 'ugovor__dobavljac_id', 'transakcija__datum_t').iterator():
+        placanja[(datum_prijema, dobavljac_id, 'isplacena')].append((datum_prijema, datum_t))
+
+    for kljuc, redovi in placanja.items():
+        broj, ukupno = _dani_placanja(redovi)
+        zbirovi[kljuc]['broj_placanja'] = broj
+        zbirovi[kljuc]['ukupno_dana_placanja'] = ukupno
+
+    return zbirovi
+
+
+def izracunaj_zbirove_stavki():
+    return {
+        (red['faktura__datum_prijema_f'], red['proizvod_id'], red['faktura__status_f']): {
+            'broj_stavki': red['broj'],
+            'ukupna_kolicina': red['kolicina'] or 0,
+            'ukupan_trosak': red['trosak'] or Decimal('0.00'),
+        }
+        for red in StavkaFakture.objects.values(
+            'faktura__datum_prijema_f', 'proizvod_id', 'faktura__status_f'
+        ).annotate(
+            broj=Count('sifra_sf'), kolicina=Sum('kolicina_sf'), trosak=Sum('cena_po_jed')
+        ).order_by()
+    }
+
+
+def izracunaj_zbirove_penala():
+    return {
+        (red['datum_p'], red['ugovor_id']): {
+            'broj_penala': red['broj'],
+            'ukupan_iznos': red['iznos'] or Decimal('0.00'),
+        }
+        for red in Penal.objects.values('datum_p', 'ugovor_id').annotate(
+            broj=Count('sifra_p'), iznos=Sum('iznos_p')
+        ).order_by()
+    }
+
+
+# tabela -> (model, polja ključa, funkcija za izračunavanje iz izvornih podataka)
+ZBIRNE_TABELE = {
+    'fakture': (DnevniZbirFaktura, ('datum', 'dobavljac_id', 'status_f'), izracunaj_zbirove_faktura),
+    'stavke': (DnevniZbirStavki, ('datum', 'proizvod_id', 'status_f'), izracunaj_zbirove_stavki),
+    'penali': (DnevniZbirPenala, ('datum', 'ugovor_id'), izracunaj_zbirove_penala),
+}
+
+
+def obnovi_zbirove(tabele=TABELE, batch_size=1000):
+    """
+    Briše i ponovo puni zbirne tabele iz izvornih podataka.
+    Vraća broj upisanih redova po tabeli.
+    """
+    rezultat = {}
+    with transaction.atomic():
+        for tabela in tabele:
+            model, polja, izracunaj = ZBIRNE_TABELE[tabela]
+            model.objects.all().delete()
+            redovi = [
+                model(**dict(zip(polja, kljuc)), **vrednosti)
+                for kljuc, vrednosti in izracunaj().items()
+            ]
+            model.objects.bulk_create(redovi, batch_size=batch_size)
+            rezultat[tabela] = len(redovi)
+    return rezultat
+
+
+def proveri_zbirove(tabele=TABELE):
+    """
+    Upoređuje zbirne tabele sa izvornim podacima.
+    Vraća listu razlika: (tabela, kljuc, ocekivano, trenutno); None znači da red ne postoji.
+    """
+    razlike = []
+    for tabela in tabele:
+        model, polja, izracunaj = ZBIRNE_TABELE[tabela]
+        ocekivano = izracunaj()
+        trenutno = {}
+        for red in model.objects.values(*polja, *[
+            f.attname for f in model._meta.concrete_fields
+            if f.attname not in polja and not f.primary_key
+        ]):
+            kljuc = tuple(red.pop(polje) for polje in polja)
+            trenutno[kljuc] = red
+
+        for kljuc in set(ocekivano) | set(trenutno):
+            vrednosti = ocekivano.get(kljuc)
+            stanje = trenutno.get(kljuc)
+            if vrednosti is None or stanje is None or any(
+                stanje.get(polje) != vrednost for polje, vrednost in vrednosti.items()
+            ):
+                razlike.append((tabela, kljuc, vrednosti, stanje))
+
+    return razlike
+
+
+def popravi_razlike(razlike):
+    """Ponovo izračunava samo korpe u kojima je pronađena razlika."""
+    with transaction.atomic():
+        for tabela, kljuc, _, _ in razlike:
+            OSVEZAVANJE[tabela](*kljuc)
+    return len(razlike)
+
+
+# ========== UPITI NAD ZBIRNIM TABELAMA ==========
+
+def zbir_faktura_za_period(start_date=None, end_date=None, status_f=None):
+    queryset = DnevniZbirFaktura.objects.all()
+    if start_date and end_date:
+        queryset = queryset.filter(datum__gte=start_date, datum__lte=end_date)
+    if status_f and status_f != 'sve':
+        queryset = queryset.filter(status_f=status_f)
+    return queryset
+
+
+def zbir_stavki_za_period(start_date=None, end_date=None, status_f=None):
+    queryset = DnevniZbirStavki.objects.all()
+    if start_date and end_date:
+        queryset = queryset.filter(datum__gte=start_date, datum__lte=end_date)
+    if status_f and status_f != 'sve':
+        queryset = queryset.filter(status_f=status_f)
+    return queryset
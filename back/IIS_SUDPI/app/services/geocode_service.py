@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from app.models import GeokodAdresa
+
+logger = logging.getLogger(__name__)
+
+# Geokodiranje adresa sa kešom u dva nivoa:
+# - LRU u memoriji procesa (GEOKOD_LRU_VELICINA unosa)
+# - tabela geokod_adresa, deljena između procesa i restartova
+# Adresa se normalizuje (mala slova, bez suvišnih razmaka) i zajedno sa
+# kodom države čini ključ; adresa duža od kolone geokod_adresa.adresa se u
+# tabeli čuva kao početak adrese sa SHA-1 hešom cele adrese. Nepronađene
+# adrese se takođe keširaju, ali kraće (GEOKOD_NEGATIVNI_TTL_SATI); greške
+# mreže se ne keširaju.
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_HEADERS = {
+    'User-Agent': 'IIS_SUDPI/1.0 (begovic.in26.2021@uns.ac.rs)'  # nesto za Nominatim
+}
+PODRAZUMEVANA_DRZAVA = 'rs'
+
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+
+
+def nominatim_geokoder(adresa, drzava):
+    """Vraća (lat, lon) ili None ako adresa nije pronađena. Greške mreže propušta dalje."""
+    params = {
+        'q': adresa,
+        'format': 'json',
+        'limit': 1,
+        'countrycodes': drzava
+    }
+    response = requests.get(
+        NOMINATIM_URL, params=params, headers=NOMINATIM_HEADERS,
+        timeout=getattr(settings, 'GEOKOD_TIMEOUT', 10)
+    )
+    response.raise_for_status()
+    data = response.json()
+    if data:
+        return float(data[0]['lat']), float(data[0]['lon'])
+    return None
+
+
+def normalizuj_adresu(adresa):
+    adresa = unicodedata.normalize('NFC', str(adresa or ''))
+    return ' '.join(adresa.replace(',', ', ').split()).strip(' ,').lower()
+
+
+def _ttl(pronadjena):
+    if pronadjena:
+        return timedelta(days=getattr(settings, 'GEOKOD_TTL_DANA', 30))
+    return timedelta(hours=getattr(settings, 'GEOKOD_NEGATIVNI_TTL_SATI', 1))
+
+
+def _iz_lru(kljuc):
+    with _lru_lock:
+        unos = _lru.get(kljuc)
+        if unos is None:
+            return None
+        koordinate, istice = unos
+        if istice < time.monotonic():
+            del _lru[kljuc]
+            return None
+        _lru.move_to_end(kljuc)
+        return unos
+
+
+def _u_lru(kljuc, koordinate, preostalo_s):
+    with _lru_lock:
+        _lru[kljuc] = (koordinate, time.monotonic() + preostalo_s)
+        _lru.move_to_end(kljuc)
+        while len(_lru) > getattr(settings, 'GEOKOD_LRU_VELICINA', 2048):
+            _lru.popitem(last=False)
+
+
+def ocisti_lru():
+    with _lru_lock:
+        _lru.clear()
+
+
+def _kljuc_baze(adresa):
+    duzina = GeokodAdresa._meta.get_field('adresa').max_length
+    if len(adresa) <= duzina:
+        return adresa
+    hes = hashlib.sha1(adresa.encode('utf-8')).hexdigest()
+    return f"{adresa[:duzina - len(hes) - 1]}#{hes}"
+
+
+def _iz_baze(adresa, drzava):
+    zapis = GeokodAdresa.objects.filter(adresa=_kljuc_baze(adresa), drzava=drzava).first()
+    if zapis is None:
+        return None
+    pronadjena = zapis.lat is not None
+    preostalo = (zapis.azurirano + _ttl(pronadjena) - timezone.now()).total_seconds()
+    if preostalo <= 0:
+        return None
+    return ((zapis.lat, zapis.lon) if pronadjena else None), preostalo
+
+
+def _u_bazu(adresa, drzava, koordinate):
+    lat, lon = koordinate if koordinate else (None, None)
+    vrednosti = {'lat': lat, 'lon': lon, 'azurirano': timezone.now()}
+    adresa = _kljuc_baze(adresa)
+    try:
+        with transaction.atomic():
+            GeokodAdresa.objects.update_or_create(adresa=adresa, drzava=drzava, defaults=vrednosti)
+    except IntegrityError:
+        # Drugi proces je istovremeno upisao istu adresu
+        GeokodAdresa.objects.filter(adresa=adresa, drzava=drzava).update(**vrednosti)
+    except DatabaseError as e:
+        # Keš je samo ubrzanje; rezultat geokodiranja se vraća i bez upisa
+        logger.warning(f"Geokod adrese {adresa} nije sačuvan u bazi: {e}")
+
+
+def geokodiraj(adresa, drzava=PODRAZUMEVANA_DRZAVA, geokoder=None):
+    """
+    Vraća (lat, lon) za adresu ili (None, None) ako adresa nije pronađena ili
+    geokoder nije dostupan. `geokoder` je funkcija (adresa, drzava) -> (lat, lon)
+    ili None; podrazumevano GEOKODER iz podešavanja (Nominatim).
+    """
+    normalizovana = normalizuj_adresu(adresa)
+    if not normalizovana:
+        return None, None
+    drzava = (drzava or '').lower()
+    kljuc = (normalizovana, drzava)
+
+    unos = _iz_lru(kljuc)
+    if unos is None:
+        unos = _iz_baze(normalizovana, drzava)
+        if unos is None:
+            if geokoder is None:
+                geokoder = import_string(getattr(
+                    settings, 'GEOKODER', 'app.services.geocode_service.nominatim_geokoder'
+                ))
+            try:
+                koordinate = geokoder(adresa, drzava)
+            except Exception as e:
+                logger.warning(f"Greška pri geokodiranju adrese {adresa}: {e}")
+                return None, None
+            _u_bazu(normalizovana, drzava, koordinate)
+            unos = (koordinate, _ttl(koordinate is not None).total_seconds())
+        _u_lru(kljuc, *unos)
+
+    koordinate = unos[0]
+    return koordinate if koordinate else (None, None)
@@ -0,0 +1,264 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import close_old_connections, connection
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from app.models import Posao
+
+logger = logging.getLogger(__name__)
+
+# Pozadinski poslovi sa trajnim redom čekanja u tabeli posao.
+#
+# - posao se registruje dekoratorom @posao('tip') i prima instancu Posao
+# - dugi poslovi (simulacije) rade u koracima: korak pozove
+#   nastavi(posao, sekunde, ...) i isti red se ponovo zakazuje, pa posao ne
+#   drži nit ni konekciju između koraka i može se otkazati u svakom trenutku
+# - radnik preuzima posao uslovnim UPDATE-om (status na_cekanju -> u_toku),
+#   pa isti posao ne može da izvrši dva radnika
+# - posao ostao u_toku posle pada radnika vraća se u red posle
+#   POSLOVI_ISTEK_IZVRSAVANJA sekundi
+
+POSLOVI = {}
+
+AKTIVNI_STATUSI = ('na_cekanju', 'u_toku')
+DISPATCH_UID = 'app.radnik_poslova_u_procesu'
+
+
+class Nastavak(Exception):
+    """Signalizira da posao treba ponovo zakazati (vidi nastavi)."""
+
+    def __init__(self, sekunde, parametri):
+        super().__init__(sekunde)
+        self.sekunde = sekunde
+        self.parametri = parametri
+
+
+def posao(tip):
+    """Dekorator koji registruje funkciju kao izvršioca posla datog tipa."""
+    def decorator(funkcija):
+        POSLOVI[tip] = funkcija
+        return funkcija
+    return decorator
+
+
+def nastavi(posao_obj, sekunde, **parametri):
+    """
+    Poziva se iz izvršioca: završava trenutni korak i zakazuje sledeći za
+    `sekunde` sekundi, uz izmenjene parametre. Prekida izvršavanje koraka.
+    """
+    raise Nastavak(sekunde, {**posao_obj.parametri, **parametri})
+
+
+def _u_datum(za):
+    if za is None:
+        return timezone.now()
+    if isinstance(za, (int, float)):
+        return timezone.now() + timedelta(seconds=za)
+    if isinstance(za, timedelta):
+        return timezone.now() + za
+    return za
+
+
+def zakazi(tip, parametri=None, za=None, kljuc='', max_pokusaja=3, jedinstven=False):
+    """
+    Dodaje posao u red. `za` je broj sekundi, timedelta ili datum.
+    Sa jedinstven=True vraća postojeći aktivni posao sa istim ključem umesto novog.
+    """
+    if tip not in POSLOVI:
+        raise ValueError(f"Nepoznat tip posla: {tip}")
+
+    if jedinstven and kljuc:
+        postojeci = Posao.objects.filter(kljuc=kljuc, status__in=AKTIVNI_STATUSI).first()
+        if postojeci:
+            return postojeci
+
+    return Posao.objects.create(
+        tip=tip,
+        kljuc=kljuc,
+        parametri=parametri or {},
+        zakazano_za=_u_datum(za),
+        max_pokusaja=max_pokusaja,
+    )
+
+
+def otkazi(sifra_p=None, kljuc=None):
+    """Otkazuje aktivne poslove po šifri ili ključu. Vraća broj otkazanih."""
+    poslovi = Posao.objects.filter(status__in=AKTIVNI_STATUSI)
+    if sifra_p is not None:
+        poslovi = poslovi.filter(sifra_p=sifra_p)
+    elif kljuc:
+        poslovi = poslovi.filter(kljuc=kljuc)
+    else:
+        return 0
+    return poslovi.update(status='otkazan', zavrseno=timezone.now())
+
+
+def preuzmi_posao(radnik):
+    """
+    Preuzima najstariji dospeli posao. Kandidati se čitaju bez zaključavanja
+    (Oracle ne podržava SELECT ... FOR UPDATE sa ograničenjem broja redova), a
+    preuzimanje je uslovni UPDATE, pa posao preuzima tačno jedan radnik.
+    Vraća Posao ili None.
+    """
+    sada = timezone.now()
+    kandidati = list(
+        Posao.objects.filter(
+            status='na_cekanju', zakazano_za__lte=sada
+        ).order_by('zakazano_za').values_list('sifra_p', flat=True)[:5]
+    )
+    for sifra_p in kandidati:
+        preuzet = Posao.objects.filter(sifra_p=sifra_p, status='na_cekanju').update(
+            status='u_toku', zapoceto=sada, radnik=radnik
+        )
+        if preuzet:
+            return Posao.objects.get(sifra_p=sifra_p)
+    return None
+
+
+def izvrsi_posao(posao_obj):
+    """Izvršava jedan korak posla i beleži ishod (samo ako posao nije otkazan)."""
+    izvrsilac = POSLOVI.get(posao_obj.tip)
+    izmene = {'broj_izvrsavanja': posao_obj.broj_izvrsavanja + 1}
+
+    try:
+        if izvrsilac is None:
+            raise ValueError(f"Nepoznat tip posla: {posao_obj.tip}")
+        izvrsilac(posao_obj)
+        izmene.update(status='zavrsen', zavrseno=timezone.now(), greska='')
+    except Nastavak as nastavak:
+        izmene.update(
+            status='na_cekanju',
+            zakazano_za=timezone.now() + timedelta(seconds=nastavak.sekunde),
+            parametri=nastavak.parametri,
+            broj_pokusaja=0,
+        )
+    except Exception as e:
+        pokusaji = posao_obj.broj_pokusaja + 1
+        izmene.update(broj_pokusaja=pokusaji, greska=traceback.format_exc()[-4000:])
+        if pokusaji < posao_obj.max_pokusaja:
+            # Eksponencijalno odlaganje: 2, 4, 8... sekundi
+            izmene.update(status='na_cekanju', zakazano_za=timezone.now() + timedelta(seconds=2 ** pokusaji))
+        else:
+            izmene.update(status='neuspesan', zavrseno=timezone.now())
+        logger.error(f"Posao {posao_obj.sifra_p} ({posao_obj.tip}) nije uspeo: {str(e)}")
+
+    # Otkazan posao ostaje otkazan i ako je korak upravo završen
+    Posao.objects.filter(sifra_p=posao_obj.sifra_p, status='u_toku').update(**izmene)
+
+
+def oporavi_zaglavljene():
+    """Vraća u red poslove koji su predugo u_toku (radnik je pao). Vraća broj."""
+    granica = timezone.now() - timedelta(
+        seconds=getattr(settings, 'POSLOVI_ISTEK_IZVRSAVANJA', 300)
+    )
+    vraceno = Posao.objects.filter(status='u_toku', zapoceto__lt=granica).update(
+        status='na_cekanju', radnik=''
+    )
+    if vraceno:
+        logger.warning(f"Vraćeno u red {vraceno} zaglavljenih poslova")
+    return vraceno
+
+
+def metrike_poslova():
+    """Dubina reda po statusu i kašnjenje (od zakazanog vremena do početka)."""
+    sada = timezone.now()
+    po_statusu = dict(Posao.objects.values_list('status').annotate(broj=Count('sifra_p')))
+    dospeli = Posao.objects.filter(status='na_cekanju', zakazano_za__lte=sada).aggregate(
+        broj=Count('sifra_p'), najstariji=Min('zakazano_za')
+    )
+
+    # Trajanja se računaju u Python-u (Oracle ne podržava AVG nad INTERVAL tipom)
+    nedavni = Posao.objects.filter(
+        zavrseno__gte=sada - timedelta(hours=1), zapoceto__isnull=False
+    ).order_by('-zavrseno').values_list('zakazano_za', 'zapoceto', 'zavrseno')[:1000]
+    kasnjenja = [(zapoceto - zakazano).total_seconds() for zakazano, zapoceto, _ in nedavni]
+    trajanja = [(zavrseno - zapoceto).total_seconds() for _, zapoceto, zavrseno in nedavni]
+
+    def prosek(vrednosti):
+        return round(sum(vrednosti) / len(vrednosti), 3) if vrednosti else 0
+
+    return {
+        'po_statusu': {status_posla: po_statusu.get(status_posla, 0) for status_posla, _ in Posao.STATUS_CHOICES},
+        'dospelo_na_cekanju': dospeli['broj'],
+        'najduze_cekanje_s': round((sada - dospeli['najstariji']).total_seconds(), 3) if dospeli['najstariji'] else 0,
+        'poslednji_sat': {
+            'broj': len(trajanja),
+            'prosecno_kasnjenje_s': prosek(kasnjenja),
+            'max_kasnjenje_s': round(max(kasnjenja), 3) if kasnjenja else 0,
+            'prosecno_trajanje_s': prosek(trajanja),
+        },
+    }
+
+
+# ========== RADNIK ==========
+
+class Radnik:
+    """
+    Ograničen skup niti koje preuzimaju i izvršavaju poslove.
+    Svaka nit ima sopstvenu konekciju ka bazi i zatvara je posle posla.
+    """
+
+    def __init__(self, broj_niti=2, interval=1.0, naziv=None):
+        self.broj_niti = max(1, broj_niti)
+        self.interval = interval
+        self.naziv = naziv or f"{socket.gethostname()}:{os.getpid()}"
+        self.zaustavi = threading.Event()
+        self.niti = []
+
+    def _petlja(self, indeks, jednom):
+        radnik = f"{self.naziv}:{indeks}"
+        try:
+            while not self.zaustavi.is_set():
+                close_old_connections()
+                try:
+                    posao_obj = preuzmi_posao(radnik)
+                    if posao_obj is not None:
+                        izvrsi_posao(posao_obj)
+                        continue
+                except Exception as e:
+                    # Greška baze ne zaustavlja nit; posao koji je ostao
+                    # u_toku vraća oporavi_zaglavljene()
+                    logger.error(f"Greška u radniku {radnik}: {str(e)}")
+                    connection.close()
+                if jednom:
+                    return
+                self.zaustavi.wait(self.interval)
+        finally:
+            connection.close()
+
+    def pokreni(self, jednom=False):
+        """Pokreće niti u pozadini (daemon). jednom=True: dok ima dospelih poslova."""
+        oporavi_zaglavljene()
+        for indeks in range(self.broj_niti):
+            nit = threading.Thread(
+                target=self._petlja, args=(indeks, jednom),
+                name=f"radnik-poslova-{indeks}", daemon=True,
+            )
+            nit.start()
+            self.niti.append(nit)
+
+    def stop(self):
+        self.zaustavi.set()
+
+
+def _pokreni_radnika_u_procesu(sender, **kwargs):
+    request_started.disconnect(dispatch_uid=DISPATCH_UID)
+    Radnik(broj_niti=getattr(settings, 'POSLOVI_BROJ_NITI', 2)).pokreni()
+
+
+def zakazi_radnika_u_procesu():
+    """
+    Poziva se iz AppConfig.ready() (bez pristupa bazi). Ako je uključeno
+    POSLOVI_RADNIK_U_PROCESU, radnik se pokreće na prvom HTTP zahtevu procesa;
+    inače poslove izvršava zaseban proces (manage.py run_worker).
+    """
+    if getattr(settings, 'POSLOVI_RADNIK_U_PROCESU', False):
+        request_started.connect(_pokreni_radnika_u_procesu, dispatch_uid=DISPATCH_UID, weak=False)
@@ -0,0 +1,334 @@
+import logging
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from app.models import Dobavljac, Faktura, KrsenjeUgovora, Reklamacija, Sertifikat, Ugovor
+from app.services.response_cache import povecaj_verziju
+
+logger = logging.getLogger(__name__)
+
+# Pravila kršenja ugovora (koristi ih services/penal_service.py).
+#
+# - pravilo se registruje dekoratorom @pravilo nad klasom sa kodom; svako
+#   pravilo je jedan skupovni upit (upit) nad jedinicama provere (ugovor,
+#   faktura, dobavljač, sertifikat)
+# - rezultat pravila se čuva u kešu zajedno sa vodenim žigom (vreme
+#   početka provere); sledeća provera istog dana ponovo proverava samo
+#   jedinice izmenjene posle žiga (polja izmenjeno*, uz preklapanje od
+#   KRSENJA_PREKLAPANJE sekundi za transakcije potvrđene sa zakašnjenjem),
+#   pa pregled i kreiranje penala dele posao
+# - promenom dana, brisanjem zapisa (signal u signals.py) ili istekom keša
+#   pravilo se proverava celo
+# - kršenje za koje je već dodeljen penal (tabela krsenje_ugovora) se ne vraća
+# - keš, žig i generacija su lokalni za proces (LocMemCache), pa rezultat
+#   proceni() može biti zastareo posle izmene ili brisanja u drugom procesu;
+#   zato se kršenja pre upisa penala ponovo proveravaju u bazi (potvrdi)
+#
+# Izmene preko QuerySet.update() ne menjaju auto_now polja, pa moraju same da
+# postave izmenjeno* (vidi IstekUgovora.posledica).
+
+PRAVILA = {}
+
+KLJUC_GENERACIJE = 'krsenja:generacija'
+
+
+def pravilo(klasa):
+    """Dekorator koji registruje klasu kao pravilo kršenja pod njenim kodom."""
+    PRAVILA[klasa.kod] = klasa()
+    return klasa
+
+
+def _aktivni_ugovor(danas, dobavljac=None):
+    """Podupit: šifra najnovijeg aktivnog ugovora dobavljača (podrazumevano spoljni pk)."""
+    if dobavljac is None:
+        dobavljac = OuterRef('pk')
+    return Subquery(
+        Ugovor.objects.filter(
+            dobavljac=dobavljac, status_u='aktivan', datum_isteka_u__gte=danas
+        ).order_by('-datum_potpisa_u', '-sifra_u').values('sifra_u')[:1]
+    )
+
+
+class Pravilo:
+    """
+    Osnova pravila kršenja. Pravilo zadaje:
+    - upit(danas): redovi (values) sa kršenjem
+    - promenjene(od): šifre jedinica čije je kršenje moglo da se promeni od `od`
+    - krsenje(red, danas): dict sa predmetom, jedinicom, ugovorom, razlogom i detaljima
+    Predmet jedinstveno određuje kršenje; za isti predmet penal se dodeljuje jednom.
+    """
+    kod = ''
+    naziv = ''
+    iznos_penala = Decimal('0.00')
+    polje_jedinice = 'pk'
+
+    def upit(self, danas):
+        raise NotImplementedError
+
+    def promenjene(self, od):
+        raise NotImplementedError
+
+    def krsenje(self, red, danas):
+        raise NotImplementedError
+
+    def posledica(self, krsenja):
+        """Izmene posle upisa penala (u istoj transakciji); podrazumevano nema."""
+
+
+@pravilo
+class IstekUgovora(Pravilo):
+    """Istekli ugovori koji nisu označeni kao istekli (administrativna greška)."""
+    kod = 'istek_ugovora'
+    naziv = 'Istekao aktivan ugovor'
+    iznos_penala = Decimal('5000.00')  # Fiksni penal za neažurirane ugovore
+    polje_jedinice = 'sifra_u'
+
+    def upit(self, danas):
+        return Ugovor.objects.filter(
+            status_u='aktivan', datum_isteka_u__lt=danas
+        ).values('sifra_u', 'datum_isteka_u')
+
+    def promenjene(self, od):
+        return Ugovor.objects.filter(izmenjeno_u__gte=od).values_list('sifra_u', flat=True)
+
+    def krsenje(self, red, danas):
+        return {
+            'predmet': f"{red['sifra_u']}:{red['datum_isteka_u'].isoformat()}",
+            'jedinica': red['sifra_u'],
+            'ugovor_id': red['sifra_u'],
+            'razlog': f'Ugovor je istekao {red["datum_isteka_u"].strftime("%d.%m.%Y")}, ali nije zatvoren',
+            'detalji': f'Ugovor br. {red["sifra_u"]} je trebao biti zatvoren pre {(danas - red["datum_isteka_u"]).days} dana.'
+        }
+
+    def posledica(self, krsenja):
+        ugovori = [krsenje['ugovor'] for krsenje in krsenja]
+        Ugovor.objects.filter(sifra_u__in=[ugovor.sifra_u for ugovor in ugovori]).update(
+            status_u='istekao', izmenjeno_u=timezone.now()
+        )
+        for ugovor in ugovori:
+            ugovor.status_u = 'istekao'
+        povecaj_verziju(Ugovor)
+
+
+@pravilo
+class NeplacenaFaktura(Pravilo):
+    """Fakture koje nisu isplaćene (ni odbijene) do roka plaćanja."""
+    kod = 'neplacena_faktura'
+    naziv = 'Neplaćena faktura posle roka'
+    iznos_penala = Decimal('2000.00')
+    polje_jedinice = 'sifra_f'
+
+    def upit(self, danas):
+        # Indeks faktura_status_rok_idx
+        return Faktura.objects.filter(
+            status_f__in=('primljena', 'verifikovana'), rok_placanja_f__lt=danas
+        ).values('sifra_f', 'iznos_f', 'rok_placanja_f', 'ugovor_id')
+
+    def promenjene(self, od):
+        return Faktura.objects.filter(izmenjeno_f__gte=od).values_list('sifra_f', flat=True)
+
+    def krsenje(self, red, danas):
+        return {
+            'predmet': str(red['sifra_f']),
+            'jedinica': red['sifra_f'],
+            'ugovor_id': red['ugovor_id'],
+            'razlog': f'Faktura br. {red["sifra_f"]} ({red["iznos_f"]} RSD) nije izmirena do roka {red["rok_placanja_f"].strftime("%d.%m.%Y")}',
+            'detalji': f'Rok plaćanja fakture br. {red["sifra_f"]} je prekoračen {(danas - red["rok_placanja_f"]).days} dana.'
+        }
+
+
+@pravilo
+class PonovljeneReklamacije(Pravilo):
+    """
+    Dobavljači sa bar KRSENJA_REKLAMACIJE_BROJ reklamacija u poslednjih
+    KRSENJA_REKLAMACIJE_PERIOD dana; penal ide na najnoviji aktivan ugovor.
+    Svaka nova reklamacija preko praga je novo kršenje.
+    """
+    kod = 'ponovljene_reklamacije'
+    naziv = 'Ponovljene reklamacije'
+    iznos_penala = Decimal('3000.00')
+    polje_jedinice = 'sifra_d'
+
+    def upit(self, danas):
+        period = getattr(settings, 'KRSENJA_REKLAMACIJE_PERIOD', 90)
+        reklamacije = Reklamacija.objects.filter(
+            dobavljac=OuterRef('pk'), datum_prijema__gt=danas - timedelta(days=period)
+        )
+        return Dobavljac.objects.annotate(
+            broj_reklamacija=Subquery(
+                reklamacije.order_by().values('dobavljac').annotate(broj=Count('reklamacija_id')).values('broj')
+            ),
+            poslednja_reklamacija=Subquery(reklamacije.order_by('-reklamacija_id').values('reklamacija_id')[:1]),
+            aktivni_ugovor=_aktivni_ugovor(danas),
+        ).filter(
+            broj_reklamacija__gte=getattr(settings, 'KRSENJA_REKLAMACIJE_BROJ', 3),
+            aktivni_ugovor__isnull=False,
+        ).values('sifra_d', 'naziv', 'broj_reklamacija', 'poslednja_reklamacija', 'aktivni_ugovor')
+
+    def promenjene(self, od):
+        return Dobavljac.objects.filter(
+            Q(sifra_d__in=Reklamacija.objects.filter(izmenjeno__gte=od).values('dobavljac_id'))
+            | Q(sifra_d__in=Ugovor.objects.filter(izmenjeno_u__gte=od).values('dobavljac_id'))
+        ).values_list('sifra_d', flat=True)
+
+    def krsenje(self, red, danas):
+        period = getattr(settings, 'KRSENJA_REKLAMACIJE_PERIOD', 90)
+        return {
+            'predmet': f"{red['sifra_d']}:{red['poslednja_reklamacija']}",
+            'jedinica': red['sifra_d'],
+            'ugovor_id': red['aktivni_ugovor'],
+            'razlog': f'Dobavljač ima {red["broj_reklamacija"]} reklamacija u poslednjih {period} dana',
+            'detalji': f'Poslednja reklamacija br. {red["poslednja_reklamacija"]} je prešla dozvoljeni broj reklamacija.'
+        }
+
+
+@pravilo
+class IstekaoSertifikat(Pravilo):
+    """
+    Istekli sertifikati dobavljača sa aktivnim ugovorom, ako dobavljač nema
+    važeći sertifikat istog tipa.
+    """
+    kod = 'istekao_sertifikat'
+    naziv = 'Istekao sertifikat'
+    iznos_penala = Decimal('4000.00')
+    polje_jedinice = 'sertifikat_id'
+
+    def upit(self, danas):
+        vazeci = Sertifikat.objects.filter(
+            dobavljac=OuterRef('dobavljac'), tip=OuterRef('tip'), datum_isteka__gte=danas
+        )
+        return Sertifikat.objects.filter(datum_isteka__lt=danas).annotate(
+            aktivni_ugovor=_aktivni_ugovor(danas, OuterRef('dobavljac')),
+        ).filter(
+            ~Exists(vazeci), aktivni_ugovor__isnull=False
+        ).values('sertifikat_id', 'naziv', 'tip', 'datum_isteka', 'aktivni_ugovor')
+
+    def promenjene(self, od):
+        # Novi sertifikat istog tipa ili izmena ugovora menja kršenje ostalih sertifikata dobavljača
+        return Sertifikat.objects.filter(
+            Q(dobavljac_id__in=Sertifikat.objects.filter(izmenjeno__gte=od).values('dobavljac_id'))
+            | Q(dobavljac_id__in=Ugovor.objects.filter(izmenjeno_u__gte=od).values('dobavljac_id'))
+        ).values_list('sertifikat_id', flat=True)
+
+    def krsenje(self, red, danas):
+        return {
+            'predmet': f"{red['sertifikat_id']}:{red['datum_isteka'].isoformat()}",
+            'jedinica': red['sertifikat_id'],
+            'ugovor_id': red['aktivni_ugovor'],
+            'razlog': f'Sertifikat {red["naziv"]} ({red["tip"]}) je istekao {red["datum_isteka"].strftime("%d.%m.%Y")}',
+            'detalji': f'Dobavljač nema važeći {red["tip"]} sertifikat već {(danas - red["datum_isteka"]).days} dana.'
+        }
+
+
+def aktivna_pravila():
+    kodovi = getattr(settings, 'KRSENJA_PRAVILA', None)
+    if kodovi is None:
+        return list(PRAVILA.values())
+    return [PRAVILA[kod] for kod in kodovi if kod in PRAVILA]
+
+
+def _kljuc_pravila(kod):
+    return f"krsenja:pravilo:{kod}"
+
+
+def generacija():
+    return cache.get_or_set(KLJUC_GENERACIJE, 1, None)
+
+
+def obrisi_kes():
+    """Sledeća provera svih pravila biće puna (npr. posle brisanja zapisa)."""
+    try:
+        cache.incr(KLJUC_GENERACIJE)
+    except ValueError:
+        cache.set(KLJUC_GENERACIJE, 2, None)
+
+
+def _proveri_pravilo(pravilo_obj, danas, gen):
+    """Krsenja pravila {predmet: krsenje} i način provere, uz osvežavanje keša."""
+    sada = timezone.now()
+    kljuc = _kljuc_pravila(pravilo_obj.kod)
+    stanje = cache.get(kljuc)
+
+    if stanje is None or stanje['datum'] != danas or stanje['generacija'] != gen:
+        krsenja = {}
+        for red in pravilo_obj.upit(danas):
+            krsenje = pravilo_obj.krsenje(red, danas)
+            krsenja[krsenje['predmet']] = krsenje
+        nacin, provereno = 'puna', None
+    else:
+        od = stanje['zig'] - timedelta(seconds=getattr(settings, 'KRSENJA_PREKLAPANJE', 60))
+        jedinice = set(pravilo_obj.promenjene(od))
+        krsenja = {
+            predmet: krsenje for predmet, krsenje in stanje['krsenja'].items()
+            if krsenje['jedinica'] not in jedinice
+        }
+        if jedinice:
+            for red in pravilo_obj.upit(danas).filter(**{f"{pravilo_obj.polje_jedinice}__in": jedinice}):
+                krsenje = pravilo_obj.krsenje(red, danas)
+                krsenja[krsenje['predmet']] = krsenje
+        nacin, provereno = 'inkrementalna', len(jedinice)
+
+    cache.set(kljuc, {
+        'datum': danas, 'zig': sada, 'generacija': gen, 'krsenja': krsenja,
+    }, getattr(settings, 'KRSENJA_KES_TTL', 86400))
+    return krsenja, nacin, provereno
+
+
+def potvrdi(krsenja, danas):
+    """
+    Kršenja (iz proceni) koja i dalje važe, provereno upitom pravila nad
+    jedinicama kršenja, bez keša.
+    """
+    jedinice = {}
+    for krsenje in krsenja:
+        jedinice.setdefault(krsenje['pravilo'], set()).add(krsenje['jedinica'])
+
+    vaze = set()
+    for kod, jedinice_pravila in jedinice.items():
+        pravilo_obj = PRAVILA[kod]
+        for red in pravilo_obj.upit(danas).filter(**{f"{pravilo_obj.polje_jedinice}__in": jedinice_pravila}):
+            krsenje = pravilo_obj.krsenje(red, danas)
+            vaze.add((kod, krsenje['predmet'], krsenje['ugovor_id']))
+    return [
+        krsenje for krsenje in krsenja
+        if (krsenje['pravilo'], krsenje['predmet'], krsenje['ugovor_id']) in vaze
+    ]
+
+
+def proceni(danas=None, pravila=None):
+    """
+    Kršenja aktivnih (ili zadatih) pravila za koja penal još nije dodeljen.
+
+    Returns:
+        tuple: (krsenja, statistika) - krsenja su dict-ovi (pravilo, predmet,
+        ugovor_id, razlog, iznos_penala, detalji); statistika po pravilu
+        (nacin, provereno, krsenja, ms)
+    """
+    danas = danas or date.today()
+    gen = generacija()
+    rezultat, statistika = [], {}
+    for pravilo_obj in (aktivna_pravila() if pravila is None else [PRAVILA[kod] for kod in pravila]):
+        pocetak = time.perf_counter()
+        krsenja, nacin, provereno = _proveri_pravilo(pravilo_obj, danas, gen)
+        kaznjena = set(
+            KrsenjeUgovora.objects.filter(pravilo=pravilo_obj.kod, predmet__in=list(krsenja))
+            .values_list('predmet', flat=True)
+        ) if krsenja else set()
+        nova = [
+            {**krsenje, 'pravilo': pravilo_obj.kod, 'iznos_penala': pravilo_obj.iznos_penala}
+            for predmet, krsenje in sorted(krsenja.items()) if predmet not in kaznjena
+        ]
+        rezultat += nova
+        statistika[pravilo_obj.kod] = {
+            'nacin': nacin,
+            'provereno': provereno,
+            'krsenja': len(nova),
+            'ms': round((time.perf_counter() - pocetak) * 1000, 2),
+        }
+    return rezultat, statistika
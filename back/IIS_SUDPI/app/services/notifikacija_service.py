@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from app.models import Notifikacija, User
+from app.serializers import NotifikacijaSerializer
+
+logger = logging.getLogger(__name__)
+
+# Isporuka notifikacija bez prozivanja (polling).
+# Nova notifikacija se posle commit-a objavljuje brokeru (signal u signals.py),
+# a broker budi otvorene SSE veze korisnika (views.notifikacije_stream).
+# Tabela notifikacija je izvor istine: probuđena veza čita redove posle svog
+# kursora (sifra_n), pa broker prenosi samo "ima novih" i ne mora biti pouzdan.
+# Šifre se dodeljuju pri upisu, a ne pri commit-u (npr. dugačak bulk_create u
+# obavesti_ulogu), pa notifikacija sa manjom šifrom može postati vidljiva posle
+# one sa većom. Zato se uz nove ponovo čitaju i notifikacije ispod kursora
+# nastale u poslednjih NOTIFIKACIJE_PREKLAPANJE sekundi; SSE veza pamti
+# poslate šifre (KursorNotifikacija), a REST klijent ih prepoznaje po sifra_n.
+# Podrazumevani broker radi u memoriji procesa; sa više procesa objava iz
+# drugog procesa stiže najkasnije posle NOTIFIKACIJE_SSE_INTERVAL sekundi,
+# kada veza ionako proverava bazu. Drugi broker (npr. Redis pub/sub) se zadaje
+# putanjom klase u NOTIFIKACIJE_BROKER i implementira objavi/pretplati/odjavi.
+#
+# Obaveštenja za sve korisnike jedne uloge (obavesti_ulogu) upisuju se jednim
+# bulk_create-om; primaoci po ulozi se keširaju (keš se briše pri izmeni
+# korisnika, signal u signals.py), a ponovljeno obaveštenje sa istim ključem
+# spajanja u roku NOTIFIKACIJE_PROZOR_SPAJANJA sekundi se preskače.
+
+NAJVISE_PO_ZAHTEVU = 200
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class LokalniBroker:
+    """
+    Pretplate u memoriji procesa: korisnik -> skup (event loop, red). Sinhrona
+    pretplata (WSGI) nema event loop i koristi queue.Queue.
+    """
+
+    def __init__(self):
+        self._pretplate = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def objavi(self, korisnik_id, sifra_n):
+        """Može se pozvati iz bilo koje niti."""
+        with self._lock:
+            pretplate = list(self._pretplate.get(korisnik_id, ()))
+        for loop, red in pretplate:
+            if loop is None:
+                red.put_nowait(sifra_n)
+                continue
+            try:
+                loop.call_soon_threadsafe(red.put_nowait, sifra_n)
+            except RuntimeError:
+                # Event loop veze je zatvoren; pretplata se uklanja pri odjavi
+                pass
+
+    def pretplati(self, korisnik_id, sinhrono=False):
+        """
+        Vraća pretplatu (loop, red). Asinhrona se pravi iz event loop-a veze
+        (red je asyncio.Queue), a sinhrona (sinhrono=True) iz niti zahteva
+        (red je queue.Queue).
+        """
+        if sinhrono:
+            pretplata = (None, queue.Queue())
+        else:
+            pretplata = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._pretplate[korisnik_id].add(pretplata)
+        return pretplata
+
+    def odjavi(self, korisnik_id, pretplata):
+        with self._lock:
+            pretplate = self._pretplate.get(korisnik_id)
+            if pretplate is not None:
+                pretplate.discard(pretplata)
+                if not pretplate:
+                    del self._pretplate[korisnik_id]
+
+    def broj_pretplata(self):
+        with self._lock:
+            return sum(len(pretplate) for pretplate in self._pretplate.values())
+
+
+def broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                putanja = getattr(settings, 'NOTIFIKACIJE_BROKER', 'app.services.notifikacija_service.LokalniBroker')
+                _broker = import_string(putanja)()
+    return _broker
+
+
+def objavi(korisnik_id, sifra_n):
+    """Budi veze korisnika; greška brokera ne sme da obori upis notifikacije."""
+    try:
+        broker().objavi(korisnik_id, sifra_n)
+    except Exception as e:
+        logger.error(f"Greška pri objavi notifikacije {sifra_n}: {str(e)}")
+
+
+def _kljuc_uloge(tip_k):
+    return f"notifikacije:primaoci:{tip_k}"
+
+
+def primaoci_uloge(tip_k):
+    """Šifre aktivnih korisnika uloge, iz keša."""
+    kljuc = _kljuc_uloge(tip_k)
+    primaoci = cache.get(kljuc)
+    if primaoci is None:
+        primaoci = list(
+            User.objects.filter(tip_k=tip_k, is_active=True).order_by('pk').values_list('pk', flat=True)
+        )
+        cache.set(kljuc, primaoci, getattr(settings, 'NOTIFIKACIJE_PRIMAOCI_TTL', 300))
+    return primaoci
+
+
+def obrisi_kes_primalaca():
+    cache.delete_many([_kljuc_uloge(tip_k) for tip_k, _ in User.USER_TYPES])
+
+
+def posalji_notifikacije(korisnici, poruka, link=None):
+    """
+    Ista notifikacija za više korisnika (šifre) jednim INSERT-om. Otvorene
+    SSE veze se bude posle commit-a (bulk_create ne okida post_save).
+    Vraća broj upisanih notifikacija.
+    """
+    korisnici = list(dict.fromkeys(korisnici))
+    if not korisnici:
+        return 0
+    sada = timezone.now()
+    Notifikacija.objects.bulk_create([
+        Notifikacija(korisnik_id=korisnik_id, poruka_n=poruka, link_n=link, procitana_n=False, datum_n=sada)
+        for korisnik_id in korisnici
+    ])
+
+    def probudi():
+        for korisnik_id in korisnici:
+            objavi(korisnik_id, None)
+
+    transaction.on_commit(probudi)
+    return len(korisnici)
+
+
+def obavesti_ulogu(tip_k, poruka, link=None, kljuc_spajanja=None):
+    """
+    Notifikacija svim korisnicima uloge. Sa kljucem_spajanja (npr.
+    'kvar:vozilo:5') isto obaveštenje se ne šalje ponovo dok ne istekne prozor
+    spajanja. Vraća broj upisanih notifikacija.
+    """
+    if kljuc_spajanja:
+        prozor = getattr(settings, 'NOTIFIKACIJE_PROZOR_SPAJANJA', 300)
+        if prozor and not cache.add(f"notifikacije:spajanje:{kljuc_spajanja}", 1, prozor):
+            logger.info(f"Obaveštenje '{kljuc_spajanja}' spojeno sa prethodnim")
+            return 0
+    return posalji_notifikacije(primaoci_uloge(tip_k), poruka, link)
+
+
+def _preklapanje():
+    return getattr(settings, 'NOTIFIKACIJE_PREKLAPANJE', 30)
+
+
+def notifikacije_posle(korisnik_id, posle=None, limit=50, preskoci=()):
+    """
+    Notifikacije korisnika posle kursora (sifra_n), od starije ka novijoj.
+    Bez kursora vraća poslednjih `limit`. Sa kursorom vraća i notifikacije
+    ispod njega nastale u prozoru preklapanja (kasni commit), pa se ista
+    notifikacija može vratiti više puta; šifre iz `preskoci` se izostavljaju.
+    Returns: (podaci, kursor, ima_jos)
+    """
+    limit = min(max(limit, 1), NAJVISE_PO_ZAHTEVU)
+    queryset = Notifikacija.objects.select_related('korisnik').filter(korisnik_id=korisnik_id)
+    if posle is None:
+        notifikacije = list(queryset.order_by('-sifra_n')[:limit])[::-1]
+        ima_jos = False
+        kursor = notifikacije[-1].sifra_n if notifikacije else posle
+    else:
+        nove = list(queryset.filter(sifra_n__gt=posle).order_by('sifra_n')[:limit + 1])
+        ima_jos = len(nove) > limit
+        nove = nove[:limit]
+        kursor = nove[-1].sifra_n if nove else posle
+
+        granica = timezone.now() - timedelta(seconds=_preklapanje())
+        zakasnele = queryset.filter(sifra_n__lte=posle, datum_n__gte=granica).order_by('sifra_n')
+        notifikacije = [n for n in [*zakasnele[:NAJVISE_PO_ZAHTEVU], *nove] if n.sifra_n not in preskoci]
+
+    return NotifikacijaSerializer(notifikacije, many=True).data, kursor, ima_jos
+
+
+class KursorNotifikacija:
+    """
+    Kursor otvorene SSE veze: pamti šifre poslate u prozoru preklapanja, pa
+    se notifikacija koja se ponovo pročita ispod kursora ne šalje dvaput.
+    """
+
+    def __init__(self, korisnik_id, posle):
+        self.korisnik_id = korisnik_id
+        self.posle = posle
+        self._poslate = {}  # sifra_n -> trenutak slanja (monotonic)
+
+    def procitaj(self, limit=50):
+        """Returns: (podaci, ima_jos)"""
+        sada = time.monotonic()
+        # Poslata notifikacija je nastala pre slanja, pa posle prozora
+        # preklapanja više ne može biti pročitana ponovo (dvostruki prozor
+        # pokriva razliku satova između procesa)
+        prozor = 2 * _preklapanje()
+        self._poslate = {sifra_n: t for sifra_n, t in self._poslate.items() if sada - t <= prozor}
+        podaci, self.posle, ima_jos = notifikacije_posle(self.korisnik_id, self.posle, limit, self._poslate)
+        for notifikacija in podaci:
+            self._poslate[notifikacija['sifra_n']] = sada
+        return podaci, ima_jos
+
+
+def poslednja_sifra(korisnik_id):
+    return (
+        Notifikacija.objects.filter(korisnik_id=korisnik_id)
+        .order_by('-sifra_n').values_list('sifra_n', flat=True).first()
+    ) or 0
+
+
+def broj_neprocitanih(korisnik_id):
+    # Indeks notifikacija_procitana_idx (korisnik, procitana_n)
+    return Notifikacija.objects.filter(korisnik_id=korisnik_id, procitana_n=False).count()
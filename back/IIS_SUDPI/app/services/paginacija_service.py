@@ -0,0 +1,151 @@
+import base64
+import binascii
+import json
+import logging
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from app.services.response_cache import kesiran_broj
+
+logger = logging.getLogger(__name__)
+
+# Keyset (cursor) paginacija za liste sortirane po (datum, šifra).
+# Umesto OFFSET-a, sledeća stranica se traži uslovom "posle poslednjeg reda
+# prethodne stranice", pa duboke stranice koštaju isto kao prva (indeks po
+# istim kolonama, vidi Meta.indexes na Faktura i Penal). Kursor je
+# base64(JSON) sa vrednostima kolona sortiranja i smerom.
+# Ukupan broj redova se kešira po verzijama modela (services/response_cache.py),
+# pa se COUNT(*) izvršava samo posle izmene podataka.
+
+PODRAZUMEVANA_VELICINA = 10
+NAJVECA_VELICINA = 100
+
+NACINI_BROJANJA = ('kes', 'tacno', 'bez')
+
+
+class NeispravanKursor(ValueError):
+    pass
+
+
+def velicina_stranice(request, podrazumevano=PODRAZUMEVANA_VELICINA, najvise=NAJVECA_VELICINA):
+    try:
+        velicina = int(request.GET.get('page_size', podrazumevano))
+    except (TypeError, ValueError):
+        return podrazumevano
+    return min(max(velicina, 1), najvise)
+
+
+def kodiraj_kursor(vrednosti, unazad=False):
+    sadrzaj = json.dumps({'v': vrednosti, 'u': unazad}, cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(sadrzaj.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def dekodiraj_kursor(kursor, polja):
+    """Vraća (vrednosti pretvorene u tip kolone, unazad)."""
+    try:
+        podaci = json.loads(base64.urlsafe_b64decode(kursor + '=' * (-len(kursor) % 4)))
+        vrednosti = podaci['v']
+        unazad = bool(podaci.get('u'))
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise NeispravanKursor("Neispravan kursor")
+    if not isinstance(vrednosti, list) or len(vrednosti) != len(polja):
+        raise NeispravanKursor("Kursor ne odgovara sortiranju")
+    try:
+        return [polje.to_python(vrednost) for polje, vrednost in zip(polja, vrednosti)], unazad
+    except ValidationError:
+        raise NeispravanKursor("Neispravan kursor")
+
+
+def _uslov_posle(redosled, vrednosti):
+    """(a, b) posle (x, y): a < x ILI (a = x I b < y) za opadajući redosled."""
+    uslov = Q()
+    for i, (naziv, opadajuce) in enumerate(redosled):
+        deo = Q(**{f"{naziv}__{'lt' if opadajuce else 'gt'}": vrednosti[i]})
+        for prethodni, vrednost in zip(redosled[:i], vrednosti):
+            deo &= Q(**{prethodni[0]: vrednost})
+        uslov |= deo
+    return uslov
+
+
+def keyset_stranica(queryset, redosled, kursor=None, velicina=PODRAZUMEVANA_VELICINA):
+    """
+    Jedna stranica queryseta sortiranog po `redosled` (npr. ('-datum_p', '-sifra_p');
+    poslednje polje mora biti jedinstveno).
+
+    Returns:
+        {'objekti', 'sledeci', 'prethodni'} - kursori su None ako stranice nema
+    """
+    model = queryset.model
+    redosled = [(polje.lstrip('-'), polje.startswith('-')) for polje in redosled]
+    polja = [model._meta.get_field(naziv) for naziv, _ in redosled]
+
+    unazad = False
+    if kursor:
+        vrednosti, unazad = dekodiraj_kursor(kursor, polja)
+        smer = [(naziv, opadajuce != unazad) for naziv, opadajuce in redosled]
+        queryset = queryset.filter(_uslov_posle(smer, vrednosti))
+    else:
+        smer = redosled
+
+    objekti = list(queryset.order_by(*[('-' if opadajuce else '') + naziv for naziv, opadajuce in smer])[:velicina + 1])
+    ima_jos = len(objekti) > velicina
+    objekti = objekti[:velicina]
+    if unazad:
+        objekti.reverse()
+
+    def kursor_za(objekat, nazad):
+        return kodiraj_kursor([getattr(objekat, polje.attname) for polje in polja], nazad)
+
+    ima_sledecu = ima_jos if not unazad else bool(kursor)
+    ima_prethodnu = ima_jos if unazad else bool(kursor)
+    return {
+        'objekti': objekti,
+        'sledeci': kursor_za(objekti[-1], False) if objekti and ima_sledecu else None,
+        'prethodni': kursor_za(objekti[0], True) if objekti and ima_prethodnu else None,
+    }
+
+
+def broj_redova(queryset, modeli, nacin='kes'):
+    """Ukupan broj redova: 'kes' (po verzijama modela), 'tacno' (COUNT(*)) ili 'bez' (None)."""
+    if nacin == 'bez':
+        return None
+    if nacin == 'tacno':
+        return queryset.count()
+    return kesiran_broj(queryset, modeli)
+
+
+def keyset_odgovor(request, queryset, redosled, serializer_class, modeli):
+    """
+    Telo odgovora liste za keyset paginaciju: ?cursor=<kursor> (prazan za prvu
+    stranicu), ?page_size, ?count=kes|tacno|bez. Baca NeispravanKursor.
+    """
+    nacin = request.GET.get('count', 'kes')
+    if nacin not in NACINI_BROJANJA:
+        nacin = 'kes'
+    velicina = velicina_stranice(request)
+    stranica = keyset_stranica(queryset, redosled, request.GET.get('cursor') or None, velicina)
+    return {
+        'results': serializer_class(stranica['objekti'], many=True).data,
+        'count': broj_redova(queryset, modeli, nacin),
+        'page_size': velicina,
+        'next_cursor': stranica['sledeci'],
+        'previous_cursor': stranica['prethodni'],
+        'has_next': stranica['sledeci'] is not None,
+        'has_previous': stranica['prethodni'] is not None,
+    }
+
+
+class KesiraniPaginator(Paginator):
+    """Paginator (OFFSET) čiji se ukupan broj redova čita iz keša."""
+
+    def __init__(self, object_list, per_page, modeli, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.modeli = modeli
+
+    @cached_property
+    def count(self):
+        return kesiran_broj(self.object_list, self.modeli)
@@ -0,0 +1,188 @@
+import logging
+import time
+from datetime import date
+
+from django.db import transaction
+
+from app.models import KrsenjeUgovora, Penal, Ugovor
+from app.services import finance_rollup_service as zbirovi
+from app.services.email_service import posalji_emailove
+from app.services.krsenja_service import PRAVILA, potvrdi, proceni
+from app.services.response_cache import povecaj_verziju
+from app.services.sifra_service import dodeli_sifre
+
+logger = logging.getLogger(__name__)
+
+# Serijska obrada kršenja ugovora (penalties/auto-create i check-violations).
+# - detekcija: pravila iz services/krsenja_service.py (skupovni upiti sa
+#   inkrementalnom proverom i kešom po pravilu), pa ugovori sa dobavljačima
+#   jednim upitom
+# - upis: u jednoj transakciji zaključavaju se ugovori sa kršenjem (istovremena
+#   provera čeka i zatim preskače već kažnjena kršenja), kršenja se ponovo
+#   proveravaju u bazi (keš pravila je lokalan za proces), penali i evidencija
+#   kršenja se upisuju bulk_create-om, a posledice pravila (npr. zatvaranje
+#   isteklih ugovora) jednim UPDATE-om po pravilu
+# - obaveštenja: email poruke dobavljačima idu u red (email_service) u istoj
+#   transakciji, pa se šalju samo za upisane penale
+# Probni rad (dry_run) izvršava samo detekciju; koristi ga i pregled kršenja.
+
+
+def _trajanje_ms(pocetak):
+    return round((time.perf_counter() - pocetak) * 1000, 2)
+
+
+def _sa_ugovorima(krsenja, ugovori=None):
+    """Dodaje kršenjima ugovor sa dobavljačem; kršenja obrisanih ugovora se izostavljaju."""
+    if ugovori is not None:
+        ugovori = set(ugovori)
+        krsenja = [krsenje for krsenje in krsenja if krsenje['ugovor_id'] in ugovori]
+    instance = Ugovor.objects.select_related('dobavljac').in_bulk({krsenje['ugovor_id'] for krsenje in krsenja})
+    return sorted(
+        (
+            {**krsenje, 'ugovor': instance[krsenje['ugovor_id']], 'tip_krsenja': krsenje['pravilo']}
+            for krsenje in krsenja if krsenje['ugovor_id'] in instance
+        ),
+        key=lambda krsenje: (krsenje['ugovor_id'], krsenje['pravilo'], krsenje['predmet'])
+    )
+
+
+def pronadji_krsenja(ugovori=None, danas=None):
+    """
+    Kršenja svih aktivnih pravila za koja penal još nije dodeljen.
+
+    Args:
+        ugovori: opciono, šifre ugovora na koje se rezultat ograničava
+
+    Returns:
+        list: dictionary-ji (ugovor, tip_krsenja, pravilo, predmet, razlog,
+        iznos_penala, detalji)
+    """
+    krsenja, _ = proceni(danas)
+    return _sa_ugovorima(krsenja, ugovori)
+
+
+def email_o_penalu(penal, ugovor, razlog_detalji=""):
+    """Naslov i sadržaj email obaveštenja dobavljaču o kršenju ugovora i penalu."""
+    subject = f"OBAVEŠTENJE: Kršenje ugovora {ugovor.sifra_u} - Dodeljen penal"
+    message = f"""
+        Poštovani,
+
+        Obaveštavamo Vas da je evidentirano kršenje uslova ugovora, te je na osnovu toga dodeljen penal.
+
+        ═══════════════════════════════════════════════
+        DETALJI UGOVORA:
+        ═══════════════════════════════════════════════
+        - Broj ugovora: {ugovor.sifra_u}
+        - Datum potpisa: {ugovor.datum_potpisa_u.strftime('%d.%m.%Y')}
+        - Datum isteka: {ugovor.datum_isteka_u.strftime('%d.%m.%Y')}
+        - Status ugovora: {ugovor.get_status_u_display()}
+
+        ═══════════════════════════════════════════════
+        DETALJI PENALA:
+        ═══════════════════════════════════════════════
+        - Broj penala: {penal.sifra_p}
+        - Razlog: {penal.razlog_p}
+        - Iznos penala: {penal.iznos_p} RSD
+        - Datum evidentiranja: {penal.datum_p.strftime('%d.%m.%Y')}
+
+        {razlog_detalji}
+
+        ═══════════════════════════════════════════════
+        SLEDEĆI KORACI:
+        ═══════════════════════════════════════════════
+        1. Iznos penala će biti odbijen od naredne isplate
+        2. Molimo Vas da preduzmete mere kako bi se ovakve situacije izbegavale u budućnosti
+        3. Za dodatna pitanja ili žalbe, kontaktirajte našeg nabavnog menadžera
+
+        NAPOMENA: Učestala kršenja ugovora mogu dovesti do prekida poslovne saradnje.
+
+        Srdačan pozdrav,
+        Sistem za upravljanje nabavkom
+        """
+    return subject, message
+
+
+def obradi_krsenja(dry_run=False, ugovori=None, danas=None):
+    """
+    Pronalazi kršenja i, osim u probnom radu, u jednoj transakciji kreira
+    penale, evidentira kršenja, primenjuje posledice pravila i stavlja
+    obaveštenja u red.
+
+    Returns:
+        dict: krsenja, penali [(krsenje, penal)], preskocena (već kažnjena,
+        otklonjena ili bez ugovora u međuvremenu), pravila (statistika provere
+        po pravilu) i trajanje_ms po fazama
+    """
+    danas = danas or date.today()
+    trajanje = {}
+    pocetak = time.perf_counter()
+    krsenja, pravila = proceni(danas)
+    krsenja = _sa_ugovorima(krsenja, ugovori)
+    trajanje['detekcija'] = _trajanje_ms(pocetak)
+
+    rezultat = {'krsenja': krsenja, 'penali': [], 'preskocena': [], 'pravila': pravila, 'trajanje_ms': trajanje}
+    if dry_run or not krsenja:
+        trajanje['ukupno'] = _trajanje_ms(pocetak)
+        return rezultat
+
+    with transaction.atomic():
+        faza = time.perf_counter()
+        postojeci = set(
+            Ugovor.objects.select_for_update().filter(
+                sifra_u__in={krsenje['ugovor_id'] for krsenje in krsenja}
+            ).order_by('sifra_u').values_list('sifra_u', flat=True)
+        )
+        kaznjena = set(
+            KrsenjeUgovora.objects.filter(
+                predmet__in={krsenje['predmet'] for krsenje in krsenja}
+            ).values_list('pravilo', 'predmet')
+        )
+        vaze = {
+            (krsenje['pravilo'], krsenje['predmet'])
+            for krsenje in potvrdi(
+                [krsenje for krsenje in krsenja if (krsenje['pravilo'], krsenje['predmet']) not in kaznjena],
+                danas
+            )
+        }
+        rezultat['preskocena'] = [
+            krsenje for krsenje in krsenja
+            if krsenje['ugovor_id'] not in postojeci or (krsenje['pravilo'], krsenje['predmet']) not in vaze
+        ]
+        krsenja = [
+            krsenje for krsenje in krsenja
+            if krsenje['ugovor_id'] in postojeci and (krsenje['pravilo'], krsenje['predmet']) in vaze
+        ]
+
+        penali = [
+            Penal(sifra_p=sifra_p, razlog_p=krsenje['razlog'], iznos_p=krsenje['iznos_penala'], ugovor=krsenje['ugovor'])
+            for sifra_p, krsenje in zip(dodeli_sifre(Penal, len(krsenja)), krsenja)
+        ]
+        Penal.objects.bulk_create(penali)
+        KrsenjeUgovora.objects.bulk_create([
+            KrsenjeUgovora(pravilo=krsenje['pravilo'], predmet=krsenje['predmet'], penal=penal)
+            for krsenje, penal in zip(krsenja, penali)
+        ])
+        for kod in dict.fromkeys(krsenje['pravilo'] for krsenje in krsenja):
+            PRAVILA[kod].posledica([krsenje for krsenje in krsenja if krsenje['pravilo'] == kod])
+
+        # bulk_create ne okida signale: zbirne tabele i keš se osvežavaju ovde
+        zbirovi.oznaci_korpe('penali', {(penal.datum_p, penal.ugovor_id) for penal in penali})
+        povecaj_verziju(Penal)
+        trajanje['upis'] = _trajanje_ms(faza)
+
+        faza = time.perf_counter()
+        posalji_emailove([
+            (krsenje['ugovor'].dobavljac.email,) + email_o_penalu(
+                penal, krsenje['ugovor'], f"\n{krsenje.get('detalji', '')}\n"
+            )
+            for krsenje, penal in zip(krsenja, penali)
+        ])
+        trajanje['obavestenja'] = _trajanje_ms(faza)
+
+    rezultat['penali'] = list(zip(krsenja, penali))
+    trajanje['ukupno'] = _trajanje_ms(pocetak)
+    logger.info(
+        f"Obrada kršenja ugovora: {len(rezultat['krsenja'])} kršenja, {len(penali)} penala kreirano, "
+        f"{len(rezultat['preskocena'])} preskočeno ({trajanje['ukupno']} ms)"
+    )
+    return rezultat
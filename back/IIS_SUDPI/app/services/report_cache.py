@@ -0,0 +1,119 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+from django.conf import settings
+
+from app.models import Dobavljac, Reklamacija, Sertifikat
+from app.services.response_cache import verzije_modela
+from app.services.supplier_sync_service import get_status as get_sync_status
+
+logger = logging.getLogger(__name__)
+
+# On-disk, content-addressed cache of PDF reports from the supplier analysis
+# microservice. The file name is a hash of the report kind, its parameters and
+# the data version (local model versions plus the last finished sync), so a
+# change to the underlying data simply produces a new key; old files expire
+# after REPORT_CACHE_TTL seconds and the directory is kept under
+# REPORT_CACHE_MAX_MB by removing the least recently used files. The mtime of
+# a file is its creation time and drives the TTL; recency for the LRU is kept
+# in the atime, which a cache hit sets explicitly (mounts may use noatime).
+# A report is written to the cache while it is streamed to the client and
+# only becomes visible once it has been received completely.
+
+CHUNK_SIZE = 64 * 1024
+SOURCE_MODELS = (Dobavljac, Reklamacija, Sertifikat)
+
+
+def _cache_dir() -> Path:
+    return Path(getattr(settings, 'REPORT_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'izvestaji')))
+
+
+def data_version() -> list:
+    return [*verzije_modela(SOURCE_MODELS), get_sync_status().get('finished')]
+
+
+def cache_key(kind: str, params: Dict[str, Any]) -> str:
+    material = json.dumps([kind, params, data_version()], sort_keys=True, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def _path(key: str) -> Path:
+    return _cache_dir() / key[:2] / f"{key}.pdf"
+
+
+def open_cached(key: str) -> Optional[BinaryIO]:
+    """Return an open file for a cached, unexpired report, or None."""
+    path = _path(key)
+    try:
+        stat = path.stat()
+        now = time.time()
+        if now - stat.st_mtime > getattr(settings, 'REPORT_CACHE_TTL', 3600):
+            path.unlink(missing_ok=True)
+            return None
+        handle = open(path, 'rb')
+        os.utime(path, (now, stat.st_mtime))  # recency for LRU pruning, mtime stays the creation time
+        return handle
+    except FileNotFoundError:
+        return None
+
+
+def stream_and_store(upstream, key: str) -> Iterator[bytes]:
+    """
+    Yield the upstream response in chunks (constant memory) while writing it
+    to a temporary file; the file is moved into the cache only if the whole
+    body was received and sent.
+    """
+    path = _path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.part')
+    completed = False
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            for chunk in upstream.iter_content(CHUNK_SIZE):
+                if chunk:
+                    temp_file.write(chunk)
+                    yield chunk
+        os.replace(temp_path, path)
+        completed = True
+        prune()
+    finally:
+        upstream.close()
+        if not completed:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+
+def prune() -> int:
+    """Delete expired files and the least recently used ones above the size limit."""
+    limit = getattr(settings, 'REPORT_CACHE_MAX_MB', 200) * 1024 * 1024
+    ttl = getattr(settings, 'REPORT_CACHE_TTL', 3600)
+    now = time.time()
+    files = []
+    removed = 0
+    for path in _cache_dir().glob('*/*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if now - stat.st_mtime > ttl:
+            path.unlink(missing_ok=True)
+            removed += 1
+        else:
+            files.append((stat.st_atime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= limit:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import logging
+import time
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# Keš odgovora za read endpoint-e.
+# Backend je Django cache alias (settings.CACHES), pa se lokalna memorija,
+# fajl sistem ili Redis biraju samo konfiguracijom (ODGOVOR_CACHE_BACKEND).
+# Svaki model ima brojač verzije u istom backend-u; signali ga povećavaju pri
+# svakoj izmeni, a verzije zavisnih modela su deo ključa, pa stari unosi
+# jednostavno postaju nedostižni i ističu sami.
+
+PREFIKS = 'odgovor'
+
+# naziv endpoint-a -> lista modela od kojih zavisi (za stats endpoint)
+REGISTROVANI_ENDPOINTI = {}
+
+
+def _kes():
+    return caches[getattr(settings, 'ODGOVOR_CACHE_ALIAS', 'odgovori')]
+
+
+def _kljuc_verzije(model):
+    return f"{PREFIKS}:verzija:{model._meta.label_lower}"
+
+
+def _nova_verzija():
+    # Vremenska oznaka umesto 1, da izbačen (evicted) brojač ne vrati staru verziju
+    return time.time_ns() // 1000
+
+
+def verzije_modela(modeli):
+    """Vraća trenutne verzije za listu modela (jedan get_many poziv)."""
+    kes = _kes()
+    kljucevi = [_kljuc_verzije(model) for model in modeli]
+    postojece = kes.get_many(kljucevi)
+    verzije = []
+    for kljuc in kljucevi:
+        if kljuc not in postojece:
+            kes.add(kljuc, _nova_verzija(), timeout=None)
+            postojece[kljuc] = kes.get(kljuc)
+        verzije.append(postojece[kljuc])
+    return verzije
+
+
+def povecaj_verziju(model):
+    """Invalidira sve keširane odgovore koji zavise od modela."""
+    kes = _kes()
+    kljuc = _kljuc_verzije(model)
+    try:
+        kes.incr(kljuc)
+    except ValueError:
+        kes.set(kljuc, _nova_verzija(), timeout=None)
+    except Exception as e:
+        logger.error(f"Greška pri invalidaciji keša za {model._meta.label}: {str(e)}")
+
+
+def _zabelezi(naziv, ishod):
+    kes = _kes()
+    kljuc = f"{PREFIKS}:statistika:{naziv}:{ishod}"
+    try:
+        kes.add(kljuc, 0, timeout=None)
+        kes.incr(kljuc)
+    except Exception:
+        pass
+
+
+def _uloga(request):
+    korisnik = getattr(request, 'user', None)
+    if korisnik is None or not korisnik.is_authenticated:
+        return 'anonimni'
+    return getattr(korisnik, 'tip_k', None) or 'nepoznata'
+
+
+def _normalizovani_parametri(request, kwargs):
+    parametri = sorted(
+        (kljuc, request.query_params.getlist(kljuc))
+        for kljuc in request.query_params.keys()
+    )
+    return json.dumps([parametri, sorted(kwargs.items())], default=str)
+
+
+def napravi_kljuc(naziv, request, modeli, kwargs=None):
+    """
+    Ključ: endpoint + metoda + uloga + normalizovani parametri + današnji datum
+    (statusi zavise od datuma) + verzije zavisnih modela.
+    """
+    sadrzaj = '|'.join([
+        request.method,
+        _normalizovani_parametri(request, kwargs or {}),
+        date.today().isoformat(),
+        '.'.join(str(verzija) for verzija in verzije_modela(modeli)),
+    ])
+    otisak = hashlib.md5(sadrzaj.encode('utf-8')).hexdigest()
+    return f"{PREFIKS}:{naziv}:{_uloga(request)}:{otisak}"
+
+
+def kesiran_odgovor(naziv, modeli=(), timeout=None):
+    """
+    Dekorator za DRF function-based view-ove. Postavlja se ispod @allowed_users,
+    tako da se provera prava izvršava pre čitanja iz keša.
+    Kešira se samo uspešan (200) odgovor.
+    """
+    modeli = tuple(modeli)
+    if timeout is None:
+        timeout = getattr(settings, 'ODGOVOR_CACHE_TIMEOUT', 300)
+
+    def decorator(view_func):
+        REGISTROVANI_ENDPOINTI[naziv] = [model._meta.label for model in modeli]
+
+        @wraps(view_func)
+        def wrapped_func(request, *args, **kwargs):
+            try:
+                kljuc = napravi_kljuc(naziv, request, modeli, kwargs)
+                podaci = _kes().get(kljuc)
+            except Exception as e:
+                # Keš nikad ne sme da obori endpoint
+                logger.error(f"Greška pri čitanju keša za {naziv}: {str(e)}")
+                return view_func(request, *args, **kwargs)
+
+            if podaci is not None:
+                _zabelezi(naziv, 'hit')
+                return Response(podaci, status=status.HTTP_200_OK)
+
+            _zabelezi(naziv, 'miss')
+            response = view_func(request, *args, **kwargs)
+            if getattr(response, 'status_code', None) == status.HTTP_200_OK and hasattr(response, 'data'):
+                try:
+                    _kes().set(kljuc, response.data, timeout)
+                except Exception as e:
+                    logger.error(f"Greška pri upisu u keš za {naziv}: {str(e)}")
+            return response
+
+        return wrapped_func
+
+    return decorator
+
+
+def kesiran_broj(queryset, modeli, timeout=None):
+    """
+    COUNT(*) queryseta iz keša. Ključ je SQL upita sa parametrima i verzijama
+    modela, pa svaka izmena modela (signali, povecaj_verziju) invalidira broj.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'ODGOVOR_CACHE_TIMEOUT', 300)
+    try:
+        sql, parametri = queryset.query.sql_with_params()
+        sadrzaj = '|'.join([
+            sql,
+            json.dumps(parametri, default=str),
+            '.'.join(str(verzija) for verzija in verzije_modela(modeli)),
+        ])
+        kljuc = f"{PREFIKS}:broj:{hashlib.md5(sadrzaj.encode('utf-8')).hexdigest()}"
+        broj = _kes().get(kljuc)
+    except Exception as e:
+        logger.error(f"Greška pri čitanju keširanog broja: {str(e)}")
+        return queryset.count()
+
+    if broj is None:
+        broj = queryset.count()
+        try:
+            _kes().set(kljuc, broj, timeout)
+        except Exception as e:
+            logger.error(f"Greška pri upisu broja u keš: {str(e)}")
+    return broj
+
+
+def statistika_kesa():
+    """Broj pogodaka i promašaja po registrovanom endpoint-u."""
+    kes = _kes()
+    kljucevi = [
+        f"{PREFIKS}:statistika:{naziv}:{ishod}"
+        for naziv in REGISTROVANI_ENDPOINTI
+        for ishod in ('hit', 'miss')
+    ]
+    vrednosti = kes.get_many(kljucevi)
+
+    endpointi = []
+    ukupno_hit = 0
+    ukupno_miss = 0
+    for naziv, modeli in sorted(REGISTROVANI_ENDPOINTI.items()):
+        hit = vrednosti.get(f"{PREFIKS}:statistika:{naziv}:hit", 0)
+        miss = vrednosti.get(f"{PREFIKS}:statistika:{naziv}:miss", 0)
+        ukupno_hit += hit
+        ukupno_miss += miss
+        endpointi.append({
+            'endpoint': naziv,
+            'modeli': modeli,
+            'hit': hit,
+            'miss': miss,
+            'hit_rate': round(hit / (hit + miss) * 100, 1) if hit + miss else 0,
+        })
+
+    return {
+        'backend': kes.__class__.__name__,
+        'ukupno_hit': ukupno_hit,
+        'ukupno_miss': ukupno_miss,
+        'hit_rate': round(ukupno_hit / (ukupno_hit + ukupno_miss) * 100, 1) if ukupno_hit + ukupno_miss else 0,
+        'endpointi': endpointi,
+    }
@@ -0,0 +1,175 @@
+import logging
+import math
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from app.models import RutaGeometrija
+
+logger = logging.getLogger(__name__)
+
+# Rute između dve tačke (OSRM) sa kešom u tabeli ruta_geometrija.
+# Ruta se uvek traži sa punom geometrijom, pa isti zapis služi i za dužinu i
+# trajanje (predlog rute) i za iscrtavanje i simulaciju vožnje.
+# Geometrija se čuva kao kodirana polilinija (preciznost 1e-5, oko 1 m).
+# Ruter je zamenljiv (podešavanje RUTER), npr. pravolinijski_ruter bez mreže.
+
+OSRM_URL = "http://router.project-osrm.org/route/v1"
+PODRAZUMEVANI_PROFIL = 'driving'
+PRECIZNOST = 5
+
+
+def osrm_ruter(polaziste, odrediste, profil):
+    """
+    polaziste/odrediste su (lat, lon). Vraća {'distance': m, 'duration': s,
+    'koordinate': [[lon, lat], ...]} ili None ako ruta ne postoji.
+    Greške mreže propušta dalje.
+    """
+    url = (
+        f"{OSRM_URL}/{profil}/{polaziste[1]},{polaziste[0]};{odrediste[1]},{odrediste[0]}"
+        f"?overview=full&geometries=geojson"
+    )
+    response = requests.get(url, timeout=getattr(settings, 'RUTER_TIMEOUT', 10))
+    response.raise_for_status()
+    data = response.json()
+    if data.get('code') != 'Ok' or not data.get('routes'):
+        return None
+    ruta = data['routes'][0]
+    return {
+        'distance': ruta['distance'],
+        'duration': ruta['duration'],
+        'koordinate': ruta['geometry']['coordinates'],
+    }
+
+
+def pravolinijski_ruter(polaziste, odrediste, profil, brzina_kmh=60, broj_tacaka=50):
+    """
+    Lokalni ruter bez mreže (testovi, rad bez pristupa OSRM-u): prava linija
+    između tačaka, dužina po haversine formuli i trajanje pri stalnoj brzini.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (*polaziste, *odrediste))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    duzina_m = 2 * 6371000 * math.asin(math.sqrt(a))
+    koordinate = [
+        [
+            polaziste[1] + (odrediste[1] - polaziste[1]) * i / (broj_tacaka - 1),
+            polaziste[0] + (odrediste[0] - polaziste[0]) * i / (broj_tacaka - 1),
+        ]
+        for i in range(broj_tacaka)
+    ]
+    return {
+        'distance': duzina_m,
+        'duration': duzina_m / (brzina_kmh / 3.6),
+        'koordinate': koordinate,
+    }
+
+
+def kodiraj_poliliniju(koordinate):
+    """[[lon, lat], ...] -> kodirana polilinija (Google algoritam, lat pa lon)."""
+    faktor = 10 ** PRECIZNOST
+    delovi = []
+    prethodni_lat = prethodni_lon = 0
+    for lon, lat in koordinate:
+        lat_i, lon_i = round(lat * faktor), round(lon * faktor)
+        for razlika in (lat_i - prethodni_lat, lon_i - prethodni_lon):
+            vrednost = ~(razlika << 1) if razlika < 0 else razlika << 1
+            while vrednost >= 0x20:
+                delovi.append(chr((0x20 | (vrednost & 0x1f)) + 63))
+                vrednost >>= 5
+            delovi.append(chr(vrednost + 63))
+        prethodni_lat, prethodni_lon = lat_i, lon_i
+    return ''.join(delovi)
+
+
+def dekodiraj_poliliniju(polilinija):
+    """Kodirana polilinija -> [[lon, lat], ...]."""
+    faktor = 10 ** PRECIZNOST
+    koordinate = []
+    indeks = lat = lon = 0
+    while indeks < len(polilinija):
+        razlike = []
+        for _ in range(2):
+            pomeraj = rezultat = 0
+            while True:
+                bajt = ord(polilinija[indeks]) - 63
+                indeks += 1
+                rezultat |= (bajt & 0x1f) << pomeraj
+                pomeraj += 5
+                if bajt < 0x20:
+                    break
+            razlike.append(~(rezultat >> 1) if rezultat & 1 else rezultat >> 1)
+        lat += razlike[0]
+        lon += razlike[1]
+        koordinate.append([lon / faktor, lat / faktor])
+    return koordinate
+
+
+def kljuc_rute(polaziste, odrediste, profil):
+    return (
+        f"{profil}:{polaziste[0]:.{PRECIZNOST}f},{polaziste[1]:.{PRECIZNOST}f};"
+        f"{odrediste[0]:.{PRECIZNOST}f},{odrediste[1]:.{PRECIZNOST}f}"
+    )
+
+
+def _rezultat(zapis, sa_geometrijom):
+    rezultat = {'duzina_m': zapis.duzina_m, 'trajanje_s': zapis.trajanje_s}
+    if sa_geometrijom:
+        rezultat['geometrija'] = {
+            'type': 'LineString',
+            'coordinates': dekodiraj_poliliniju(zapis.polilinija),
+        }
+    return rezultat
+
+
+def geometrija_rute(kljuc):
+    """
+    Koordinate [[lon, lat], ...] keširane rute po ključu (kljuc_rute), ili None
+    ako zapis više ne postoji. Ne proverava starost i ne poziva ruter.
+    """
+    polilinija = RutaGeometrija.objects.filter(kljuc=kljuc).values_list('polilinija', flat=True).first()
+    if polilinija is None:
+        return None
+    return dekodiraj_poliliniju(polilinija)
+
+
+def dobavi_rutu(polaziste, odrediste, profil=PODRAZUMEVANI_PROFIL, sa_geometrijom=True, ruter=None):
+    """
+    Vraća {'duzina_m', 'trajanje_s', 'geometrija' (GeoJSON LineString)} za rutu
+    između dve tačke (lat, lon), ili None ako ruta nije dostupna. Ruter se poziva
+    samo ako ruta nije u kešu ili je starija od RUTA_KES_TTL_DANA.
+    """
+    if None in (*polaziste, *odrediste):
+        return None
+    kljuc = kljuc_rute(polaziste, odrediste, profil)
+    granica = timezone.now() - timedelta(days=getattr(settings, 'RUTA_KES_TTL_DANA', 30))
+    zapis = RutaGeometrija.objects.filter(kljuc=kljuc, azurirano__gte=granica).first()
+    if zapis:
+        return _rezultat(zapis, sa_geometrijom)
+
+    if ruter is None:
+        ruter = import_string(getattr(settings, 'RUTER', 'app.services.route_service.osrm_ruter'))
+    try:
+        ruta = ruter(polaziste, odrediste, profil)
+    except Exception as e:
+        logger.warning(f"Greška pri dobavljanju rute {kljuc}: {e}")
+        return None
+    if ruta is None:
+        return None
+
+    vrednosti = {
+        'profil': profil,
+        'duzina_m': ruta['distance'],
+        'trajanje_s': ruta['duration'],
+        'polilinija': kodiraj_poliliniju(ruta['koordinate']),
+        'azurirano': timezone.now(),
+    }
+    try:
+        zapis, _ = RutaGeometrija.objects.update_or_create(kljuc=kljuc, defaults=vrednosti)
+    except IntegrityError:
+        # Drugi proces je istovremeno upisao istu rutu
+        zapis = RutaGeometrija.objects.get(kljuc=kljuc)
+    return _rezultat(zapis, sa_geometrijom)
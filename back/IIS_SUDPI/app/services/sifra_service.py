@@ -0,0 +1,167 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Max, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from app.models import BrojacSifara, Dobavljac, Faktura, Penal, Popust, Skladiste, Transakcija
+
+logger = logging.getLogger(__name__)
+
+# Centralna dodela šifara (primarnih ključeva) umesto Max()+1 pri svakom upisu,
+# koje je pod istovremenim zahtevima davalo iste šifre (greške duplog ključa).
+# - 'sekvenca' (Oracle, PostgreSQL): sledeća vrednost identity sekvence kolone;
+#   sekvenca nije deo transakcije, pa se ne zaključava ništa, a šifre se ne
+#   sudaraju ni sa redovima kojima šifru dodeljuje sama baza
+# - 'blok' (ostale baze): hi/lo dodela; jednim UPDATE-om nad brojac_sifara
+#   rezerviše se blok od SIFRE_VELICINA_BLOKA šifara, a ostatak bloka se deli
+#   iz memorije procesa tek kada je rezervacija potvrđena (commit)
+# Posle uvoza podataka sa eksplicitnim šiframa pokrenuti `manage.py uskladi_sifre`
+# da sekvence i brojači pređu najveću postojeću šifru.
+
+STRATEGIJE_PO_BAZI = {'oracle': 'sekvenca', 'postgresql': 'sekvenca'}
+
+# Tabele čije se šifre dodeljuju preko ovog servisa (komanda uskladi_sifre)
+MODELI = (Dobavljac, Faktura, Penal, Popust, Skladiste, Transakcija)
+
+_blokovi = {}  # tabela -> [sledeca, poslednja]
+_sekvence = {}  # tabela -> naziv sekvence
+_lock = threading.Lock()
+
+
+def strategija():
+    return getattr(settings, 'SIFRE_STRATEGIJA', '') or STRATEGIJE_PO_BAZI.get(connection.vendor, 'blok')
+
+
+def dodeli_sifru(model):
+    """Vraća novu, jedinstvenu šifru za zapis modela."""
+    return dodeli_sifre(model, 1)[0]
+
+
+def dodeli_sifre(model, broj):
+    """Vraća listu od `broj` novih šifara (ne nužno uzastopnih)."""
+    if broj < 1:
+        return []
+    if strategija() == 'sekvenca':
+        return _iz_sekvence(model, broj)
+    return _iz_bloka(model, broj)
+
+
+# Sekvence
+
+def _naziv_sekvence(model):
+    tabela = model._meta.db_table
+    if tabela not in _sekvence:
+        kolona = model._meta.pk.column
+        with connection.cursor() as cursor:
+            if connection.vendor == 'oracle':
+                cursor.execute(
+                    "SELECT sequence_name FROM user_tab_identity_cols "
+                    "WHERE table_name = UPPER(%s) AND column_name = UPPER(%s)",
+                    [tabela, kolona]
+                )
+            else:
+                cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [tabela, kolona])
+            red = cursor.fetchone()
+        if not red or not red[0]:
+            raise ImproperlyConfigured(f"Kolona {tabela}.{kolona} nema sekvencu; postaviti SIFRE_STRATEGIJA='blok'")
+        _sekvence[tabela] = red[0]
+    return _sekvence[tabela]
+
+
+def _iz_sekvence(model, broj):
+    sekvenca = _naziv_sekvence(model)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'oracle':
+            cursor.execute(
+                f'SELECT {connection.ops.quote_name(sekvenca)}.NEXTVAL FROM dual CONNECT BY LEVEL <= %s',
+                [broj]
+            )
+        else:
+            cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [sekvenca, broj])
+        return [red[0] for red in cursor.fetchall()]
+
+
+# Hi/lo blokovi
+
+def _najveca_sifra(model):
+    # Redovi upisani mimo dodele (admin, uvoz, identity kolona) ne smeju biti
+    # preklopljeni; najveća šifra se čita po indeksu primarnog ključa
+    return Coalesce(Subquery(model.objects.order_by('-pk').values('pk')[:1]), 0)
+
+
+def _rezervisi_blok(model, velicina):
+    """Rezerviše `velicina` uzastopnih šifara u brojac_sifara; vraća prvu."""
+    tabela = model._meta.db_table
+    with transaction.atomic():
+        azurirano = BrojacSifara.objects.filter(tabela=tabela).update(
+            poslednja=Greatest(F('poslednja'), _najveca_sifra(model)) + velicina
+        )
+        if not azurirano:
+            try:
+                with transaction.atomic():
+                    BrojacSifara.objects.create(tabela=tabela, poslednja=0)
+            except IntegrityError:
+                # Drugi proces je istovremeno napravio brojač
+                pass
+            BrojacSifara.objects.filter(tabela=tabela).update(
+                poslednja=Greatest(F('poslednja'), _najveca_sifra(model)) + velicina
+            )
+        poslednja = BrojacSifara.objects.filter(tabela=tabela).values_list('poslednja', flat=True).get()
+    return poslednja - velicina + 1
+
+
+def _sacuvaj_ostatak(tabela, sledeca, poslednja):
+    with _lock:
+        _blokovi[tabela] = [sledeca, poslednja]
+
+
+def _iz_bloka(model, broj):
+    tabela = model._meta.db_table
+    with _lock:
+        blok = _blokovi.get(tabela)
+        if blok and blok[1] - blok[0] + 1 >= broj:
+            prva = blok[0]
+            blok[0] += broj
+            return list(range(prva, prva + broj))
+
+    velicina = max(broj, getattr(settings, 'SIFRE_VELICINA_BLOKA', 20))
+    prva = _rezervisi_blok(model, velicina)
+    if velicina > broj:
+        # Ako se okolna transakcija poništi, poništava se i rezervacija, pa se
+        # ostatak bloka sme deliti tek posle potvrde
+        transaction.on_commit(lambda: _sacuvaj_ostatak(tabela, prva + broj, prva + velicina - 1))
+    return list(range(prva, prva + broj))
+
+
+def uskladi(model):
+    """
+    Pomera sekvencu (ili brojač) iznad najveće postojeće šifre tabele.
+    Vraća najveću postojeću šifru.
+    """
+    tabela = model._meta.db_table
+    najveca = model.objects.aggregate(najveca=Max('pk'))['najveca'] or 0
+    if strategija() == 'sekvenca':
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            if connection.vendor == 'oracle':
+                cursor.execute(
+                    f"ALTER TABLE {quote(tabela)} MODIFY {quote(model._meta.pk.column)} "
+                    f"GENERATED BY DEFAULT ON NULL AS IDENTITY (START WITH LIMIT VALUE)"
+                )
+            else:
+                sekvenca = _naziv_sekvence(model)
+                cursor.execute(
+                    f"SELECT setval(%s, GREATEST(%s, (SELECT last_value FROM {sekvenca})))",
+                    [sekvenca, najveca]
+                )
+    else:
+        BrojacSifara.objects.get_or_create(tabela=tabela)
+        BrojacSifara.objects.filter(tabela=tabela).update(poslednja=Greatest(F('poslednja'), najveca))
+        with _lock:
+            _blokovi.pop(tabela, None)
+    logger.info(f"Šifre za {tabela} usklađene (najveća postojeća: {najveca})")
+    return najveca
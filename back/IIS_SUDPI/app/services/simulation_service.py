@@ -0,0 +1,115 @@
+import logging
+import random
+
+from django.db import transaction
+
+from app.models import Isporuka, Rampa, Ruta, Temperatura, Upozorenje, Voznja, voziloOmogucavaTemperatura
+from app.services.job_service import posao, nastavi
+from app.services.route_service import geometrija_rute
+
+logger = logging.getLogger(__name__)
+
+# Simulacije vožnje i temperature kao pozadinski poslovi (job_service).
+# Svaki poziv izvršava jedan korak i zakazuje sledeći pomoću nastavi(),
+# umesto niti koja spava između koraka.
+# Posao simulacije vožnje čuva samo ključ rute u kešu (ruta_geometrija) i
+# redni broj koraka; koordinate se čitaju iz keša u svakom koraku, pa se
+# parametri posla ne uvećavaju sa dužinom rute.
+
+KORAK_VOZNJE_S = 2
+KORAK_TEMPERATURE_S = 5
+
+
+def kljuc_simulacije_voznje(sifra_r):
+    return f"simulacija_voznje:{sifra_r}"
+
+
+def kljuc_simulacije_temperature(sifra_i):
+    return f"simulacija_temperature:{sifra_i}"
+
+
+@posao('simulacija_voznje')
+def korak_simulacije_voznje(posao_obj):
+    """Parametri: ruta (sifra_r), geometrija (ključ rute u kešu, kljuc_rute), korak."""
+    parametri = posao_obj.parametri
+    ruta = Ruta.objects.get(sifra_r=parametri['ruta'])
+    if 'geometrija' in parametri:
+        koordinate = geometrija_rute(parametri['geometrija'])
+    else:
+        # Posao zakazan pre keširanja geometrije nosi koordinate u parametrima
+        koordinate = parametri.get('koordinate')
+    korak = parametri.get('korak', 0)
+    if koordinate is None:
+        logger.warning(f"Geometrija rute {parametri.get('geometrija')} nije u kešu, simulacija rute {ruta.sifra_r} se završava")
+        koordinate = []
+
+    if korak < len(koordinate):
+        lon, lat = koordinate[korak]
+        # 5% šanse da vozilo odstupi od rute
+        if random.random() < 0.05:
+            lon += random.uniform(0.001, 0.003)
+            lat += random.uniform(0.001, 0.003)
+            Upozorenje.objects.create(
+                isporuka=Isporuka.objects.filter(ruta=ruta).first(),
+                tip="odstupanje",
+                poruka=f"Vozilo je odstupilo od planirane rute ({ruta.polazna_tacka} → {ruta.odrediste})."
+            )
+            ruta.status = "odstupanje"
+            ruta.save()
+
+        Voznja.objects.create(ruta=ruta, trenutna_lat=lat, trenutna_lon=lon)
+        nastavi(posao_obj, KORAK_VOZNJE_S, korak=korak + 1)
+
+    # Poslednji korak: ruta je završena, vozač i vozilo se oslobađaju
+    with transaction.atomic():
+        ruta.status = "zavrsena"
+        ruta.save()
+        isporuka = Isporuka.objects.select_related('vozac', 'vozilo').filter(ruta=ruta).first()
+        if isporuka:
+            isporuka.status = 'zavrsena'
+            isporuka.save()
+            if isporuka.vozac:
+                isporuka.vozac.status = 'slobodan'
+                isporuka.vozac.save()
+            if isporuka.vozilo:
+                isporuka.vozilo.status = 'slobodno'
+                isporuka.vozilo.save()
+
+
+@posao('simulacija_temperature')
+def korak_simulacije_temperature(posao_obj):
+    """Parametri: isporuka (sifra_i), min_granica, max_granica. Traje dok je isporuka spremna."""
+    parametri = posao_obj.parametri
+    isporuka = Isporuka.objects.select_related('vozilo').get(sifra_i=parametri['isporuka'])
+    if isporuka.status != 'spremna':
+        return
+
+    min_g = parametri['min_granica']
+    max_g = parametri['max_granica']
+    vrednost = random.uniform(min_g - 1, max_g + 1)
+
+    voziloOmogucavaTemperatura.objects.create(
+        sifra_temp=Temperatura.objects.first(),
+        sifra_vozila=isporuka.vozilo,
+        isporuka=isporuka,
+        vrednost=vrednost,
+        min_granica=min_g,
+        max_granica=max_g
+    )
+
+    if vrednost < min_g or vrednost > max_g:
+        Upozorenje.objects.create(
+            isporuka=isporuka,
+            tip="temperatura",
+            poruka=f"Temperatura {vrednost:.2f}°C je izvan granica ({min_g:.1f} - {max_g:.1f})."
+        )
+
+    nastavi(posao_obj, KORAK_TEMPERATURE_S)
+
+
+@posao('oslobodi_rampu')
+def oslobodi_rampu(posao_obj):
+    """Parametri: rampa (sifra_rp)."""
+    rampa = Rampa.objects.filter(sifra_rp=posao_obj.parametri['rampa']).first()
+    if rampa:
+        rampa.oslobodi()
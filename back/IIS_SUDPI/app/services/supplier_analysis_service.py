@@ -1,65 +1,315 @@
+import asyncio
 import logging
+import random
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+import httpx
 import requests
-from typing import Dict, List, Any, Optional
+from requests.adapters import HTTPAdapter
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeouts in seconds, matched by endpoint prefix
+DEFAULT_TIMEOUT: Tuple[float, float] = (3.05, 10)
+ENDPOINT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    'health': (2, 5),
+    'analysis/': (3.05, 30),
+    'reports/': (3.05, 60),
+}
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {'get', 'put', 'delete'}
+
+
+class CircuitOpenError(Exception):
+    """Raised internally when the circuit breaker rejects a call."""
+
+
+class BatchNotSupported(Exception):
+    """The microservice has no batch endpoint for a resource (404/405)."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After `failure_threshold` failures the
+    circuit opens and calls fail fast for `reset_timeout` seconds; then a single
+    trial call is let through (half-open) and its outcome closes or reopens it.
+    A trial that ends without an outcome is released; one that never reports
+    back is replaced by a new trial after another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and (
+                self._trial_started is None
+                or time.monotonic() - self._trial_started >= self.reset_timeout
+            ):
+                self._trial_started = time.monotonic()
+                return True
+            return False
+
+    def release(self) -> None:
+        """Free the half-open trial slot of a call that ended without success or failure."""
+        with self._lock:
+            self._trial_started = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_started is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Supplier analysis circuit opened after %s failures", self._failures)
+                self._opened_at = time.monotonic()
+            self._trial_started = None
+
+
+class EndpointMetrics:
+    """Thread-safe per-endpoint call counters and latency samples."""
+
+    SAMPLE_SIZE = 500
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        return self._data.setdefault(name, {
+            'calls': 0, 'errors': 0, 'retries': 0, 'rejected': 0,
+            'latencies': deque(maxlen=self.SAMPLE_SIZE), 'last_error': None,
+        })
+
+    def record(self, name: str, latency: float, error: Optional[str] = None, retries: int = 0) -> None:
+        with self._lock:
+            entry = self._entry(name)
+            entry['calls'] += 1
+            entry['retries'] += retries
+            entry['latencies'].append(latency)
+            if error:
+                entry['errors'] += 1
+                entry['last_error'] = error
+
+    def record_rejected(self, name: str) -> None:
+        with self._lock:
+            self._entry(name)['rejected'] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for name, entry in self._data.items():
+                latencies = sorted(entry['latencies'])
+                result[name] = {
+                    'calls': entry['calls'],
+                    'errors': entry['errors'],
+                    'retries': entry['retries'],
+                    'rejected': entry['rejected'],
+                    'avg_ms': round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0,
+                    'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else 0,
+                    'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0,
+                    'last_error': entry['last_error'],
+                }
+            return result
+
+
+# Shared by every SupplierAnalysisService instance in the process
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+circuit_breaker = CircuitBreaker(
+    failure_threshold=getattr(settings, 'SUPPLIER_ANALYSIS_CIRCUIT_THRESHOLD', 5),
+    reset_timeout=getattr(settings, 'SUPPLIER_ANALYSIS_CIRCUIT_RESET', 30),
+)
+metrics = EndpointMetrics()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session (keep-alive connections are reused)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = getattr(settings, 'SUPPLIER_ANALYSIS_POOL_SIZE', 10)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def endpoint_name(method: str, endpoint: str) -> str:
+    """Metric key: numeric path segments are collapsed so IDs do not create new keys."""
+    path = re.sub(r'/\d+(?=/|$)', '/{id}', endpoint.rstrip('/'))
+    return f"{method.upper()} {path}"
+
+
 class SupplierAnalysisService:
     """
     Service for communicating with the Supplier Analysis microservice
     """
-    def __init__(self):
-        self.base_url = settings.SUPPLIER_ANALYSIS_MS_URL
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url or settings.SUPPLIER_ANALYSIS_MS_URL
         if not self.base_url.endswith('/'):
             self.base_url += '/'
         self.api_url = f"{self.base_url}api/"
+        self.max_retries = getattr(settings, 'SUPPLIER_ANALYSIS_MAX_RETRIES', 2)
+        self.backoff = getattr(settings, 'SUPPLIER_ANALYSIS_BACKOFF', 0.2)
         logger.info(f"Initialized SupplierAnalysisService with base URL: {self.base_url}")
 
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None,
-                     params: Optional[Dict[str, Any]] = None, stream: bool = False) -> Any:
+    @staticmethod
+    def _timeout_for(endpoint: str) -> Tuple[float, float]:
+        for prefix, timeout in ENDPOINT_TIMEOUTS.items():
+            if endpoint.startswith(prefix):
+                return timeout
+        return DEFAULT_TIMEOUT
+
+    def _send(self, method: str, endpoint: str, name: str, idempotent: bool,
+              **kwargs: Any) -> requests.Response:
         """
-        Make a request to the supplier analysis microservice
+        Send one logical request through the circuit breaker, retrying idempotent
+        calls on connection errors, timeouts and 502/503/504 with jittered backoff.
+        Raises CircuitOpenError or requests.exceptions.RequestException.
         """
+        if not circuit_breaker.allow():
+            metrics.record_rejected(name)
+            raise CircuitOpenError(f"Circuit open, skipping {name}")
+
         url = f"{self.api_url}{endpoint}"
-        
+        attempts = self.max_retries + 1 if idempotent else 1
+        decided = False
         try:
-            logger.debug(f"Making {method} request to {url}")
-            if method.lower() == 'get':
-                response = requests.get(url, params=params, stream=stream)
-            elif method.lower() == 'post':
-                response = requests.post(url, json=data, params=params, stream=stream)
-            elif method.lower() == 'put':
-                response = requests.put(url, json=data, params=params)
-            elif method.lower() == 'delete':
-                response = requests.delete(url, params=params)
-            else:
-                logger.error(f"Unsupported HTTP method: {method}")
-                return None
-            
-            response.raise_for_status()
-            
+            started = time.perf_counter()
+            for attempt in range(attempts):
+                try:
+                    logger.debug(f"Making {method} request to {url}")
+                    response = get_session().request(method, url, timeout=self._timeout_for(endpoint), **kwargs)
+                    if response.status_code in RETRY_STATUSES and attempt + 1 < attempts:
+                        response.close()
+                        raise requests.exceptions.HTTPError(f"{response.status_code} from {url}", response=response)
+                    response.raise_for_status()
+                except requests.exceptions.RequestException as e:
+                    client_error = (
+                        isinstance(e, requests.exceptions.HTTPError) and e.response is not None
+                        and e.response.status_code < 500
+                    )
+                    retryable = not client_error and (
+                        isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                        or (e.response is not None and e.response.status_code in RETRY_STATUSES)
+                    )
+                    if retryable and attempt + 1 < attempts:
+                        time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+                        continue
+                    # 4xx means the service answered; only server-side failures trip the breaker
+                    decided = True
+                    if client_error:
+                        circuit_breaker.record_success()
+                    else:
+                        circuit_breaker.record_failure()
+                    metrics.record(name, time.perf_counter() - started, error=str(e), retries=attempt)
+                    raise
+                decided = True
+                circuit_breaker.record_success()
+                metrics.record(name, time.perf_counter() - started, retries=attempt)
+                return response
+        finally:
+            if not decided:
+                # Cancelled or failed outside the request: no outcome, free a half-open trial
+                circuit_breaker.release()
+
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None,
+                     params: Optional[Dict[str, Any]] = None, stream: bool = False,
+                     idempotent: Optional[bool] = None, name: Optional[str] = None) -> Any:
+        """
+        Make a request to the supplier analysis microservice.
+        `idempotent` defaults to True for GET/PUT/DELETE; read-only POST endpoints pass True.
+        """
+        method = method.lower()
+        if method not in ('get', 'post', 'put', 'delete'):
+            logger.error(f"Unsupported HTTP method: {method}")
+            return None
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        name = name or endpoint_name(method, endpoint)
+
+        kwargs: Dict[str, Any] = {'params': params}
+        if method in ('post', 'put'):
+            kwargs['json'] = data
+        if stream:
+            kwargs['stream'] = True
+
+        try:
+            response = self._send(method, endpoint, name, idempotent, **kwargs)
             if stream:
                 return response
-            
+
             return response.json()
+        except CircuitOpenError as e:
+            logger.warning(str(e))
+            return None
         except requests.exceptions.RequestException as e:
             logger.error(f"Error communicating with supplier analysis microservice: {str(e)}")
             return None
+        except ValueError as e:
+            logger.error(f"Invalid JSON from supplier analysis microservice ({name}): {str(e)}")
+            return None
 
     def health_check(self) -> bool:
         """
-        Check if the microservice is up and running
+        Check if the microservice is up and running.
+        Failures feed the circuit breaker; while it is open this returns False without a call.
         """
         try:
-            # Use the specific health endpoint
-            response = requests.get(f"{self.api_url}health", timeout=5)
+            # Use the specific health endpoint (no retries: it is the probe)
+            response = self._send('get', 'health', 'GET health', idempotent=False)
             data = response.json()
-            return response.status_code == 200 and data.get("status") == "ok"
-        except requests.exceptions.RequestException as e:
+            return data.get("status") == "ok"
+        except CircuitOpenError:
+            return False
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"Health check failed: {e}")
             return False
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Per-endpoint latency/error metrics and circuit breaker state
+        """
+        return {
+            'circuit': circuit_breaker.state,
+            'endpoints': metrics.snapshot(),
+        }
+
     # Supplier methods
     def get_suppliers(self) -> List[Dict[str, Any]]:
         """
@@ -86,6 +336,29 @@ class SupplierAnalysisService:
         """
         return self._make_request('put', f'suppliers/{supplier_id}', data=supplier_data)
 
+    def create_batch(self, resource: str, items: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Create or update many records with one POST to `<resource>/batch`.
+        Raises BatchNotSupported if the endpoint does not exist, so callers can
+        fall back to single creates; returns None on any other failure.
+        """
+        name = f"POST {resource}/batch"
+        try:
+            response = self._send('post', f'{resource}/batch', name, idempotent=False,
+                                  json={'items': items})
+            return response.json() if response.content else {}
+        except CircuitOpenError as e:
+            logger.warning(str(e))
+            return None
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code in (404, 405):
+                raise BatchNotSupported(resource) from e
+            logger.error(f"Error communicating with supplier analysis microservice: {str(e)}")
+            return None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Error communicating with supplier analysis microservice: {str(e)}")
+            return None
+
     # Complaint methods
     def create_complaint(self, complaint_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -120,7 +393,8 @@ class SupplierAnalysisService:
         Get alternative suppliers for a material
         """
         return self._make_request('get', f'analysis/alternative-suppliers/{material_name}', 
-                                params={'min_rating': min_rating})
+                                params={'min_rating': min_rating},
+                                name='GET analysis/alternative-suppliers/{material}')
 
     def get_better_suppliers(self, supplier_id: int, rating_increase: float = 1.0) -> Dict[str, Any]:
         """
@@ -142,6 +416,14 @@ class SupplierAnalysisService:
         return self._make_request('get', f'analysis/supplier-analytics/{supplier_id}')
 
     # Report methods
+    def open_report(self, endpoint: str, method: str = 'get',
+                    data: Optional[Dict[str, Any]] = None) -> Optional[requests.Response]:
+        """
+        Open a report as a streamed response without reading the body, so it
+        can be passed through to the client chunk by chunk. Caller must close it.
+        """
+        return self._make_request(method, endpoint, data=data, stream=True, idempotent=True)
+
     def get_supplier_report(self, supplier_id: int) -> Optional[bytes]:
         """
         Get a PDF report for a specific supplier
@@ -156,7 +438,7 @@ class SupplierAnalysisService:
         Get a PDF report comparing multiple suppliers
         """
         response = self._make_request('post', 'reports/supplier-comparison', data={'supplier_ids': supplier_ids}, 
-                                    stream=True)
+                                    stream=True, idempotent=True)
         if response:
             return response.content
         return None
@@ -166,7 +448,7 @@ class SupplierAnalysisService:
         Get a PDF report of all suppliers for a specific material (POST method)
         """
         response = self._make_request('post', 'reports/material', data={'material_name': material_name}, 
-                                    stream=True)
+                                    stream=True, idempotent=True)
         if response:
             return response.content
         return None
@@ -206,4 +488,132 @@ class SupplierAnalysisService:
         Get alternative suppliers for a material (POST method for UTF-8 support)
         """
         return self._make_request('post', 'analysis/alternative-suppliers', 
-                                data={'material_name': material_name, 'min_rating': min_rating})
+                                data={'material_name': material_name, 'min_rating': min_rating},
+                                idempotent=True)
+
+
+# Dashboard sections fetched together by AsyncSupplierAnalysisService.get_dashboard
+DASHBOARD_ENDPOINTS: Dict[str, str] = {
+    'risk_patterns': 'analysis/risk-patterns',
+    'performance_trends': 'analysis/supplier-performance-trends',
+    'market_dynamics': 'analysis/material-market-dynamics',
+}
+
+# Under ASGI one long-lived event loop serves every request of a worker, so
+# one httpx.AsyncClient (connection pool) per loop is reused. Under WSGI each
+# async view runs in its own loop that is discarded after the response; a
+# client cached there would never be closed, so requests use their own client.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _new_async_client() -> httpx.AsyncClient:
+    pool_size = getattr(settings, 'SUPPLIER_ANALYSIS_POOL_SIZE', 10)
+    return httpx.AsyncClient(limits=httpx.Limits(
+        max_connections=pool_size, max_keepalive_connections=pool_size
+    ))
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Client shared by all requests on the running loop; only for long-lived (ASGI) loops."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _new_async_client()
+        _async_clients[loop] = client
+    return client
+
+
+@asynccontextmanager
+async def async_client(shared: bool = False) -> AsyncIterator[httpx.AsyncClient]:
+    """Client for one request: the loop's shared client, or a new one closed on exit."""
+    if shared:
+        yield get_async_client()
+        return
+    async with _new_async_client() as client:
+        yield client
+
+
+class AsyncSupplierAnalysisService:
+    """
+    Async counterpart of SupplierAnalysisService for read-only calls, so
+    independent microservice requests can run concurrently. Shares the
+    circuit breaker and metrics with the sync client.
+
+    Pass shared_client=True only under ASGI (see get_async_client); otherwise
+    each call opens its own client and closes it before returning.
+    """
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url or settings.SUPPLIER_ANALYSIS_MS_URL
+        if not self.base_url.endswith('/'):
+            self.base_url += '/'
+        self.api_url = f"{self.base_url}api/"
+        self.max_retries = getattr(settings, 'SUPPLIER_ANALYSIS_MAX_RETRIES', 2)
+        self.backoff = getattr(settings, 'SUPPLIER_ANALYSIS_BACKOFF', 0.2)
+
+    async def _get(self, client: httpx.AsyncClient, endpoint: str,
+                   params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET with the same timeouts, retries and circuit breaker as the sync client; None on failure."""
+        name = endpoint_name('get', endpoint)
+        if not circuit_breaker.allow():
+            metrics.record_rejected(name)
+            logger.warning(f"Circuit open, skipping {name}")
+            return None
+
+        decided = False
+        try:
+            connect, read = SupplierAnalysisService._timeout_for(endpoint)
+            timeout = httpx.Timeout(read, connect=connect)
+            started = time.perf_counter()
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await client.get(
+                        f"{self.api_url}{endpoint}", params=params, timeout=timeout
+                    )
+                    response.raise_for_status()
+                    data = response.json()
+                except (httpx.HTTPError, ValueError) as e:
+                    status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                    retryable = isinstance(e, httpx.TransportError) or status_code in RETRY_STATUSES
+                    if retryable and attempt < self.max_retries:
+                        await asyncio.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+                        continue
+                    decided = True
+                    if status_code is not None and status_code < 500:
+                        circuit_breaker.record_success()
+                    else:
+                        circuit_breaker.record_failure()
+                    metrics.record(name, time.perf_counter() - started, error=str(e), retries=attempt)
+                    logger.error(f"Error communicating with supplier analysis microservice: {str(e)}")
+                    return None
+                decided = True
+                circuit_breaker.record_success()
+                metrics.record(name, time.perf_counter() - started, retries=attempt)
+                return data
+        finally:
+            if not decided:
+                # Cancelled (client disconnected) or unexpected error: free a half-open trial
+                circuit_breaker.release()
+
+    async def _get_one(self, endpoint: str, shared_client: bool) -> Any:
+        async with async_client(shared_client) as client:
+            return await self._get(client, endpoint)
+
+    async def get_supplier_risk_patterns(self, shared_client: bool = False) -> Dict[str, Any]:
+        return await self._get_one(DASHBOARD_ENDPOINTS['risk_patterns'], shared_client)
+
+    async def get_supplier_performance_trends(self, shared_client: bool = False) -> Dict[str, Any]:
+        return await self._get_one(DASHBOARD_ENDPOINTS['performance_trends'], shared_client)
+
+    async def get_material_market_dynamics(self, shared_client: bool = False) -> Dict[str, Any]:
+        return await self._get_one(DASHBOARD_ENDPOINTS['market_dynamics'], shared_client)
+
+    async def get_dashboard(self, shared_client: bool = False) -> Dict[str, Any]:
+        """
+        Fetch all dashboard sections concurrently: latency is the slowest
+        call rather than the sum. Failed sections are None.
+        """
+        async with async_client(shared_client) as client:
+            results = await asyncio.gather(
+                *(self._get(client, endpoint) for endpoint in DASHBOARD_ENDPOINTS.values())
+            )
+        return dict(zip(DASHBOARD_ENDPOINTS, results))
@@ -0,0 +1,308 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from app.models import Dobavljac, KontrolnaTacka, Posao, Reklamacija, Sertifikat, SinhronizacijaOtisak
+from app.services.job_service import nastavi, posao, zakazi
+from app.services.supplier_analysis_service import BatchNotSupported, SupplierAnalysisService
+
+logger = logging.getLogger(__name__)
+
+# Bulk sync of suppliers, complaints and certificates to the supplier analysis
+# microservice.
+# - change tracking: a fingerprint (hash of the sent payload) is stored per row
+#   in sinhronizacija_otisak, so only new or modified rows are sent; this also
+#   catches changes made by queryset.update() or PL/SQL procedures
+# - changed rows are sent in chunks (`<resource>/batch`, falling back to single
+#   creates if the microservice has no batch endpoint) from a bounded pool
+# - progress is kept in the 'sinhronizacija_dobavljaca' checkpoint, which
+#   also prevents two syncs from running at the same time
+# - queued requests share one pending job: entities requested while a job is
+#   waiting are merged into its parameters; a job that starts while another
+#   sync is running is postponed rather than failed
+
+CHECKPOINT = 'sinhronizacija_dobavljaca'
+JOB_TYPE = 'sinhronizacija_dobavljaca'
+CHUNK_SIZE = 200
+STALE_AFTER = timedelta(minutes=10)
+RETRY_AFTER = 30  # seconds, when a queued job finds another sync running
+
+
+class SyncAlreadyRunning(RuntimeError):
+    pass
+
+
+def supplier_payload(supplier: Dobavljac) -> Dict[str, Any]:
+    return {
+        "supplier_id": supplier.sifra_d,
+        "name": supplier.naziv,
+        "email": supplier.email,
+        "pib": supplier.PIB_d,
+        "material_name": supplier.ime_sirovine,
+        "price": float(supplier.cena),
+        "delivery_time": supplier.rok_isporuke,
+        "rating": float(supplier.ocena),
+        "rating_date": supplier.datum_ocenjivanja.isoformat(),
+        "selected": supplier.izabran
+    }
+
+
+def complaint_payload(complaint: Reklamacija) -> Dict[str, Any]:
+    return {
+        "complaint_id": complaint.reklamacija_id,
+        "supplier_id": complaint.dobavljac_id,
+        "controller_id": complaint.kontrolor.korisnik_id,
+        "problem_description": complaint.opis_problema,
+        "severity": complaint.jacina_zalbe,
+        "duration": complaint.vreme_trajanja,
+        "status": complaint.status,
+        "reception_date": complaint.datum_prijema.isoformat()
+    }
+
+
+def certificate_payload(certificate: Sertifikat) -> Dict[str, Any]:
+    return {
+        "certificate_id": certificate.sertifikat_id,
+        "supplier_id": certificate.dobavljac_id,
+        "name": certificate.naziv,
+        "type": certificate.tip,
+        "issue_date": certificate.datum_izdavanja.isoformat(),
+        "expiry_date": certificate.datum_isteka.isoformat()
+    }
+
+
+# Suppliers go first: complaints and certificates reference them
+ENTITIES: Dict[str, Dict[str, Any]] = {
+    'suppliers': {
+        'queryset': lambda: Dobavljac.objects.order_by('sifra_d'),
+        'payload': supplier_payload,
+        'create': 'create_supplier',
+    },
+    'complaints': {
+        'queryset': lambda: Reklamacija.objects.select_related('kontrolor').order_by('reklamacija_id'),
+        'payload': complaint_payload,
+        'create': 'create_complaint',
+    },
+    'certificates': {
+        'queryset': lambda: Sertifikat.objects.order_by('sertifikat_id'),
+        'payload': certificate_payload,
+        'create': 'create_certificate',
+    },
+}
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_status() -> Dict[str, Any]:
+    """Progress of the current (or last) sync run."""
+    checkpoint = KontrolnaTacka.objects.filter(naziv=CHECKPOINT).first()
+    return checkpoint.stanje if checkpoint else {'status': 'never_run'}
+
+
+def _save_status(state: Dict[str, Any]) -> None:
+    state['heartbeat'] = timezone.now().isoformat()
+    KontrolnaTacka.objects.filter(naziv=CHECKPOINT).update(stanje=state, azurirano=timezone.now())
+
+
+def _acquire(state: Dict[str, Any]) -> bool:
+    """Mark a run as started unless another one is running (and still heartbeating)."""
+    try:
+        with transaction.atomic():
+            checkpoint, _ = KontrolnaTacka.objects.select_for_update().get_or_create(naziv=CHECKPOINT)
+            previous = checkpoint.stanje
+            heartbeat = previous.get('heartbeat')
+            if (previous.get('status') == 'running' and heartbeat
+                    and timezone.now() - datetime.fromisoformat(heartbeat) < STALE_AFTER):
+                return False
+            state['heartbeat'] = timezone.now().isoformat()
+            checkpoint.stanje = state
+            checkpoint.save()
+    except IntegrityError:
+        # Another process created the checkpoint at the same moment
+        return False
+    return True
+
+
+def pending_changes(entity: str, full: bool = False) -> Dict[str, Any]:
+    """
+    Compare current rows with stored fingerprints.
+    Returns {'total', 'changed': [(id, payload, fingerprint)], 'deleted': [ids]}.
+    """
+    config = ENTITIES[entity]
+    known = dict(
+        SinhronizacijaOtisak.objects.filter(entitet=entity).values_list('objekat_id', 'otisak')
+    )
+    changed = []
+    total = 0
+    for row in config['queryset']().iterator(chunk_size=2000):
+        total += 1
+        payload = config['payload'](row)
+        digest = fingerprint(payload)
+        if known.pop(row.pk, None) != digest or full:
+            changed.append((row.pk, payload, digest))
+    return {'total': total, 'changed': changed, 'deleted': list(known)}
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _send_chunk(service: SupplierAnalysisService, entity: str, chunk: List[tuple],
+                batch_supported: Dict[str, bool]) -> List[int]:
+    """Send one chunk; returns ids accepted by the microservice."""
+    if batch_supported.get(entity, True):
+        try:
+            result = service.create_batch(entity, [payload for _, payload, _ in chunk])
+            if result is None:
+                return []
+            failed = set(result.get('failed_ids', [])) if isinstance(result, dict) else set()
+            return [pk for pk, _, _ in chunk if pk not in failed]
+        except BatchNotSupported:
+            logger.info(f"No batch endpoint for {entity}, falling back to single creates")
+            batch_supported[entity] = False
+
+    create: Callable = getattr(service, ENTITIES[entity]['create'])
+    return [pk for pk, payload, _ in chunk if create(payload)]
+
+
+def _store_fingerprints(entity: str, chunk: List[tuple], accepted: List[int]) -> None:
+    accepted = set(accepted)
+    rows = [
+        SinhronizacijaOtisak(entitet=entity, objekat_id=pk, otisak=digest)
+        for pk, _, digest in chunk if pk in accepted
+    ]
+    if not rows:
+        return
+    with transaction.atomic():
+        SinhronizacijaOtisak.objects.filter(
+            entitet=entity, objekat_id__in=[row.objekat_id for row in rows]
+        ).delete()
+        SinhronizacijaOtisak.objects.bulk_create(rows)
+
+
+def sync(entities: Optional[List[str]] = None, full: bool = False, chunk_size: int = CHUNK_SIZE,
+         workers: Optional[int] = None, dry_run: bool = False,
+         progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Send new and changed rows to the microservice. Returns the final status.
+    Raises RuntimeError if another sync is already running.
+    """
+    entities = entities or list(ENTITIES)
+    unknown = set(entities) - set(ENTITIES)
+    if unknown:
+        raise ValueError(f"Unknown entities: {', '.join(sorted(unknown))}")
+
+    if dry_run:
+        result = {}
+        for entity in entities:
+            changes = pending_changes(entity, full)
+            result[entity] = {'total': changes['total'], 'changed': len(changes['changed'])}
+        return {'status': 'dry_run', 'entities': result}
+
+    workers = workers or getattr(settings, 'SUPPLIER_SYNC_WORKERS', 4)
+    state: Dict[str, Any] = {
+        'status': 'running',
+        'started': timezone.now().isoformat(),
+        'finished': None,
+        'process': os.getpid(),
+        'entities': {entity: {'total': 0, 'changed': 0, 'sent': 0, 'failed': 0} for entity in entities},
+    }
+    if not _acquire(state):
+        raise SyncAlreadyRunning("Supplier sync is already running")
+
+    service = SupplierAnalysisService()
+    batch_supported: Dict[str, bool] = {}
+    try:
+        for entity in entities:
+            changes = pending_changes(entity, full)
+            counters = state['entities'][entity]
+            counters.update(total=changes['total'], changed=len(changes['changed']))
+            _save_status(state)
+
+            # Fingerprints of deleted rows are dropped so a reused id is sent again
+            if changes['deleted']:
+                SinhronizacijaOtisak.objects.filter(
+                    entitet=entity, objekat_id__in=changes['deleted']
+                ).delete()
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(_send_chunk, service, entity, chunk, batch_supported): chunk
+                    for chunk in _chunks(changes['changed'], chunk_size)
+                }
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        accepted = future.result()
+                    except Exception as e:
+                        logger.error(f"Error syncing {entity} chunk: {str(e)}")
+                        accepted = []
+                    _store_fingerprints(entity, chunk, accepted)
+                    counters['sent'] += len(accepted)
+                    counters['failed'] += len(chunk) - len(accepted)
+                    _save_status(state)
+                    if progress:
+                        progress(state)
+
+        failed = sum(counters['failed'] for counters in state['entities'].values())
+        state['status'] = 'completed_with_errors' if failed else 'completed'
+    except Exception as e:
+        state['status'] = 'failed'
+        state['error'] = str(e)
+        raise
+    finally:
+        state['finished'] = timezone.now().isoformat()
+        _save_status(state)
+
+    return state
+
+
+@posao(JOB_TYPE)
+def sync_job(job) -> None:
+    """Background job wrapper (job_service); parameters: entities, full."""
+    try:
+        sync(entities=job.parametri.get('entities'), full=job.parametri.get('full', False))
+    except SyncAlreadyRunning:
+        logger.info(f"Supplier sync is already running, job {job.sifra_p} postponed")
+        nastavi(job, RETRY_AFTER)
+
+
+def schedule_sync(entities: Optional[List[str]] = None, full: bool = False):
+    """
+    Queue a sync run; returns the job that will send the entities. A pending
+    job is reused, with its entities extended; a running job may already be
+    past the requested entities, so a new job is queued after it.
+    """
+    requested = set(entities or ENTITIES)
+    unknown = requested - set(ENTITIES)
+    if unknown:
+        raise ValueError(f"Unknown entities: {', '.join(sorted(unknown))}")
+
+    for job in Posao.objects.filter(tip=JOB_TYPE, kljuc=JOB_TYPE, status='na_cekanju').order_by('sifra_p'):
+        parametri = {
+            'entities': [
+                entity for entity in ENTITIES
+                if entity in requested or entity in job.parametri.get('entities', ())
+            ],
+            'full': full or job.parametri.get('full', False),
+        }
+        # The job is only changed while it is still waiting for a worker
+        if Posao.objects.filter(sifra_p=job.sifra_p, status='na_cekanju').update(parametri=parametri):
+            job.parametri = parametri
+            return job
+
+    return zakazi(
+        JOB_TYPE, {'entities': [entity for entity in ENTITIES if entity in requested], 'full': full},
+        kljuc=JOB_TYPE, max_pokusaja=1,
+    )
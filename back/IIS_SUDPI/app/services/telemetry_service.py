@@ -0,0 +1,438 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef, Sum
+from django.db.models.functions import TruncHour, TruncMinute
+from django.utils import timezone
+
+from app.models import (
+    Skladiste, Temperatura, voziloOmogucavaTemperatura,
+    ZbirTemperatureMinut, ZbirTemperatureSat, KontrolnaTacka,
+)
+from app.services.response_cache import povecaj_verziju
+
+logger = logging.getLogger(__name__)
+
+# Čuvanje i sabijanje merenja temperature.
+#
+# Sabijanje: nova sirova merenja (pk veći od poslednjeg obrađenog) se
+# agregiraju u zbirove od 1 minuta i 1 sata (min/max/zbir/broj). Zbirovi se
+# spajaju sa postojećim, pa je sabijanje inkrementalno i merenja sa zakasnelim
+# vremenom se pravilno uračunavaju.
+# Šifre se ne potvrđuju redom: masovni unos može da dobije manje šifre, a da
+# bude potvrđen posle reda sa većom šifrom. Zato se sabija samo do najveće
+# šifre viđene pre bar TELEMETRIJA_SABIJANJE_ODLAGANJE_S sekundi (kontrolna
+# tačka pamti viđene najveće šifre); transakcija unosa kraća od odlaganja je
+# tada već potvrđena, pa nijedno merenje ne ostaje ispod poslednjeg sabijenog.
+# Čuvanje: sirova merenja i minutni zbirovi stariji od perioda čuvanja
+# (settings.TELEMETRIJA_CUVANJE_DANA) se brišu; briše se samo ono što je već
+# sabijeno. Upiti za period biraju rezoluciju prema dužini perioda.
+
+KONTROLNA_TACKA = 'sabijanje_telemetrije'
+VELICINA_SERIJE = 20000
+MAX_TACAKA = 500
+
+IZVORI = {
+    'temperatura': {
+        'model': Temperatura,
+        'vreme': 'vreme_merenja',
+        'dimenzije': {'skladiste_id': 'skladiste_id', 'vozilo_id': 'vozilo_id'},
+    },
+    'isporuka': {
+        'model': voziloOmogucavaTemperatura,
+        'vreme': 'vreme',
+        'dimenzije': {'vozilo_id': 'sifra_vozila_id', 'isporuka_id': 'isporuka_id'},
+    },
+}
+
+REZOLUCIJE = {
+    'minut': (ZbirTemperatureMinut, TruncMinute, timedelta(minutes=1)),
+    'sat': (ZbirTemperatureSat, TruncHour, timedelta(hours=1)),
+}
+
+DIMENZIJE = ('skladiste_id', 'vozilo_id', 'isporuka_id')
+
+
+def period_cuvanja(nivo):
+    """Period čuvanja za 'sirovo', 'minut' ili 'sat'; None znači zauvek."""
+    dana = getattr(settings, 'TELEMETRIJA_CUVANJE_DANA', {}).get(nivo, 0)
+    return timedelta(days=dana) if dana else None
+
+
+def _stanje():
+    kontrolna_tacka = KontrolnaTacka.objects.filter(naziv=KONTROLNA_TACKA).first()
+    return kontrolna_tacka.stanje if kontrolna_tacka else {}
+
+
+def poslednji_sabijeni_id(izvor):
+    return _stanje().get(izvor, 0)
+
+
+# ========== AGREGACIJA ==========
+
+def agregiraj(izvor, queryset, trunc):
+    """
+    Agregira sirova merenja u intervale (jedan GROUP BY upit).
+    Vraća listu rečnika sa ključevima dimenzija, 'pocetak' i vrednostima zbira.
+    """
+    opis = IZVORI[izvor]
+    redovi = queryset.values(
+        *opis['dimenzije'].values(), pocetak=trunc(opis['vreme'])
+    ).annotate(
+        broj_merenja=Count('pk'),
+        minimum=Min('vrednost'),
+        maksimum=Max('vrednost'),
+        zbir=Sum('vrednost'),
+    )
+
+    rezultat = []
+    for red in redovi:
+        zbir = {dimenzija: None for dimenzija in DIMENZIJE}
+        for dimenzija, polje in opis['dimenzije'].items():
+            zbir[dimenzija] = red[polje]
+        zbir.update(
+            pocetak=red['pocetak'],
+            broj_merenja=red['broj_merenja'],
+            minimum=red['minimum'],
+            maksimum=red['maksimum'],
+            zbir=red['zbir'],
+        )
+        rezultat.append(zbir)
+    return rezultat
+
+
+def _kljuc(zbir):
+    if isinstance(zbir, dict):
+        return tuple(zbir[dimenzija] for dimenzija in DIMENZIJE) + (zbir['pocetak'],)
+    return tuple(getattr(zbir, dimenzija) for dimenzija in DIMENZIJE) + (zbir.pocetak,)
+
+
+def spoji_zbirove(model, izvor, redovi, batch_size=1000):
+    """
+    Spaja agregirane redove sa postojećim zbirovima (min/max/zbir/broj su
+    sabirljivi). Jedan upit za čitanje, zatim bulk_create i bulk_update.
+    """
+    if not redovi:
+        return 0
+
+    postojeci = {
+        _kljuc(zbir): zbir
+        for zbir in model.objects.filter(
+            izvor=izvor, pocetak__in={red['pocetak'] for red in redovi}
+        )
+    }
+
+    novi = []
+    izmenjeni = []
+    for red in redovi:
+        zbir = postojeci.get(_kljuc(red))
+        if zbir is None:
+            novi.append(model(izvor=izvor, **red))
+            continue
+        zbir.broj_merenja += red['broj_merenja']
+        zbir.minimum = min(zbir.minimum, red['minimum'])
+        zbir.maksimum = max(zbir.maksimum, red['maksimum'])
+        zbir.zbir += red['zbir']
+        izmenjeni.append(zbir)
+
+    model.objects.bulk_create(novi, batch_size=batch_size)
+    model.objects.bulk_update(
+        izmenjeni, ['broj_merenja', 'minimum', 'maksimum', 'zbir'], batch_size=batch_size
+    )
+    return len(novi) + len(izmenjeni)
+
+
+# ========== SABIJANJE ==========
+
+def _granica_sabijanja(izvor, odlaganje):
+    """
+    Beleži trenutnu najveću šifru izvora u kontrolnoj tački i vraća najveću
+    šifru viđenu pre bar `odlaganje` sekundi (0 ako takve nema).
+    """
+    model = IZVORI[izvor]['model']
+    sada = timezone.now()
+    with transaction.atomic():
+        kontrolna_tacka, _ = KontrolnaTacka.objects.select_for_update().get_or_create(
+            naziv=KONTROLNA_TACKA
+        )
+        najveca = model.objects.aggregate(Max('pk'))['pk__max'] or 0
+        if odlaganje <= 0:
+            return najveca
+
+        prag = sada - timedelta(seconds=odlaganje)
+        vidjeno = kontrolna_tacka.stanje.get('vidjeno', {})
+        stara, nova = [], []
+        for vreme, sifra in vidjeno.get(izvor, []):
+            (stara if datetime.fromisoformat(vreme) <= prag else nova).append([vreme, sifra])
+        granica = stara[-1][1] if stara else 0
+        # Dovoljno je najnovije staro viđenje; ista šifra se ne beleži ponovo,
+        # jer je starije viđenje bliže potvrdi
+        if not (nova or stara) or (nova or stara)[-1][1] != najveca:
+            nova.append([sada.isoformat(), najveca])
+
+        kontrolna_tacka.stanje = {
+            **kontrolna_tacka.stanje,
+            'vidjeno': {**vidjeno, izvor: stara[-1:] + nova},
+        }
+        kontrolna_tacka.save()
+    return granica
+
+
+def sabij_izvor(izvor, velicina_serije=VELICINA_SERIJE, odlaganje=None):
+    """
+    Sabija nova sirova merenja izvora u serijama po pk, do granice iz
+    _granica_sabijanja. Svaka serija je transakcija koja zaključava kontrolnu
+    tačku, spaja zbirove i pomera poslednji sabijeni pk, pa se istovremena
+    pokretanja ne preklapaju. `odlaganje` (sekunde) podrazumevano iz
+    TELEMETRIJA_SABIJANJE_ODLAGANJE_S.
+    Vraća (broj_merenja, broj_minutnih_zbirova, broj_satnih_zbirova).
+    """
+    if odlaganje is None:
+        odlaganje = getattr(settings, 'TELEMETRIJA_SABIJANJE_ODLAGANJE_S', 300)
+    model = IZVORI[izvor]['model']
+    dozvoljeno = model.objects.filter(pk__lte=_granica_sabijanja(izvor, odlaganje))
+    ukupno = [0, 0, 0]
+
+    while True:
+        with transaction.atomic():
+            kontrolna_tacka, _ = KontrolnaTacka.objects.select_for_update().get_or_create(
+                naziv=KONTROLNA_TACKA
+            )
+            od_id = kontrolna_tacka.stanje.get(izvor, 0)
+
+            granica = list(
+                dozvoljeno.filter(pk__gt=od_id).order_by('pk').values_list(
+                    'pk', flat=True
+                )[velicina_serije - 1:velicina_serije]
+            )
+            if not granica:
+                granica = [dozvoljeno.filter(pk__gt=od_id).aggregate(Max('pk'))['pk__max']]
+            do_id = granica[0]
+            if do_id is None:
+                break
+
+            serija = model.objects.filter(pk__gt=od_id, pk__lte=do_id)
+            broj_merenja = serija.count()
+            minutni = spoji_zbirove(ZbirTemperatureMinut, izvor, agregiraj(izvor, serija, TruncMinute))
+            satni = spoji_zbirove(ZbirTemperatureSat, izvor, agregiraj(izvor, serija, TruncHour))
+
+            kontrolna_tacka.stanje = {
+                **kontrolna_tacka.stanje,
+                izvor: do_id,
+                'poslednje_sabijanje': timezone.now().isoformat(),
+            }
+            kontrolna_tacka.save()
+
+        ukupno[0] += broj_merenja
+        ukupno[1] += minutni
+        ukupno[2] += satni
+
+    return tuple(ukupno)
+
+
+def _obrisi_u_serijama(queryset, velicina_serije, bez_signala=False):
+    """
+    Briše queryset u serijama po pk (kratke transakcije, ograničen undo).
+    bez_signala=True briše direktnim DELETE upitom, bez učitavanja objekata
+    i post_delete signala po redu.
+    """
+    obrisano = 0
+    model = queryset.model
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:velicina_serije])
+        if not ids:
+            return obrisano
+        serija = model.objects.filter(pk__in=ids)
+        if bez_signala:
+            obrisano += serija._raw_delete(serija.db)
+        else:
+            obrisano += serija.delete()[0]
+
+
+def za_brisanje(sada=None):
+    """Querysetovi koji po periodu čuvanja treba da budu obrisani."""
+    sada = sada or timezone.now()
+    stanje = _stanje()
+    querysetovi = {}
+
+    cuvanje = period_cuvanja('sirovo')
+    if cuvanje:
+        granica = sada - cuvanje
+        # Ne brišu se merenja na koja upućuje temperaturaVozilo (CASCADE) ni
+        # poslednje merenje skladišta (iz njega se računa status rizika)
+        querysetovi['temperatura'] = Temperatura.objects.filter(
+            vreme_merenja__lt=granica,
+            pk__lte=stanje.get('temperatura', 0),
+        ).exclude(
+            Exists(voziloOmogucavaTemperatura.objects.filter(sifra_temp=OuterRef('pk')))
+        ).exclude(
+            Exists(Skladiste.objects.filter(
+                sifra_s=OuterRef('skladiste'),
+                vreme_poslednjeg_merenja_s=OuterRef('vreme_merenja'),
+            ))
+        )
+        querysetovi['isporuka'] = voziloOmogucavaTemperatura.objects.filter(
+            vreme__lt=granica,
+            pk__lte=stanje.get('isporuka', 0),
+        )
+
+    for nivo, (model, _, _) in REZOLUCIJE.items():
+        cuvanje = period_cuvanja(nivo)
+        if cuvanje:
+            querysetovi[nivo] = model.objects.filter(pocetak__lt=sada - cuvanje)
+
+    return querysetovi
+
+
+def primeni_cuvanje(sada=None, velicina_serije=VELICINA_SERIJE):
+    """Briše podatke starije od perioda čuvanja. Vraća broj obrisanih po tabeli."""
+    obrisano = {}
+    for naziv, queryset in za_brisanje(sada).items():
+        # Temperatura ima post_delete signal (poslednje merenje skladišta), a
+        # brišu se samo stara merenja koja nisu poslednja, pa signal nije potreban
+        obrisano[naziv] = _obrisi_u_serijama(
+            queryset, velicina_serije, bez_signala=naziv == 'temperatura'
+        )
+
+    if obrisano.get('temperatura'):
+        povecaj_verziju(Temperatura)
+    return obrisano
+
+
+def sabij_telemetriju(velicina_serije=VELICINA_SERIJE, cuvanje=True, sada=None):
+    """Sabija sve izvore i (opciono) primenjuje period čuvanja."""
+    rezultat = {'sabijeno': {}, 'obrisano': {}}
+    for izvor in IZVORI:
+        rezultat['sabijeno'][izvor] = sabij_izvor(izvor, velicina_serije)
+    if cuvanje:
+        rezultat['obrisano'] = primeni_cuvanje(sada, velicina_serije)
+
+    logger.info(f"Sabijanje telemetrije: {rezultat}")
+    return rezultat
+
+
+def pregled_sabijanja(sada=None):
+    """Dry-run: broj merenja koja čekaju sabijanje i broj redova za brisanje."""
+    stanje = _stanje()
+    return {
+        'za_sabijanje': {
+            izvor: opis['model'].objects.filter(pk__gt=stanje.get(izvor, 0)).count()
+            for izvor, opis in IZVORI.items()
+        },
+        'za_brisanje': {
+            naziv: queryset.count() for naziv, queryset in za_brisanje(sada).items()
+        },
+    }
+
+
+# ========== UPITI ZA PERIOD ==========
+
+def trunc_vreme(vreme, rezolucija):
+    """Početak intervala rezolucije kome pripada vreme (u lokalnoj vremenskoj zoni)."""
+    lokalno = timezone.localtime(vreme) if timezone.is_aware(vreme) else vreme
+    lokalno = lokalno.replace(second=0, microsecond=0)
+    if rezolucija == 'sat':
+        lokalno = lokalno.replace(minute=0)
+    return lokalno
+
+
+def _filteri(izvor, skladiste=None, vozilo=None, isporuka=None):
+    dimenzije = {'skladiste_id': skladiste, 'vozilo_id': vozilo, 'isporuka_id': isporuka}
+    sirovi = {}
+    zbirni = {'izvor': izvor}
+    for dimenzija, vrednost in dimenzije.items():
+        if vrednost is None:
+            continue
+        polje = IZVORI[izvor]['dimenzije'].get(dimenzija)
+        if polje is None:
+            raise ValueError(f"Izvor '{izvor}' nema dimenziju {dimenzija}")
+        sirovi[polje] = vrednost
+        zbirni[dimenzija] = vrednost
+    return sirovi, zbirni
+
+
+def odaberi_rezoluciju(od, do, sirovi_queryset=None, max_tacaka=MAX_TACAKA, sada=None):
+    """
+    Najfinija rezolucija koja ima podatke za ceo period i ne prelazi max_tacaka:
+    sirova merenja (ako ih u periodu nema više od max_tacaka), pa 1 minut, pa 1 sat.
+    """
+    sada = sada or timezone.now()
+
+    cuvanje = period_cuvanja('sirovo')
+    if sirovi_queryset is not None and (cuvanje is None or od >= sada - cuvanje):
+        if sirovi_queryset.count() <= max_tacaka:
+            return 'sirovo'
+
+    cuvanje = period_cuvanja('minut')
+    if (cuvanje is None or od >= sada - cuvanje) and (do - od) / REZOLUCIJE['minut'][2] <= max_tacaka:
+        return 'minut'
+
+    return 'sat'
+
+
+def temperature_za_period(od, do, skladiste=None, vozilo=None, isporuka=None,
+                          rezolucija=None, max_tacaka=MAX_TACAKA):
+    """
+    Merenja temperature za period [od, do] u automatski izabranoj rezoluciji.
+    Za zbirne rezolucije se merenja koja još nisu sabijena agregiraju u letu,
+    pa rezultat uvek obuhvata i najnovija merenja.
+    Vraća {'rezolucija': ..., 'tacke': [{'vreme', 'minimum', 'maksimum', 'prosek', 'broj_merenja'}]}.
+    """
+    if skladiste is None and vozilo is None and isporuka is None:
+        raise ValueError("Potrebno je zadati skladište, vozilo ili isporuku")
+
+    izvor = 'isporuka' if isporuka is not None else 'temperatura'
+    opis = IZVORI[izvor]
+    sirovi_filteri, zbirni_filteri = _filteri(izvor, skladiste, vozilo, isporuka)
+    sirovi = opis['model'].objects.filter(
+        **sirovi_filteri,
+        **{f"{opis['vreme']}__gte": od, f"{opis['vreme']}__lte": do},
+    )
+
+    if rezolucija is None:
+        rezolucija = odaberi_rezoluciju(od, do, sirovi, max_tacaka)
+
+    if rezolucija == 'sirovo':
+        tacke = [
+            {
+                'vreme': vreme,
+                'minimum': float(vrednost),
+                'maksimum': float(vrednost),
+                'prosek': float(vrednost),
+                'broj_merenja': 1,
+            }
+            for vreme, vrednost in sirovi.order_by(opis['vreme']).values_list(opis['vreme'], 'vrednost')
+        ]
+        return {'rezolucija': rezolucija, 'tacke': tacke}
+
+    model, trunc, _ = REZOLUCIJE[rezolucija]
+    zbirovi = {
+        zbir.pocetak: [zbir.broj_merenja, zbir.minimum, zbir.maksimum, zbir.zbir]
+        for zbir in model.objects.filter(
+            **zbirni_filteri, pocetak__gte=trunc_vreme(od, rezolucija), pocetak__lte=do
+        )
+    }
+    nesabijeni = sirovi.filter(pk__gt=poslednji_sabijeni_id(izvor))
+    for red in agregiraj(izvor, nesabijeni, trunc):
+        postojeci = zbirovi.get(red['pocetak'])
+        if postojeci is None:
+            zbirovi[red['pocetak']] = [red['broj_merenja'], red['minimum'], red['maksimum'], red['zbir']]
+        else:
+            postojeci[0] += red['broj_merenja']
+            postojeci[1] = min(postojeci[1], red['minimum'])
+            postojeci[2] = max(postojeci[2], red['maksimum'])
+            postojeci[3] += red['zbir']
+
+    tacke = [
+        {
+            'vreme': pocetak,
+            'minimum': float(minimum),
+            'maksimum': float(maksimum),
+            'prosek': round(float(zbir) / broj_merenja, 2),
+            'broj_merenja': broj_merenja,
+        }
+        for pocetak, (broj_merenja, minimum, maksimum, zbir) in sorted(zbirovi.items())
+    ]
+    return {'rezolucija': rezolucija, 'tacke': tacke}
@@ -0,0 +1,198 @@
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from app.models import Skladiste, Temperatura, Vozilo
+from app.services.response_cache import povecaj_verziju
+from app.services.warehouse_status_service import zabelezi_merenja
+
+logger = logging.getLogger(__name__)
+
+# Masovni unos merenja temperature (senzori skladišta i vozila).
+# Merenja se upisuju u serijama sa bulk_create (bez post_save signala po redu),
+# a poslednje merenje i status rizika se ažuriraju jednom po skladištu po seriji.
+
+VELICINA_SERIJE = 1000
+MAKS_SERIJA = 5000
+MAKS_PRIKAZANIH_GRESAKA = 50
+MIN_TEMPERATURA = Decimal('-100')
+MAX_TEMPERATURA = Decimal('200')
+
+
+def _vrednost(podatak):
+    try:
+        vrednost = Decimal(str(podatak['vrednost'])).quantize(Decimal('0.01'))
+    except KeyError:
+        raise ValueError("Nedostaje polje 'vrednost'")
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError("Polje 'vrednost' mora biti broj")
+    if not vrednost.is_finite():
+        raise ValueError("Polje 'vrednost' mora biti broj")
+    if not MIN_TEMPERATURA <= vrednost <= MAX_TEMPERATURA:
+        raise ValueError(f"Vrednost {vrednost} je van dozvoljenog opsega")
+    return vrednost
+
+
+def _vreme(podatak, sada):
+    vreme = podatak.get('vreme_merenja')
+    if vreme in (None, ''):
+        return sada
+    try:
+        vreme = datetime.fromisoformat(str(vreme).replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError("Polje 'vreme_merenja' mora biti u ISO 8601 formatu")
+    if timezone.is_naive(vreme) and timezone.is_aware(sada):
+        vreme = timezone.make_aware(vreme)
+    if vreme > sada:
+        raise ValueError("Vreme merenja ne može biti u budućnosti")
+    return vreme
+
+
+def _sifra(podatak, polje):
+    sifra = podatak.get(polje)
+    if sifra in (None, ''):
+        return None
+    if isinstance(sifra, bool):
+        raise ValueError(f"Polje '{polje}' mora biti ceo broj")
+    try:
+        return int(sifra)
+    except (TypeError, ValueError):
+        raise ValueError(f"Polje '{polje}' mora biti ceo broj")
+
+
+def validiraj_merenje(podatak, sada=None):
+    """
+    Proverava jedno merenje i vraća (vrednost, vreme, skladiste_id, vozilo_id).
+    Merenje mora imati skladište ili vozilo; postojanje se proverava po seriji.
+    """
+    if not isinstance(podatak, dict):
+        raise ValueError("Merenje mora biti JSON objekat")
+    sada = sada or timezone.now()
+
+    skladiste_id = _sifra(podatak, 'skladiste')
+    vozilo_id = _sifra(podatak, 'vozilo')
+    if skladiste_id is None and vozilo_id is None:
+        raise ValueError("Merenje mora imati 'skladiste' ili 'vozilo'")
+
+    return _vrednost(podatak), _vreme(podatak, sada), skladiste_id, vozilo_id
+
+
+def citaj_ndjson(stream):
+    """
+    Generator merenja iz NDJSON tela (jedan JSON objekat po liniji).
+    Čita liniju po liniju, bez učitavanja celog tela u memoriju.
+    Vraća (broj_linije, podatak) ili (broj_linije, ValueError).
+    """
+    for broj_linije, linija in enumerate(iter(stream.readline, b''), start=1):
+        linija = linija.strip()
+        if not linija:
+            continue
+        try:
+            yield broj_linije, json.loads(linija)
+        except (ValueError, UnicodeDecodeError):
+            yield broj_linije, ValueError("Neispravan JSON")
+
+
+def citaj_json_niz(podaci):
+    """Isti format kao citaj_ndjson, za već parsiran JSON niz (redni broj od 1)."""
+    for indeks, podatak in enumerate(podaci, start=1):
+        yield indeks, podatak
+
+
+def _upisi_seriju(serija):
+    """
+    serija: lista (redni_broj, vrednost, vreme, skladiste_id, vozilo_id).
+    Proverava postojanje skladišta/vozila (po jedan upit), upisuje merenja sa
+    bulk_create i ažurira poslednje merenje po skladištu. Vraća (upisano, greske).
+    """
+    skladista = set(Skladiste.objects.filter(
+        sifra_s__in={stavka[3] for stavka in serija if stavka[3] is not None}
+    ).values_list('sifra_s', flat=True))
+    vozila = set(Vozilo.objects.filter(
+        sifra_v__in={stavka[4] for stavka in serija if stavka[4] is not None}
+    ).values_list('sifra_v', flat=True))
+
+    greske = []
+    merenja = []
+    poslednja_merenja = {}
+    for redni_broj, vrednost, vreme, skladiste_id, vozilo_id in serija:
+        if skladiste_id is not None and skladiste_id not in skladista:
+            greske.append({'red': redni_broj, 'greska': f"Skladište {skladiste_id} ne postoji"})
+            continue
+        if vozilo_id is not None and vozilo_id not in vozila:
+            greske.append({'red': redni_broj, 'greska': f"Vozilo {vozilo_id} ne postoji"})
+            continue
+
+        merenja.append(Temperatura(
+            vrednost=vrednost,
+            vreme_merenja=vreme,
+            skladiste_id=skladiste_id,
+            vozilo_id=vozilo_id,
+        ))
+        # Kasnije merenje u seriji (po vremenu, pa po redosledu) je poslednje
+        if skladiste_id is not None and (
+            skladiste_id not in poslednja_merenja or vreme >= poslednja_merenja[skladiste_id][1]
+        ):
+            poslednja_merenja[skladiste_id] = (vrednost, vreme)
+
+    if merenja:
+        with transaction.atomic():
+            Temperatura.objects.bulk_create(merenja)
+            zabelezi_merenja(poslednja_merenja)
+
+    return len(merenja), greske
+
+
+def unesi_merenja(zapisi, velicina_serije=VELICINA_SERIJE):
+    """
+    Upisuje merenja iz iterabile (redni_broj, podatak) u serijama.
+    Neispravna merenja se preskaču i prijavljuju, ostala se upisuju.
+    Svaka serija je zasebna transakcija.
+    """
+    velicina_serije = max(1, min(velicina_serije, MAKS_SERIJA))
+    rezultat = {'primljeno': 0, 'upisano': 0, 'odbijeno': 0, 'serija': 0, 'greske': []}
+    sada = timezone.now()
+
+    def zabelezi_greske(greske):
+        rezultat['odbijeno'] += len(greske)
+        slobodno = MAKS_PRIKAZANIH_GRESAKA - len(rezultat['greske'])
+        if slobodno > 0:
+            rezultat['greske'].extend(greske[:slobodno])
+
+    def obradi(serija):
+        upisano, greske = _upisi_seriju(serija)
+        rezultat['upisano'] += upisano
+        rezultat['serija'] += 1
+        zabelezi_greske(greske)
+
+    serija = []
+    for redni_broj, podatak in zapisi:
+        rezultat['primljeno'] += 1
+        try:
+            if isinstance(podatak, ValueError):
+                raise podatak
+            serija.append((redni_broj,) + validiraj_merenje(podatak, sada))
+        except ValueError as e:
+            zabelezi_greske([{'red': redni_broj, 'greska': str(e)}])
+            continue
+
+        if len(serija) >= velicina_serije:
+            obradi(serija)
+            serija = []
+
+    if serija:
+        obradi(serija)
+
+    if rezultat['upisano']:
+        # bulk_create ne okida signale
+        povecaj_verziju(Temperatura)
+        logger.info(
+            f"Masovni unos temperatura: {rezultat['upisano']} upisano, "
+            f"{rezultat['odbijeno']} odbijeno ({rezultat['serija']} serija)"
+        )
+
+    return rezultat
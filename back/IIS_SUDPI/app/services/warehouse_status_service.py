@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import IntegrityError, connection, transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from app.models import Skladiste, Temperatura, KontrolnaTacka
+from app.services.response_cache import povecaj_verziju
+
+logger = logging.getLogger(__name__)
+
+# Usklađivanje statusa rizika skladišta sa poslednjom izmerenom temperaturom.
+# Ranije se radilo u AppConfig.ready() (jedan upit po skladištu, u svakom
+# procesu i svakoj manage.py komandi). Sada se pokreće jednom, odloženo:
+# prvi HTTP zahtev pokreće pozadinsku nit, a zaključavanje preko kontrolne
+# tačke u bazi obezbeđuje da ga izvrši samo jedan worker.
+# Poslednje merenje se čuva na samom skladištu (poslednja_temperatura_s,
+# vreme_poslednjeg_merenja_s) i ažurira pri svakom upisu temperature.
+
+KONTROLNA_TACKA = 'uskladjivanje_skladista'
+DISPATCH_UID = 'app.uskladjivanje_skladista_pri_pokretanju'
+
+
+def odredi_status_rizika(vrednost):
+    """Status rizika skladišta na osnovu temperature (°C)."""
+    if vrednost > 6:
+        return 'visok'
+    if vrednost >= 4:
+        return 'umeren'
+    return 'nizak'
+
+
+# Uslovi nad poslednjom temperaturom, isti pragovi kao odredi_status_rizika
+USLOVI_STATUSA = (
+    ('visok', Q(poslednja_temperatura_s__gt=6)),
+    ('umeren', Q(poslednja_temperatura_s__gte=4, poslednja_temperatura_s__lte=6)),
+    ('nizak', Q(poslednja_temperatura_s__lt=4)),
+)
+
+
+def podupit_poslednjeg_merenja(polje):
+    """Podupit za polje poslednjeg merenja skladišta (indeks skladiste, vreme_merenja)."""
+    return Subquery(
+        Temperatura.objects.filter(skladiste=OuterRef('pk')).order_by(
+            '-vreme_merenja', '-id_merenja'
+        ).values(polje)[:1]
+    )
+
+
+def zabelezi_merenja(poslednja_merenja):
+    """
+    Beleži poslednja merenja za više skladišta odjednom.
+    poslednja_merenja: {skladiste_id: (vrednost, vreme_merenja)}
+
+    Po skladištu jedan uslovni UPDATE koji postavlja i status rizika; merenje
+    starije od već sačuvanog se preskače (svaki UPDATE je idempotentan, pa
+    transakciju određuje pozivalac). Vraća broj ažuriranih skladišta.
+    """
+    azurirano = 0
+    for skladiste_id, (vrednost, vreme_merenja) in poslednja_merenja.items():
+        novije = (
+            Q(vreme_poslednjeg_merenja_s__isnull=True)
+            | Q(vreme_poslednjeg_merenja_s__lte=vreme_merenja)
+        )
+        azurirano += Skladiste.objects.filter(novije, sifra_s=skladiste_id).update(
+            poslednja_temperatura_s=vrednost,
+            vreme_poslednjeg_merenja_s=vreme_merenja,
+            status_rizika_s=odredi_status_rizika(vrednost),
+        )
+
+    if azurirano:
+        # update() ne okida signale, pa keš invalidiramo ručno
+        povecaj_verziju(Skladiste)
+    return azurirano
+
+
+def zabelezi_merenje(skladiste_id, vrednost, vreme_merenja):
+    """
+    Beleži merenje kao poslednje za skladište (ako nije starije od sačuvanog)
+    i odmah postavlja status rizika. Jedan UPDATE, bez čitanja istorije.
+    Vraća True ako je merenje postalo poslednje.
+    """
+    return zabelezi_merenja({skladiste_id: (vrednost, vreme_merenja)}) > 0
+
+
+def osvezi_poslednja_merenja(queryset=None):
+    """
+    Ponovo računa poslednje merenje iz istorije (npr. posle brisanja merenja).
+    Jedan UPDATE sa podupitima; vraća broj obrađenih skladišta.
+    """
+    queryset = Skladiste.objects.all() if queryset is None else queryset
+    return queryset.update(
+        poslednja_temperatura_s=podupit_poslednjeg_merenja('vrednost'),
+        vreme_poslednjeg_merenja_s=podupit_poslednjeg_merenja('vreme_merenja'),
+    )
+
+
+def primeni_statuse_rizika(queryset=None):
+    """
+    Usklađuje status rizika sa sačuvanom poslednjom temperaturom.
+    Najviše jedan UPDATE po statusu; skladišta bez merenja se ne menjaju.
+    Vraća broj promenjenih skladišta.
+    """
+    queryset = Skladiste.objects.all() if queryset is None else queryset
+    promenjeno = 0
+    with transaction.atomic():
+        for status_rizika, uslov in USLOVI_STATUSA:
+            promenjeno += queryset.filter(uslov).exclude(
+                status_rizika_s=status_rizika
+            ).update(status_rizika_s=status_rizika)
+    return promenjeno
+
+
+def uskladi_statuse_skladista(queryset=None):
+    """
+    Usklađuje poslednja merenja i status rizika skladišta sa istorijom merenja,
+    bez učitavanja skladišta u Python. Vraća broj skladišta koja su promenila status.
+    """
+    with transaction.atomic():
+        osvezi_poslednja_merenja(queryset)
+        promenjeno = primeni_statuse_rizika(queryset)
+
+    # Poslednja merenja su možda promenjena i kad status nije
+    povecaj_verziju(Skladiste)
+    if promenjeno:
+        logger.info(f"Usklađen status rizika za {promenjeno} skladišta")
+
+    return promenjeno
+
+
+def _zauzmi_zakljucavanje():
+    """
+    Zauzima zaključavanje (kontrolna tačka sa vremenom pokretanja).
+    Ako je drugi worker pokrenuo usklađivanje u poslednjih
+    SKLADISTA_USKLADJIVANJE_ZAKLJUCAVANJE sekundi, vraća False.
+    """
+    trajanje = timedelta(seconds=getattr(settings, 'SKLADISTA_USKLADJIVANJE_ZAKLJUCAVANJE', 300))
+    sada = timezone.now()
+
+    try:
+        with transaction.atomic():
+            kontrolna_tacka, _ = KontrolnaTacka.objects.select_for_update().get_or_create(
+                naziv=KONTROLNA_TACKA
+            )
+            pokrenuto = kontrolna_tacka.stanje.get('pokrenuto')
+            if pokrenuto and sada - datetime.fromisoformat(pokrenuto) < trajanje:
+                return False
+
+            kontrolna_tacka.stanje = {'pokrenuto': sada.isoformat(), 'proces': os.getpid()}
+            kontrolna_tacka.save()
+    except IntegrityError:
+        # Drugi worker je istovremeno napravio kontrolnu tačku
+        return False
+
+    return True
+
+
+def pokreni_jednokratno_uskladjivanje():
+    """
+    Usklađuje statuse skladišta ako ih drugi worker nije upravo uskladio.
+    Vraća broj promenjenih skladišta, ili None ako je preskočeno.
+    """
+    try:
+        if not _zauzmi_zakljucavanje():
+            logger.info("Usklađivanje skladišta je već pokrenuo drugi proces, preskačem")
+            return None
+
+        promenjeno = uskladi_statuse_skladista()
+        KontrolnaTacka.objects.filter(naziv=KONTROLNA_TACKA).update(stanje={
+            'pokrenuto': timezone.now().isoformat(),
+            'proces': os.getpid(),
+            'promenjeno': promenjeno,
+        })
+        logger.info(f"Početno usklađivanje skladišta završeno: {promenjeno} promenjeno")
+        return promenjeno
+    except Exception as e:
+        logger.error(f"Greška pri početnom usklađivanju skladišta: {str(e)}")
+        return None
+
+
+def _pozadinsko_uskladjivanje():
+    try:
+        pokreni_jednokratno_uskladjivanje()
+    finally:
+        # Nit ima sopstvenu konekciju ka bazi, koja se ne vraća u request ciklus
+        connection.close()
+
+
+def _pri_prvom_zahtevu(sender, **kwargs):
+    request_started.disconnect(dispatch_uid=DISPATCH_UID)
+    threading.Thread(
+        target=_pozadinsko_uskladjivanje,
+        name='uskladjivanje-skladista',
+        daemon=True,
+    ).start()
+
+
+def zakazi_uskladjivanje_pri_pokretanju():
+    """
+    Poziva se iz AppConfig.ready(). Ne pristupa bazi - samo povezuje
+    jednokratni handler koji se izvršava na prvom HTTP zahtevu procesa,
+    pa manage.py komande i testovi ne pokreću usklađivanje.
+    """
+    if not getattr(settings, 'SKLADISTA_USKLADJIVANJE_PRI_POKRETANJU', True):
+        return
+    request_started.connect(_pri_prvom_zahtevu, dispatch_uid=DISPATCH_UID, weak=False)
@@ -1,10 +1,14 @@
-from django.db.models.signals import post_save, post_migrate
+from django.db.models.signals import post_save, post_delete, post_migrate, pre_save, pre_delete, m2m_changed
 from django.dispatch import receiver
+from django.db import transaction
 from django.apps import apps
-from datetime import date, timedelta, datetime
-from decimal import Decimal
-from .models import Artikal, Popust, Skladiste, Temperatura, Vozilo, Isporuka, Upozorenje, User
-from .views import posalji_notifikaciju
+from .models import Notifikacija, Artikal, Popust, Skladiste, Temperatura, Vozilo, Isporuka, Upozorenje, User, Faktura, Transakcija, StavkaFakture, Penal, Dobavljac, Ugovor, Zalihe, Reklamacija, Sertifikat
+from .services import finance_rollup_service as zbirovi
+from .services.response_cache import povecaj_verziju
+from .services import notifikacija_service as notifikacije
+from .services import krsenja_service
+from .services.expiry_service import uskladi_artikle, uskladi_artikal
+from .services.warehouse_status_service import zabelezi_merenje, uskladi_statuse_skladista
 import logging
 
 # Postavi logging
@@ -15,32 +19,12 @@ def check_and_update_skladiste_status(skladiste):
     """
     Proveri i ažuriraj status rizika skladišta na osnovu poslednje temperature
     """
-    # Dobij poslednju temperaturu za ovo skladište
-    poslednja_temp = Temperatura.objects.filter(
-        skladiste=skladiste
-    ).order_by('-vreme_merenja').first()
-    
-    if not poslednja_temp:
-        return False
-    
     stari_status = skladiste.status_rizika_s
-    
-    # Odredi novi status na osnovu temperature
-    if poslednja_temp.vrednost > 6:
-        novi_status = 'visok'
-    elif poslednja_temp.vrednost >= 4:
-        novi_status = 'umeren'
-    else:
-        novi_status = 'nizak'
-    
-    # Promeni status ako je potrebno
-    if stari_status != novi_status:
-        # Direktno ažuriranje u bazi
-        Skladiste.objects.filter(sifra_s=skladiste.sifra_s).update(status_rizika_s=novi_status)
-        logger.info(f"Skladište {skladiste.sifra_s} ({skladiste.mesto_s}): {stari_status} → {novi_status} (temperatura: {poslednja_temp.vrednost}°C)")
-        return True
-    
-    return False
+    was_changed = uskladi_statuse_skladista(Skladiste.objects.filter(sifra_s=skladiste.sifra_s)) > 0
+    if was_changed:
+        skladiste.refresh_from_db(fields=['status_rizika_s', 'poslednja_temperatura_s', 'vreme_poslednjeg_merenja_s'])
+        logger.info(f"Skladište {skladiste.sifra_s} ({skladiste.mesto_s}): {stari_status} → {skladiste.status_rizika_s} (temperatura: {skladiste.poslednja_temperatura_s}°C)")
+    return was_changed
 
 
 def update_all_skladista_status():
@@ -48,147 +32,67 @@ def update_all_skladista_status():
     Manuelno ažuriranje statusa svih skladišta na osnovu poslednje temperature
     Poziva se kada god treba da se proveri stanje svih skladišta
     """
-    skladista = Skladiste.objects.all()
-    updated_count = 0
-    
-    for skladiste in skladista:
-        try:
-            was_changed = check_and_update_skladiste_status(skladiste)
-            if was_changed:
-                updated_count += 1
-        except Exception as e:
-            logger.error(f"Greška pri proveri skladišta {skladiste.sifra_s}: {str(e)}")
-    
-    return updated_count
+    return uskladi_statuse_skladista()
 
 
 def update_all_artikli_status():
     """
     Manuelno ažuriranje statusa svih artikala na osnovu roka trajanja
-    Poziva se kada god treba da se proveri stanje svih artikala
+    Prelazi se upisuju skupovnim UPDATE upitima (services/expiry_service.py),
+    a popusti se kreiraju samo za artikle koji su upravo prešli u 'istice'
     """
-    artikli = Artikal.objects.all()
-    updated_count = 0
-    
-    for artikal in artikli:
-        try:
-            was_changed = check_and_update_artikel_status(artikal)
-            if was_changed:
-                updated_count += 1
-        except Exception as e:
-            logger.error(f"Greška pri proveri artikla {artikal.sifra_a}: {str(e)}")
-    
+    updated_count, _ = uskladi_artikle()
     return updated_count
 
 
 def check_all_skladista_status():
     """
     Proveri i ažuriraj status rizika za sva skladišta
+    (jedan upit za poslednje temperature i najviše jedan UPDATE po statusu)
     """
-    skladista = Skladiste.objects.all()
-    promenjenih_skladista = 0
-    
-    for skladiste in skladista:
-        try:
-            was_changed = check_and_update_skladiste_status(skladiste)
-            if was_changed:
-                promenjenih_skladista += 1
-        except Exception as e:
-            logger.error(f"Greška pri proveri skladišta {skladiste.sifra_s}: {str(e)}")
-    
-    return promenjenih_skladista
+    return uskladi_statuse_skladista()
 
 
 @receiver(post_save, sender=Temperatura)
 def check_skladiste_on_temperatura_save(sender, instance, created, **kwargs):
     """
     Signal koji se pokreće kada se doda nova temperatura
-    Automatski ažurira status rizika skladišta
+    Beleži poslednje merenje skladišta i ažurira status rizika (jedan UPDATE)
     """
+    if not instance.skladiste_id:
+        return
     try:
-        was_changed = check_and_update_skladiste_status(instance.skladiste)
-        
-        if created and was_changed:
-            logger.info(f"Status skladišta {instance.skladiste.mesto_s} ažuriran nakon dodavanja temperature {instance.vrednost}°C")
-            
+        zabelezi_merenje(instance.skladiste_id, instance.vrednost, instance.vreme_merenja)
     except Exception as e:
         logger.error(f"Greška pri proveri skladišta nakon temperature: {str(e)}")
 
 
-def check_and_update_artikel_status(artikal):
-
+@receiver(post_delete, sender=Temperatura)
+def check_skladiste_on_temperatura_delete(sender, instance, **kwargs):
     """
-    Proveri i ažuriraj status artikla na osnovu roka trajanja
+    Posle brisanja merenja poslednje merenje i status se računaju iz preostale istorije
     """
-    danas = date.today()
-    datum_za_7_dana = danas + timedelta(days=7)
-    
-    stari_status = artikal.status_trajanja
-    novi_status = stari_status
-    
-    # Proveri status na osnovu roka trajanja
-    if artikal.rok_trajanja_a < danas:
-        # Rok je već prošao
-        novi_status = 'istekao'
-    elif artikal.rok_trajanja_a <= datum_za_7_dana:
-        # Rok ističe za 7 ili manje dana
-        novi_status = 'istice'
-    else:
-        # Još uvek je aktivan
-        novi_status = 'aktivan'
-    
-    # Promeni status ako je potrebno
-    if stari_status != novi_status:
-        artikal.status_trajanja = novi_status
-        artikal.save()
-        
-        logger.info(f"Artikal {artikal.sifra_a} ({artikal.naziv_a}): {stari_status} → {novi_status}")
-        
-        # Kreiraj popust za artikle koji ističu (samo za novo promenjene)
-        if novi_status == 'istice' and stari_status != 'istice':
-            create_discount_for_artikel(artikal)
-    
-    return novi_status != stari_status
+    if not instance.skladiste_id:
+        return
+    try:
+        uskladi_statuse_skladista(Skladiste.objects.filter(sifra_s=instance.skladiste_id))
+    except Exception as e:
+        logger.error(f"Greška pri proveri skladišta nakon brisanja temperature: {str(e)}")
 
 
-def create_discount_for_artikel(artikal):
+def check_and_update_artikel_status(artikal):
     """
-    Kreira popust za artikal koji ističe
+    Proveri i ažuriraj status artikla na osnovu roka trajanja
+    Koristi isti mehanizam kao noćna provera (services/expiry_service.py):
+    skupovni UPDATE i bulk kreiranje popusta za artikle koji počinju da ističu
     """
-    danas = date.today()
+    stari_status = artikal.status_trajanja
+    was_changed = uskladi_artikal(artikal)
     
-    # Proverava da li već postoji popust za ovaj artikal u tom periodu
-    postojeci_popust = Popust.objects.filter(
-        artikli=artikal,
-        datum_pocetka_vazenja_p__lte=danas,
-        datum_kraja_vazenja_p__gte=danas
-    ).first()
+    if was_changed:
+        logger.info(f"Artikal {artikal.sifra_a} ({artikal.naziv_a}): {stari_status} → {artikal.status_trajanja}")
     
-    if not postojeci_popust:
-        # Izračunaj popust cenu (50% od osnovne cene)
-        popust_cena = artikal.osnovna_cena_a * Decimal('0.5')
-        
-        # Kreiraj novi popust
-        popust = Popust.objects.create(
-            predlozena_cena_a=popust_cena,
-            datum_pocetka_vazenja_p=danas,
-            datum_kraja_vazenja_p=artikal.rok_trajanja_a
-        )
-        # Dodeli artikal popustu
-        popust.artikli.add(artikal)
-        
-        logger.info(
-            f"Kreiran popust za artikal {artikal.sifra_a}: "
-            f"{artikal.osnovna_cena_a} → {popust_cena} "
-            f"(važeće od {danas} do {artikal.rok_trajanja_a})"
-        )
-        return popust
-    else:
-        logger.info(
-            f"Popust već postoji za artikal {artikal.sifra_a} "
-            f"u periodu {postojeci_popust.datum_pocetka_vazenja_p} - {postojeci_popust.datum_kraja_vazenja_p}"
-        )
-        return postojeci_popust
+    return was_changed
 
 
 @receiver(post_save, sender=Artikal)
@@ -222,23 +126,8 @@ def check_all_artikli_on_startup(sender, **kwargs):
         try:
             logger.info("=== POKRETANJE AUTOMATSKE PROVERE SVIH ARTIKALA I SKLADIŠTA ===")
             
-            # Proveri artikle
-            artikli = Artikal.objects.all()
-            promenjenih_artikala = 0
-            kreiranih_popusta = 0
-            
-            for artikal in artikli:
-                try:
-                    was_changed = check_and_update_artikel_status(artikal)
-                    if was_changed:
-                        promenjenih_artikala += 1
-                        
-                        # Ako je promenjen na 'istice', popust je već kreiran u check_and_update_artikel_status
-                        if artikal.status_trajanja == 'istice':
-                            kreiranih_popusta += 1
-                            
-                except Exception as e:
-                    logger.error(f"Greška pri proveri artikla {artikal.sifra_a}: {str(e)}")
+            # Proveri artikle (skupovni prelazi statusa)
+            promenjenih_artikala = update_all_artikli_status()
             
             # Proveri skladišta
             promenjenih_skladista = check_all_skladista_status()
@@ -254,7 +143,7 @@ def check_all_artikli_on_startup(sender, **kwargs):
             visok_rizik = Skladiste.objects.filter(status_rizika_s='visok').count()
             
             logger.info(f"Automatska provera završena:")
-            logger.info(f"- Artikli: {promenjenih_artikala} promenjeno, {kreiranih_popusta} popusta kreirano")
+            logger.info(f"- Artikli: {promenjenih_artikala} promenjeno")
             logger.info(f"- Skladišta: {promenjenih_skladista} promenjeno")
             logger.info(f"Trenutno stanje artikala - Aktivni: {aktivni}, Ističu: {isticu}, Istekli: {istekli}")
             logger.info(f"Trenutno stanje skladišta - Nizak rizik: {nizak_rizik}, Umeren: {umeren_rizik}, Visok: {visok_rizik}")
@@ -272,29 +161,141 @@ def get_isporuka_vozilo(vozilo):
 def obavesti_o_kvaru(sender, instance, **kwargs):
     #prethodno = Vozilo.objects.get(pk=instance.pk) prethodno.status != instance.status
     if instance.status == 'u_kvaru':
+        isporuka = get_isporuka_vozilo(instance)
         upozorenje = Upozorenje.objects.create(
-            isporuka=get_isporuka_vozilo(instance),
+            isporuka=isporuka,
             tip='kvar',
             poruka=f"Vozilo {instance.marka} {instance.model} je u kvaru.",
         )
-        # šalje obaveštenje lk
-        isporuka = get_isporuka_vozilo(instance)
-        koordinatori = User.objects.filter(tip_k='logisitcki_koordinator')
-        for n in koordinatori:
-            posalji_notifikaciju(
-                n,
-                f"Kvar na vozilu {instance.registracija}. Pogledaj detalje isporuke #{isporuka.sifra_i}.",
-                link=f"/upozorenja/{upozorenje.sifra_u}"
-            )
+        # šalje obaveštenje lk; svako čuvanje vozila u kvaru pravi upozorenje,
+        # ali koordinatori dobijaju jedno obaveštenje po prozoru spajanja
+        poruka = f"Kvar na vozilu {instance.registracija}."
+        if isporuka is not None:
+            poruka += f" Pogledaj detalje isporuke #{isporuka.sifra_i}."
+        notifikacije.obavesti_ulogu(
+            'logisticki_koordinator',
+            poruka,
+            link=f"/upozorenja/{upozorenje.sifra_u}",
+            kljuc_spajanja=f"kvar:vozilo:{instance.pk}"
+        )
+
+@receiver(post_save, sender=Notifikacija)
+def objavi_novu_notifikaciju(sender, instance, created, **kwargs):
+    # Otvorene SSE veze korisnika se bude tek kada je notifikacija vidljiva (posle commit-a)
+    if created:
+        transaction.on_commit(lambda: notifikacije.objavi(instance.korisnik_id, instance.sifra_n))
 
 @receiver(post_save, sender=Isporuka)
 def obavesti_o_novoj_isporuci(sender, instance, created, **kwargs):
     if created:
-        # šalje se logističkom koordinatoru
-        koordinatori = User.objects.filter(tip_k='logisticki_koordinator')
-        for k in koordinatori:
-            posalji_notifikaciju(
-                k,
-                f"Nova isporuka #{instance.sifra_i} je kreirana.",
-                link=f"/isporuke/{instance.sifra_i}"
-            )
\ No newline at end of file
+        # šalje se logističkim koordinatorima, jednim upisom
+        notifikacije.obavesti_ulogu(
+            'logisticki_koordinator',
+            f"Nova isporuka #{instance.sifra_i} je kreirana.",
+            link=f"/isporuke/{instance.sifra_i}",
+            kljuc_spajanja=f"isporuka:{instance.sifra_i}"
+        )
+
+@receiver([post_save, post_delete], sender=User)
+def osvezi_primaoce_notifikacija(sender, **kwargs):
+    # Prijava menja samo last_login, što ne utiče na primaoce
+    if kwargs.get('update_fields') != frozenset({'last_login'}):
+        notifikacije.obrisi_kes_primalaca()
+
+
+# ========== ZBIRNE FINANSIJSKE TABELE ==========
+# Svaka izmena faktura, transakcija, stavki i penala označava korpe zbirnih
+# tabela koje dotiče (staru i novu vrednost ključa); osvežavanje ide posle commit-a.
+
+@receiver(pre_save, sender=Faktura)
+def zapamti_stari_kljuc_fakture(sender, instance, **kwargs):
+    instance._stari_zbir_kljuc = zbirovi.kljuc_fakture(instance.pk) if instance.pk else None
+
+@receiver(post_save, sender=Faktura)
+def osvezi_zbirove_fakture(sender, instance, **kwargs):
+    stari_kljuc = getattr(instance, '_stari_zbir_kljuc', None)
+    novi_kljuc = zbirovi.kljuc_fakture(instance.pk)
+    zbirovi.oznaci_korpe('fakture', [stari_kljuc, novi_kljuc])
+
+    # Promena datuma ili statusa fakture premešta njene stavke u druge korpe
+    if stari_kljuc and novi_kljuc and (stari_kljuc[0], stari_kljuc[2]) != (novi_kljuc[0], novi_kljuc[2]):
+        zbirovi.oznaci_korpe(
+            'stavke',
+            zbirovi.kljucevi_stavki(instance.pk, stari_kljuc[0], stari_kljuc[2])
+            | zbirovi.kljucevi_stavki(instance.pk, novi_kljuc[0], novi_kljuc[2])
+        )
+
+@receiver(pre_delete, sender=Faktura)
+def oznaci_zbirove_obrisane_fakture(sender, instance, **kwargs):
+    kljuc = zbirovi.kljuc_fakture(instance.pk)
+    zbirovi.oznaci_korpe('fakture', [kljuc])
+
+@receiver(post_save, sender=Transakcija)
+def osvezi_zbirove_transakcije(sender, instance, **kwargs):
+    zbirovi.oznaci_korpe('fakture', [zbirovi.kljuc_fakture(instance.faktura_id)])
+
+@receiver(pre_delete, sender=Transakcija)
+def oznaci_zbirove_obrisane_transakcije(sender, instance, **kwargs):
+    zbirovi.oznaci_korpe('fakture', [zbirovi.kljuc_fakture(instance.faktura_id)])
+
+@receiver(pre_save, sender=StavkaFakture)
+def zapamti_stari_kljuc_stavke(sender, instance, **kwargs):
+    instance._stari_zbir_kljuc = zbirovi.kljuc_stavke(instance.pk) if instance.pk else None
+
+@receiver(post_save, sender=StavkaFakture)
+def osvezi_zbirove_stavke(sender, instance, **kwargs):
+    zbirovi.oznaci_korpe('stavke', [
+        getattr(instance, '_stari_zbir_kljuc', None),
+        zbirovi.kljuc_stavke(instance.pk),
+    ])
+
+@receiver(pre_delete, sender=StavkaFakture)
+def oznaci_zbirove_obrisane_stavke(sender, instance, **kwargs):
+    zbirovi.oznaci_korpe('stavke', [zbirovi.kljuc_stavke(instance.pk)])
+
+@receiver(pre_save, sender=Penal)
+def zapamti_stari_kljuc_penala(sender, instance, **kwargs):
+    instance._stari_zbir_kljuc = zbirovi.kljuc_penala(instance.pk) if instance.pk else None
+
+@receiver(post_save, sender=Penal)
+def osvezi_zbirove_penala(sender, instance, **kwargs):
+    zbirovi.oznaci_korpe('penali', [
+        getattr(instance, '_stari_zbir_kljuc', None),
+        (instance.datum_p, instance.ugovor_id),
+    ])
+
+@receiver(pre_delete, sender=Penal)
+def oznaci_zbirove_obrisanog_penala(sender, instance, **kwargs):
+    zbirovi.oznaci_korpe('penali', [(instance.datum_p, instance.ugovor_id)])
+
+
+# ========== INVALIDACIJA KEŠA ODGOVORA ==========
+# Svaka izmena modela povećava njegovu verziju u kešu odgovora
+# (vidi services/response_cache.py), čime se invalidiraju zavisni endpoint-i.
+
+KESIRANI_MODELI = (Faktura, Ugovor, Dobavljac, Penal, Artikal, Zalihe, Popust, Skladiste, Temperatura, Reklamacija, Sertifikat)
+
+def invalidiraj_kes_modela(sender, **kwargs):
+    povecaj_verziju(sender)
+
+for kesirani_model in KESIRANI_MODELI:
+    post_save.connect(invalidiraj_kes_modela, sender=kesirani_model, dispatch_uid=f'kes_save_{kesirani_model.__name__}')
+    post_delete.connect(invalidiraj_kes_modela, sender=kesirani_model, dispatch_uid=f'kes_delete_{kesirani_model.__name__}')
+
+@receiver(m2m_changed, sender=Popust.artikli.through)
+def invalidiraj_kes_popusta(sender, **kwargs):
+    povecaj_verziju(Popust)
+    povecaj_verziju(Artikal)
+
+
+# ========== KEŠ PRAVILA KRŠENJA UGOVORA ==========
+# Inkrementalna provera kršenja vidi izmene preko vodenog žiga, ali ne i
+# brisanja; posle brisanja sva pravila se sledeći put proveravaju cela.
+
+@receiver(post_delete, sender=Ugovor)
+@receiver(post_delete, sender=Faktura)
+@receiver(post_delete, sender=Reklamacija)
+@receiver(post_delete, sender=Sertifikat)
+@receiver(post_delete, sender=Dobavljac)
+def obrisi_kes_krsenja(sender, **kwargs):
+    krsenja_service.obrisi_kes()
@@ -1,3 +1,700 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+import httpx
+
+from django.core import mail
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from app import saga_orchestrator, views_saga
+from app.management.commands.benchmark_email import napravi_lokalni_smtp
+from app.models import (
+    Artikal, Dobavljac, EmailPoruka, Faktura, GeokodAdresa, KontrolnaTacka, KrsenjeUgovora, Notifikacija, Penal,
+    Popust, Posao,
+    Ruta, RutaGeometrija, Saga, Temperatura, Ugovor, User, Voznja, ZbirTemperatureSat,
+)
+from app.services import (
+    email_service, expiry_service, geocode_service, krsenja_service, notifikacija_service, penal_service, report_cache,
+    route_service, sifra_service, supplier_analysis_service, supplier_sync_service, telemetry_service,
+)
+from app.services.job_service import izvrsi_posao, preuzmi_posao, zakazi
+
+
+def _isprazni_red_emailova():
+    """Izvršava dospele poslove slanja, kao pozadinski radnik."""
+    while True:
+        posao_obj = preuzmi_posao('test')
+        if posao_obj is None:
+            return
+        izvrsi_posao(posao_obj)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', EMAIL_SERIJA=3)
+class EmailRedTest(TestCase):
+
+    def test_poruka_se_salje_tek_iz_posla(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            email_service.posalji_email('dobavljac@example.com', 'Naslov', 'Sadržaj')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Posao.objects.filter(tip=email_service.POSAO_SLANJE, status='na_cekanju').count(), 1)
+
+        _isprazni_red_emailova()
+        self.assertEqual([poruka.to for poruka in mail.outbox], [['dobavljac@example.com']])
+        self.assertEqual(EmailPoruka.objects.get().status, 'poslata')
+        self.assertEqual(Posao.objects.get().status, 'zavrsen')
+
+    def test_jedan_posao_za_vise_poruka(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            email_service.posalji_emailove([(f'd{i}@example.com', f'Naslov {i}', 'Sadržaj') for i in range(7)])
+            email_service.posalji_email('d7@example.com', 'Naslov 7', 'Sadržaj')
+
+        self.assertEqual(Posao.objects.filter(tip=email_service.POSAO_SLANJE).count(), 1)
+        _isprazni_red_emailova()
+        self.assertEqual(len(mail.outbox), 8)
+        self.assertFalse(EmailPoruka.objects.exclude(status='poslata').exists())
+
+    def test_preuzeta_poruka_se_ne_preuzima_ponovo(self):
+        for i in range(5):
+            EmailPoruka.objects.create(primalac=f'd{i}@example.com', posiljalac='s@example.com', naslov='N', sadrzaj='S')
+
+        prva = email_service._preuzmi_seriju(3)
+        druga = email_service._preuzmi_seriju(3)
+        self.assertEqual(len(prva), 3)
+        self.assertEqual(len(druga), 2)
+        self.assertFalse({poruka.pk for poruka in prva} & {poruka.pk for poruka in druga})
+        self.assertEqual(email_service._preuzmi_seriju(3), [])
+
+    @override_settings(EMAIL_MAX_POKUSAJA=2)
+    def test_ponavljanje_sa_odlaganjem(self):
+        poruka = EmailPoruka.objects.create(primalac='d@example.com', posiljalac='s@example.com', naslov='N', sadrzaj='S')
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=SMTPException('odbijeno')
+        ):
+            email_service.posalji_seriju(email_service._preuzmi_seriju(10))
+            poruka.refresh_from_db()
+            self.assertEqual((poruka.status, poruka.broj_pokusaja), ('na_cekanju', 1))
+            self.assertIn('odbijeno', poruka.greska)
+            odlaganje = (poruka.sledeci_pokusaj - timezone.now()).total_seconds()
+            self.assertTrue(25 < odlaganje <= 30)
+
+            # Dok odlaganje ne istekne, poruka nije dospela
+            self.assertEqual(email_service._preuzmi_seriju(10), [])
+
+            EmailPoruka.objects.filter(pk=poruka.pk).update(sledeci_pokusaj=timezone.now() - timedelta(seconds=1))
+            email_service.posalji_seriju(email_service._preuzmi_seriju(10))
+            poruka.refresh_from_db()
+            self.assertEqual((poruka.status, poruka.broj_pokusaja), ('neuspesna', 2))
+
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_serija_ide_preko_jedne_smtp_veze(self):
+        server = napravi_lokalni_smtp()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        for i in range(7):
+            EmailPoruka.objects.create(primalac=f'd{i}@example.com', posiljalac='s@example.com', naslov='N', sadrzaj='S')
+
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.server_address[1],
+            EMAIL_USE_TLS=False, EMAIL_USE_SSL=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        ):
+            posao_obj = Posao.objects.create(tip=email_service.POSAO_SLANJE, status='u_toku')
+            izvrsi_posao(posao_obj)
+
+        self.assertEqual(server.primljeno, 7)
+        # Serije od 3 poruke: 3 + 3 + 1
+        self.assertEqual(server.veze, 3)
+        self.assertEqual(Posao.objects.get(pk=posao_obj.pk).status, 'zavrsen')
+
+
+class PopustiTest(TestCase):
+
+    def test_popusti_sa_vezama_ka_artiklima(self):
+        danas = date(2026, 1, 10)
+        artikli = [
+            Artikal.objects.create(naziv_a=f'Artikal {i}', osnovna_cena_a=Decimal('100.00'), rok_trajanja_a=danas + timedelta(days=3))
+            for i in range(4)
+        ]
+        ids = [artikal.sifra_a for artikal in artikli]
+
+        self.assertEqual(expiry_service.kreiraj_popuste(ids, danas, batch_size=3), 4)
+        for artikal in artikli:
+            popust = artikal.popusti.get()
+            self.assertEqual(popust.predlozena_cena_a, Decimal('50.00'))
+            self.assertEqual(popust.datum_kraja_vazenja_p, artikal.rok_trajanja_a)
+
+        # Ponovno pokretanje ne pravi duplikate
+        self.assertEqual(expiry_service.kreiraj_popuste(ids, danas), 0)
+        self.assertEqual(Popust.objects.count(), 4)
+
+
+class KrsenjaTest(TestCase):
+
+    def setUp(self):
+        krsenja_service.obrisi_kes()
+        self.danas = date(2026, 3, 1)
+        dobavljac = Dobavljac.objects.create(
+            naziv='Dobavljač', email='dobavljac@example.com', PIB_d='123456789', ime_sirovine='Sirovina',
+            cena=Decimal('100.00'), rok_isporuke=7, ocena=Decimal('8'), datum_ocenjivanja=self.danas,
+        )
+        self.ugovor = Ugovor.objects.create(
+            datum_potpisa_u=date(2025, 1, 1), datum_isteka_u=date(2027, 1, 1),
+            status_u='aktivan', uslovi_u='Uslovi', dobavljac=dobavljac,
+        )
+        self.faktura = Faktura.objects.create(
+            iznos_f=Decimal('1000.00'), datum_prijema_f=date(2026, 1, 1), rok_placanja_f=date(2026, 2, 1),
+            status_f='primljena', ugovor=self.ugovor,
+        )
+
+    def test_penal_za_neplacenu_fakturu(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rezultat = penal_service.obradi_krsenja(danas=self.danas)
+
+        self.assertEqual([krsenje['pravilo'] for krsenje, _ in rezultat['penali']], ['neplacena_faktura'])
+        penal = Penal.objects.get()
+        self.assertEqual((penal.ugovor_id, penal.iznos_p), (self.ugovor.sifra_u, Decimal('2000.00')))
+        self.assertTrue(KrsenjeUgovora.objects.filter(pravilo='neplacena_faktura', predmet=str(self.faktura.sifra_f)).exists())
+        self.assertEqual(EmailPoruka.objects.get().primalac, 'dobavljac@example.com')
+
+        # Isto kršenje se ne kažnjava ponovo
+        self.assertEqual(penal_service.obradi_krsenja(danas=self.danas)['penali'], [])
+        self.assertEqual(Penal.objects.count(), 1)
+
+    def test_zastareo_kes_ne_pravi_penal(self):
+        krsenja, _ = krsenja_service.proceni(self.danas)
+        self.assertEqual(len(krsenja), 1)
+
+        # Izmena koju keš ovog procesa ne vidi (kao izmena iz drugog procesa
+        # potvrđena pre žiga keša)
+        Faktura.objects.filter(pk=self.faktura.pk).update(status_f='isplacena')
+
+        with override_settings(KRSENJA_PREKLAPANJE=0):
+            rezultat = penal_service.obradi_krsenja(danas=self.danas)
+        self.assertEqual(len(rezultat['krsenja']), 1)
+        self.assertEqual(rezultat['penali'], [])
+        self.assertEqual([krsenje['predmet'] for krsenje in rezultat['preskocena']], [str(self.faktura.sifra_f)])
+        self.assertFalse(Penal.objects.exists())
+        self.assertFalse(EmailPoruka.objects.exists())
+
+
+class ZakazivanjeSinhronizacijeTest(TestCase):
+
+    def test_zahtevi_se_spajaju_u_posao_na_cekanju(self):
+        prvi = supplier_sync_service.schedule_sync(['suppliers'])
+        drugi = supplier_sync_service.schedule_sync(['certificates'])
+        treci = supplier_sync_service.schedule_sync(['complaints', 'suppliers'], full=True)
+
+        self.assertEqual({prvi.pk, drugi.pk, treci.pk}, {prvi.pk})
+        posao_obj = Posao.objects.get()
+        self.assertEqual(posao_obj.parametri, {'entities': ['suppliers', 'complaints', 'certificates'], 'full': True})
+
+    def test_posao_u_toku_ne_preuzima_nove_zahteve(self):
+        prvi = supplier_sync_service.schedule_sync(['suppliers'])
+        self.assertEqual(preuzmi_posao('test').pk, prvi.pk)
+
+        drugi = supplier_sync_service.schedule_sync(['complaints'])
+        self.assertNotEqual(drugi.pk, prvi.pk)
+        self.assertEqual(drugi.parametri, {'entities': ['complaints'], 'full': False})
+        self.assertEqual(Posao.objects.get(pk=prvi.pk).parametri['entities'], ['suppliers'])
+
+    def test_posao_se_odlaze_dok_traje_druga_sinhronizacija(self):
+        posao_obj = supplier_sync_service.schedule_sync(['suppliers'])
+        preuzmi_posao('test')
+        with mock.patch.object(supplier_sync_service, '_acquire', return_value=False):
+            izvrsi_posao(Posao.objects.get(pk=posao_obj.pk))
+
+        posao_obj.refresh_from_db()
+        self.assertEqual(posao_obj.status, 'na_cekanju')
+        self.assertGreater(posao_obj.zakazano_za, timezone.now())
+
+
+class GeokoderStub:
+    """Geokoder bez mreže: poznate adrese iz rečnika, ostale nisu pronađene."""
+
+    def __init__(self, adrese=None, greska=None):
+        self.adrese = adrese or {}
+        self.greska = greska
+        self.pozivi = []
+
+    def __call__(self, adresa, drzava):
+        self.pozivi.append((adresa, drzava))
+        if self.greska:
+            raise self.greska
+        return self.adrese.get(adresa)
+
+
+class GeokodiranjeTest(TestCase):
+
+    def setUp(self):
+        geocode_service.ocisti_lru()
+        self.addCleanup(geocode_service.ocisti_lru)
+
+    def test_kes_u_memoriji_i_bazi(self):
+        geokoder = GeokoderStub({'Bulevar oslobođenja 1, Novi Sad': (45.25, 19.84)})
+
+        self.assertEqual(geocode_service.geokodiraj('Bulevar oslobođenja 1, Novi Sad', geokoder=geokoder), (45.25, 19.84))
+        # Ista adresa posle normalizacije dolazi iz keša u memoriji
+        self.assertEqual(geocode_service.geokodiraj('  bulevar  OSLOBOĐENJA 1,Novi Sad ', geokoder=geokoder), (45.25, 19.84))
+        self.assertEqual(len(geokoder.pozivi), 1)
+
+        # Drugi proces (prazan keš u memoriji) čita tabelu
+        geocode_service.ocisti_lru()
+        self.assertEqual(geocode_service.geokodiraj('Bulevar oslobođenja 1, Novi Sad', geokoder=geokoder), (45.25, 19.84))
+        self.assertEqual(len(geokoder.pozivi), 1)
+        self.assertEqual(GeokodAdresa.objects.get().adresa, 'bulevar oslobođenja 1, novi sad')
+
+    def test_nepronadjena_adresa_se_kesira_krace(self):
+        geokoder = GeokoderStub()
+        self.assertEqual(geocode_service.geokodiraj('Nepostojeća 99', geokoder=geokoder), (None, None))
+        self.assertEqual(geocode_service.geokodiraj('Nepostojeća 99', geokoder=geokoder), (None, None))
+        self.assertEqual(len(geokoder.pozivi), 1)
+
+        # Posle isteka negativnog keša adresa se ponovo traži
+        geocode_service.ocisti_lru()
+        GeokodAdresa.objects.update(azurirano=timezone.now() - timedelta(hours=2))
+        geocode_service.geokodiraj('Nepostojeća 99', geokoder=geokoder)
+        self.assertEqual(len(geokoder.pozivi), 2)
+
+    def test_greska_geokodera_se_ne_kesira(self):
+        self.assertEqual(
+            geocode_service.geokodiraj('Zmaj Jovina 5', geokoder=GeokoderStub(greska=ConnectionError('timeout'))),
+            (None, None)
+        )
+        self.assertFalse(GeokodAdresa.objects.exists())
+
+        geokoder = GeokoderStub({'Zmaj Jovina 5': (45.26, 19.85)})
+        self.assertEqual(geocode_service.geokodiraj('Zmaj Jovina 5', geokoder=geokoder), (45.26, 19.85))
+
+    def test_dugacka_adresa(self):
+        prva, druga = 'Ulica ' + 'a' * 300 + ' 1', 'Ulica ' + 'a' * 300 + ' 2'
+        geokoder = GeokoderStub({prva: (44.0, 20.0), druga: (44.1, 20.1)})
+
+        self.assertEqual(geocode_service.geokodiraj(prva, geokoder=geokoder), (44.0, 20.0))
+        self.assertEqual(geocode_service.geokodiraj(druga, geokoder=geokoder), (44.1, 20.1))
+        self.assertEqual(GeokodAdresa.objects.count(), 2)
+        self.assertTrue(all(len(adresa) <= 255 for adresa in GeokodAdresa.objects.values_list('adresa', flat=True)))
+
+        geocode_service.ocisti_lru()
+        self.assertEqual(geocode_service.geokodiraj(druga, geokoder=geokoder), (44.1, 20.1))
+        self.assertEqual(len(geokoder.pozivi), 2)
+
+    def test_greska_baze_ne_prekida_geokodiranje(self):
+        geokoder = GeokoderStub({'Njegoševa 3': (45.0, 19.0)})
+        with mock.patch.object(GeokodAdresa.objects, 'update_or_create', side_effect=DatabaseError('ORA-12899')):
+            self.assertEqual(geocode_service.geokodiraj('Njegoševa 3', geokoder=geokoder), (45.0, 19.0))
+        self.assertFalse(GeokodAdresa.objects.exists())
+
+
+class DodelaSifaraTest(TransactionTestCase):
+    """Istovremena dodela šifara iz više niti (svaka nit ima svoju konekciju)."""
+
+    NITI = 8
+    TRANSAKCIJA_PO_NITI = 10
+
+    def setUp(self):
+        if connection.vendor == 'sqlite':
+            if connection.is_in_memory_db():
+                self.skipTest('SQLite baza u memoriji ne podržava istovremene konekcije (DATABASE_TEST_NAME)')
+            # SQLite dozvoljava jednog pisca; sa BEGIN IMMEDIATE transakcije čekaju red
+            opcije = connection.settings_dict['OPTIONS']
+            self.addCleanup(opcije.update, dict(opcije))
+            self.addCleanup(opcije.clear)
+            opcije.update(transaction_mode='IMMEDIATE', timeout=60)
+        sifra_service._blokovi.clear()
+        self.addCleanup(sifra_service._blokovi.clear)
+
+    def _dodeli(self, model, broj):
+        try:
+            sifre = []
+            for _ in range(self.TRANSAKCIJA_PO_NITI):
+                with transaction.atomic():
+                    sifre += sifra_service.dodeli_sifre(model, broj)
+            return sifre
+        finally:
+            connection.close()
+
+    def _dodeli_istovremeno(self, model, broj):
+        with ThreadPoolExecutor(max_workers=self.NITI) as pool:
+            rezultati = list(pool.map(lambda _: self._dodeli(model, broj), range(self.NITI)))
+        return [sifra for sifre in rezultati for sifra in sifre]
+
+    def test_bez_duplikata(self):
+        for broj in (1, 3, 25):
+            sifre = self._dodeli_istovremeno(Penal, broj)
+            self.assertEqual(len(sifre), self.NITI * self.TRANSAKCIJA_PO_NITI * broj)
+            ponovljene = [sifra for sifra, ukupno in Counter(sifre).items() if ukupno > 1]
+            self.assertEqual(ponovljene, [], f"Duple šifre pri dodeli po {broj}")
+
+    def test_ne_preklapa_postojece_zapise(self):
+        dobavljac = Dobavljac.objects.create(
+            naziv='Dobavljač', email='dobavljac@example.com', PIB_d='123456789', ime_sirovine='Sirovina',
+            cena=Decimal('100.00'), rok_isporuke=7, ocena=Decimal('8'), datum_ocenjivanja=date(2026, 1, 1),
+        )
+        ugovor = Ugovor.objects.create(
+            datum_potpisa_u=date(2026, 1, 1), datum_isteka_u=date(2027, 1, 1),
+            status_u='aktivan', uslovi_u='Uslovi', dobavljac=dobavljac,
+        )
+        # Zapis upisan mimo servisa (npr. admin) sa šifrom koju baza sama dodeljuje
+        postojeci = Penal.objects.create(razlog_p='Ručno', iznos_p=Decimal('10.00'), ugovor=ugovor)
+
+        sifre = self._dodeli_istovremeno(Penal, 2)
+        self.assertEqual(len(set(sifre)), len(sifre))
+        self.assertGreater(min(sifre), postojeci.pk)
+
+
+class SifreSagaTest(TransactionTestCase):
+    """
+    Sage (faktura sa plaćanjem i penal) pokrenute istovremeno iz više niti:
+    svaki zapis dobija svoju šifru. Slanje događaja mikroservisu je isključeno.
+    """
+
+    SAGA = 240
+    NITI = 12
+
+    def setUp(self):
+        self.red = contextlib.nullcontext()
+        if connection.vendor == 'sqlite':
+            if connection.is_in_memory_db():
+                # Baza u memoriji (deljeni keš) odbija drugog pisca umesto da
+                # čeka, pa se sage iz različitih niti izvršavaju jedna po jedna
+                self.red = threading.Lock()
+            else:
+                opcije = connection.settings_dict['OPTIONS']
+                self.addCleanup(opcije.update, dict(opcije))
+                self.addCleanup(opcije.clear)
+                opcije.update(transaction_mode='IMMEDIATE', timeout=60)
+        sifra_service._blokovi.clear()
+        self.addCleanup(sifra_service._blokovi.clear)
+        for zakrpa in (
+            mock.patch('app.saga_orchestrator.zakazi_slanje'),
+            mock.patch('app.saga_orchestrator.zakazi_oporavak'),
+        ):
+            zakrpa.start()
+            self.addCleanup(zakrpa.stop)
+
+        dobavljac = Dobavljac.objects.create(
+            naziv='Dobavljač', email='dobavljac@example.com', PIB_d='123456789', ime_sirovine='Sirovina',
+            cena=Decimal('100.00'), rok_isporuke=7, ocena=Decimal('8'), datum_ocenjivanja=date(2026, 1, 1),
+        )
+        self.ugovor = Ugovor.objects.create(
+            datum_potpisa_u=date(2026, 1, 1), datum_isteka_u=date(2027, 1, 1),
+            status_u='aktivan', uslovi_u='Uslovi', dobavljac=dobavljac,
+        )
+
+    def _saga(self, i):
+        try:
+            with self.red:
+                if i % 2:
+                    return saga_orchestrator.PenalSagaOrchestrator().create_penal_with_sync(
+                        ugovor_id=self.ugovor.sifra_u, razlog=f"Penal {i}", iznos=Decimal('10.00'),
+                    )
+                return saga_orchestrator.SagaOrchestrator().create_faktura_with_payment(
+                    ugovor_id=self.ugovor.sifra_u, iznos=Decimal('1000.00'), datum_prijema='2026-03-01',
+                    rok_placanja='2026-04-01', potvrda_transakcije=f"POTVRDA-{i}",
+                )
+        finally:
+            connection.close()
+
+    def test_istovremene_sage_bez_duplih_sifara(self):
+        with ThreadPoolExecutor(max_workers=self.NITI) as pool:
+            rezultati = list(pool.map(self._saga, range(self.SAGA)))
+
+        neuspele = [rezultat for uspeh, rezultat in rezultati if not uspeh]
+        self.assertEqual(neuspele, [])
+        for kljuc, broj in (('saga_id', self.SAGA), ('faktura_id', self.SAGA // 2),
+                            ('transakcija_id', self.SAGA // 2), ('penal_id', self.SAGA // 2)):
+            sifre = [rezultat[kljuc] for _, rezultat in rezultati if kljuc in rezultat]
+            self.assertEqual(len(sifre), broj, kljuc)
+            ponovljene = [sifra for sifra, ukupno in Counter(sifre).items() if ukupno > 1]
+            self.assertEqual(ponovljene, [], f"Duple šifre: {kljuc}")
+        self.assertEqual(Faktura.objects.count(), self.SAGA // 2)
+        self.assertEqual(Penal.objects.count(), self.SAGA // 2)
+
+
+class AsinhroniKlijentTest(TestCase):
+
+    def setUp(self):
+        self.klijenti = []
+
+        def novi_klijent():
+            klijent = httpx.AsyncClient(transport=httpx.MockTransport(lambda zahtev: httpx.Response(200, json={})))
+            self.klijenti.append(klijent)
+            return klijent
+
+        zakrpa = mock.patch.object(supplier_analysis_service, '_new_async_client', side_effect=novi_klijent)
+        zakrpa.start()
+        self.addCleanup(zakrpa.stop)
+        self.servis = supplier_analysis_service.AsyncSupplierAnalysisService('http://mikroservis.test/')
+
+    def test_klijent_zahteva_se_zatvara(self):
+        rezultat = asyncio.run(self.servis.get_dashboard())
+
+        self.assertEqual(rezultat, {sekcija: {} for sekcija in supplier_analysis_service.DASHBOARD_ENDPOINTS})
+        # Jedan klijent za sve sekcije, zatvoren pre kraja zahteva
+        self.assertEqual(len(self.klijenti), 1)
+        self.assertTrue(self.klijenti[0].is_closed)
+        self.assertEqual(len(supplier_analysis_service._async_clients), 0)
+
+    def test_deljeni_klijent_petlje(self):
+        async def dva_zahteva():
+            await self.servis.get_dashboard(shared_client=True)
+            await self.servis.get_supplier_risk_patterns(shared_client=True)
+            klijent = supplier_analysis_service.get_async_client()
+            await klijent.aclose()
+            return klijent
+
+        klijent = asyncio.run(dva_zahteva())
+        self.assertEqual(self.klijenti, [klijent])
+
+
+class SabijanjeTelemetrijeTest(TestCase):
+
+    def _merenje(self, sifra, vrednost):
+        return Temperatura.objects.create(
+            id_merenja=sifra, vrednost=Decimal(vrednost), vreme_merenja=timezone.now() - timedelta(days=10)
+        )
+
+    def _ostari_vidjeno(self, sekunde):
+        kontrolna_tacka = KontrolnaTacka.objects.get(naziv=telemetry_service.KONTROLNA_TACKA)
+        for vidjeno in kontrolna_tacka.stanje['vidjeno'].values():
+            for unos in vidjeno:
+                unos[0] = (datetime.fromisoformat(unos[0]) - timedelta(seconds=sekunde)).isoformat()
+        kontrolna_tacka.save()
+
+    @override_settings(TELEMETRIJA_SABIJANJE_ODLAGANJE_S=300)
+    def test_kasno_potvrdjeno_merenje_se_sabija(self):
+        self._merenje(1, '4.00')
+        self._merenje(3, '6.00')
+
+        # Najveća šifra je tek viđena: ništa se još ne sabija
+        self.assertEqual(telemetry_service.sabij_izvor('temperatura'), (0, 0, 0))
+
+        # Masovni unos sa manjom šifrom potvrđen posle merenja 3
+        self._merenje(2, '5.00')
+        self._ostari_vidjeno(301)
+        merenja, _, _ = telemetry_service.sabij_izvor('temperatura')
+        self.assertEqual(merenja, 3)
+        self.assertEqual(telemetry_service.poslednji_sabijeni_id('temperatura'), 3)
+        self.assertEqual(sum(ZbirTemperatureSat.objects.values_list('broj_merenja', flat=True)), 3)
+
+        # Brisanje po periodu čuvanja obuhvata samo sabijena merenja
+        self._merenje(4, '7.00')
+        self.assertEqual(
+            sorted(telemetry_service.za_brisanje()['temperatura'].values_list('pk', flat=True)), [1, 2, 3]
+        )
+
+    def test_bez_odlaganja(self):
+        self._merenje(1, '4.00')
+        self.assertEqual(telemetry_service.sabij_izvor('temperatura', odlaganje=0)[0], 1)
+
+
+class PonovljenaSagaTest(TestCase):
+    """Ponovljen zahtev sa istim ključem dok prvi još izvršava lokalne korake."""
+
+    def setUp(self):
+        self.korisnik = User.objects.create_user(
+            username='admin', mail_k='admin@example.com', password='x', tip_k='administrator'
+        )
+
+    def _post(self, view, podaci, kljuc):
+        zahtev = APIRequestFactory().post('/', podaci, format='json', HTTP_IDEMPOTENCY_KEY=kljuc)
+        force_authenticate(zahtev, user=self.korisnik)
+        return view(zahtev)
+
+    def test_penal_u_obradi(self):
+        saga = Saga.objects.create(
+            tip='penal', kljuc_idempotencije='penal-1', mikroservis_url='http://mikroservis.test',
+            parametri={'ugovor_id': 5, 'razlog': 'Kašnjenje', 'iznos': '100.00'},
+        )
+        odgovor = self._post(
+            views_saga.create_penal_saga, {'ugovor_id': 5, 'razlog': 'Kašnjenje', 'iznos': '100.00'}, 'penal-1'
+        )
+        self.assertEqual(odgovor.status_code, 409)
+        self.assertTrue(odgovor.data['u_toku'])
+        self.assertEqual((odgovor.data['saga_id'], odgovor.data['saga_status']), (saga.sifra_sg, 'pokrenuta'))
+        self.assertEqual(Saga.objects.count(), 1)
+
+    def test_uvoz_u_obradi(self):
+        fakture = [
+            {
+                'ugovor_id': 5, 'iznos': '1000.00', 'datum_prijema': '2026-01-01',
+                'rok_placanja': '2026-02-01', 'potvrda_transakcije': f'TRX-{i}',
+            }
+            for i in range(3)
+        ]
+        serija, _ = saga_orchestrator._proveri_stavke(fakture)
+        saga = Saga.objects.create(
+            tip='fakture_sa_placanjem', kljuc_idempotencije='uvoz-1:0', mikroservis_url='http://mikroservis.test',
+            parametri={'stavke': serija},
+        )
+
+        odgovor = self._post(views_saga.create_fakture_with_payment_batch_saga, {'fakture': fakture}, 'uvoz-1')
+        self.assertEqual(odgovor.status_code, 409)
+        podaci = odgovor.data['data']
+        self.assertEqual((podaci['kreirano'], podaci['u_obradi'], podaci['neuspesno']), (0, 3, 0))
+        self.assertEqual({(stavka['status'], stavka['saga_id']) for stavka in podaci['stavke']}, {('u_obradi', saga.sifra_sg)})
+
+
+class CircuitBreakerTest(TestCase):
+
+    def setUp(self):
+        self.prekidac = supplier_analysis_service.CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        zakrpa = mock.patch.object(supplier_analysis_service, 'circuit_breaker', self.prekidac)
+        zakrpa.start()
+        self.addCleanup(zakrpa.stop)
+        # Otvoren prekidač koji je upravo prešao u half-open
+        self.prekidac.record_failure()
+        self.prekidac._opened_at -= 0.05
+
+    def test_probni_poziv_bez_ishoda_se_zamenjuje(self):
+        self.assertTrue(self.prekidac.allow())
+        self.assertFalse(self.prekidac.allow())
+        # Probni poziv se nikad nije javio: novi posle reset_timeout
+        self.prekidac._trial_started -= 0.05
+        self.assertTrue(self.prekidac.allow())
+
+    def test_otkazan_asinhroni_poziv_oslobadja_probu(self):
+        klijent = mock.Mock(spec=httpx.AsyncClient)
+        klijent.get.side_effect = asyncio.CancelledError
+        servis = supplier_analysis_service.AsyncSupplierAnalysisService('http://mikroservis.test/')
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(servis._get(klijent, 'analysis/risk-patterns'))
+        self.assertEqual(self.prekidac.state, 'half_open')
+        self.assertTrue(self.prekidac.allow())
+
+    def test_neocekivana_greska_sinhronog_poziva_oslobadja_probu(self):
+        servis = supplier_analysis_service.SupplierAnalysisService('http://mikroservis.test/')
+        with mock.patch.object(supplier_analysis_service, 'get_session', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                servis._send('get', 'suppliers', 'GET suppliers', True)
+        self.assertTrue(self.prekidac.allow())
+
+
+class KesIzvestajaTest(TestCase):
+
+    def setUp(self):
+        direktorijum = tempfile.TemporaryDirectory()
+        self.addCleanup(direktorijum.cleanup)
+        podesavanja = override_settings(REPORT_CACHE_DIR=direktorijum.name, REPORT_CACHE_TTL=60, REPORT_CACHE_MAX_MB=1)
+        podesavanja.enable()
+        self.addCleanup(podesavanja.disable)
+
+    def _upisi(self, kljuc, velicina, starost):
+        putanja = report_cache._path(kljuc)
+        putanja.parent.mkdir(parents=True, exist_ok=True)
+        putanja.write_bytes(b'x' * velicina)
+        trenutak = time.time() - starost
+        os.utime(putanja, (trenutak, trenutak))
+        return putanja
+
+    def test_cest_pogodak_ne_produzava_trajanje(self):
+        self._upisi('aa01', 10, 50)
+        with report_cache.open_cached('aa01') as fajl:
+            self.assertEqual(fajl.read(), b'x' * 10)
+        putanja = report_cache._path('aa01')
+        self.assertLess(time.time() - putanja.stat().st_mtime, 60)
+        self.assertGreater(time.time() - putanja.stat().st_mtime, 49)
+
+        os.utime(putanja, (time.time(), time.time() - 61))
+        self.assertIsNone(report_cache.open_cached('aa01'))
+        self.assertFalse(putanja.exists())
+
+    def test_lru_brise_najduze_nekorisceni(self):
+        pola_mb = 512 * 1024
+        stari_korisceni = self._upisi('bb01', pola_mb, 30)
+        novi_nekorisceni = self._upisi('bb02', pola_mb, 20)
+        report_cache.open_cached('bb01').close()
+        self._upisi('bb03', pola_mb, 10)
+
+        self.assertEqual(report_cache.prune(), 1)
+        self.assertTrue(stari_korisceni.exists())
+        self.assertFalse(novi_nekorisceni.exists())
+
+
+class SimulacijaVoznjeTest(TestCase):
+
+    def _izvrsi_korak(self, posao_obj):
+        # Radnik preuzima posao bez obzira na zakazano vreme sledećeg koraka
+        Posao.objects.filter(pk=posao_obj.pk).update(status='u_toku')
+        izvrsi_posao(Posao.objects.get(pk=posao_obj.pk))
+        return Posao.objects.get(pk=posao_obj.pk)
+
+    def test_posao_cuva_samo_kljuc_rute_i_korak(self):
+        koordinate = [[20.45, 44.81], [20.46, 44.82], [20.47, 44.83]]
+        kljuc = route_service.kljuc_rute((44.81, 20.45), (44.83, 20.47), route_service.PODRAZUMEVANI_PROFIL)
+        RutaGeometrija.objects.create(
+            kljuc=kljuc, duzina_m=3000, trajanje_s=240, polilinija=route_service.kodiraj_poliliniju(koordinate),
+        )
+        ruta = Ruta.objects.create(
+            polazna_tacka='Beograd', odrediste='Zemun', duzina_km=Decimal('3'),
+            vreme_dolaska=timedelta(minutes=4), status='u_toku',
+        )
+        posao_obj = zakazi('simulacija_voznje', {'ruta': ruta.sifra_r, 'geometrija': kljuc, 'korak': 0})
+
+        with mock.patch('app.services.simulation_service.random.random', return_value=1.0):
+            posao_obj = self._izvrsi_korak(posao_obj)
+            self.assertEqual(posao_obj.parametri, {'ruta': ruta.sifra_r, 'geometrija': kljuc, 'korak': 1})
+            self.assertEqual(posao_obj.status, 'na_cekanju')
+
+            for _ in range(len(koordinate)):
+                posao_obj = self._izvrsi_korak(posao_obj)
+        self.assertEqual(posao_obj.status, 'zavrsen')
+
+        self.assertEqual(Voznja.objects.filter(ruta=ruta).count(), len(koordinate))
+        poslednja = Voznja.objects.filter(ruta=ruta).latest('pk')
+        self.assertAlmostEqual(poslednja.trenutna_lon, 20.47)
+        ruta.refresh_from_db()
+        self.assertEqual(ruta.status, 'zavrsena')
+
+
+class KursorNotifikacijaTest(TestCase):
+
+    def setUp(self):
+        self.korisnik = User.objects.create_user(
+            username='primalac', mail_k='primalac@example.com', password='lozinka123', tip_k='administrator',
+        )
+
+    def _notifikacija(self, poruka):
+        return Notifikacija.objects.create(korisnik=self.korisnik, poruka_n=poruka)
+
+    def test_kasno_vidljiva_notifikacija_ispod_kursora_se_ne_gubi(self):
+        # Notifikacija sa manjom šifrom čiji je commit stigao posle čitanja
+        zakasnela = self._notifikacija('kasni commit')
+        novija = self._notifikacija('novija')
+        kursor = notifikacija_service.KursorNotifikacija(self.korisnik.pk, novija.sifra_n)
+
+        podaci, ima_jos = kursor.procitaj()
+        self.assertEqual([n['sifra_n'] for n in podaci], [zakasnela.sifra_n, novija.sifra_n])
+        self.assertFalse(ima_jos)
+
+        # Već poslate se ne ponavljaju, nova stiže
+        treca = self._notifikacija('treća')
+        podaci, _ = kursor.procitaj()
+        self.assertEqual([n['sifra_n'] for n in podaci], [treca.sifra_n])
+        self.assertEqual(kursor.posle, treca.sifra_n)
+
+    def test_stare_notifikacije_ispod_kursora_se_ne_citaju_ponovo(self):
+        stara = self._notifikacija('stara')
+        Notifikacija.objects.filter(pk=stara.pk).update(datum_n=timezone.now() - timedelta(minutes=5))
+        nova = self._notifikacija('nova')
+
+        podaci, kursor, _ = notifikacija_service.notifikacije_posle(self.korisnik.pk, nova.sifra_n)
+        self.assertEqual([n['sifra_n'] for n in podaci], [nova.sifra_n])
+        self.assertEqual(kursor, nova.sifra_n)
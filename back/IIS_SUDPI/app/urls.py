@@ -1,7 +1,8 @@
 from django.urls import path, include
 from . import views
 from . import views_mv
-from .views_saga import create_faktura_with_payment_saga, create_penal_saga, saga_status
+from .views_saga import (create_faktura_with_payment_saga, create_fakture_with_payment_batch_saga,
+                         create_penal_saga, saga_status)
 from .views import (LoginView, index, register, api_login, dashboard_finansijski_analiticar, invoice_list, 
                     invoice_filter_options, invoice_detail, invoice_action, reports_data, reports_filter_options, 
                     penalties_list, penalties_filter_options, penalties_analysis, check_and_create_penalties, 
@@ -17,7 +18,7 @@ from .views_mv2 import (
     get_suppliers, get_material_suppliers_report_post, get_performance_trends_report,
     get_risk_analysis_report, get_alternative_suppliers_post, get_supplier_performance_trends,
     get_material_market_dynamics, supplier_analysis_dashboard, supplier_complaint_transaction,
-    upload_izvestaj
+    upload_izvestaj, supplier_service_metrics, sync_status, supplier_analysis_overview
 )
 from django.contrib.auth.views import LogoutView
 from django.conf.urls.static import static
@@ -41,6 +42,7 @@ urlpatterns = [
     path('invoices/<int:invoice_id>/simulate-payment/', simulate_payment, name='simulate_payment'),
     path('reports/', reports_data, name='reports_data'),
     path('reports/filter-options/', reports_filter_options, name='reports_filter_options'),
+    path('cache/statistika/', views.cache_statistika, name='cache_statistika'),
     path('penalties/', penalties_list, name='penalties_list'),
     path('penalties/filter-options/', penalties_filter_options, name='penalties_filter_options'),
     path('penalties/analysis/', penalties_analysis, name='penalties_analysis'),
@@ -61,6 +63,7 @@ urlpatterns = [
 
     # SAGA PATTERN - Transakciona obrada podataka (Oracle + InfluxDB)
     path('saga/faktura-sa-placanjem/', create_faktura_with_payment_saga, name='saga-faktura-payment'),
+    path('saga/fakture-sa-placanjem/batch/', create_fakture_with_payment_batch_saga, name='saga-fakture-payment-batch'),
     path('saga/penal/', create_penal_saga, name='saga-penal'),
     path('saga/status/', saga_status, name='saga-status'),
 
@@ -92,9 +95,12 @@ urlpatterns = [
 
     # Supplier Analysis Microservice integration
     path('api/supplier-analysis/health/', check_service_health, name='supplier_analysis_health'),
+    path('api/supplier-analysis/metrics/', supplier_service_metrics, name='supplier_analysis_metrics'),
+    path('api/supplier-analysis/overview/', supplier_analysis_overview, name='supplier_analysis_overview'),
     path('api/supplier-analysis/sync/suppliers/', sync_suppliers, name='sync_suppliers'),
     path('api/supplier-analysis/sync/complaints/', sync_complaints, name='sync_complaints'),
     path('api/supplier-analysis/sync/certificates/', sync_certificates, name='sync_certificates'),
+    path('api/supplier-analysis/sync/status/', sync_status, name='sync_status'),
     path('api/supplier-analysis/reports/supplier/<int:supplier_id>/', get_supplier_report, name='supplier_report'),
     path('api/supplier-analysis/reports/supplier-comparison/', get_supplier_comparison_report, name='supplier_comparison_report'),
     path('api/supplier-analysis/reports/material/<str:material_name>/', get_material_suppliers_report, name='material_suppliers_report'),
@@ -152,6 +158,9 @@ urlpatterns = [
     path('notifikacije/', views.list_notifikacije, name='list_notifikacije'),
     path('notifikacije/<int:pk>/mark-as-read/', views.mark_notifikacija_as_read, name='mark_notifikacija_as_read'),
     path('notifikacije/user/<int:user_id>/', views.list_user_notifikacije, name='list_user_notifikacije'),
+    path('notifikacije/moje/', views.moje_notifikacije, name='moje_notifikacije'),
+    path('notifikacije/neprocitane/', views.broj_neprocitanih_notifikacija, name='broj_neprocitanih_notifikacija'),
+    path('notifikacije/stream/', views.notifikacije_stream, name='notifikacije_stream'),
 
     path('api/isporuke/spremi/<int:pk>/', views.spremi_isporuku, name='spremi_isporuku'),
     path('api/isporuke/<int:pk>/', views.isporuka_detail),
@@ -175,7 +184,10 @@ urlpatterns = [
     path('api/simulacija-rute/<int:pk>/', views.simulacija_voznje, name='simulacija_voznje'),
     path('api/simulacija-temperature/<int:pk>/', views.simulacija_temperature, name = 'simulacija_temperature'),
     path('api/voznje/<int:pk>/trenutna/', views.trenutna_pozicija, name='trenutna_pozicija'),
+    path('api/poslovi/metrike/', views.poslovi_metrike, name='poslovi_metrike'),
+    path('api/poslovi/<int:pk>/otkazi/', views.otkazi_posao, name='otkazi_posao'),
     path('api/temperature/ruta/<int:pk>/', views.temperatura_po_ruti, name='temperatura_po_ruti'),
+    path('api/temperature/bulk/', views.temperature_bulk_unos, name='temperature_bulk_unos'),
 
     #upozorenja
     path('api/upozorenja/', views.list_upozorenja, name='list_upozorenja'),
@@ -2,7 +2,7 @@ from difflib import SequenceMatcher
 import random
 from django.template.loader import render_to_string
 from django.views.decorators.csrf import csrf_exempt
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -10,11 +10,18 @@ from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework.exceptions import AuthenticationFailed
+from asgiref.sync import sync_to_async
+import asyncio
+import json
+import queue
+from django.core.handlers.asgi import ASGIRequest
 from django.utils import timezone
-from django.db.models import Sum, Q, Count, Avg, Max
+from django.db.models import Sum, Q, Count, F, Prefetch, ExpressionWrapper, DecimalField
 from decimal import Decimal
-from datetime import timedelta, datetime
-from django.core.paginator import Paginator
+from datetime import date, timedelta, datetime
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -22,7 +29,7 @@ from django.contrib import messages
 import requests
 from datetime import timedelta
 from django.utils import timezone
-from .models import Rampa, Voznja, TerminUtovara, Ruta, Notifikacija, Isporuka,Temperatura, Upozorenje, Vozilo, Vozac, Servis, Faktura, User, Dobavljac, Penal, StavkaFakture, Proizvod, Poseta, Reklamacija, KontrolorKvaliteta, FinansijskiAnaliticar, NabavniMenadzer, LogistickiKoordinator, SkladisniOperater, Administrator, Skladiste, Artikal, Zalihe, Popust, Transakcija, Izvestaj, voziloOmogucavaTemperatura
+from .models import Ugovor, KrsenjeUgovora, Rampa, Voznja, TerminUtovara, Ruta, Notifikacija, Isporuka,Temperatura, Upozorenje, Vozilo, Vozac, Servis, Faktura, User, Dobavljac, Penal, StavkaFakture, Proizvod, Poseta, Reklamacija, KontrolorKvaliteta, FinansijskiAnaliticar, NabavniMenadzer, LogistickiKoordinator, SkladisniOperater, Administrator, Skladiste, Artikal, Zalihe, Popust, Transakcija, Izvestaj, voziloOmogucavaTemperatura
 from .serializers import (
     RegistrationSerializer, 
     FakturaSerializer,
@@ -55,7 +62,21 @@ from .serializers import (
 from rest_framework import generics, filters
 from django.db import transaction
 from .decorators import allowed_users
-from django.core.mail import send_mail
+from .services.dashboard_service import izracunaj_dashboard_finansija
+from .services import finance_rollup_service as zbirovi
+from .services.response_cache import kesiran_odgovor, statistika_kesa
+from .services.expiry_service import artikli_sa_statusom, uslov_statusa
+from .services.temperature_ingest_service import unesi_merenja, citaj_json_niz, citaj_ndjson, VELICINA_SERIJE
+from .services.telemetry_service import temperature_za_period
+from .services.geocode_service import geokodiraj
+from .services.route_service import PODRAZUMEVANI_PROFIL, dobavi_rutu, kljuc_rute
+from .services.job_service import zakazi, otkazi, metrike_poslova, AKTIVNI_STATUSI
+from .services.simulation_service import kljuc_simulacije_voznje, kljuc_simulacije_temperature
+from .services.sifra_service import dodeli_sifru
+from .services import notifikacija_service as notifikacije
+from .services.email_service import posalji_email
+from .services.penal_service import email_o_penalu, obradi_krsenja, pronadji_krsenja
+from .services.paginacija_service import KesiraniPaginator, NeispravanKursor, keyset_odgovor, velicina_stranice
 from django.conf import settings
 import logging
 import uuid
@@ -194,107 +215,10 @@ def dashboard_finansijski_analiticar(request):
     """
     API endpoint za dashboard finansijskog analitičara
     Vraća: pregled finansija, profitabilnost dobavljača, nadolazeće isplate, troškove
+    Svi paneli se računaju skupovnim upitima (vidi services/dashboard_service.py).
     """
-    
-    # 1. PREGLED FINANSIJA
-    ukupno_placeno = Faktura.objects.filter(status_f='isplacena').aggregate(
-        total=Sum('iznos_f')
-    )['total'] or Decimal('0.00')
-    
-    na_cekanju = Faktura.objects.filter(
-        status_f__in=['primljena', 'verifikovana']
-    ).aggregate(
-        total=Sum('iznos_f')
-    )['total'] or Decimal('0.00')
-    
-    isplacene_fakture = Faktura.objects.filter(
-        status_f='isplacena',
-        transakcija__isnull=False
-    )
-    
-    prosecno_vreme = 0
-    if isplacene_fakture.exists():
-        ukupno_dana = 0
-        brojac = 0
-        for faktura in isplacene_fakture:
-            if hasattr(faktura, 'transakcija'):
-                razlika = (faktura.transakcija.datum_t.date() - faktura.datum_prijema_f).days
-                ukupno_dana += razlika
-                brojac += 1
-        prosecno_vreme = round(ukupno_dana / brojac) if brojac > 0 else 0
-    
-    pregled_finansija = {
-        'ukupno_placeno': float(ukupno_placeno),
-        'na_cekanju': float(na_cekanju),
-        'prosecno_vreme_placanja': prosecno_vreme
-    }
-    
-    # 2. PROFITABILNOST DOBAVLJAČA
-    dobavljaci_profitabilnost = []
-    for dobavljac in Dobavljac.objects.filter(izabran=True):
+    dashboard_data = izracunaj_dashboard_finansija()
 
-        aktivni_ugovori = dobavljac.ugovori.filter(status_u='aktivan').count()
-        
-        pre_6_meseci = date.today() - timedelta(days=180)
-        penali_count = Penal.objects.filter(
-            ugovor__dobavljac=dobavljac,
-            datum_p__gte=pre_6_meseci
-        ).count()
-        
-        # Računamo profitabilnost: (ocena * 10) + (aktivni_ugovori * 5) - (penali * 15)
-        profitabilnost = (float(dobavljac.ocena) * 10) + (aktivni_ugovori * 5) - (penali_count * 15)
-        profitabilnost = max(0, min(100, profitabilnost))  # Ograniči na 0-100%
-        
-        dobavljaci_profitabilnost.append({
-            'name': dobavljac.naziv,
-            'profitability': f"{profitabilnost:.0f}%"
-        })
-    
-    dobavljaci_profitabilnost.sort(key=lambda x: float(x['profitability'].replace('%', '')), reverse=True)
-    
-    # 3. NADOLAZEĆE ISPLATE
-    danas = date.today()
-    za_30_dana = danas + timedelta(days=30)
-    
-    nadolazece_isplate = []
-    fakture_za_isplatu = Faktura.objects.filter(
-        status_f__in=['primljena', 'verifikovana'],
-        rok_placanja_f__lte=za_30_dana
-    ).select_related('ugovor__dobavljac').order_by('rok_placanja_f')[:10]
-    
-    for faktura in fakture_za_isplatu:
-        nadolazece_isplate.append({
-            'id': str(faktura.sifra_f),
-            'supplier': faktura.ugovor.dobavljac.naziv,
-            'amount': f"{float(faktura.iznos_f):.0f}€"
-        })
-    
-    # 4. VIZUALIZACIJA TROŠKOVA (poslednih 6 meseci)
-    troskovi_po_mesecima = []
-    for i in range(6):
-        mesec = date.today().replace(day=1) - timedelta(days=30*i)
-        sledeci_mesec = (mesec.replace(day=28) + timedelta(days=4)).replace(day=1)
-        
-        troskovi_mesec = Faktura.objects.filter(
-            datum_prijema_f__gte=mesec,
-            datum_prijema_f__lt=sledeci_mesec,
-            status_f='isplacena'
-        ).aggregate(total=Sum('iznos_f'))['total'] or Decimal('0.00')
-        
-        troskovi_po_mesecima.append({
-            'mesec': mesec.strftime('%m/%Y'),
-            'iznos': float(troskovi_mesec)
-        })
-    
-    troskovi_po_mesecima.reverse()
-    
-    dashboard_data = {
-        'pregled_finansija': pregled_finansija,
-        'profitabilnost_dobavljaca': dobavljaci_profitabilnost,
-        'nadolazece_isplate': nadolazece_isplate,
-        'vizualizacija_troskova': troskovi_po_mesecima
-    }
-    
     return Response(dashboard_data, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
@@ -303,6 +227,10 @@ def dashboard_finansijski_analiticar(request):
 def invoice_list(request):
     """
     API endpoint za prikaz liste faktura sa filtering i search opcijama
+    
+    Paginacija: ?page=N (OFFSET), ili ?cursor=<next_cursor> za keyset paginaciju
+    po (datum_prijema_f, sifra_f) - prazan cursor daje prvu stranicu. Ukupan
+    broj se kešira; ?count=tacno ili ?count=bez (samo uz cursor).
     """
     # Početni queryset sa related objektima za optimizaciju
     queryset = Faktura.objects.select_related('ugovor__dobavljac').all()
@@ -343,24 +271,37 @@ def invoice_list(request):
                 datum_prijema_f__month=last_month.month
             )
     
-    # Search funkcionalnost
+    # Search funkcionalnost: šifra i iznos se porede tačno (icontains nad
+    # brojevima pretvara kolonu u tekst i zaobilazi indeks), naziv dobavljača delimično
     search_query = request.GET.get('search', '').strip()
     if search_query:
-        queryset = queryset.filter(
-            Q(sifra_f__icontains=search_query) |
-            Q(ugovor__dobavljac__naziv__icontains=search_query) |
-            Q(iznos_f__icontains=search_query)
-        )
+        uslov = Q(ugovor__dobavljac__naziv__icontains=search_query)
+        if search_query.isdigit():
+            uslov |= Q(sifra_f=int(search_query))
+        try:
+            iznos = Decimal(search_query.replace(',', '.'))
+            if iznos.is_finite():
+                uslov |= Q(iznos_f=iznos)
+        except ArithmeticError:
+            pass
+        queryset = queryset.filter(uslov)
+    
+    # Keyset paginacija (najnovije prvo), bez OFFSET-a
+    if 'cursor' in request.GET:
+        try:
+            return Response(keyset_odgovor(
+                request, queryset, ('-datum_prijema_f', '-sifra_f'), FakturaSerializer,
+                [Faktura, Ugovor, Dobavljac]
+            ), status=status.HTTP_200_OK)
+        except NeispravanKursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     # Sortiranje po datumu prijema (najnovije prvo)
     queryset = queryset.order_by('-datum_prijema_f', '-sifra_f')
     
     # Paginacija
-    page_size = int(request.GET.get('page_size', 10))
-    page_number = int(request.GET.get('page', 1))
-    
-    paginator = Paginator(queryset, page_size)
-    page = paginator.get_page(page_number)
+    paginator = KesiraniPaginator(queryset, velicina_stranice(request), [Faktura, Ugovor, Dobavljac])
+    page = paginator.get_page(request.GET.get('page', 1))
     
     # Serijalizacija podataka
     serializer = FakturaSerializer(page.object_list, many=True)
@@ -377,6 +318,7 @@ def invoice_list(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @allowed_users(['finansijski_analiticar'])
+@kesiran_odgovor('invoice_filter_options', modeli=[Dobavljac, Ugovor, Faktura])
 def invoice_filter_options(request):
     """
     API endpoint za dobijanje opcija za dropdown filtere
@@ -514,22 +456,9 @@ def reports_data(request):
         end_date = None
         period_label = 'Sav period'
     
-    # Početni queryset sa filterom po datumu
-    fakture_queryset = Faktura.objects.all()
-    if start_date and end_date:
-        fakture_queryset = fakture_queryset.filter(
-            datum_prijema_f__gte=start_date,
-            datum_prijema_f__lte=end_date
-        )
-    
-    # Filter po statusu
-    if status_filter != 'sve':
-        fakture_queryset = fakture_queryset.filter(status_f=status_filter)
-    
-    # Dobijamo stavke faktura sa related podacima
-    stavke_queryset = StavkaFakture.objects.filter(
-        faktura__in=fakture_queryset
-    ).select_related('faktura', 'proizvod')
+    # Čitamo iz dnevnih zbirnih tabela (filter po datumu prijema i statusu fakture)
+    fakture_queryset = zbirovi.zbir_faktura_za_period(start_date, end_date, status_filter)
+    stavke_queryset = zbirovi.zbir_stavki_za_period(start_date, end_date, status_filter)
     
     # Grupiranje po proizvodu
     if group_by_filter == 'proizvodu':
@@ -537,10 +466,9 @@ def reports_data(request):
         
         # Agregiramo podatke po proizvodima
         proizvodi_data = stavke_queryset.values('proizvod__naziv_pr').annotate(
-            ukupna_kolicina=Sum('kolicina_sf'),
-            ukupan_trosak=Sum('cena_po_jed'),
-            broj_stavki=Count('sifra_sf'),
-            prosecna_cena=Avg('cena_po_jed')
+            ukupna_kolicina=Sum('ukupna_kolicina'),
+            ukupan_trosak=Sum('ukupan_trosak'),
+            broj_stavki=Sum('broj_stavki')
         ).order_by('-ukupan_trosak')
         
         chart_profitability = []
@@ -615,9 +543,9 @@ def reports_data(request):
         report_data = []
         
         # Agregiramo podatke po dobavljačima preko faktura
-        dobavljaci_data = fakture_queryset.values('ugovor__dobavljac__naziv').annotate(
-            ukupan_trosak=Sum('iznos_f'),
-            broj_faktura=Count('sifra_f')
+        dobavljaci_data = fakture_queryset.values('dobavljac__naziv').annotate(
+            ukupan_trosak=Sum('ukupan_iznos'),
+            broj_faktura=Sum('broj_faktura')
         ).order_by('-ukupan_trosak')
         
         chart_profitability = []
@@ -628,7 +556,7 @@ def reports_data(request):
         ukupna_profitabilnost = 0
         
         for dobavljac in dobavljaci_data:
-            naziv = dobavljac['ugovor__dobavljac__naziv'] or 'Nepoznat dobavljač'
+            naziv = dobavljac['dobavljac__naziv'] or 'Nepoznat dobavljač'
             broj_faktura = dobavljac['broj_faktura'] or 0
             trosak = dobavljac['ukupan_trosak'] or Decimal('0.00')
             
@@ -675,9 +603,9 @@ def reports_data(request):
         
         # Agregiramo podatke po kategorijama
         kategorije_data = stavke_queryset.values('proizvod__kategorija__naziv_kp').annotate(
-            ukupna_kolicina=Sum('kolicina_sf'),
-            ukupan_trosak=Sum('cena_po_jed'),
-            broj_stavki=Count('sifra_sf')
+            ukupna_kolicina=Sum('ukupna_kolicina'),
+            ukupan_trosak=Sum('ukupan_trosak'),
+            broj_stavki=Sum('broj_stavki')
         ).order_by('-ukupan_trosak')
         
         chart_profitability = []
@@ -815,6 +743,7 @@ def reports_data(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @allowed_users(['finansijski_analiticar'])
+@kesiran_odgovor('reports_filter_options', modeli=[])
 def reports_filter_options(request):
     """
     API endpoint za dobijanje opcija za report filtere
@@ -847,12 +776,31 @@ def reports_filter_options(request):
         'grupiranje': grupiranje,
     }, status=status.HTTP_200_OK)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@allowed_users(['administrator'])
+def cache_statistika(request):
+    """
+    API endpoint za pregled keša odgovora (samo administrator)
+    Vraća broj pogodaka i promašaja po keširanom endpoint-u
+    """
+    try:
+        return Response(statistika_kesa(), status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Greška u cache_statistika: {str(e)}")
+        return Response({
+            'error': 'Greška pri dohvatanju statistike keša',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @allowed_users(['finansijski_analiticar', 'nabavni_menadzer'])
 def penalties_list(request):
     """
     API endpoint za prikaz liste penala sa filtering opcijama
+    
+    Paginacija kao invoice_list: ?page=N ili ?cursor= (keyset po datum_p, sifra_p).
     """
     # Početni queryset sa related objektima za optimizaciju
     queryset = Penal.objects.select_related('ugovor__dobavljac').all()
@@ -878,15 +826,22 @@ def penalties_list(request):
             # Penali noviji od 30 dana
             queryset = queryset.filter(datum_p__gte=danas - timedelta(days=30))
     
+    # Keyset paginacija (najnoviji prvo), bez OFFSET-a
+    if 'cursor' in request.GET:
+        try:
+            return Response(keyset_odgovor(
+                request, queryset, ('-datum_p', '-sifra_p'), PenalSerializer,
+                [Penal, Ugovor, Dobavljac]
+            ), status=status.HTTP_200_OK)
+        except NeispravanKursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
     # Sortiranje po datumu (najnoviji prvo)
     queryset = queryset.order_by('-datum_p', '-sifra_p')
     
     # Paginacija
-    page_size = int(request.GET.get('page_size', 10))
-    page_number = int(request.GET.get('page', 1))
-    
-    paginator = Paginator(queryset, page_size)
-    page = paginator.get_page(page_number)
+    paginator = KesiraniPaginator(queryset, velicina_stranice(request), [Penal, Ugovor, Dobavljac])
+    page = paginator.get_page(request.GET.get('page', 1))
     
     # Serijalizacija podataka
     serializer = PenalSerializer(page.object_list, many=True)
@@ -903,6 +858,7 @@ def penalties_list(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @allowed_users(['finansijski_analiticar', 'nabavni_menadzer'])
+@kesiran_odgovor('penalties_filter_options', modeli=[Dobavljac, Ugovor, Penal])
 def penalties_filter_options(request):
     """
     API endpoint za dobijanje opcija za dropdown filtere
@@ -941,39 +897,20 @@ def penalties_analysis(request):
     # Analiziramo dobavljače koji imaju penale
     dobavljaci_analiza = []
     
-    # Dobijamo sve dobavljače koji imaju ugovore (ne samo one sa penalima)
-    dobavljaci = Dobavljac.objects.filter(
-        ugovori__isnull=False
-    ).distinct()
+    # Jedan upit nad dnevnim zbirovima penala umesto četiri upita po dobavljaču
+    # Koristimo values sa skalarnim poljima da izbegnemo NCLOB problem
+    dobavljaci = Dobavljac.objects.values('sifra_d', 'naziv').annotate(
+        ukupno_ugovora=Count('ugovori', distinct=True),
+        ugovori_sa_penalima=Count('ugovori__zbirovi_penala__ugovor', distinct=True),
+        broj_penala=Sum('ugovori__zbirovi_penala__broj_penala'),
+        ukupan_iznos=Sum('ugovori__zbirovi_penala__ukupan_iznos'),
+    ).filter(broj_penala__gt=0)
     
     for dobavljac in dobavljaci:
-        # Ukupan broj ugovora za ovog dobavljača
-        ukupno_ugovora = dobavljac.ugovori.count()
-        
-        # Dobijamo unikatne ID-jeve ugovora koji imaju penale
-        # Koristimo values_list sa flat=True da izbegnemo NCLOB problem
-        ugovori_sa_penalima_ids = list(
-            dobavljac.ugovori.filter(
-                penali__isnull=False
-            ).values_list('sifra_u', flat=True).distinct()
-        )
-        broj_ugovora_sa_penalima = len(ugovori_sa_penalima_ids)
-        
-        # Ukupan broj penala za ovog dobavljača
-        broj_penala = Penal.objects.filter(
-            ugovor__dobavljac=dobavljac
-        ).count()
-        
-        # Ukupan iznos penala
-        ukupan_iznos = Penal.objects.filter(
-            ugovor__dobavljac=dobavljac
-        ).aggregate(
-            total=Sum('iznos_p')
-        )['total'] or 0
-        
-        # Preskačemo dobavljače koji nemaju penale
-        if broj_penala == 0:
-            continue
+        ukupno_ugovora = dobavljac['ukupno_ugovora']
+        broj_ugovora_sa_penalima = dobavljac['ugovori_sa_penalima']
+        broj_penala = dobavljac['broj_penala']
+        ukupan_iznos = dobavljac['ukupan_iznos'] or 0
             
         # Računamo stopu kršenja kao procenat ugovora koji imaju penale
         stopa_krsenja = (broj_ugovora_sa_penalima / ukupno_ugovora * 100) if ukupno_ugovora > 0 else 0
@@ -990,7 +927,7 @@ def penalties_analysis(request):
             tip_preporuke = "positive"
         
         dobavljaci_analiza.append({
-            'naziv': dobavljac.naziv,
+            'naziv': dobavljac['naziv'],
             'broj_penala': broj_penala,
             'ukupno_ugovora': ukupno_ugovora,
             'ugovori_sa_penalima': broj_ugovora_sa_penalima,
@@ -1009,6 +946,9 @@ def penalties_analysis(request):
 
 
 # ========== SIMULACIJA PLAĆANJA - HELPER FUNKCIJE ==========
+# Email-ovi se ne šalju u toku zahteva: posalji_email ih upisuje u red
+# (services/email_service.py), u istoj transakciji kao plaćanje ili penal,
+# a šalje ih pozadinski posao. True znači da je poruka stavljena u red.
 
 def send_payment_notification(dobavljac_email, faktura):
     """
@@ -1032,14 +972,8 @@ def send_payment_notification(dobavljac_email, faktura):
         Sistem za upravljanje nabavkom
         """
         
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [dobavljac_email],
-            fail_silently=False,
-        )
-        logger.info(f"Email notifikacija poslata na {dobavljac_email} za fakturu {faktura.sifra_f}")
+        posalji_email(dobavljac_email, subject, message)
+        logger.info(f"Email notifikacija za {dobavljac_email} (faktura {faktura.sifra_f}) stavljena u red")
         return True
     except Exception as e:
         logger.error(f"Greška pri slanju email notifikacije: {str(e)}")
@@ -1070,14 +1004,8 @@ def send_confirmation_notification(dobavljac_email, transakcija, faktura):
         Sistem za upravljanje nabavkom
         """
         
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [dobavljac_email],
-            fail_silently=False,
-        )
-        logger.info(f"Email potvrde poslat na {dobavljac_email} za transakciju {transakcija.potvrda_t}")
+        posalji_email(dobavljac_email, subject, message)
+        logger.info(f"Email potvrde za {dobavljac_email} (transakcija {transakcija.potvrda_t}) stavljen u red")
         return True
     except Exception as e:
         logger.error(f"Greška pri slanju email potvrde: {str(e)}")
@@ -1088,51 +1016,9 @@ def send_penalty_notification(dobavljac_email, penal, ugovor, razlog_detalji="")
     Slanje email notifikacije dobavljaču o kršenju ugovora i dodeljenom penalu
     """
     try:
-        subject = f"OBAVEŠTENJE: Kršenje ugovora {ugovor.sifra_u} - Dodeljen penal"
-        message = f"""
-        Poštovani,
-        
-        Obaveštavamo Vas da je evidentirano kršenje uslova ugovora, te je na osnovu toga dodeljen penal.
-        
-        ═══════════════════════════════════════════════
-        DETALJI UGOVORA:
-        ═══════════════════════════════════════════════
-        - Broj ugovora: {ugovor.sifra_u}
-        - Datum potpisa: {ugovor.datum_potpisa_u.strftime('%d.%m.%Y')}
-        - Datum isteka: {ugovor.datum_isteka_u.strftime('%d.%m.%Y')}
-        - Status ugovora: {ugovor.get_status_u_display()}
-        
-        ═══════════════════════════════════════════════
-        DETALJI PENALA:
-        ═══════════════════════════════════════════════
-        - Broj penala: {penal.sifra_p}
-        - Razlog: {penal.razlog_p}
-        - Iznos penala: {penal.iznos_p} RSD
-        - Datum evidentiranja: {penal.datum_p.strftime('%d.%m.%Y')}
-        
-        {razlog_detalji}
-        
-        ═══════════════════════════════════════════════
-        SLEDEĆI KORACI:
-        ═══════════════════════════════════════════════
-        1. Iznos penala će biti odbijen od naredne isplate
-        2. Molimo Vas da preduzmete mere kako bi se ovakve situacije izbegavale u budućnosti
-        3. Za dodatna pitanja ili žalbe, kontaktirajte našeg nabavnog menadžera
-        
-        NAPOMENA: Učestala kršenja ugovora mogu dovesti do prekida poslovne saradnje.
-        
-        Srdačan pozdrav,
-        Sistem za upravljanje nabavkom
-        """
-        
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [dobavljac_email],
-            fail_silently=False,
-        )
-        logger.info(f"Email o penalu poslat na {dobavljac_email} za ugovor {ugovor.sifra_u}, penal {penal.sifra_p}")
+        subject, message = email_o_penalu(penal, ugovor, razlog_detalji)
+        posalji_email(dobavljac_email, subject, message)
+        logger.info(f"Email o penalu za {dobavljac_email} (ugovor {ugovor.sifra_u}, penal {penal.sifra_p}) stavljen u red")
         return True
     except Exception as e:
         logger.error(f"Greška pri slanju email obaveštenja o penalu: {str(e)}")
@@ -1141,31 +1027,14 @@ def send_penalty_notification(dobavljac_email, penal, ugovor, razlog_detalji="")
 
 def check_contract_violations():
     """
-    Proverava sve aktivne ugovore i detektuje kršenja od strane dobavljača:
-    - Istekli ugovori koji nisu označeni kao istekli (administrativna greška)
+    Proverava sve aktivne ugovore i detektuje kršenja od strane dobavljača
+    (vidi services/penal_service.pronadji_krsenja)
     
     Returns:
         list: Lista dictionary-ja sa detaljima o prekršajima
     """
-    violations = []
-    danas = date.today()
-    
     try:
-        # 1. PROVERA: Aktivni ugovori koji su istekli
-        istekli_ugovori = Ugovor.objects.filter(
-            status_u='aktivan',
-            datum_isteka_u__lt=danas
-        ).select_related('dobavljac')
-        
-        for ugovor in istekli_ugovori:
-            violations.append({
-                'ugovor': ugovor,
-                'tip_krsenja': 'istek_ugovora',
-                'razlog': f'Ugovor je istekao {ugovor.datum_isteka_u.strftime("%d.%m.%Y")}, ali nije zatvoren',
-                'iznos_penala': Decimal('5000.00'),  # Fiksni penal za neažurirane ugovore
-                'detalji': f'Ugovor br. {ugovor.sifra_u} je trebao biti zatvoren pre {(danas - ugovor.datum_isteka_u).days} dana.'
-            })
-        
+        violations = pronadji_krsenja()
         logger.info(f"Provera kršenja ugovora završena. Pronađeno {len(violations)} kršenja.")
         return violations
         
@@ -1190,36 +1059,38 @@ def auto_create_penalty(violation_data):
         
         # Kreiraj penal
         with transaction.atomic():
-            from django.db.models import Max
-            max_penal_id = Penal.objects.aggregate(Max('sifra_p'))['sifra_p__max'] or 0
-            next_penal_id = max_penal_id + 1
-            
             penal = Penal.objects.create(
-                sifra_p=next_penal_id,
+                sifra_p=dodeli_sifru(Penal),
                 razlog_p=violation_data['razlog'],
                 iznos_p=violation_data['iznos_penala'],
                 ugovor=ugovor
             )
             
+            # Evidencija sprečava ponovni penal za isto kršenje (vidi services/krsenja_service.py)
+            if violation_data.get('predmet'):
+                KrsenjeUgovora.objects.create(
+                    pravilo=violation_data['tip_krsenja'], predmet=violation_data['predmet'], penal=penal
+                )
+            
             # Ako je kršenje 'istek_ugovora', ažuriraj status ugovora
             if violation_data['tip_krsenja'] == 'istek_ugovora':
                 ugovor.status_u = 'istekao'
                 ugovor.save()
             
             logger.info(f"Automatski kreiran penal {penal.sifra_p} za ugovor {ugovor.sifra_u}")
-        
-        # Pošalji email obaveštenje dobavljaču
-        email_sent = send_penalty_notification(
-            dobavljac_email=dobavljac.email,
-            penal=penal,
-            ugovor=ugovor,
-            razlog_detalji=f"\n{violation_data.get('detalji', '')}\n"
-        )
+
+            # Email obaveštenje dobavljaču ide u red zajedno sa penalom
+            email_sent = send_penalty_notification(
+                dobavljac_email=dobavljac.email,
+                penal=penal,
+                ugovor=ugovor,
+                razlog_detalji=f"\n{violation_data.get('detalji', '')}\n"
+            )
         
         if email_sent:
-            logger.info(f"Email obaveštenje uspešno poslato za penal {penal.sifra_p}")
+            logger.info(f"Email obaveštenje stavljeno u red za penal {penal.sifra_p}")
         else:
-            logger.warning(f"Email obaveštenje nije poslato za penal {penal.sifra_p}")
+            logger.warning(f"Email obaveštenje nije stavljeno u red za penal {penal.sifra_p}")
         
         return True, penal, None
         
@@ -1228,6 +1099,24 @@ def auto_create_penalty(violation_data):
         logger.error(error_msg)
         return False, None, error_msg
 
+def _podaci_krsenja(violation):
+    """Kršenje iz penal_service u obliku za odgovor (pregled i probni rad)."""
+    ugovor = violation['ugovor']
+    return {
+        'ugovor_id': ugovor.sifra_u,
+        'predmet': violation['predmet'],
+        'dobavljac': ugovor.dobavljac.naziv,
+        'dobavljac_email': ugovor.dobavljac.email,
+        'tip_krsenja': violation['tip_krsenja'],
+        'razlog': violation['razlog'],
+        'iznos_penala': float(violation['iznos_penala']),
+        'detalji': violation['detalji'],
+        'datum_potpisa': ugovor.datum_potpisa_u.strftime('%d.%m.%Y'),
+        'datum_isteka': ugovor.datum_isteka_u.strftime('%d.%m.%Y'),
+        'status_ugovora': ugovor.status_u
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @allowed_users(['nabavni_menadzer', 'finansijski_analiticar', 'administrator'])
@@ -1235,50 +1124,64 @@ def check_and_create_penalties(request):
     """
     API endpoint za automatsku proveru kršenja ugovora i kreiranje penala
     
-    Ova funkcija:
-    1. Proverava sve aktivne ugovore i detektuje kršenja
-    2. Automatski kreira penale za svako kršenje
-    3. Šalje email obaveštenja dobavljačima
+    Ova funkcija (services/penal_service.obradi_krsenja):
+    1. Pronalazi kršenja po pravilima (services/krsenja_service.py): istek ugovora,
+       neplaćene fakture posle roka, ponovljene reklamacije, istekli sertifikati
+    2. U jednoj transakciji kreira sve penale (bulk_create) i ažurira statuse ugovora
+    3. Stavlja email obaveštenja dobavljačima u red za slanje
     
+    Sa ?dry_run=true samo vraća kršenja, bez upisa (kao check-violations).
     Može se pozvati ručno ili automatski (npr. putem schedulera)
     
     Returns:
-        JSON sa detaljima o kreiranim penalima i greškama
+        JSON sa detaljima o kreiranim penalima, greškama i trajanjem faza (ms)
     """
     try:
-        # Proveri kršenja ugovora
-        violations = check_contract_violations()
+        dry_run = request.GET.get('dry_run', '').lower() in ('1', 'true')
+        rezultat = obradi_krsenja(dry_run=dry_run)
+        violations = rezultat['krsenja']
         
         if not violations:
             return Response({
                 'message': 'Nije pronađeno nijedno kršenje ugovora',
                 'violations_found': 0,
                 'penalties_created': 0,
-                'errors': []
+                'errors': [],
+                'pravila': rezultat['pravila'],
+                'trajanje_ms': rezultat['trajanje_ms']
             }, status=status.HTTP_200_OK)
         
-        # Kreiraj penale za svako kršenje
-        created_penalties = []
-        errors = []
+        if dry_run:
+            return Response({
+                'message': f'Probni rad: bilo bi kreirano {len(violations)} penala',
+                'dry_run': True,
+                'violations_found': len(violations),
+                'penalties_created': 0,
+                'violations': [_podaci_krsenja(violation) for violation in violations],
+                'errors': [],
+                'pravila': rezultat['pravila'],
+                'trajanje_ms': rezultat['trajanje_ms']
+            }, status=status.HTTP_200_OK)
         
-        for violation in violations:
-            success, penal, error_msg = auto_create_penalty(violation)
-            
-            if success:
-                created_penalties.append({
-                    'penal_id': penal.sifra_p,
-                    'ugovor_id': violation['ugovor'].sifra_u,
-                    'dobavljac': violation['ugovor'].dobavljac.naziv,
-                    'tip_krsenja': violation['tip_krsenja'],
-                    'iznos': float(violation['iznos_penala']),
-                    'razlog': violation['razlog']
-                })
-            else:
-                errors.append({
-                    'ugovor_id': violation['ugovor'].sifra_u,
-                    'dobavljac': violation['ugovor'].dobavljac.naziv,
-                    'error': error_msg
-                })
+        created_penalties = [
+            {
+                'penal_id': penal.sifra_p,
+                'ugovor_id': violation['ugovor'].sifra_u,
+                'dobavljac': violation['ugovor'].dobavljac.naziv,
+                'tip_krsenja': violation['tip_krsenja'],
+                'iznos': float(violation['iznos_penala']),
+                'razlog': violation['razlog']
+            }
+            for violation, penal in rezultat['penali']
+        ]
+        errors = [
+            {
+                'ugovor_id': violation['ugovor'].sifra_u,
+                'dobavljac': violation['ugovor'].dobavljac.naziv,
+                'error': 'Penal za ovo kršenje je u međuvremenu dodeljen ili je ugovor obrisan'
+            }
+            for violation in rezultat['preskocena']
+        ]
         
         # Pripremi odgovor
         response_data = {
@@ -1286,12 +1189,11 @@ def check_and_create_penalties(request):
             'violations_found': len(violations),
             'penalties_created': len(created_penalties),
             'penalties': created_penalties,
-            'errors': errors
+            'errors': errors,
+            'pravila': rezultat['pravila'],
+            'trajanje_ms': rezultat['trajanje_ms']
         }
         
-        # Loguj rezultat
-        logger.info(f"Automatska provera penala: {len(violations)} kršenja, {len(created_penalties)} penala kreirano")
-        
         return Response(response_data, status=status.HTTP_201_CREATED)
         
     except Exception as e:
@@ -1310,32 +1212,21 @@ def preview_contract_violations(request):
     API endpoint za pregled kršenja ugovora BEZ kreiranja penala
     
     Koristi se za pregled šta bi se desilo kada se pozove check_and_create_penalties
+    (isti probni rad kao check_and_create_penalties sa ?dry_run=true)
     
     Returns:
         JSON sa listom pronađenih kršenja
     """
     try:
-        violations = check_contract_violations()
-        
-        violations_data = []
-        for violation in violations:
-            violations_data.append({
-                'ugovor_id': violation['ugovor'].sifra_u,
-                'dobavljac': violation['ugovor'].dobavljac.naziv,
-                'dobavljac_email': violation['ugovor'].dobavljac.email,
-                'tip_krsenja': violation['tip_krsenja'],
-                'razlog': violation['razlog'],
-                'iznos_penala': float(violation['iznos_penala']),
-                'detalji': violation['detalji'],
-                'datum_potpisa': violation['ugovor'].datum_potpisa_u.strftime('%d.%m.%Y'),
-                'datum_isteka': violation['ugovor'].datum_isteka_u.strftime('%d.%m.%Y'),
-                'status_ugovora': violation['ugovor'].status_u
-            })
+        rezultat = obradi_krsenja(dry_run=True)
+        violations = rezultat['krsenja']
         
         return Response({
             'message': f'Pronađeno {len(violations)} kršenja ugovora',
             'violations_count': len(violations),
-            'violations': violations_data
+            'violations': [_podaci_krsenja(violation) for violation in violations],
+            'pravila': rezultat['pravila'],
+            'trajanje_ms': rezultat['trajanje_ms']
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -1374,11 +1265,6 @@ def create_transaction(faktura):
             
             return postojeca_transakcija
         
-        # Dobavi maksimalnu sifra_t i dodaj 1
-        from django.db.models import Max
-        max_sifra = Transakcija.objects.aggregate(Max('sifra_t'))['sifra_t__max']
-        nova_sifra = (max_sifra or 0) + 1
-        
         # Generisanje jedinstvenog broja potvrde
         potvrda_broj = f"TRX-{uuid.uuid4().hex[:12].upper()}"
         
@@ -1388,7 +1274,7 @@ def create_transaction(faktura):
         
         # Kreiranje nove transakcije sa eksplicitnim ID-om
         transakcija = Transakcija.objects.create(
-            sifra_t=nova_sifra,
+            sifra_t=dodeli_sifru(Transakcija),
             faktura=faktura,
             potvrda_t=potvrda_broj,
             status_t='uspesna',
@@ -1557,21 +1443,18 @@ def select_supplier(request, sifra_d):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @allowed_users(['skladisni_operater', 'administrator'])
+@kesiran_odgovor('skladista_list', modeli=[Skladiste])
 def skladista_list(request):
     """
     API endpoint za dobijanje liste svih skladišta
-    Automatski proverava i ažurira status rizika pre slanja odgovora
+    Poslednja temperatura i status rizika se održavaju pri upisu temperature,
+    pa je lista jedan upit bez obzira na broj merenja
     """
     # Debug informacije
     logger.info(f"Skladista API pozvan od strane korisnika: {request.user}")
     logger.info(f"Tip korisnika: {request.user.tip_k if hasattr(request.user, 'tip_k') else 'N/A'}")
     
     try:
-        # Prvo ažuriraj status svih skladišta na osnovu najnovijih temperatura
-        from .signals import update_all_skladista_status
-        updated_count = update_all_skladista_status()
-        
-        # Zatim vrati ažurirane podatke
         skladista = Skladiste.objects.all().order_by('sifra_s')
         serializer = SkladisteSerializer(skladista, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1916,13 +1799,15 @@ def rizicni_artikli_list(request):
     API endpoint za dobijanje liste rizičnih artikala (koji ističu) sa popustima
     """
     try:
-        # Prvo ažuriraj status svih artikala
-        from .signals import update_all_artikli_status
-        update_all_artikli_status()
-        
-        # Dobij artikle koji ističu (status 'istice')
-        rizicni_artikli = Artikal.objects.filter(
-            status_trajanja='istice'
+        # Status se izvodi iz roka trajanja u samom upitu (bez upisa u bazu)
+        danas = date.today()
+        rizicni_artikli = artikli_sa_statusom(danas=danas).filter(
+            uslov_statusa('istice', danas)
+        ).prefetch_related(
+            Prefetch('popusti', queryset=Popust.objects.filter(
+                datum_pocetka_vazenja_p__lte=danas,
+                datum_kraja_vazenja_p__gte=danas
+            ), to_attr='aktivni_popusti')
         ).order_by('rok_trajanja_a')
         
         serializer = RizicniArtikalSerializer(rizicni_artikli, many=True)
@@ -1938,46 +1823,38 @@ def rizicni_artikli_list(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @allowed_users(['skladisni_operater', 'administrator'])
+@kesiran_odgovor('artikli_statistike', modeli=[Artikal, Zalihe])
 def artikli_statistike(request):
     """
     API endpoint za statistike artikala za treće mesto dashboarda
     """
     try:
-        # Prvo ažuriraj status svih artikala
-        from .signals import update_all_artikli_status
-        update_all_artikli_status()
-        
-        # 1. Ukupan broj artikala
-        ukupno_artikala = Artikal.objects.count()
-        
-        # 2. Broj rizičnih artikala (koji ističu)
-        rizicni_artikli = Artikal.objects.filter(status_trajanja='istice').count()
+        # Status se izvodi iz roka trajanja u samom upitu (bez upisa u bazu)
+        danas = date.today()
         
-        # 3. Broj propali articala (istekli)
-        propali_artikli = Artikal.objects.filter(status_trajanja='istekao').count()
+        # 1-3. Ukupan broj, rizični (ističu) i propali (istekli) artikli u jednom upitu
+        brojevi = Artikal.objects.aggregate(
+            ukupno_artikala=Count('sifra_a'),
+            rizicni_artikli=Count('sifra_a', filter=uslov_statusa('istice', danas)),
+            propali_artikli=Count('sifra_a', filter=uslov_statusa('istekao', danas)),
+        )
         
         # 4. Šteta za propale artikle (osnovna_cena * trenutna_kolicina iz zaliha)
-        propali_artikli_data = Artikal.objects.filter(
-            status_trajanja='istekao'
-        ).prefetch_related('zalihe')
-        
-        ukupna_steta = 0
-        for artikal in propali_artikli_data:
-            try:
-                # Sumiranje količina iz svih skladišta za ovaj artikal
-                ukupna_kolicina = sum([zaliha.trenutna_kolicina_a for zaliha in artikal.zalihe.all()])
-                if ukupna_kolicina > 0 and artikal.osnovna_cena_a:
-                    steta_artikal = float(artikal.osnovna_cena_a) * ukupna_kolicina
-                    ukupna_steta += steta_artikal
-            except Exception as artikal_error:
-                logger.warning(f"Greška pri računanju štete za artikal {artikal.sifra_a}: {str(artikal_error)}")
-                continue
+        ukupna_steta = Zalihe.objects.filter(
+            uslov_statusa('istekao', danas, prefiks='artikal__'),
+            trenutna_kolicina_a__gt=0
+        ).aggregate(
+            steta=Sum(ExpressionWrapper(
+                F('artikal__osnovna_cena_a') * F('trenutna_kolicina_a'),
+                output_field=DecimalField(max_digits=20, decimal_places=2)
+            ))
+        )['steta'] or 0
         
         statistike = {
-            'ukupno_artikala': ukupno_artikala,
-            'rizicni_artikli': rizicni_artikli,
-            'propali_artikli': propali_artikli,
-            'ukupna_steta': round(ukupna_steta, 2)
+            'ukupno_artikala': brojevi['ukupno_artikala'],
+            'rizicni_artikli': brojevi['rizicni_artikli'],
+            'propali_artikli': brojevi['propali_artikli'],
+            'ukupna_steta': round(float(ukupna_steta), 2)
         }
         
         return Response(statistike, status=status.HTTP_200_OK)
@@ -1999,10 +1876,6 @@ def artikli_grafikon_po_nedeljama(request):
     try:
         from datetime import datetime, timedelta
         
-        # Prvo ažuriraj status svih artikala
-        from .signals import update_all_artikli_status
-        update_all_artikli_status()
-        
         danas = datetime.now().date()
         
         # Definiši početak svake nedelje (ponedeljak)
@@ -2033,21 +1906,22 @@ def artikli_grafikon_po_nedeljama(request):
             }
         ]
         
+        # Broj artikala koji ističu po nedeljama u jednom upitu
+        # (rok posle danas znači da artikal još nije istekao, pa status nije potrebno čuvati)
+        brojevi = Artikal.objects.filter(rok_trajanja_a__gt=danas).aggregate(**{
+            f'nedelja_{indeks}': Count('sifra_a', filter=Q(
+                rok_trajanja_a__gte=nedelja['pocetak'],
+                rok_trajanja_a__lte=nedelja['kraj']
+            ))
+            for indeks, nedelja in enumerate(nedelje)
+        })
+        
         grafikon_data = []
         
-        for nedelja in nedelje:
-            # Broj artikala koji ističu u ovoj nedelji (samo oni koji još nisu istekli)
-            broj_artikala = Artikal.objects.filter(
-                rok_trajanja_a__gte=nedelja['pocetak'],
-                rok_trajanja_a__lte=nedelja['kraj'],
-                rok_trajanja_a__gt=danas  # Isključi artikle koji su već istekli
-            ).exclude(
-                status_trajanja='istekao'  # Dodatno isključi artikle sa statusom istekao
-            ).count()
-            
+        for indeks, nedelja in enumerate(nedelje):
             grafikon_data.append({
                 'nedelja': nedelja['naziv'],
-                'broj_artikala': broj_artikala,
+                'broj_artikala': brojevi[f'nedelja_{indeks}'],
                 'pocetak': nedelja['pocetak'].isoformat(),
                 'kraj': nedelja['kraj'].isoformat()
             })
@@ -2388,6 +2262,50 @@ def list_temperature(request):
     serializer = TemperaturaSerializer(temperature, many=True)
     return Response(serializer.data)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@allowed_users(['skladisni_operater', 'logisticki_koordinator', 'administrator'])
+def temperature_bulk_unos(request):
+    """
+    Masovni unos merenja temperature za skladišta i vozila.
+    Telo je JSON niz (ili {"merenja": [...]}) ili NDJSON (Content-Type:
+    application/x-ndjson), jedan objekat po liniji:
+    {"vrednost": 4.5, "skladiste": 1, "vozilo": null, "vreme_merenja": "2025-10-03T12:00:00Z"}
+    Query parametar velicina_serije određuje broj merenja po transakciji.
+    """
+    try:
+        try:
+            velicina_serije = int(request.query_params.get('velicina_serije', VELICINA_SERIJE))
+        except ValueError:
+            return Response(
+                {'error': 'velicina_serije mora biti ceo broj'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.content_type.startswith(('application/x-ndjson', 'application/jsonl')):
+            # NDJSON se čita liniju po liniju direktno iz tela zahteva
+            zapisi = citaj_ndjson(request.stream)
+        else:
+            podaci = request.data
+            if isinstance(podaci, dict):
+                podaci = podaci.get('merenja')
+            if not isinstance(podaci, list):
+                return Response(
+                    {'error': 'Očekuje se JSON niz merenja ili NDJSON telo'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            zapisi = citaj_json_niz(podaci)
+
+        rezultat = unesi_merenja(zapisi, velicina_serije)
+        status_odgovora = status.HTTP_201_CREATED if rezultat['upisano'] else status.HTTP_400_BAD_REQUEST
+        return Response(rezultat, status=status_odgovora)
+    except Exception as e:
+        logger.error(f"Greška pri masovnom unosu temperatura: {str(e)}")
+        return Response(
+            {'error': 'Greška pri masovnom unosu temperatura', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
 # @api_view(['GET'])
 # def list_vozilo_temperatura(request):
 #     veze = voziloOmogucavaTemperatura.objects.select_related('sifra_temp', 'sifra_vozila', 'isporuka').all()
@@ -2396,6 +2314,7 @@ def list_temperature(request):
 
 # notifikacija
 def posalji_notifikaciju(korisnik, poruka, link=None):
+    # Posle commit-a signal objavljuje notifikaciju otvorenim SSE vezama korisnika
     Notifikacija.objects.create(
         korisnik=korisnik,
         poruka_n=poruka,
@@ -2432,6 +2351,157 @@ def list_user_notifikacije(request, user_id):
         print(f"Greška pri dohvatanju notifikacija za korisnika {user_id}: {e}")
         return Response({'detail': 'Došlo je do greške na serveru.'}, status=500)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def moje_notifikacije(request):
+    """
+    Notifikacije prijavljenog korisnika posle kursora, umesto cele istorije
+    
+    GET /api/notifikacije/moje/?posle=<cursor>&limit=50
+    Bez parametra posle vraća poslednjih `limit` notifikacija; sledeći zahtev
+    šalje posle=<cursor> iz odgovora i dobija nove, uz već poslate iz
+    poslednjih NOTIFIKACIJE_PREKLAPANJE sekundi (kasni commit) koje klijent
+    prepoznaje po sifra_n.
+    """
+    try:
+        posle = request.GET.get('posle')
+        posle = int(posle) if posle not in (None, '') else None
+        limit = int(request.GET.get('limit', 50))
+    except (TypeError, ValueError):
+        return Response({'error': 'Parametri posle i limit moraju biti brojevi'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        podaci, kursor, ima_jos = notifikacije.notifikacije_posle(request.user.pk, posle, limit)
+        return Response({
+            'results': podaci,
+            'cursor': kursor,
+            'has_more': ima_jos,
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Greška u moje_notifikacije: {str(e)}")
+        return Response({
+            'error': 'Greška pri dohvatanju notifikacija',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def broj_neprocitanih_notifikacija(request):
+    """GET /api/notifikacije/neprocitane/ - broj nepročitanih notifikacija prijavljenog korisnika"""
+    return Response({'broj': notifikacije.broj_neprocitanih(request.user.pk)}, status=status.HTTP_200_OK)
+
+def _korisnik_iz_tokena(request):
+    """
+    JWT iz zaglavlja Authorization ili parametra token (EventSource u
+    pregledaču ne može da šalje zaglavlja). Vraća korisnika ili None.
+    """
+    autentifikacija = JWTAuthentication()
+    zaglavlje = autentifikacija.get_header(request)
+    token = autentifikacija.get_raw_token(zaglavlje) if zaglavlje else request.GET.get('token')
+    if not token:
+        return None
+    try:
+        return autentifikacija.get_user(autentifikacija.get_validated_token(token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+def _sse_dogadjaj(notifikacija):
+    return (
+        f"id: {notifikacija['sifra_n']}\nevent: notifikacija\n"
+        f"data: {json.dumps(notifikacija, default=str)}\n\n"
+    )
+
+async def _sse_notifikacije(korisnik_id, posle):
+    """Tok događaja pod ASGI: veza čeka objavu u event loop-u, bez niti."""
+    interval = getattr(settings, 'NOTIFIKACIJE_SSE_INTERVAL', 20)
+    broker = notifikacije.broker()
+    pretplata = broker.pretplati(korisnik_id)
+    _, red = pretplata
+    kursor = notifikacije.KursorNotifikacija(korisnik_id, posle)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            ima_jos = True
+            while ima_jos:
+                podaci, ima_jos = await sync_to_async(kursor.procitaj)()
+                for notifikacija in podaci:
+                    yield _sse_dogadjaj(notifikacija)
+            try:
+                await asyncio.wait_for(red.get(), timeout=interval)
+                # Više objava odjednom se obrađuje jednim upitom
+                while not red.empty():
+                    red.get_nowait()
+            except asyncio.TimeoutError:
+                # Komentar održava vezu kroz proxy-je; posle njega se baza
+                # proverava i za objave iz drugih procesa
+                yield ": ping\n\n"
+    finally:
+        broker.odjavi(korisnik_id, pretplata)
+
+def _sse_notifikacije_sinhrono(korisnik_id, posle):
+    """
+    Tok događaja pod WSGI (runserver, gunicorn): WSGI ne može da šalje
+    asinhroni iterator deo po deo, pa veza zauzima nit servera dok je otvorena.
+    Prekid veze se primećuje pri sledećem slanju (najkasnije ping).
+    """
+    interval = getattr(settings, 'NOTIFIKACIJE_SSE_INTERVAL', 20)
+    broker = notifikacije.broker()
+    pretplata = broker.pretplati(korisnik_id, sinhrono=True)
+    _, red = pretplata
+    kursor = notifikacije.KursorNotifikacija(korisnik_id, posle)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            ima_jos = True
+            while ima_jos:
+                podaci, ima_jos = kursor.procitaj()
+                for notifikacija in podaci:
+                    yield _sse_dogadjaj(notifikacija)
+            try:
+                red.get(timeout=interval)
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            # Više objava odjednom se obrađuje jednim upitom
+            try:
+                while True:
+                    red.get_nowait()
+            except queue.Empty:
+                pass
+    finally:
+        broker.odjavi(korisnik_id, pretplata)
+
+async def notifikacije_stream(request):
+    """
+    Server-Sent Events: nove notifikacije prijavljenog korisnika u realnom vremenu
+    
+    GET /api/notifikacije/stream/?token=<access token>
+    Svaki događaj (event: notifikacija) nosi id = sifra_n; pri ponovnom
+    povezivanju pregledač šalje Last-Event-ID pa se propuštene šalju odmah.
+    Bez Last-Event-ID (ili ?posle=) šalju se samo notifikacije nastale posle povezivanja.
+    Pod ASGI serverom veza ne zauzima nit; pod WSGI (runserver) zauzima jednu nit servera.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Dozvoljen je samo GET'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    korisnik = await sync_to_async(_korisnik_iz_tokena)(request)
+    if korisnik is None:
+        return JsonResponse({'error': 'Potrebna je autentifikacija'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    posle = request.headers.get('Last-Event-ID') or request.GET.get('posle')
+    try:
+        posle = int(posle) if posle else await sync_to_async(notifikacije.poslednja_sifra)(korisnik.pk)
+    except ValueError:
+        return JsonResponse({'error': 'Neispravan kursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if isinstance(request, ASGIRequest):
+        dogadjaji = _sse_notifikacije(korisnik.pk, posle)
+    else:
+        dogadjaji = _sse_notifikacije_sinhrono(korisnik.pk, posle)
+    response = StreamingHttpResponse(dogadjaji, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 @allowed_users(['administrator'])
@@ -2494,27 +2564,8 @@ def predlozi_vozilo(request):
         return Response({'error': str(e)}, status=500)
     
 def geokodiraj_adresu(adresa):
-    try:
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            'q': adresa,
-            'format': 'json',
-            'limit': 1,
-            'countrycodes': 'rs'  # Pretraga samo za Srbiju
-        }
-        headers = {
-            'User-Agent': 'IIS_SUDPI/1.0 (begovic.in26.2021@uns.ac.rs)'  # nesto za Nominatim
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                return float(data[0]['lat']), float(data[0]['lon'])
-        return None, None
-    except Exception as e:
-        print(f"Greška pri geokodiranju adrese {adresa}: {e}")
-        return None, None
+    # Keširano geokodiranje (memorija + tabela geokod_adresa), Nominatim samo za nove adrese
+    return geokodiraj(adresa, drzava='rs')  # Pretraga samo za Srbiju
 
 # dobavljanje podataka o ruti koristeci OSRM API
 def dobavi_podatke_o_ruti(polazna_tacka, odrediste):
@@ -2529,25 +2580,19 @@ def dobavi_podatke_o_ruti(polazna_tacka, odrediste):
         if not odrediste_lat:
             return None
         
-        # Poziv OSRM API-ja za dobijanje rute
-        url = f"http://router.project-osrm.org/route/v1/driving/{polaziste_lon},{polaziste_lat};{odrediste_lon},{odrediste_lat}?overview=false"
-        #url = f"https://map.project-osrm.org/?z=7&center=44.331707%2C22.357178&loc={polaziste_lon}%2C{polaziste_lat}&loc={odrediste_lon}%2C{odrediste_lat}&hl=en&alt=0&srv=0"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            
-            if data['code'] == 'Ok' and data['routes']:
-                ruta = data['routes'][0]
-                duzina_km = round(ruta['distance'] / 1000, 2)
-                vreme_sati = round(ruta['duration'] / 3600, 2)
-                
-                return {
-                    'duzina_km': duzina_km,
-                    'vreme_sati': vreme_sati,
-                    'polazna_tacka_koordinate': f"{polaziste_lat},{polaziste_lon}",
-                    'odrediste_koordinate': f"{odrediste_lat},{odrediste_lon}",
-                    'smer': 'Najkraća ruta'
-                }
+        # Ruta iz keša (services/route_service.py), OSRM samo za nove parove tačaka
+        ruta = dobavi_rutu((polaziste_lat, polaziste_lon), (odrediste_lat, odrediste_lon), sa_geometrijom=False)
+        if ruta:
+            duzina_km = round(ruta['duzina_m'] / 1000, 2)
+            vreme_sati = round(ruta['trajanje_s'] / 3600, 2)
+
+            return {
+                'duzina_km': duzina_km,
+                'vreme_sati': vreme_sati,
+                'polazna_tacka_koordinate': f"{polaziste_lat},{polaziste_lon}",
+                'odrediste_koordinate': f"{odrediste_lat},{odrediste_lon}",
+                'smer': 'Najkraća ruta'
+            }
         
         return None
     except Exception as e:
@@ -2877,29 +2922,22 @@ def ruta_directions(request, pk):
         if not polaziste_lat or not odrediste_lat:
             return Response({'error': 'Nije moguće geokodirati adrese'}, status=400)
         
-        # Poziv OSRM API-ja za dobijanje kompletne rute sa geometrijom
-        url = f"http://router.project-osrm.org/route/v1/driving/{polaziste_lon},{polaziste_lat};{odrediste_lon},{odrediste_lat}?overview=full&geometries=geojson"
-        
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            
-            if data['code'] == 'Ok' and data['routes']:
-                ruta_data = data['routes'][0]
-                
-                return Response({
-                    'ruta_id': ruta.sifra_r,
-                    'polazna_tacka': ruta.polazna_tacka,
-                    'odrediste': ruta.odrediste,
-                    'duzina_km': ruta.duzina_km,
-                    'vreme_dolaska': str(ruta.vreme_dolaska),
-                    'status': ruta.status,
-                    'polaziste_koordinate': [polaziste_lon, polaziste_lat],
-                    'odrediste_koordinate': [odrediste_lon, odrediste_lat],
-                    'geometry': ruta_data['geometry'],  # GeoJSON geometija rute
-                    'distance': ruta_data['distance'],  # dužina u metrima
-                    'duration': ruta_data['duration']   # vreme u sekundama
-                })
+        # Kompletna ruta sa geometrijom iz keša (services/route_service.py)
+        ruta_data = dobavi_rutu((polaziste_lat, polaziste_lon), (odrediste_lat, odrediste_lon))
+        if ruta_data:
+            return Response({
+                'ruta_id': ruta.sifra_r,
+                'polazna_tacka': ruta.polazna_tacka,
+                'odrediste': ruta.odrediste,
+                'duzina_km': ruta.duzina_km,
+                'vreme_dolaska': str(ruta.vreme_dolaska),
+                'status': ruta.status,
+                'polaziste_koordinate': [polaziste_lon, polaziste_lat],
+                'odrediste_koordinate': [odrediste_lon, odrediste_lat],
+                'geometry': ruta_data['geometrija'],  # GeoJSON geometija rute
+                'distance': ruta_data['duzina_m'],  # dužina u metrima
+                'duration': ruta_data['trajanje_s']   # vreme u sekundama
+            })
         
         return Response({'error': 'Nije moguće dobiti podatke o ruti'}, status=400)
         
@@ -3100,11 +3138,10 @@ def get_aktivna_rampa(request):
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
-from threading import Timer
-
 def zakazi_oslobadjanje_rampe(rampa, vreme_utovara_h):
+    # Odloženi posao u tabeli posao (preživljava restart, za razliku od Timer niti)
     sekunde = vreme_utovara_h * 3600
-    Timer(sekunde, lambda: rampa.oslobodi()).start()
+    zakazi('oslobodi_rampu', {'rampa': rampa.sifra_rp}, za=sekunde, kljuc=f"rampa:{rampa.sifra_rp}")
 
 def azuriraj_status_rampe(isporuka):
 
@@ -3469,13 +3506,11 @@ def generisi_izvestaj(request):
         logger.error(f"Greška pri generisanju PDF-a: {str(e)}")
         return HttpResponse(f"Došlo je do greške pri generisanju izveštaja: {str(e)}", status=500)
 
-import time
 import random
-import threading
 import requests
 from django.http import HttpResponse
 from django.utils import timezone
-from .models import Ruta, Isporuka, Upozorenje, voziloOmogucavaTemperatura, Vozilo, Temperatura
+from .models import Ruta, Isporuka, Upozorenje, voziloOmogucavaTemperatura, Vozilo, Temperatura, Posao
 
 def get_isporuka_ruta(ruta_id):
     try:
@@ -3513,61 +3548,32 @@ def simulacija_voznje(request, pk):
         if ruta.status != 'u_toku':
             return HttpResponse("Ruta nije aktivna (status nije 'u_toku').")
 
-        # OSRM API za dobijanje koordinata
+        # Simulacija koja je već u toku se ne pokreće ponovo
+        aktivan = Posao.objects.filter(
+            kljuc=kljuc_simulacije_voznje(ruta.sifra_r), status__in=AKTIVNI_STATUSI
+        ).first()
+        if aktivan:
+            return HttpResponse(f"Simulacija vožnje za rutu {ruta.polazna_tacka} → {ruta.odrediste} je već pokrenuta (posao {aktivan.sifra_p}).")
+
+        # Koordinate rute iz keša (services/route_service.py)
         polaziste_lat, polaziste_lon = geokodiraj_adresu(ruta.polazna_tacka)
         odrediste_lat, odrediste_lon = geokodiraj_adresu(ruta.odrediste)
 
-        url = f"http://router.project-osrm.org/route/v1/driving/{polaziste_lon},{polaziste_lat};{odrediste_lon},{odrediste_lat}?overview=full&geometries=geojson"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        koordinate = data["routes"][0]["geometry"]["coordinates"]  # lista [lon, lat]
-
-        def pokreni_simulaciju():
-            for i, tacka in enumerate(koordinate):
-                lon, lat = tacka
-                # 5% šanse da vozilo odstupi od rute
-                if random.random() < 0.05:
-                    lon += random.uniform(0.001, 0.003)
-                    lat += random.uniform(0.001, 0.003)
-                    Upozorenje.objects.create(
-                        isporuka=Isporuka.objects.filter(ruta=ruta).first(),
-                        tip="odstupanje",
-                        poruka=f"Vozilo je odstupilo od planirane rute ({ruta.polazna_tacka} → {ruta.odrediste})."
-                    )
-        #             posalji_notifikaciju(request.user,
-        #                      f"Vozilo je odstupilo od planirane rute ({ruta.polazna_tacka} → {ruta.odrediste})."
-        # )
-                    ruta.status = "odstupanje"
-                    ruta.save()
-
-                voznja = Voznja.objects.create(
-                    ruta = ruta,
-                    trenutna_lat = lat, 
-                    trenutna_lon = lon,
-                    #vreme_azuriranja = datetime.now()
-                )
-                time.sleep(2)  # pomeranje na svaka 2 sekunde
-            with transaction.atomic():
-                ruta.status = "zavrsena"
-                ruta.save()
-                isporuka = get_isporuka_ruta(ruta.sifra_r)
-                if isporuka:
-                    vozac = get_vozac_isporuka(isporuka.sifra_i)
-                    vozilo = get_vozilo_isporuka(isporuka.sifra_i)
-                    isporuka.status = 'zavrsena'
-                    isporuka.save()
-                if vozac:
-                    vozac.status = 'slobodan'
-                    vozac.save()
-                if vozilo:
-                    vozilo.status = 'slobodno'
-                    vozilo.save()
-            # ruta.status = "zavrsena"
-            # ruta.save()
-
-        threading.Thread(target=pokreni_simulaciju).start()
-
-        return HttpResponse(f"Simulacija vožnje za rutu {ruta.polazna_tacka} → {ruta.odrediste} je pokrenuta.")
+        polaziste, odrediste = (polaziste_lat, polaziste_lon), (odrediste_lat, odrediste_lon)
+        ruta_data = dobavi_rutu(polaziste, odrediste, sa_geometrijom=False)
+        if not ruta_data:
+            return HttpResponse("Nije moguće dobiti podatke o ruti.", status=400)
+
+        # Pozadinski posao pomera vozilo na svaka 2 sekunde (services/simulation_service.py);
+        # u parametrima je samo ključ rute u kešu, koordinate se čitaju po koraku
+        posao_obj = zakazi(
+            'simulacija_voznje',
+            {'ruta': ruta.sifra_r, 'geometrija': kljuc_rute(polaziste, odrediste, PODRAZUMEVANI_PROFIL), 'korak': 0},
+            kljuc=kljuc_simulacije_voznje(ruta.sifra_r),
+            jedinstven=True,
+        )
+
+        return HttpResponse(f"Simulacija vožnje za rutu {ruta.polazna_tacka} → {ruta.odrediste} je pokrenuta (posao {posao_obj.sifra_p}).")
 
     except Ruta.DoesNotExist:
         return HttpResponse("Ruta ne postoji.", status=404)
@@ -3582,44 +3588,53 @@ def simulacija_temperature(request, pk):
         isporuka = get_isporuka_ruta(pk)
         if not isporuka:
             return HttpResponse("Isporuka nije pronađena za datu rutu.", status=404)
-        vozilo = isporuka.vozilo
-        temp_obj = Temperatura.objects.first()
-        min_g = random.randint(0, 2)
-        max_g = random.randint(7, 9)
-        def generisi_temperature():
-            #while isporuka.status == 'u_toku':
-            while isporuka.status == 'spremna':
-
-                vrednost = random.uniform(min_g - 1, max_g + 1)
-
-                t = voziloOmogucavaTemperatura.objects.create(
-                    sifra_temp=temp_obj,
-                    sifra_vozila=vozilo,
-                    isporuka=isporuka,
-                    vrednost=vrednost,
-                    min_granica=min_g,
-                    max_granica=max_g
-                )
-
-                if vrednost < min_g or vrednost > max_g:
-                    Upozorenje.objects.create(
-                        isporuka=isporuka,
-                        tip="temperatura",
-                        poruka=f"Temperatura {vrednost:.2f}°C je izvan granica ({min_g:.1f} - {max_g:.1f})."
-                    )
-                    # posalji_notifikaciju(request.user,
-                    #          f"Temperatura {vrednost:.2f}°C je izvan granica ({min_g:.1f} - {max_g:.1f}).")
-                    
 
-                time.sleep(5)
-
-        threading.Thread(target=generisi_temperature).start()
-        return HttpResponse(f"Simulacija temperature za isporuku {isporuka.sifra_i} je pokrenuta.")
+        # Pozadinski posao beleži temperaturu na svakih 5 sekundi dok je isporuka spremna
+        posao_obj = zakazi(
+            'simulacija_temperature',
+            {'isporuka': isporuka.sifra_i, 'min_granica': random.randint(0, 2), 'max_granica': random.randint(7, 9)},
+            kljuc=kljuc_simulacije_temperature(isporuka.sifra_i),
+            jedinstven=True,
+        )
+        return HttpResponse(f"Simulacija temperature za isporuku {isporuka.sifra_i} je pokrenuta (posao {posao_obj.sifra_p}).")
 
     except Isporuka.DoesNotExist:
         return HttpResponse("Isporuka ne postoji.", status=404)
     except Exception as e:
         return HttpResponse(f"Greška: {e}", status=500)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@allowed_users(['administrator', 'logisticki_koordinator'])
+def otkazi_posao(request, pk):
+    """Otkazuje pozadinski posao (npr. simulaciju) koji čeka ili je u toku."""
+    try:
+        if not Posao.objects.filter(sifra_p=pk).exists():
+            return Response({'error': 'Posao nije pronađen'}, status=status.HTTP_404_NOT_FOUND)
+        otkazano = otkazi(sifra_p=pk)
+        if not otkazano:
+            return Response({'error': 'Posao je već završen'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': f'Posao {pk} je otkazan'})
+    except Exception as e:
+        return Response({
+            'error': 'Greška pri otkazivanju posla',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@allowed_users(['administrator'])
+def poslovi_metrike(request):
+    """Dubina reda pozadinskih poslova i kašnjenje izvršavanja."""
+    try:
+        return Response(metrike_poslova())
+    except Exception as e:
+        return Response({
+            'error': 'Greška pri dohvatanju metrika poslova',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 
 @api_view(['GET'])
@@ -3635,8 +3650,30 @@ def trenutna_pozicija(request, pk):
 
 @api_view(['GET'])
 def temperatura_po_ruti(request, pk):
+    """
+    Poslednjih 20 merenja isporuke na ruti.
+    Sa parametrima od/do (ISO 8601) vraća merenja za period u rezoluciji
+    izabranoj prema dužini perioda (sirova merenja, zbirovi od 1 min ili 1 h).
+    """
     try:
         isporuka = Isporuka.objects.get(ruta__sifra_r=pk)
+
+        if 'od' in request.query_params:
+            try:
+                od = dt.fromisoformat(request.query_params['od'])
+                do = dt.fromisoformat(request.query_params['do']) if 'do' in request.query_params else timezone.now()
+            except ValueError:
+                return Response({"error": "Parametri od/do moraju biti u ISO 8601 formatu."}, status=400)
+            if timezone.is_naive(od):
+                od = timezone.make_aware(od)
+            if timezone.is_naive(do):
+                do = timezone.make_aware(do)
+
+            rezultat = temperature_za_period(od, do, isporuka=isporuka.pk)
+            for tacka in rezultat['tacke']:
+                tacka['vreme'] = timezone.localtime(tacka['vreme']).isoformat()
+            return Response(rezultat)
+
         podaci = voziloOmogucavaTemperatura.objects.filter(isporuka=isporuka).order_by('-vreme')[:20]
 
         rezultat = [
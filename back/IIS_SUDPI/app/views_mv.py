@@ -4,9 +4,9 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
-from django.db.models import Max
 from django.utils import timezone
 from .models import Dobavljac, Poseta, Reklamacija, Sertifikat
+from .services.sifra_service import dodeli_sifru
 from .serializers import DobavljacSerializer, VisitSerializer, ComplaintSerializer, SertifikatSerializer
 import pytz
 from django.conf import settings
@@ -47,13 +47,9 @@ class suppliers(generics.ListAPIView):
                     'error': 'Dobavljač sa ovim PIB-om već postoji'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Get the max sifra_d value and increment by 1
-            max_sifra = Dobavljac.objects.aggregate(Max('sifra_d'))['sifra_d__max'] or 0
-            next_sifra = max_sifra + 1
-            
             # Add sifra_d to request data
             request_data = request.data.copy()
-            request_data['sifra_d'] = next_sifra
+            request_data['sifra_d'] = dodeli_sifru(Dobavljac)
 
             serializer = self.get_serializer(data=request_data)
             if serializer.is_valid():
@@ -1,11 +1,11 @@
 import logging
-import tempfile
 from django.shortcuts import render, redirect
-from django.http import HttpResponse, JsonResponse, FileResponse
+from django.http import HttpResponse, JsonResponse, FileResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.core.handlers.asgi import ASGIRequest
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from datetime import datetime
@@ -14,7 +14,9 @@ from .serializers import DobavljacSerializer
 
 from .models import Dobavljac, Reklamacija, Sertifikat, User
 from .decorators import allowed_users
-from .services.supplier_analysis_service import SupplierAnalysisService
+from .services.supplier_analysis_service import SupplierAnalysisService, AsyncSupplierAnalysisService
+from .services.supplier_sync_service import schedule_sync, get_status as get_sync_status
+from .services import report_cache
 
 from rest_framework.views import APIView
 from .models import Izvestaj
@@ -22,6 +24,7 @@ from .serializers import IzvestajSerializer
 
 logger = logging.getLogger(__name__)
 supplier_service = SupplierAnalysisService()
+async_supplier_service = AsyncSupplierAnalysisService()
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -30,104 +33,55 @@ def check_service_health(request):
     Check if the supplier analysis microservice is available
     """
     health_status = supplier_service.health_check()
-    return Response({"status": "online" if health_status else "offline"})
+    return Response({
+        "status": "online" if health_status else "offline",
+        "circuit": supplier_service.get_metrics()["circuit"],
+    })
 
 @api_view(['GET'])
-@permission_classes([AllowAny])
-def sync_suppliers(request):
+@permission_classes([IsAuthenticated])
+@allowed_users(['administrator'])
+def supplier_service_metrics(request):
     """
-    Synchronize suppliers between Django and the microservice
+    Per-endpoint latency/error metrics and circuit breaker state for the microservice client
+    """
+    return Response(supplier_service.get_metrics())
+
+def _queue_sync(entities):
+    """
+    Queue a background sync (services/supplier_sync_service.py) and return 202.
+    Only rows changed since the last successful sync are sent.
     """
     try:
-        # Get all suppliers from Django
-        django_suppliers = Dobavljac.objects.all()
-        
-        success_count = 0
-        error_count = 0
-        
-        for supplier in django_suppliers:
-            # Format supplier data for the microservice
-            supplier_data = {
-                "supplier_id": supplier.sifra_d,
-                "name": supplier.naziv,
-                "email": supplier.email,
-                "pib": supplier.PIB_d,
-                "material_name": supplier.ime_sirovine,
-                "price": float(supplier.cena),
-                "delivery_time": supplier.rok_isporuke,
-                "rating": float(supplier.ocena),
-                "rating_date": supplier.datum_ocenjivanja.isoformat(),
-                "selected": supplier.izabran
-            }
-            
-            result = supplier_service.create_supplier(supplier_data)
-            
-            if result:
-                success_count += 1
-            else:
-                error_count += 1
-        
+        job = schedule_sync(entities, full=False)
         return Response({
-            "message": "Supplier synchronization completed",
-            "success_count": success_count,
-            "error_count": error_count,
-            "total_suppliers": len(django_suppliers)
-        })
-            
+            "message": "Synchronization queued",
+            "job_id": job.sifra_p,
+            "entities": job.parametri.get('entities'),
+            "status_url": "/api/supplier-analysis/sync/status/",
+        }, status=status.HTTP_202_ACCEPTED)
     except Exception as e:
-        logger.error(f"Error synchronizing suppliers: {str(e)}")
+        logger.error(f"Error queueing synchronization: {str(e)}")
         return Response(
-            {"error": f"Error synchronizing suppliers: {str(e)}"},
+            {"error": f"Error queueing synchronization: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sync_suppliers(request):
+    """
+    Synchronize suppliers between Django and the microservice
+    """
+    return _queue_sync(['suppliers'])
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def sync_complaints(request):
     """
     Synchronize complaints between Django and the microservice
     """
-    try:
-        # Get all complaints from Django
-        django_complaints = Reklamacija.objects.all().select_related('kontrolor', 'dobavljac')
-        
-        success_count = 0
-        error_count = 0
-        
-        for complaint in django_complaints:
-            # Format complaint data for the microservice
-            complaint_data = {
-                "complaint_id": complaint.reklamacija_id,
-                "supplier_id": complaint.dobavljac.sifra_d,
-                "controller_id": complaint.kontrolor.korisnik.sifra_k,
-                "problem_description": complaint.opis_problema,
-                "severity": complaint.jacina_zalbe,
-                "duration": complaint.vreme_trajanja,
-                "status": complaint.status,
-                "reception_date": complaint.datum_prijema.isoformat()
-            }
-            
-            # Create complaint in microservice
-            result = supplier_service.create_complaint(complaint_data)
-            
-            if result:
-                success_count += 1
-            else:
-                error_count += 1
-        
-        return Response({
-            "message": "Complaint synchronization completed",
-            "success_count": success_count,
-            "error_count": error_count,
-            "total_complaints": len(django_complaints)
-        })
-            
-    except Exception as e:
-        logger.error(f"Error synchronizing complaints: {str(e)}")
-        return Response(
-            {"error": f"Error synchronizing complaints: {str(e)}"},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+    return _queue_sync(['complaints'])
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -135,46 +89,48 @@ def sync_certificates(request):
     """
     Synchronize certificates between Django and the microservice
     """
+    return _queue_sync(['certificates'])
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sync_status(request):
+    """
+    Progress of the current (or last) synchronization run
+    """
     try:
-        # Get all certificates from Django
-        django_certificates = Sertifikat.objects.all().select_related('dobavljac')
-        
-        success_count = 0
-        error_count = 0
-        
-        for certificate in django_certificates:
-            # Format certificate data for the microservice
-            certificate_data = {
-                "certificate_id": certificate.sertifikat_id,
-                "supplier_id": certificate.dobavljac.sifra_d,
-                "name": certificate.naziv,
-                "type": certificate.tip,
-                "issue_date": certificate.datum_izdavanja.isoformat(),
-                "expiry_date": certificate.datum_isteka.isoformat()
-            }
-            
-            # Create certificate in microservice
-            result = supplier_service.create_certificate(certificate_data)
-            
-            if result:
-                success_count += 1
-            else:
-                error_count += 1
-        
-        return Response({
-            "message": "Certificate synchronization completed",
-            "success_count": success_count,
-            "error_count": error_count,
-            "total_certificates": len(django_certificates)
-        })
-            
+        return Response(get_sync_status())
     except Exception as e:
-        logger.error(f"Error synchronizing certificates: {str(e)}")
+        logger.error(f"Error reading synchronization status: {str(e)}")
         return Response(
-            {"error": f"Error synchronizing certificates: {str(e)}"},
+            {"error": f"Error reading synchronization status: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def _stream_report(kind, params, endpoint, filename, method='get', data=None):
+    """
+    Serve a microservice PDF report from the on-disk report cache, or stream it
+    straight from the microservice to the client while caching it
+    (services/report_cache.py). Returns None if the microservice call failed.
+    """
+    key = report_cache.cache_key(kind, params)
+    cached = report_cache.open_cached(key)
+    if cached:
+        response = FileResponse(cached, content_type='application/pdf')
+        response['X-Report-Cache'] = 'hit'
+    else:
+        upstream = supplier_service.open_report(endpoint, method=method, data=data)
+        if upstream is None:
+            return None
+        response = StreamingHttpResponse(
+            report_cache.stream_and_store(upstream, key),
+            content_type='application/pdf'
+        )
+        if upstream.headers.get('Content-Length'):
+            response['Content-Length'] = upstream.headers['Content-Length']
+        response['X-Report-Cache'] = 'miss'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_supplier_report(request, supplier_id):
@@ -190,26 +146,17 @@ def get_supplier_report(request, supplier_id):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Get the report from the microservice
-        report_content = supplier_service.get_supplier_report(supplier_id)
+        # Stream the report from the microservice (or the report cache)
+        response = _stream_report(
+            'supplier', {'supplier_id': supplier_id},
+            f'reports/supplier/{supplier_id}', f"supplier_report_{supplier_id}.pdf"
+        )
         
-        if not report_content:
+        if response is None:
             return Response(
                 {"error": "Failed to generate report"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(report_content)
-            temp_path = temp_file.name
-        
-        # Return the file as an attachment
-        response = FileResponse(
-            open(temp_path, 'rb'),
-            content_type='application/pdf'
-        )
-        response['Content-Disposition'] = f'attachment; filename="supplier_report_{supplier_id}.pdf"'
         return response
         
     except Exception as e:
@@ -243,27 +190,19 @@ def get_supplier_comparison_report(request):
                     status=status.HTTP_404_NOT_FOUND
                 )
         
-        # Get the report from the microservice
-        report_content = supplier_service.get_supplier_comparison_report(supplier_ids)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Stream the report from the microservice (or the report cache)
+        response = _stream_report(
+            'supplier_comparison', {'supplier_ids': supplier_ids},
+            'reports/supplier-comparison', f"supplier_comparison_{timestamp}.pdf",
+            method='post', data={'supplier_ids': supplier_ids}
+        )
         
-        if not report_content:
+        if response is None:
             return Response(
                 {"error": "Failed to generate comparison report"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(report_content)
-            temp_path = temp_file.name
-        
-        # Return the file as an attachment
-        response = FileResponse(
-            open(temp_path, 'rb'),
-            content_type='application/pdf'
-        )
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response['Content-Disposition'] = f'attachment; filename="supplier_comparison_{timestamp}.pdf"'
         return response
         
     except Exception as e:
@@ -280,26 +219,18 @@ def get_material_suppliers_report(request, material_name):
     Get a PDF report of all suppliers for a specific material
     """
     try:
-        # Get the report from the microservice
-        report_content = supplier_service.get_material_suppliers_report(material_name)
+        # Stream the report from the microservice (or the report cache)
+        response = _stream_report(
+            'material', {'material_name': material_name},
+            'reports/material', f"material_suppliers_{material_name}.pdf",
+            method='post', data={'material_name': material_name}
+        )
         
-        if not report_content:
+        if response is None:
             return Response(
                 {"error": "Failed to generate material suppliers report"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(report_content)
-            temp_path = temp_file.name
-        
-        # Return the file as an attachment
-        response = FileResponse(
-            open(temp_path, 'rb'),
-            content_type='application/pdf'
-        )
-        response['Content-Disposition'] = f'attachment; filename="material_suppliers_{material_name}.pdf"'
         return response
         
     except Exception as e:
@@ -487,30 +418,22 @@ def get_material_suppliers_report_post(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get the report from the microservice
-        report_content = supplier_service.get_material_suppliers_report(material_name)
-        
-        if not report_content:
-            return Response(
-                {"error": "Failed to generate material suppliers report"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-        
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(report_content)
-            temp_path = temp_file.name
-        
         # Create safe filename
         safe_filename = material_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
         safe_filename = ''.join(c for c in safe_filename if c.isalnum() or c in '_-.')
         
-        # Return the file as an attachment
-        response = FileResponse(
-            open(temp_path, 'rb'),
-            content_type='application/pdf'
+        # Stream the report from the microservice (or the report cache)
+        response = _stream_report(
+            'material', {'material_name': material_name},
+            'reports/material', f"material_suppliers_{safe_filename}.pdf",
+            method='post', data={'material_name': material_name}
         )
-        response['Content-Disposition'] = f'attachment; filename="material_suppliers_{safe_filename}.pdf"'
+        
+        if response is None:
+            return Response(
+                {"error": "Failed to generate material suppliers report"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         return response
         
     except Exception as e:
@@ -527,26 +450,14 @@ def get_performance_trends_report(request):
     Get a comprehensive performance trends report
     """
     try:
-        # Get the report from the microservice
-        report_content = supplier_service.get_performance_trends_report()
+        # Stream the report from the microservice (or the report cache)
+        response = _stream_report('performance_trends', {}, 'reports/performance-trends', "performance_trends_report.pdf")
         
-        if not report_content:
+        if response is None:
             return Response(
                 {"error": "Failed to generate performance trends report"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(report_content)
-            temp_path = temp_file.name
-        
-        # Return the file as an attachment
-        response = FileResponse(
-            open(temp_path, 'rb'),
-            content_type='application/pdf'
-        )
-        response['Content-Disposition'] = f'attachment; filename="performance_trends_report.pdf"'
         return response
         
     except Exception as e:
@@ -563,26 +474,14 @@ def get_risk_analysis_report(request):
     Get a comprehensive risk analysis report
     """
     try:
-        # Get the report from the microservice
-        report_content = supplier_service.get_risk_analysis_report()
+        # Stream the report from the microservice (or the report cache)
+        response = _stream_report('risk_analysis', {}, 'reports/risk-analysis', "risk_analysis_report.pdf")
         
-        if not report_content:
+        if response is None:
             return Response(
                 {"error": "Failed to generate risk analysis report"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(report_content)
-            temp_path = temp_file.name
-        
-        # Return the file as an attachment
-        response = FileResponse(
-            open(temp_path, 'rb'),
-            content_type='application/pdf'
-        )
-        response['Content-Disposition'] = f'attachment; filename="risk_analysis_report.pdf"'
         return response
         
     except Exception as e:
@@ -680,6 +579,30 @@ def supplier_analysis_dashboard(request):
     """
     return render(request, 'app/supplier_analysis.html')
 
+@require_http_methods(["GET"])
+async def supplier_analysis_overview(request):
+    """
+    Risk patterns, performance trends and market dynamics in one response.
+    Async view: the microservice calls run concurrently, so the response time is
+    the slowest call instead of the sum of all three.
+    """
+    try:
+        # The shared connection pool outlives the request only under ASGI
+        result = await async_supplier_service.get_dashboard(shared_client=isinstance(request, ASGIRequest))
+        errors = [section for section, data in result.items() if data is None]
+        if len(errors) == len(result):
+            return JsonResponse(
+                {"error": "Failed to retrieve supplier analysis from microservice"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return JsonResponse({**result, "errors": errors})
+    except Exception as e:
+        logger.error(f"Error getting supplier analysis overview: {str(e)}")
+        return JsonResponse(
+            {"error": f"Error getting supplier analysis overview: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def supplier_complaint_transaction(request):
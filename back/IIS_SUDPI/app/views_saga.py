@@ -10,14 +10,59 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+from datetime import timedelta
 import logging
 from decimal import Decimal
 
-from .saga_orchestrator import SagaOrchestrator, PenalSagaOrchestrator
+from .models import Saga
+from .saga_orchestrator import (
+    SagaOrchestrator, PenalSagaOrchestrator, NEZAVRSENI_STATUSI, uvezi_fakture_sa_placanjem
+)
 
 logger = logging.getLogger(__name__)
 
 MIKROSERVIS_URL = getattr(settings, 'MIKROSERVIS_URL', 'http://localhost:8001')
+MAX_STAVKI_UVOZA = getattr(settings, 'SAGA_MAX_STAVKI_UVOZA', 10000)
+
+
+def kljuc_idempotencije(request):
+    """Ključ iz zaglavlja Idempotency-Key ili polja kljuc_idempotencije."""
+    return request.headers.get('Idempotency-Key') or request.data.get('kljuc_idempotencije')
+
+
+def odgovor_sage(success, result, podaci):
+    """
+    201 za novu sagu, 200 za ponovljen zahtev (isti ključ idempotencije),
+    409 ako je ključ iskorišćen za drugi zahtev ili je prvi zahtev sa istim
+    ključem još u obradi (u_toku), inače 500.
+    """
+    if success:
+        return Response({
+            "success": True,
+            "message": result['message'],
+            "data": {
+                **{kljuc: result.get(kljuc) for kljuc in podaci},
+                "saga_id": result['saga_id'],
+                "saga_status": result['saga_status'],
+                "influxdb_status": result.get('influxdb_status')
+            },
+            "saga_log": result['saga_log']
+        }, status=status.HTTP_200_OK if result.get('ponovljen') else status.HTTP_201_CREATED)
+
+    return Response({
+        "success": False,
+        "message": result['message'],
+        "error": result['error'],
+        "u_toku": result.get('u_toku', False),
+        "saga_id": result.get('saga_id'),
+        "saga_status": result.get('saga_status'),
+        "saga_log": result['saga_log']
+    }, status=(
+        status.HTTP_409_CONFLICT if result.get('konflikt') or result.get('u_toku')
+        else status.HTTP_500_INTERNAL_SERVER_ERROR
+    ))
 
 
 @api_view(['POST'])
@@ -31,11 +76,14 @@ def create_faktura_with_payment_saga(request):
     Koraci:
     1. Kreiraj fakturu u Oracle DB (Django)
     2. Kreiraj transakciju u Oracle DB (Django)
-    3. Pošalji događaj u InfluxDB (Mikroservis)
+    3. Pošalji događaj u InfluxDB (Mikroservis) - u pozadini, posle commit-a
     4. Ako nešto ne uspe → Rollback (kompenzacione transakcije)
     
     POST /api/saga/faktura-sa-placanjem/
     
+    Zaglavlje Idempotency-Key (ili polje kljuc_idempotencije): ponovljen
+    zahtev sa istim ključem vraća postojeću sagu (200) umesto nove.
+    
     Body:
     {
         "ugovor_id": 1,
@@ -49,11 +97,13 @@ def create_faktura_with_payment_saga(request):
     Response (uspeh):
     {
         "success": true,
-        "message": "Transakciona obrada uspešno završena",
+        "message": "Lokalni koraci završeni, događaj za InfluxDB se šalje u pozadini",
         "data": {
             "faktura_id": 123,
             "transakcija_id": 456,
-            "influxdb_status": "synced"
+            "saga_id": 789,
+            "saga_status": "ceka_dogadjaj",
+            "influxdb_status": "na_cekanju"
         },
         "saga_log": [...]
     }
@@ -93,30 +143,101 @@ def create_faktura_with_payment_saga(request):
             datum_prijema=datum_prijema,
             rok_placanja=rok_placanja,
             potvrda_transakcije=potvrda_transakcije,
-            status_transakcije=status_transakcije
+            status_transakcije=status_transakcije,
+            kljuc_idempotencije=kljuc_idempotencije(request)
         )
         
-        if success:
+        return odgovor_sage(success, result, ('faktura_id', 'transakcija_id'))
+            
+    except Exception as e:
+        logger.error(f"Greška u Saga view-u: {str(e)}")
+        return Response({
+            "success": False,
+            "error": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_fakture_with_payment_batch_saga(request):
+    """
+    TRANSAKCIONA OBRADA PODATAKA (SAGA PATTERN) - Uvoz više faktura
+    
+    Uvozi fakture sa plaćanjem u serijama: svaka serija se upisuje jednim
+    bulk_create-om i šalje mikroservisu jednim zahtevom, kao zasebna saga.
+    Stavke koje mikroservis odbije se kompenzuju pojedinačno.
+    
+    POST /api/saga/fakture-sa-placanjem/batch/
+    
+    Zaglavlje Idempotency-Key: ponovljen zahtev vraća postojeće sage serija.
+    
+    Body:
+    {
+        "fakture": [
+            {
+                "ugovor_id": 1,
+                "iznos": 150000.00,
+                "datum_prijema": "2025-10-01",
+                "rok_placanja": "2025-11-01",
+                "potvrda_transakcije": "TRX-2025-001",
+                "status_transakcije": "uspesna"
+            },
+            ...
+        ]
+    }
+    
+    Response: 201 (sve stavke kreirane), 207 (deo stavki), 409 (ponovljen
+    zahtev dok je prvi još u obradi), 400 (nijedna stavka nije ispravna), 500
+    (nijedna serija nije uspela). Status stavke: kreirana, odbijena
+    (neispravna), neuspesna (upis ili serija nije uspela), u_obradi (saga serije
+    sa istim ključem još upisuje) ili kompenzovana (mikroservis odbio događaj).
+    {
+        "success": true,
+        "data": {
+            "ukupno": 2, "kreirano": 1, "u_obradi": 0, "neuspesno": 1,
+            "stavke": [
+                {"indeks": 0, "status": "kreirana", "faktura_id": 123, "transakcija_id": 456,
+                 "saga_id": 789, "influxdb_status": "na_cekanju"},
+                {"indeks": 1, "status": "odbijena", "error": "..."}
+            ],
+            "sage": [789]
+        }
+    }
+    """
+    try:
+        fakture = request.data.get('fakture')
+        if not isinstance(fakture, list) or not fakture:
             return Response({
-                "success": True,
-                "message": result['message'],
-                "data": {
-                    "faktura_id": result['faktura_id'],
-                    "transakcija_id": result['transakcija_id'],
-                    "influxdb_status": result['influxdb_status']
-                },
-                "saga_log": result['saga_log']
-            }, status=status.HTTP_201_CREATED)
-        else:
+                "success": False,
+                "error": "Polje 'fakture' mora biti neprazna lista"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(fakture) > MAX_STAVKI_UVOZA:
             return Response({
                 "success": False,
-                "message": result['message'],
-                "error": result['error'],
-                "saga_log": result['saga_log']
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
+                "error": f"Najviše {MAX_STAVKI_UVOZA} faktura po zahtevu"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        rezultat = uvezi_fakture_sa_placanjem(
+            fakture,
+            kljuc_idempotencije=kljuc_idempotencije(request),
+            mikroservis_url=MIKROSERVIS_URL
+        )
+
+        if rezultat['kreirano'] == rezultat['ukupno']:
+            kod = status.HTTP_201_CREATED
+        elif rezultat['kreirano']:
+            kod = status.HTTP_207_MULTI_STATUS
+        elif rezultat['u_obradi']:
+            # Isti ključ idempotencije, prve serije još nisu upisane
+            kod = status.HTTP_409_CONFLICT
+        elif not rezultat['sage']:
+            kod = status.HTTP_400_BAD_REQUEST
+        else:
+            kod = status.HTTP_500_INTERNAL_SERVER_ERROR
+        return Response({"success": rezultat['kreirano'] > 0, "data": rezultat}, status=kod)
+
     except Exception as e:
-        logger.error(f"Greška u Saga view-u: {str(e)}")
+        logger.error(f"Greška u Batch Saga view-u: {str(e)}")
         return Response({
             "success": False,
             "error": str(e)
@@ -133,11 +254,13 @@ def create_penal_saga(request):
     
     Koraci:
     1. Kreiraj penal u Oracle DB (Django)
-    2. Pošalji događaj u InfluxDB (Mikroservis)
+    2. Pošalji događaj u InfluxDB (Mikroservis) - u pozadini, posle commit-a
     3. Ako nešto ne uspe → Rollback
     
     POST /api/saga/penal/
     
+    Podržava zaglavlje Idempotency-Key (kao faktura sa plaćanjem).
+    
     Body:
     {
         "ugovor_id": 1,
@@ -166,26 +289,11 @@ def create_penal_saga(request):
         success, result = orchestrator.create_penal_with_sync(
             ugovor_id=ugovor_id,
             razlog=razlog,
-            iznos=iznos
+            iznos=iznos,
+            kljuc_idempotencije=kljuc_idempotencije(request)
         )
         
-        if success:
-            return Response({
-                "success": True,
-                "message": result['message'],
-                "data": {
-                    "penal_id": result['penal_id'],
-                    "influxdb_status": result['influxdb_status']
-                },
-                "saga_log": result['saga_log']
-            }, status=status.HTTP_201_CREATED)
-        else:
-            return Response({
-                "success": False,
-                "message": result['message'],
-                "error": result['error'],
-                "saga_log": result['saga_log']
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return odgovor_sage(success, result, ('penal_id',))
             
     except Exception as e:
         logger.error(f"Greška u Penal Saga view-u: {str(e)}")
@@ -199,48 +307,68 @@ def create_penal_saga(request):
 @permission_classes([AllowAny])
 def saga_status(request):
     """
-    Informacije o Saga transakcionoj obradi
+    Stanje Saga transakcione obrade iz tabele saga
     
-    GET /api/saga/status/
+    GET /api/saga/status/                - broj saga po tipu i statusu
+    GET /api/saga/status/?saga_id=123    - stanje i dnevnik koraka jedne sage
+    GET /api/saga/status/?kljuc=abc      - isto, po ključu idempotencije
     
-    Javni endpoint - ne zahteva autentifikaciju
+    Pregled je javni endpoint; pojedinačna saga zahteva autentifikaciju.
     """
+    saga_id = request.query_params.get('saga_id')
+    kljuc = request.query_params.get('kljuc')
+    if saga_id or kljuc:
+        if not request.user.is_authenticated:
+            return Response({"error": "Potrebna je autentifikacija"}, status=status.HTTP_401_UNAUTHORIZED)
+        if saga_id and not saga_id.isdigit():
+            return Response({"error": "saga_id mora biti broj"}, status=status.HTTP_400_BAD_REQUEST)
+        sage = Saga.objects.filter(sifra_sg=saga_id) if saga_id else Saga.objects.filter(kljuc_idempotencije=kljuc)
+        saga = sage.first()
+        if saga is None:
+            return Response({"error": "Saga ne postoji"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "saga_id": saga.sifra_sg,
+            "tip": saga.tip,
+            "status": saga.status,
+            "korak": saga.korak,
+            "rezultat": saga.rezultat,
+            "broj_pokusaja": saga.broj_pokusaja,
+            "greska": saga.greska,
+            "kreirano": saga.kreirano,
+            "azurirano": saga.azurirano,
+            "saga_log": saga.log
+        })
+
+    po_tipu = {}
+    for red in Saga.objects.values('tip', 'status').annotate(broj=Count('sifra_sg')).order_by():
+        po_tipu.setdefault(red['tip'], {})[red['status']] = red['broj']
+    granica = timezone.now() - timedelta(seconds=getattr(settings, 'SAGA_ISTEK', 300))
+    zaglavljene = Saga.objects.filter(status__in=NEZAVRSENI_STATUSI, azurirano__lt=granica).count()
+
     return Response({
         "message": "Saga Transakciona Obrada Podataka",
         "pattern": "Orkestracija",
-        "baze_podataka": [
-            {
-                "tip": "Relaciona",
-                "naziv": "Oracle Database",
-                "lokacija": "Django (localhost:8000)"
-            },
-            {
-                "tip": "NoSQL - Time Series",
-                "naziv": "InfluxDB",
-                "lokacija": "Mikroservis (localhost:8001)"
-            }
-        ],
+        "sage": {
+            "po_tipu": po_tipu,
+            "nezavrsene": sum(
+                broj for statusi in po_tipu.values()
+                for status_sage, broj in statusi.items() if status_sage in NEZAVRSENI_STATUSI
+            ),
+            "zaglavljene": zaglavljene
+        },
         "funkcionalnosti": [
             {
                 "endpoint": "POST /api/saga/faktura-sa-placanjem/",
-                "opis": "Kreiranje fakture sa transakcijom (Oracle + InfluxDB)",
-                "koraci": [
-                    "1. Kreiraj fakturu u Oracle DB",
-                    "2. Kreiraj transakciju u Oracle DB",
-                    "3. Pošalji događaj u InfluxDB",
-                    "4. Rollback ako nešto ne uspe"
-                ]
+                "opis": "Kreiranje fakture sa transakcijom (Oracle + InfluxDB)"
+            },
+            {
+                "endpoint": "POST /api/saga/fakture-sa-placanjem/batch/",
+                "opis": "Uvoz više faktura sa transakcijama u serijama (Oracle + InfluxDB)"
             },
             {
                 "endpoint": "POST /api/saga/penal/",
-                "opis": "Kreiranje penala (Oracle + InfluxDB)",
-                "koraci": [
-                    "1. Kreiraj penal u Oracle DB",
-                    "2. Pošalji događaj u InfluxDB",
-                    "3. Rollback ako nešto ne uspe"
-                ]
+                "opis": "Kreiranje penala (Oracle + InfluxDB)"
             }
         ],
-        "mikroservis_url": MIKROSERVIS_URL,
-        "mikroservis_status": "active"
+        "mikroservis_url": MIKROSERVIS_URL
     })